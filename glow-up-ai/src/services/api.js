@@ -3,38 +3,65 @@ const API_BASE_URL = 'http://localhost:5000/api';
 class ApiService {
   constructor() {
     this.token = localStorage.getItem('token');
+    // Respuestas GET cacheadas por URL junto a su ETag
+    this.etagCache = new Map();
+    // Generaciones en curso: los dobles clics reutilizan la misma petición
+    this.pendingGenerations = new Map();
   }
 
   setToken(token) {
     this.token = token;
+    this.etagCache.clear();
     localStorage.setItem('token', token);
   }
 
   removeToken() {
     this.token = null;
+    this.etagCache.clear();
     localStorage.removeItem('token');
   }
 
   async request(endpoint, options = {}) {
     const url = `${API_BASE_URL}${endpoint}`;
     const config = {
+      ...options,
       headers: {
         'Content-Type': 'application/json',
         ...options.headers,
       },
-      ...options,
     };
 
     if (this.token) {
       config.headers.Authorization = `Bearer ${this.token}`;
     }
 
+    const method = (config.method || 'GET').toUpperCase();
+    const cached = method === 'GET' ? this.etagCache.get(url) : undefined;
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag;
+    }
+
     try {
       const response = await fetch(url, config);
+
+      // 304: los datos no han cambiado, se reutiliza la copia local
+      if (response.status === 304 && cached) {
+        return cached.data;
+      }
+
       const data = await response.json();
 
       if (!response.ok) {
-        throw new Error(data.error || 'Error en la solicitud');
+        const error = new Error(data.error || 'Error en la solicitud');
+        error.status = response.status;
+        // 429/503: segundos que el servidor pide esperar antes de repetir
+        error.retryAfter = Number(response.headers.get('Retry-After')) || null;
+        throw error;
+      }
+
+      const etag = response.headers.get('ETag');
+      if (method === 'GET' && etag) {
+        this.etagCache.set(url, { etag, data });
       }
 
       return data;
@@ -72,29 +99,62 @@ class ApiService {
   }
 
   async verifyToken() {
-    return await this.request('/auth/verify-token', {
-      method: 'POST',
-    });
+    return await this.request('/auth/verify-token');
   }
 
   logout() {
     this.removeToken();
   }
 
-  // Planes de entrenamiento
-  async generateWorkoutPlan(duration_weeks = 4) {
-    return await this.request('/generate-workout-plan', {
+  // Generación de planes: una sola petición en curso por tipo y duración, y la
+  // misma Idempotency-Key en los reintentos para que el servidor no genere dos veces
+  generatePlan(kind, duration_weeks) {
+    const slot = `${kind}:${duration_weeks}`;
+    if (this.pendingGenerations.has(slot)) {
+      return this.pendingGenerations.get(slot);
+    }
+
+    const idempotencyKey = crypto.randomUUID();
+    const promise = this.requestWithRetry(`/generate-${kind}-plan`, {
       method: 'POST',
+      headers: { 'Idempotency-Key': idempotencyKey },
       body: JSON.stringify({ duration_weeks }),
-    });
+    }).finally(() => this.pendingGenerations.delete(slot));
+
+    this.pendingGenerations.set(slot, promise);
+    return promise;
+  }
+
+  // Reintenta errores de red, 409 (la misma clave sigue en curso en el servidor)
+  // y 503 (cola de generación llena); el 429 del límite de uso no se reintenta
+  async requestWithRetry(endpoint, options, retries = 3) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await this.request(endpoint, options);
+      } catch (error) {
+        const retryable = error instanceof TypeError || error.status === 409 || error.status === 503;
+        if (!retryable || attempt >= retries) {
+          throw error;
+        }
+        const delay = error.retryAfter ? error.retryAfter * 1000 : 500 * 2 ** attempt;
+        await new Promise((resolve) => setTimeout(resolve, delay));
+      }
+    }
+  }
+
+  // Planes de entrenamiento
+  async generateWorkoutPlan(duration_weeks = 4) {
+    return await this.generatePlan('workout', duration_weeks);
   }
 
   // Planes nutricionales
   async generateNutritionPlan(duration_weeks = 4) {
-    return await this.request('/generate-nutrition-plan', {
-      method: 'POST',
-      body: JSON.stringify({ duration_weeks }),
-    });
+    return await this.generatePlan('nutrition', duration_weeks);
+  }
+
+  // Estado de una generación en segundo plano
+  async getJob(jobId) {
+    return await this.request(`/jobs/${jobId}`);
   }
 
   // Obtener mis planes
@@ -102,6 +162,18 @@ class ApiService {
     return await this.request('/my-plans');
   }
 
+  // Resúmenes de planes paginados (cursor devuelto en next_cursors)
+  async getPlanSummaries({ type, limit = 20, cursor } = {}) {
+    const params = new URLSearchParams({ view: 'summary', limit });
+    if (type) params.set('type', type);
+    if (type && cursor) params.set(`${type}_cursor`, cursor);
+    return await this.request(`/my-plans?${params}`);
+  }
+
+  async getPlan(type, planId) {
+    return await this.request(`/plans/${type}/${planId}`);
+  }
+
   // Feedback
   async submitFeedback(feedbackData) {
     return await this.request('/submit-feedback', {
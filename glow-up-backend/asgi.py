@@ -0,0 +1,8 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.asgi import create_asgi_app
+
+# Punto de entrada ASGI: uvicorn asgi:app --host 0.0.0.0 --port 5000
+app = create_asgi_app()
@@ -0,0 +1,219 @@
+"""Generaciones de planes simultáneas en un proceso: servidor con hilos (app.run) frente a ASGI (uvicorn).
+
+Arranca cada servidor en un subproceso sobre la misma base de datos temporal,
+con el LLM simulado (FakeChatCompletion, latencia fija) y sin caché de planes,
+y lanza ráfagas de C peticiones POST /api/generate-workout-plan a la vez, cada
+una de un usuario distinto para que no se agrupen. Para cada ráfaga informa
+cuántas sirvió el LLM (el resto cae al plan local por plazo o error), p50/p95,
+la media de llamadas al LLM en vuelo, los errores 5xx por mensaje y el pico de
+hilos y de memoria (RSS) del servidor leídos de /proc.
+
+Al servidor con hilos se le da un pool de conexiones y de llamadas al LLM del
+tamaño de la ráfaga para que el límite medido sea el del modelo de servidor.
+
+Uso: python benchmarks/bench_async_serving.py [--concurrency 50,200,500] [--llm-latency 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+SERVERS = {
+    'threaded': lambda port: [
+        sys.executable, '-c',
+        f"from src.main import create_app; create_app().run(host='127.0.0.1', port={port}, threaded=True)"
+    ],
+    'asgi': lambda port: [
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+        '--log-level', 'warning', '--backlog', '4096'
+    ]
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(round(fraction * (len(values) - 1))), len(values) - 1)] if values else 0.0
+
+
+def seed_users(count):
+    """Crea los usuarios directamente en la base de datos; devuelve sus cabeceras de autenticación"""
+    import datetime
+    import jwt
+    from src.main import create_app
+    from src.models.migrations import migrate
+    from src.models.user import User, db
+    from src.routes.auth import SECRET_KEY
+
+    app = create_app()
+    migrate(app)
+    with app.app_context():
+        users = [
+            User(name=f'Bench {index}', email=f'bench{index}@example.com', password_hash='-',
+                 age=30, weight=75, height=178, goal='gain_muscle', activity_level='moderate',
+                 experience_level='intermediate', equipment_available='["barra"]')
+            for index in range(count)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+        expires = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+        return [
+            {'Authorization': 'Bearer ' + jwt.encode({'user_id': user.id, 'exp': expires}, SECRET_KEY, algorithm='HS256')}
+            for user in users
+        ]
+
+
+def process_stats(pid):
+    """(hilos, RSS en MB) del proceso"""
+    threads = rss = 0
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('Threads:'):
+                threads = int(line.split()[1])
+            elif line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) / 1024
+    return threads, rss
+
+
+async def wait_ready(session, base_url, process):
+    for _ in range(300):
+        if process.poll() is not None:
+            raise RuntimeError('El servidor terminó al arrancar')
+        try:
+            async with session.get(f'{base_url}/api/health') as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError('El servidor no respondió a tiempo')
+
+
+async def burst(session, base_url, headers, pid):
+    """Lanza todas las peticiones a la vez mientras muestrea hilos y RSS del servidor"""
+    peak = {'threads': 0, 'rss_mb': 0.0}
+    errors = {}
+    sampling = True
+
+    async def sample():
+        while sampling:
+            threads, rss = process_stats(pid)
+            peak['threads'] = max(peak['threads'], threads)
+            peak['rss_mb'] = max(peak['rss_mb'], rss)
+            await asyncio.sleep(0.05)
+
+    async def one(user_headers):
+        started = time.perf_counter()
+        try:
+            async with session.post(f'{base_url}/api/generate-workout-plan', headers=user_headers,
+                                    json={'duration_weeks': 4}) as response:
+                body = await response.json(content_type=None)
+                status = response.status
+        except Exception as e:
+            return time.perf_counter() - started, f'client:{type(e).__name__}', {}
+        body = body if isinstance(body, dict) else {}
+        if status >= 500:
+            error = str(body.get('error', ''))[:80]
+            errors[error] = errors.get(error, 0) + 1
+        return time.perf_counter() - started, status, body.get('generation') or {}
+
+    sampler = asyncio.ensure_future(sample())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(user_headers) for user_headers in headers))
+    wall = time.perf_counter() - started
+    sampling = False
+    await sampler
+
+    latencies = [elapsed for elapsed, _, _ in results]
+    outcomes = {}
+    llm_seconds = 0.0
+    for _, status, generation in results:
+        key = f"{status} {generation.get('source')}:{generation.get('reason') or '-'}"
+        outcomes[key] = outcomes.get(key, 0) + 1
+        if generation.get('source') == 'llm':
+            llm_seconds += generation['llm_ms'] / 1000
+    return {
+        'served_by_llm': sum(1 for _, _, generation in results if generation.get('source') == 'llm'),
+        'wall_s': round(wall, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'avg_llm_in_flight': round(llm_seconds / wall, 1),
+        'peak_threads': peak['threads'],
+        'peak_rss_mb': round(peak['rss_mb'], 1),
+        'outcomes': outcomes,
+        'errors': errors
+    }
+
+
+async def run_server(name, port, env, headers, levels):
+    import aiohttp
+
+    process = subprocess.Popen(SERVERS[name](port), cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    results = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=0, force_close=True)
+        timeout = aiohttp.ClientTimeout(total=300)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await wait_ready(session, base_url, process)
+            idle_threads, idle_rss = process_stats(process.pid)
+            results['idle'] = {'threads': idle_threads, 'rss_mb': round(idle_rss, 1)}
+            for concurrency in levels:
+                results[str(concurrency)] = await burst(session, base_url, headers[:concurrency], process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', default='50,200,500', help='Tamaños de ráfaga separados por comas')
+    parser.add_argument('--llm-latency', type=float, default=2.0, help='FAKE_LLM_LATENCY (segundos)')
+    parser.add_argument('--deadline', type=float, default=30.0, help='LLM_DEADLINE_SECONDS')
+    parser.add_argument('--port', type=int, default=5071)
+    parser.add_argument('--servers', default='threaded,asgi')
+    args = parser.parse_args()
+
+    levels = [int(value) for value in args.concurrency.split(',')]
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{db_path}',
+        FAKE_LLM_LATENCY=str(args.llm_latency),
+        PLAN_GENERATOR='llm',
+        PLAN_CACHE_ENABLED='0',
+        LLM_DEADLINE_SECONDS=str(args.deadline),
+        LLM_SLOW_CALL_SECONDS=str(args.deadline),
+        PYTHONWARNINGS='ignore'
+    )
+    # El servidor con hilos retiene una conexión y un hilo de llamada al LLM por petición en curso
+    server_env = {
+        'threaded': dict(env, LLM_MAX_CONCURRENCY=str(max(levels)), DB_MAX_OVERFLOW=str(max(levels))),
+        'asgi': env
+    }
+    os.environ.update(DATABASE_URL=env['DATABASE_URL'])
+
+    results = {}
+    try:
+        headers = seed_users(max(levels))
+        for offset, name in enumerate(args.servers.split(',')):
+            results[name] = asyncio.run(run_server(name, args.port + offset, server_env[name], headers, levels))
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    print(json.dumps({'llm_latency_s': args.llm_latency, 'deadline_s': args.deadline, 'servers': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark de importación masiva de progreso (filas por segundo) sobre SQLite.
+
+Uso: python benchmarks/bench_bulk_import.py [--rows 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_payload(rows, data_format):
+    start = date(2000, 1, 1)
+    if data_format == 'csv':
+        lines = ['date,weight,body_fat_percentage,notes']
+        for i in range(rows):
+            lines.append(f'{start + timedelta(days=i)},{70 + i % 10},{18 + i % 5},fila {i}')
+    else:
+        lines = [json.dumps({
+            'date': (start + timedelta(days=i)).isoformat(),
+            'weight': 70 + i % 10,
+            'body_fat_percentage': 18 + i % 5,
+            'measurements': {'waist': 80 + i % 3}
+        }) for i in range(rows)]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from app import create_app
+    from src.models.migrations import migrate
+
+    app = create_app()
+    migrate(app)
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'name': 'Bench', 'email': 'bench@example.com', 'password': 'bench-password',
+        'age': 30, 'weight': 75, 'height': 175, 'goal': 'maintain'
+    })
+    headers = {'Authorization': f"Bearer {response.json['token']}"}
+
+    for data_format, content_type in (('ndjson', 'application/x-ndjson'), ('csv', 'text/csv')):
+        for label in ('insert', 'upsert'):
+            payload = build_payload(args.rows, data_format)
+            start = time.perf_counter()
+            response = client.post('/api/progress/bulk', data=payload,
+                                   headers={**headers, 'Content-Type': content_type})
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200 and not response.json['failed'], response.json
+            print(f'{data_format:>6} {label}: {args.rows} filas en {elapsed:.2f}s '
+                  f'({args.rows / elapsed:,.0f} filas/s)')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark de concurrencia lectura/escritura sobre SQLite con el perfil de motor
+'legacy' (opciones por defecto, journal de rollback) frente a 'tuned' (WAL,
+busy_timeout, synchronous=NORMAL, mmap y pool dimensionado).
+
+Cada perfil se ejecuta en un proceso aparte con su propia base de datos.
+Uso: python benchmarks/bench_db_concurrency.py [--threads 8] [--seconds 5] [--write-ratio 0.3]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+
+def register(client, index):
+    response = client.post('/api/auth/register', json={
+        'name': f'Bench {index}', 'email': f'bench{index}@example.com', 'password': 'bench-password',
+        'age': 30, 'weight': 75, 'height': 175, 'goal': 'maintain'
+    })
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+
+def worker(app, headers, deadline, write_ratio, results, lock):
+    client = app.test_client()
+    rng = random.Random()
+    counts = {'reads': 0, 'writes': 0, 'errors': 0, 'locked': 0}
+    latencies = []
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if rng.random() < write_ratio:
+            day = date.today() - timedelta(days=rng.randrange(365))
+            response = client.post('/api/progress', headers=headers, json={
+                'date': day.isoformat(), 'weight': round(rng.uniform(60, 90), 1)
+            })
+            kind = 'writes'
+        else:
+            response = client.get('/api/progress/stats?days=90', headers=headers)
+            kind = 'reads'
+        latencies.append(time.perf_counter() - started)
+
+        if response.status_code < 300:
+            counts[kind] += 1
+        else:
+            counts['errors'] += 1
+            if b'locked' in response.data:
+                counts['locked'] += 1
+
+    with lock:
+        for key, value in counts.items():
+            results[key] += value
+        results['latencies'].extend(latencies)
+
+
+def run_profile(args):
+    """Ejecuta la carga con el perfil indicado en DB_ENGINE_PROFILE y devuelve las métricas"""
+    from app import create_app
+    from src.models.migrations import migrate
+
+    app = create_app()
+    migrate(app)
+    client = app.test_client()
+    users = [register(client, index) for index in range(args.users)]
+
+    results = {'reads': 0, 'writes': 0, 'errors': 0, 'locked': 0, 'latencies': []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=worker, args=(app, users[i % len(users)], deadline, args.write_ratio, results, lock))
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(results.pop('latencies'))
+    total = results['reads'] + results['writes']
+    results['ops_per_second'] = total / args.seconds
+    results['p95_ms'] = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+    with app.app_context():
+        from src.models.user import db
+        results['journal_mode'] = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--profile', choices=('legacy', 'tuned'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    print(f'{args.threads} hilos, {args.users} usuarios, {args.seconds:.0f} s, '
+          f'{args.write_ratio:.0%} escrituras')
+    for profile in ('legacy', 'tuned'):
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        env = dict(os.environ, DB_ENGINE_PROFILE=profile, DATABASE_URL=f'sqlite:///{db_path}',
+                   PASSWORD_HASH_WORKERS='0')
+        try:
+            output = subprocess.run(
+                [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--profile', profile,
+                 '--threads', str(args.threads), '--users', str(args.users),
+                 '--seconds', str(args.seconds), '--write-ratio', str(args.write_ratio)],
+                env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:>7} ({result['journal_mode']}): {result['ops_per_second']:8.1f} ops/s  "
+              f"lecturas={result['reads']} escrituras={result['writes']} "
+              f"errores={result['errors']} (locked={result['locked']})  p95={result['p95_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Borrado de un usuario con muchos datos: DELETE /api/users/<id>.
+
+Cada muestra es un proceso nuevo con una base SQLite temporal: siembra un
+usuario con N entradas de progreso (más planes, feedback, rollups y
+versiones), lo borra con el cliente de pruebas y mide el tiempo, el pico de
+memoria Python (tracemalloc) y las filas que quedan huérfanas en cada tabla.
+
+Con --ref se repite sobre otra revisión (git archive) para comparar, p. ej.
+--ref HEAD~1: allí el ORM carga cada fila hija en la sesión y la borra una a
+una, y el feedback queda huérfano.
+
+Uso: python benchmarks/bench_delete_user.py [--progress-rows 100000] [--samples 3] [--ref HEAD~1]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tablas con user_id cuyo resto se cuenta tras el borrado
+OWNED_TABLES = (
+    'workout_plan', 'nutrition_plan', 'progress_entry', 'progress_rollup',
+    'data_version', 'plan_feedback', 'idempotency_record'
+)
+
+# Se ejecuta en el proceso nuevo, con el directorio del backend como cwd
+CHILD = r'''
+import json, sys, time, tracemalloc
+from datetime import date, datetime, timedelta
+sys.path.insert(0, '.')
+from app import create_app
+from src.models.migrations import migrate
+from src.models.user import User, ProgressEntry, ProgressRollup, WorkoutPlan, NutritionPlan, PlanFeedback, DataVersion, db
+
+rows, plans, tables = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3].split(',')
+app = create_app()
+migrate(app)
+with app.app_context():
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [
+        {'name': name, 'email': f'{name}@example.com', 'password_hash': '-', 'created_at': now, 'updated_at': now}
+        for name in ('borrar', 'otro')
+    ])
+    user_id = db.session.execute(db.select(User.id).filter_by(email='borrar@example.com')).scalar()
+    start = date(1900, 1, 1)
+    for offset in range(0, rows, 10000):
+        db.session.execute(db.insert(ProgressEntry), [
+            {'user_id': user_id, 'date': start + timedelta(days=day), 'weight': 70 + day % 10,
+             'measurements': '{"waist": 80}', 'created_at': now}
+            for day in range(offset, min(offset + 10000, rows))
+        ])
+    db.session.execute(db.insert(ProgressRollup), [
+        {'user_id': user_id, 'period': 'week', 'period_start': start + timedelta(weeks=week), 'entry_count': 7}
+        for week in range(rows // 7)
+    ])
+    for index in range(plans):
+        db.session.add(WorkoutPlan(user_id=user_id, title='Plan', duration_weeks=4, difficulty_level='beginner',
+                                   plan_data={'weekly_schedule': [{'day': day} for day in range(7)]}))
+        db.session.add(NutritionPlan(user_id=user_id, title='Plan', duration_weeks=4, daily_calories=2000,
+                                     macros={'protein_grams': 150}, meal_plan={'days': list(range(7))}))
+        db.session.add(PlanFeedback(user_id=user_id, plan_type='workout', plan_id=index + 1, rating=4))
+    db.session.add(DataVersion(user_id=user_id, scope='plans', version=1))
+    db.session.commit()
+
+client = app.test_client()
+tracemalloc.start()
+started = time.perf_counter()
+response = client.delete(f'/api/users/{user_id}')
+elapsed = time.perf_counter() - started
+_, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+with app.app_context():
+    inspector = db.inspect(db.engine)
+    leftover = {
+        table: db.session.execute(db.text(f'SELECT COUNT(*) FROM {table} WHERE user_id = :id'), {'id': user_id}).scalar()
+        for table in tables if inspector.has_table(table)
+    }
+print(json.dumps({'status': response.status_code, 'delete_ms': elapsed * 1000,
+                  'peak_mb': peak / 1024 / 1024, 'leftover_rows': leftover}))
+'''
+
+
+def export_ref(ref, target):
+    """Extrae glow-up-backend de la revisión ref en target; devuelve su ruta"""
+    top = subprocess.check_output(['git', 'rev-parse', '--show-toplevel'], cwd=BACKEND_DIR, text=True).strip()
+    prefix = os.path.relpath(BACKEND_DIR, top)
+    archive = subprocess.check_output(['git', 'archive', ref, prefix], cwd=top)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return os.path.join(target, prefix)
+
+
+def sample(backend_dir, rows, plans):
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.remove(db_path)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', PYTHONWARNINGS='ignore')
+    try:
+        output = subprocess.check_output(
+            [sys.executable, '-c', CHILD, str(rows), str(plans), ','.join(OWNED_TABLES)],
+            cwd=backend_dir, env=env, text=True)
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(backend_dir, rows, plans, samples):
+    results = [sample(backend_dir, rows, plans) for _ in range(samples)]
+    return {
+        'status': results[0]['status'],
+        'delete_ms': {'median': round(statistics.median(r['delete_ms'] for r in results), 1),
+                      'min': round(min(r['delete_ms'] for r in results), 1)},
+        'peak_mb': round(max(r['peak_mb'] for r in results), 1),
+        'leftover_rows': results[0]['leftover_rows']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--progress-rows', type=int, default=100000)
+    parser.add_argument('--plans', type=int, default=50, help='Planes de cada tipo (y feedback) del usuario')
+    parser.add_argument('--samples', type=int, default=3)
+    parser.add_argument('--ref', help='Revisión de git con la que comparar (p. ej. HEAD~1)')
+    args = parser.parse_args()
+
+    results = {'current': measure(BACKEND_DIR, args.progress_rows, args.plans, args.samples)}
+    if args.ref:
+        with tempfile.TemporaryDirectory() as target:
+            results[args.ref] = measure(export_ref(args.ref, target), args.progress_rows, args.plans, args.samples)
+
+    print(json.dumps({'progress_rows': args.progress_rows, 'plans': args.plans, 'samples': args.samples,
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Memoria y velocidad de la exportación: lista completa en memoria frente a NDJSON en streaming.
+
+Para cada tamaño siembra usuarios y entradas de progreso en una base SQLite
+temporal y mide el pico de memoria (tracemalloc) y las filas por segundo de:
+
+- list: lo que hacía GET /api/users, extendido a progreso (query.all(),
+  to_dict() de cada fila y un único JSON);
+- stream: iter_ndjson de src/services/export.py, consumiendo y descartando
+  cada bloque como haría la respuesta HTTP o el fichero del CLI.
+
+Con yield_per el pico del streaming depende del tamaño de lote, no del número
+de filas.
+
+Uso: python benchmarks/bench_export.py [--rows 20000,200000] [--users 100] [--batch-size 1000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(app, users, rows):
+    from src.models.user import ProgressEntry, User, db
+
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.execute(db.insert(User), [
+            {'name': f'Bench {index}', 'email': f'bench{index}@example.com', 'password_hash': '-',
+             'age': 30, 'weight': 75, 'height': 178, 'goal': 'maintain', 'dietary_restrictions': '[]',
+             'equipment_available': '[]', 'created_at': now, 'updated_at': now}
+            for index in range(users)
+        ])
+        start = date(2000, 1, 1)
+        per_user = -(-rows // users)
+        batch = []
+        for index in range(rows):
+            batch.append({
+                'user_id': index // per_user + 1, 'date': start + timedelta(days=index % per_user),
+                'weight': 70 + index % 10, 'body_fat_percentage': 18 + index % 5,
+                'measurements': '{"waist": 80}', 'notes': f'fila {index}', 'created_at': now
+            })
+            if len(batch) == 10000:
+                db.session.execute(db.insert(ProgressEntry), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(ProgressEntry), batch)
+        db.session.commit()
+
+
+def export_list(app):
+    from src.models.user import ProgressEntry, User
+
+    records = [user.to_dict() for user in User.query.all()]
+    records += [entry.to_dict() for entry in ProgressEntry.query.all()]
+    return len(app.json.dumps(records))
+
+
+def export_stream(app, batch_size):
+    from src.services.export import iter_ndjson
+
+    size = 0
+    for chunk in iter_ndjson(app, ('user', 'progress_entry'), batch_size=batch_size):
+        size += len(chunk)
+    return size
+
+
+def measure(app, fn):
+    """Una pasada cronometrada y otra con tracemalloc (que la ralentiza) para el pico de memoria"""
+    from src.models.user import db
+
+    with app.app_context():
+        gc.collect()
+        started = time.perf_counter()
+        size = fn()
+        elapsed = time.perf_counter() - started
+        db.session.remove()
+
+    with app.app_context():
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.session.remove()
+    return {'seconds': round(elapsed, 2), 'peak_mb': round(peak / 1024 / 1024, 1), 'output_mb': round(size / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='20000,200000', help='Entradas de progreso, separadas por comas')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    from app import create_app
+    from src.models.migrations import migrate
+
+    results = {}
+    for rows in (int(value) for value in args.rows.split(',')):
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+        try:
+            app = create_app()
+            migrate(app)
+            seed(app, args.users, rows)
+            total = rows + args.users
+            results[rows] = {}
+            for name, fn in (('list', lambda: export_list(app)),
+                             ('stream', lambda: export_stream(app, args.batch_size))):
+                result = measure(app, fn)
+                result['rows_per_s'] = round(total / result['seconds'])
+                results[rows][name] = result
+            with app.app_context():
+                from src.models.user import db
+                db.engine.dispose()
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    print(json.dumps({'users': args.users, 'batch_size': args.batch_size, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark del plazo, el circuit breaker y el fallback del LLM frente a un proveedor lento o inestable.
+
+Para cada escenario (sano, lento, inestable, caído) lanza generaciones de
+planes desde varios hilos contra FakeChatCompletion y cuenta el origen de cada
+plan según los metadatos 'generation' de la respuesta, además de p50/p95/max
+de latencia y las llamadas que llegaron al proveedor.
+
+Uso: python benchmarks/bench_llm_guard.py [--requests 60] [--threads 6] [--deadline 2]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (nombre, latencia del proveedor en segundos, tasa de errores)
+SCENARIOS = (
+    ('healthy', 0.1, 0.0),
+    ('slow', 5.0, 0.0),
+    ('flaky', 0.1, 0.5),
+    ('down', 0.0, 1.0),
+)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(round(fraction * (len(values) - 1))), len(values) - 1)] if values else 0.0
+
+
+def run_scenario(app, users, requests, threads):
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker(headers):
+        client = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            response = client.post('/api/generate-workout-plan', headers=headers, json={'duration_weeks': 4})
+            elapsed = time.perf_counter() - started
+            generation = (response.json or {}).get('generation') or {}
+            with lock:
+                latencies.append(elapsed)
+                outcomes[f"{response.status_code} {generation.get('source')}:{generation.get('reason') or '-'}"] += 1
+
+    # Un usuario por hilo para que las peticiones no se agrupen en una sola generación
+    pool = [threading.Thread(target=worker, args=(users[i % len(users)],)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=60)
+    parser.add_argument('--threads', type=int, default=6)
+    parser.add_argument('--deadline', type=float, default=2.0, help='LLM_DEADLINE_SECONDS')
+    parser.add_argument('--failures', type=int, default=5, help='LLM_BREAKER_FAILURES')
+    parser.add_argument('--cooldown', type=float, default=30, help='LLM_BREAKER_COOLDOWN_SECONDS')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['PLAN_CACHE_ENABLED'] = '0'
+    os.environ['PLAN_GENERATOR'] = 'llm'
+    os.environ['LLM_DEADLINE_SECONDS'] = str(args.deadline)
+    os.environ['LLM_HEDGE_MARGIN_SECONDS'] = str(min(0.5, args.deadline / 4))
+    os.environ['LLM_SLOW_CALL_SECONDS'] = str(args.deadline)
+    os.environ['LLM_BREAKER_FAILURES'] = str(args.failures)
+    os.environ['LLM_BREAKER_COOLDOWN_SECONDS'] = str(args.cooldown)
+
+    from app import create_app
+    from src.models.migrations import migrate
+    from src.services import llm_guard
+    from src.services.fake_llm import FakeChatCompletion, install_fake_llm
+
+    app = create_app()
+    migrate(app)
+    # Cada degradación se registra como aviso; aquí solo interesa el resumen
+    app.logger.setLevel(logging.ERROR)
+    client = app.test_client()
+    users = []
+    for index in range(args.threads):
+        response = client.post('/api/auth/register', json={
+            'name': f'Bench {index}', 'email': f'bench{index}@example.com', 'password': 'bench-password',
+            'age': 30, 'weight': 75, 'height': 178, 'goal': 'gain_muscle',
+            'activity_level': 'moderate', 'experience_level': 'intermediate'
+        })
+        users.append({'Authorization': f"Bearer {response.json['token']}"})
+
+    results = {}
+    try:
+        for name, latency, failure_rate in SCENARIOS:
+            install_fake_llm(latency, failure_rate=failure_rate, seed=1)
+            llm_guard.breaker.reset()
+            started = time.perf_counter()
+            latencies, outcomes = run_scenario(app, users, args.requests, args.threads)
+            results[name] = {
+                'llm_latency_s': latency,
+                'llm_failure_rate': failure_rate,
+                'wall_s': round(time.perf_counter() - started, 2),
+                'provider_calls': FakeChatCompletion.calls,
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+                'max_ms': round(max(latencies) * 1000, 1),
+                'outcomes': dict(outcomes),
+                'circuit': llm_guard.breaker.state
+            }
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    print(json.dumps({'deadline_s': args.deadline, 'requests': args.requests, 'threads': args.threads,
+                      'scenarios': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
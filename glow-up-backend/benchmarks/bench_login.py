@@ -0,0 +1,72 @@
+"""Benchmark de logins por segundo (y por núcleo) con y sin pool de procesos.
+
+Uso: python benchmarks/bench_login.py [--users 20] [--logins 200] [--threads 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(app, users, logins, threads):
+    client = app.test_client()
+
+    def login(i):
+        response = client.post('/api/auth/login', json={
+            'email': f'bench{i % users}@example.com',
+            'password': 'bench-password'
+        })
+        assert response.status_code == 200, response.json
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(login, range(logins)))
+    return logins / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--method', default='scrypt')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from app import create_app
+    from src.models.migrations import migrate
+    from src.services.passwords import configure_password_hasher
+
+    app = create_app()
+    migrate(app)
+    client = app.test_client()
+    configure_password_hasher(method=args.method, workers=0)
+    for i in range(args.users):
+        client.post('/api/auth/register', json={
+            'name': f'Bench {i}', 'email': f'bench{i}@example.com', 'password': 'bench-password',
+            'age': 30, 'weight': 75, 'height': 175, 'goal': 'maintain'
+        })
+
+    cores = os.cpu_count() or 1
+    print(f'method={args.method} logins={args.logins} threads={args.threads} cores={cores}')
+    for label, workers in (('inline', 0), ('process-pool', cores)):
+        hasher = configure_password_hasher(method=args.method, workers=workers)
+        if workers:
+            hasher.verify(hasher.hash('warmup'), 'warmup')  # arrancar procesos
+        rate = run(app, args.users, args.logins, args.threads)
+        used = workers or 1
+        print(f'{label:>13}: {rate:8.1f} logins/s  {rate / used:8.1f} logins/s/core')
+        hasher.shutdown()
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
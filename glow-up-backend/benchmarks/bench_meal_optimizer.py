@@ -0,0 +1,103 @@
+"""Benchmark del optimizador de planes de comidas: planes por minuto y días dentro de tolerancia.
+
+Genera lotes de planes de nutrición con objetivos y restricciones aleatorias
+mediante generate_nutrition_plans y comprueba los totales de cada día frente a
+las calorías y macros objetivo.
+
+Uso: python benchmarks/bench_meal_optimizer.py [--plans 500] [--weeks 4] [--batch 100] [--seed 1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GOALS = ('lose_weight', 'gain_muscle', 'maintain_weight')
+DIETS = (None, '[]', '["vegetariano"]', '["vegano"]', '["sin gluten"]', '["lactosa"]',
+         '["vegetariano", "sin gluten"]')
+
+
+def build_requests(count, weeks, rng):
+    return [
+        (SimpleNamespace(goal=rng.choice(GOALS), dietary_restrictions=rng.choice(DIETS)),
+         weeks, (), rng.randrange(1400, 3600, 50))
+        for _ in range(count)
+    ]
+
+
+def check(plan, daily_calories):
+    """(días-opción dentro de tolerancia, total, peor error relativo de calorías)"""
+    from src.services.meal_optimizer import CALORIE_TOLERANCE, MACRO_TOLERANCE, day_totals
+
+    macros = plan['macros']
+    targets = {'protein': macros['protein_grams'], 'carbs': macros['carbs_grams'], 'fat': macros['fat_grams']}
+    ok = total = 0
+    worst = 0.0
+    for week in plan['meal_plan'].values():
+        for day in week.values():
+            for totals in day_totals(day).values():
+                calorie_error = abs(totals['calories'] - daily_calories) / daily_calories
+                macro_error = max(abs(totals[key] - value) / value for key, value in targets.items())
+                worst = max(worst, calorie_error)
+                ok += calorie_error <= CALORIE_TOLERANCE and macro_error <= MACRO_TOLERANCE
+                total += 1
+    return ok, total, worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=500)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=100, help='planes por llamada a generate_nutrition_plans')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    from src.services.local_planner import generate_nutrition_plan, generate_nutrition_plans
+    from src.services.meal_optimizer import get_optimizer
+
+    requests = build_requests(args.plans, args.weeks, random.Random(args.seed))
+
+    # Precalcula los optimizadores para medir solo la generación
+    started = time.perf_counter()
+    generate_nutrition_plans(requests[:len(requests) // 10 + 1])
+    warmup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    plans = []
+    for i in range(0, len(requests), args.batch):
+        plans.extend(generate_nutrition_plans(requests[i:i + args.batch]))
+    batch_elapsed = time.perf_counter() - started
+
+    single = requests[:min(len(requests), 100)]
+    started = time.perf_counter()
+    for request in single:
+        generate_nutrition_plan(*request)
+    single_elapsed = time.perf_counter() - started
+
+    ok = total = 0
+    worst = 0.0
+    for (_, _, _, calories), plan in zip(requests, plans):
+        plan_ok, plan_total, plan_worst = check(plan, calories)
+        ok += plan_ok
+        total += plan_total
+        worst = max(worst, plan_worst)
+
+    print(json.dumps({
+        'plans': args.plans,
+        'weeks': args.weeks,
+        'batch': args.batch,
+        'optimizers': get_optimizer.cache_info().currsize,
+        'warmup_s': round(warmup, 3),
+        'batch_plans_per_minute': round(len(plans) / batch_elapsed * 60),
+        'single_plans_per_minute': round(len(single) / single_elapsed * 60),
+        'day_options_within_tolerance': round(ok / total, 4),
+        'worst_calorie_error': round(worst, 4)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Microbenchmark de GET /my-plans: peticiones por segundo antes y después del
+proveedor JSON rápido con fragmentos RawJSON.
+
+Uso: python benchmarks/bench_my_plans.py [--plans 20] [--weeks 8] [--requests 200]
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(app, user_id, plans, weeks):
+    from src.models.user import NutritionPlan, WorkoutPlan, db
+    from src.routes.ai_plans import generate_local_nutrition_plan, generate_local_workout_plan
+
+    nutrition = generate_local_nutrition_plan(None, weeks)
+    day = nutrition['meal_plan']['week_1']['monday']
+    days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    meal_plan = {f'week_{w}': {d: copy.deepcopy(day) for d in days} for w in range(1, weeks + 1)}
+
+    with app.app_context():
+        for _ in range(plans):
+            db.session.add(WorkoutPlan(
+                user_id=user_id, title='Bench', duration_weeks=weeks, difficulty_level='beginner',
+                plan_data=generate_local_workout_plan(None, weeks)
+            ))
+            db.session.add(NutritionPlan(
+                user_id=user_id, title='Bench', duration_weeks=weeks, daily_calories=2200,
+                macros=nutrition['macros'], meal_plan=meal_plan
+            ))
+        db.session.commit()
+
+
+def measure(client, headers, requests):
+    client.get('/api/my-plans', headers=headers)  # calentamiento
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/my-plans', headers=headers)
+        assert response.status_code == 200
+    return requests / (time.perf_counter() - start), len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plans', type=int, default=20)
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from flask.json.provider import DefaultJSONProvider
+    from app import create_app
+    from src.models.migrations import migrate
+    from src.json_provider import FastJSONProvider
+
+    app = create_app()
+    migrate(app)
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'name': 'Bench', 'email': 'bench@example.com', 'password': 'bench-password',
+        'age': 30, 'weight': 75, 'height': 175, 'goal': 'maintain'
+    })
+    headers = {'Authorization': f"Bearer {response.json['token']}"}
+    seed(app, response.json['user']['id'], args.plans, args.weeks)
+
+    print(f'{args.plans} planes de cada tipo, meal_plan de {args.weeks} semanas, {args.requests} peticiones')
+    for label, provider in (('antes (json.loads + jsonify)', DefaultJSONProvider),
+                            ('después (orjson + RawJSON)', FastJSONProvider)):
+        app.json = provider(app)
+        rate, size = measure(client, headers, args.requests)
+        print(f'{label:>30}: {rate:8.1f} req/s  ({size / 1024:.0f} KiB por respuesta)')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
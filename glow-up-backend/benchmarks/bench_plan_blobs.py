@@ -0,0 +1,60 @@
+"""Benchmark de los códecs de blobs de planes: bytes en disco y tiempo de decodificación.
+
+Uso: python benchmarks/bench_plan_blobs.py [--weeks 12] [--repeat 200]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_meal_plan(weeks):
+    from src.routes.ai_plans import generate_local_nutrition_plan
+
+    day = generate_local_nutrition_plan(None, weeks)['meal_plan']['week_1']['monday']
+    days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    return {f'week_{w}': {d: copy.deepcopy(day) for d in days} for w in range(1, weeks + 1)}
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    from src.models.plan_blob import CODECS, StoredJSON, encode_value, split_payload
+
+    meal_plan = build_meal_plan(args.weeks)
+    legacy = json.dumps(meal_plan).encode('utf-8')  # formato anterior (json.dumps en Text)
+    legacy_decode = timed(lambda: json.loads(legacy), args.repeat)
+    print(f'meal_plan de {args.weeks} semanas, {args.repeat} repeticiones')
+    print(f'{"formato":>14} {"bytes":>9} {"ratio":>6} {"encode ms":>10} {"decode ms":>10} {"a JSON ms":>10}')
+    print(f'{"legacy text":>14} {len(legacy):>9} {1:>6.2f} {timed(lambda: json.dumps(meal_plan), args.repeat):>10.3f} '
+          f'{legacy_decode:>10.3f} {0:>10.3f}')
+
+    for name, codec in CODECS.items():
+        try:
+            stored = encode_value(meal_plan, codec)
+        except RuntimeError as e:
+            print(f'{name:>14} omitido: {e}')
+            continue
+        encode_ms = timed(lambda: encode_value(meal_plan, codec), args.repeat)
+        decode_ms = timed(lambda: StoredJSON(*split_payload(stored)).value, args.repeat)
+        json_ms = timed(lambda: StoredJSON(*split_payload(stored)).json_bytes(), args.repeat)
+        print(f'{name:>14} {len(stored):>9} {len(stored) / len(legacy):>6.2f} {encode_ms:>10.3f} '
+              f'{decode_ms:>10.3f} {json_ms:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Tokens de los prompts antes y después de la compactación para un conjunto de usuarios sembrado.
+
+Compara los prompts originales (plantilla indentada, JSON crudo de equipo y
+restricciones y comentarios literales de feedback) con los de prompt_builder,
+contando tokens con prompt_builder.count_tokens (tiktoken si está instalado).
+
+Uso: python benchmarks/bench_prompt_tokens.py [--users 200] [--seed 1] [--budget 220]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GOALS = ('lose_weight', 'gain_muscle', 'maintain_weight')
+ACTIVITY_LEVELS = ('sedentary', 'light', 'moderate', 'active', 'very_active')
+LEVELS = ('beginner', 'intermediate', 'advanced')
+EQUIPMENT = ('barra', 'mancuernas', 'banco', 'kettlebell', 'bandas elásticas', 'máquina de poleas',
+             'bicicleta estática', 'cinta de correr', 'barra de dominadas', 'TRX', 'esterilla')
+RESTRICTIONS = ('vegetariano', 'vegano', 'sin gluten', 'lactosa', 'sin frutos secos', 'bajo en sodio')
+COMMENTS = (
+    'Me gustó mucho, aunque los lunes se me hacían muy largos y terminaba agotado.',
+    'Demasiado repetitivo, siempre los mismos ejercicios y las mismas comidas.',
+    'Muy bien explicado, pero me faltó tiempo para hacer todo el cardio entre semana.',
+    'Las recetas estaban ricas pero algunas llevaban ingredientes difíciles de encontrar.',
+    '',
+)
+
+
+def legacy_workout_prompt(user, duration_weeks, previous_feedback):
+    """Prompt de entrenamiento tal y como se construía antes de la compactación"""
+    feedback_text = ""
+    if previous_feedback:
+        feedback_text = "Feedback de planes anteriores:\n"
+        for feedback in previous_feedback:
+            feedback_text += f"- Rating: {feedback.rating}/5, Dificultad: {feedback.difficulty_rating}/5, Comentario: {feedback.feedback_text}\n"
+
+    equipment_available = user.equipment_available if user.equipment_available else "Equipo básico de gimnasio"
+
+    return f"""
+    Genera un plan de entrenamiento personalizado para un usuario con las siguientes características:
+
+    Información del usuario:
+    - Edad: {user.age} años
+    - Peso: {user.weight} kg
+    - Altura: {user.height} cm
+    - Objetivo: {user.goal}
+    - Nivel de experiencia: {user.experience_level}
+    - Nivel de actividad: {user.activity_level}
+    - Equipo disponible: {equipment_available}
+
+    Duración del plan: {duration_weeks} semanas
+
+    {feedback_text}
+
+    Genera un plan estructurado con:
+    1. Cronograma semanal (7 días)
+    2. Para cada día de entrenamiento: tipo de entrenamiento, grupos musculares, ejercicios específicos
+    3. Para cada ejercicio: series, repeticiones, peso sugerido (si aplica), tempo (para usuarios avanzados)
+    4. Días de descanso y cardio
+    5. Progresión semanal
+
+    Responde en formato JSON con la estructura especificada.
+    """
+
+
+def legacy_nutrition_prompt(user, duration_weeks, previous_feedback, daily_calories):
+    """Prompt nutricional tal y como se construía antes de la compactación"""
+    feedback_text = ""
+    if previous_feedback:
+        feedback_text = "Feedback de planes anteriores:\n"
+        for feedback in previous_feedback:
+            feedback_text += f"- Rating: {feedback.rating}/5, Comentario: {feedback.feedback_text}\n"
+
+    dietary_restrictions = user.dietary_restrictions if user.dietary_restrictions else "Ninguna"
+
+    return f"""
+    Genera un plan nutricional personalizado para un usuario con las siguientes características:
+
+    Información del usuario:
+    - Edad: {user.age} años
+    - Peso: {user.weight} kg
+    - Altura: {user.height} cm
+    - Objetivo: {user.goal}
+    - Nivel de actividad: {user.activity_level}
+    - Restricciones dietéticas: {dietary_restrictions}
+    - Calorías diarias objetivo: {daily_calories}
+
+    Duración del plan: {duration_weeks} semanas
+
+    {feedback_text}
+
+    Genera un plan estructurado con:
+    1. Distribución de macronutrientes
+    2. Plan de comidas semanal con 2 opciones por comida
+    3. Recetas detalladas con ingredientes y preparación
+    4. Información nutricional por comida
+
+    Responde en formato JSON con la estructura especificada.
+    """
+
+
+def seeded_users(count, rng):
+    users = []
+    for _ in range(count):
+        user = SimpleNamespace(
+            age=rng.randint(18, 65), weight=round(rng.uniform(50, 120), 1), height=rng.randint(150, 200),
+            goal=rng.choice(GOALS), activity_level=rng.choice(ACTIVITY_LEVELS),
+            experience_level=rng.choice(LEVELS),
+            equipment_available=json.dumps(rng.sample(EQUIPMENT, rng.randint(0, 6)), ensure_ascii=False),
+            dietary_restrictions=json.dumps(rng.sample(RESTRICTIONS, rng.randint(0, 2)), ensure_ascii=False)
+        )
+        feedback = [
+            SimpleNamespace(rating=rng.randint(1, 5), difficulty_rating=rng.randint(1, 5),
+                            feedback_text=rng.choice(COMMENTS))
+            for _ in range(rng.randint(0, 5))
+        ]
+        users.append((user, rng.choice((4, 8, 12)), feedback))
+    return users
+
+
+def stats(values):
+    values = sorted(values)
+    return {
+        'mean': round(sum(values) / len(values), 1),
+        'p95': values[min(int(round(0.95 * (len(values) - 1))), len(values) - 1)],
+        'max': values[-1]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--budget', type=int, help='PROMPT_TOKEN_BUDGET (por defecto el configurado)')
+    args = parser.parse_args()
+
+    from src.routes.ai_plans import calculate_daily_calories, nutrition_prompt_inputs, workout_prompt_inputs
+    from src.services import prompt_builder
+
+    budget = args.budget or prompt_builder.PROMPT_TOKEN_BUDGET
+    counts = {key: [] for key in ('workout_before', 'workout_after', 'nutrition_before', 'nutrition_after')}
+    over_budget = 0
+    for user, weeks, feedback in seeded_users(args.users, random.Random(args.seed)):
+        counts['workout_before'].append(prompt_builder.count_tokens(legacy_workout_prompt(user, weeks, feedback)))
+        counts['nutrition_before'].append(prompt_builder.count_tokens(
+            legacy_nutrition_prompt(user, weeks, feedback, calculate_daily_calories(user))))
+
+        _, workout_tokens = prompt_builder.workout_prompt(workout_prompt_inputs(user, weeks, feedback), budget)
+        _, nutrition_tokens = prompt_builder.nutrition_prompt(nutrition_prompt_inputs(user, weeks, feedback), budget)
+        counts['workout_after'].append(workout_tokens)
+        counts['nutrition_after'].append(nutrition_tokens)
+        over_budget += (workout_tokens > budget) + (nutrition_tokens > budget)
+
+    result = {
+        'users': args.users,
+        'seed': args.seed,
+        'budget': budget,
+        'tokenizer': 'tiktoken/cl100k_base' if prompt_builder.tiktoken is not None else 'estimación',
+        'tokens': {key: stats(values) for key, values in counts.items()},
+        'reduction': {
+            kind: round(1 - sum(counts[f'{kind}_after']) / sum(counts[f'{kind}_before']), 3)
+            for kind in ('workout', 'nutrition')
+        },
+        'prompts_over_budget': over_budget
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Tiempo de arranque en frío: importación, create_app y primera respuesta.
+
+Cada muestra es un proceso Python nuevo que mide por fases el import de la
+factoría (app.create_app), la llamada a create_app() y la primera petición
+GET /api/health con el cliente de pruebas, e indica si openai y numpy quedaron
+importados. Además arranca el servidor real (python app.py sin recarga) y mide
+desde el lanzamiento del proceso hasta la primera respuesta HTTP.
+
+Con --ref se repite la medida sobre otra revisión del repositorio (git archive)
+para comparar, p. ej. --ref HEAD~1. La base de datos se migra antes, de modo que
+el create_all al arrancar de las revisiones antiguas solo comprueba el esquema.
+
+Uso: python benchmarks/bench_startup.py [--samples 5] [--ref HEAD~1] [--output arranque.json]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en el proceso nuevo, con el directorio del backend como cwd
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, '.')
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get('/api/health')
+answered = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_response_ms': (answered - created) * 1000,
+    'openai_loaded': 'openai' in sys.modules,
+    'numpy_loaded': 'numpy' in sys.modules
+}))
+'''
+
+# Servidor de desarrollo sin recarga ni depurador, como un worker
+SERVER = r'''
+import sys
+sys.path.insert(0, '.')
+from app import create_app
+create_app().run(host='127.0.0.1', port=int(sys.argv[1]), use_reloader=False)
+'''
+
+
+def export_ref(ref, target):
+    """Extrae glow-up-backend de la revisión ref en target; devuelve su ruta"""
+    top = subprocess.check_output(['git', 'rev-parse', '--show-toplevel'], cwd=BACKEND_DIR, text=True).strip()
+    prefix = os.path.relpath(BACKEND_DIR, top)
+    archive = subprocess.check_output(['git', 'archive', ref, prefix], cwd=top)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return os.path.join(target, prefix)
+
+
+def sample_process(backend_dir, env):
+    started = time.perf_counter()
+    output = subprocess.check_output([sys.executable, '-c', CHILD], cwd=backend_dir, env=env, text=True)
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def sample_server(backend_dir, env, port):
+    """Milisegundos desde el lanzamiento del servidor hasta su primera respuesta HTTP"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', SERVER, str(port)], cwd=backend_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while process.poll() is None:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError('El servidor terminó al arrancar')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summarize(samples):
+    summary = {}
+    for key in ('import_ms', 'create_app_ms', 'first_response_ms', 'process_ms', 'server_first_response_ms'):
+        values = [sample[key] for sample in samples if key in sample]
+        summary[key] = {'median': round(statistics.median(values), 1), 'min': round(min(values), 1)}
+    summary['openai_loaded'] = samples[0]['openai_loaded']
+    summary['numpy_loaded'] = samples[0]['numpy_loaded']
+    return summary
+
+
+def measure(backend_dir, env, samples, port):
+    results = []
+    for _ in range(samples):
+        result = sample_process(backend_dir, env)
+        result['server_first_response_ms'] = sample_server(backend_dir, env, port)
+        results.append(result)
+    return summarize(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--ref', help='Revisión de git con la que comparar (p. ej. HEAD~1)')
+    parser.add_argument('--port', type=int, default=5091)
+    parser.add_argument('--output', help='Guardar los resultados en un fichero JSON')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', PYTHONWARNINGS='ignore')
+    # Sin API key ni LLM simulado: un worker que aún no ha generado ningún plan
+    for name in ('OPENAI_API_KEY', 'FAKE_LLM_LATENCY', 'LLM_CLIENT_PRELOAD'):
+        env.pop(name, None)
+
+    results = {}
+    try:
+        subprocess.check_call([sys.executable, '-c', 'from app import create_app; from src.models.migrations import '
+                               'migrate; migrate(create_app())'], cwd=BACKEND_DIR, env=env)
+        results['current'] = measure(BACKEND_DIR, env, args.samples, args.port)
+        if args.ref:
+            with tempfile.TemporaryDirectory() as target:
+                results[args.ref] = measure(export_ref(args.ref, target), env, args.samples, args.port)
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    output = {'python': sys.version.split()[0], 'samples': args.samples, 'results': results}
+    print(json.dumps(output, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""Prueba de carga de los endpoints principales con un LLM local simulado.
+
+Arranca la app con create_app sobre una base de datos temporal, siembra usuarios
+con historial de progreso y planes, sustituye openai.ChatCompletion.create por
+FakeChatCompletion y ejecuta una mezcla de operaciones desde varios hilos.
+Informa p50/p95/p99 y peticiones por segundo por endpoint y puede guardar los
+resultados en JSON para compararlos entre commits.
+
+Uso:
+  python benchmarks/loadtest.py [--users 20] [--threads 8] [--seconds 10]
+      [--llm-latency 0.2] [--llm-payload-bytes 8000]
+      [--mix login=1,generate=1,progress_write=4,stats_read=6,my_plans=2]
+      [--output resultados.json] [--compare base.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+PASSWORD = 'bench-password'
+GOALS = ('lose_weight', 'gain_muscle', 'maintain_weight')
+ACTIVITY_LEVELS = ('sedentary', 'light', 'moderate', 'active', 'very_active')
+LEVELS = ('beginner', 'intermediate', 'advanced')
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'Operación desconocida: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def seed(app, client, args, rng):
+    """Crea usuarios con historial de progreso y planes; devuelve (email, cabeceras) por usuario"""
+    from src.models.user import NutritionPlan, WorkoutPlan, db
+    from src.routes.ai_plans import generate_local_nutrition_plan, generate_local_workout_plan
+    from src.services.progress_import import upsert_progress_rows
+    from src.services.progress_rollups import rebuild_rollups
+
+    users = []
+    today = date.today()
+    for index in range(args.users):
+        email = f'load{index}@example.com'
+        response = client.post('/api/auth/register', json={
+            'name': f'Load {index}', 'email': email, 'password': PASSWORD,
+            'age': rng.randint(18, 65), 'weight': round(rng.uniform(55, 110), 1),
+            'height': rng.randint(150, 200), 'goal': rng.choice(GOALS),
+            'activity_level': rng.choice(ACTIVITY_LEVELS), 'experience_level': rng.choice(LEVELS)
+        })
+        assert response.status_code == 201, response.json
+        user_id = response.json['user']['id']
+        users.append((email, {'Authorization': f"Bearer {response.json['token']}"}))
+
+        with app.app_context():
+            weight = rng.uniform(60, 100)
+            rows = []
+            for offset in range(args.progress_days, 0, -1):
+                if rng.random() < 0.7:
+                    weight += rng.uniform(-0.4, 0.35)
+                    rows.append({
+                        'date': today - timedelta(days=offset), 'weight': round(weight, 1),
+                        'body_fat_percentage': round(rng.uniform(12, 30), 1),
+                        'measurements': None, 'notes': None
+                    })
+            upsert_progress_rows(user_id, rows)
+            rebuild_rollups(user_id)
+
+            for _ in range(args.plans):
+                db.session.add(WorkoutPlan(
+                    user_id=user_id, title='Plan sembrado', duration_weeks=4,
+                    difficulty_level='beginner', plan_data=generate_local_workout_plan(None, 4),
+                    is_active=False
+                ))
+                nutrition = generate_local_nutrition_plan(None, 4)
+                db.session.add(NutritionPlan(
+                    user_id=user_id, title='Plan sembrado', duration_weeks=4, daily_calories=2200,
+                    macros=nutrition['macros'], meal_plan=nutrition['meal_plan'], is_active=False
+                ))
+            db.session.commit()
+    return users
+
+
+def op_login(client, user, rng):
+    return 'POST /auth/login', client.post('/api/auth/login', json={'email': user[0], 'password': PASSWORD})
+
+
+def op_generate(client, user, rng):
+    kind = rng.choice(('workout', 'nutrition'))
+    return (f'POST /generate-{kind}-plan',
+            client.post(f'/api/generate-{kind}-plan', headers=user[1],
+                        json={'duration_weeks': rng.choice((4, 8, 12))}))
+
+
+def op_progress_write(client, user, rng):
+    day = date.today() - timedelta(days=rng.randrange(30))
+    return 'POST /progress', client.post('/api/progress', headers=user[1], json={
+        'date': day.isoformat(), 'weight': round(rng.uniform(60, 100), 1)
+    })
+
+
+def op_stats_read(client, user, rng):
+    days = rng.choice((30, 90, 365))
+    return 'GET /progress/stats', client.get(f'/api/progress/stats?days={days}', headers=user[1])
+
+
+def op_chart_read(client, user, rng):
+    return 'GET /progress/chart', client.get('/api/progress/chart?days=365', headers=user[1])
+
+
+def op_my_plans(client, user, rng):
+    return 'GET /my-plans', client.get('/api/my-plans?view=summary', headers=user[1])
+
+
+OPERATIONS = {
+    'login': op_login,
+    'generate': op_generate,
+    'progress_write': op_progress_write,
+    'stats_read': op_stats_read,
+    'chart_read': op_chart_read,
+    'my_plans': op_my_plans
+}
+
+
+def worker(app, users, mix, deadline, seed_value, samples, lock):
+    client = app.test_client()
+    rng = random.Random(seed_value)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    local = []
+    while time.perf_counter() < deadline:
+        operation = OPERATIONS[rng.choices(names, weights)[0]]
+        user = rng.choice(users)
+        started = time.perf_counter()
+        endpoint, response = operation(client, user, rng)
+        local.append((endpoint, time.perf_counter() - started, response.status_code))
+    with lock:
+        samples.extend(local)
+
+
+def summarize(samples, elapsed):
+    by_endpoint = {}
+    for endpoint, latency, status in samples:
+        by_endpoint.setdefault(endpoint, []).append((latency, status))
+
+    def stats(entries):
+        latencies = sorted(latency for latency, _ in entries)
+        return {
+            'requests': len(entries),
+            'errors': sum(1 for _, status in entries if status >= 400),
+            'rps': round(len(entries) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)
+        }
+
+    endpoints = {name: stats(entries) for name, entries in sorted(by_endpoint.items())}
+    total = stats([(latency, status) for _, latency, status in samples])
+    return endpoints, total
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result, baseline=None):
+    header = f"{'endpoint':<32}{'req':>7}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    print('-' * len(header))
+    rows = list(result['endpoints'].items()) + [('TOTAL', result['total'])]
+    for name, row in rows:
+        line = (f"{name:<32}{row['requests']:>7}{row['errors']:>6}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+        base = (baseline['endpoints'].get(name) if name != 'TOTAL' else baseline['total']) if baseline else None
+        if base and base['p95_ms'] and base['rps']:
+            line += (f"   p95 {(row['p95_ms'] / base['p95_ms'] - 1):+.0%}"
+                     f"  req/s {(row['rps'] / base['rps'] - 1):+.0%}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--progress-days', type=int, default=365)
+    parser.add_argument('--plans', type=int, default=3, help='planes sembrados de cada tipo por usuario')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-payload-bytes', type=int, default=0)
+    parser.add_argument('--mix', type=parse_mix,
+                        default=parse_mix('login=1,generate=1,progress_write=4,stats_read=6,my_plans=2'))
+    parser.add_argument('--no-plan-cache', action='store_true', help='desactiva la caché de planes')
+    parser.add_argument('--plan-generator', choices=('auto', 'local', 'llm'),
+                        help='generador de planes (PLAN_GENERATOR)')
+    parser.add_argument('--hash-workers', type=int, help='procesos de hash de contraseñas (0 = en línea)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='fichero JSON de resultados')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para mostrar diferencias')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    if args.no_plan_cache:
+        os.environ['PLAN_CACHE_ENABLED'] = '0'
+    if args.plan_generator:
+        os.environ['PLAN_GENERATOR'] = args.plan_generator
+    if args.hash_workers is not None:
+        os.environ['PASSWORD_HASH_WORKERS'] = str(args.hash_workers)
+
+    from app import create_app
+    from src.models.migrations import migrate
+    from src.services.fake_llm import FakeChatCompletion, install_fake_llm
+
+    install_fake_llm(args.llm_latency, args.llm_payload_bytes)
+    app = create_app()
+    migrate(app)
+    rng = random.Random(args.seed)
+
+    try:
+        started = time.perf_counter()
+        users = seed(app, app.test_client(), args, rng)
+        print(f'Sembrados {len(users)} usuarios en {time.perf_counter() - started:.1f}s; '
+              f'{args.threads} hilos durante {args.seconds:.0f}s')
+
+        samples = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=worker, args=(app, users, args.mix, deadline, args.seed + i, samples, lock))
+            for i in range(args.threads)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    endpoints, total = summarize(samples, elapsed)
+    result = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {
+            'users': args.users, 'progress_days': args.progress_days, 'plans': args.plans,
+            'threads': args.threads, 'seconds': args.seconds, 'llm_latency': args.llm_latency,
+            'llm_payload_bytes': args.llm_payload_bytes, 'mix': args.mix,
+            'plan_cache': not args.no_plan_cache, 'seed': args.seed,
+            'plan_generator': os.environ.get('PLAN_GENERATOR', 'auto')
+        },
+        'llm_calls': FakeChatCompletion.calls,
+        'endpoints': endpoints,
+        'total': total
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+        print(f'Resultados guardados en {args.output}')
+
+
+if __name__ == '__main__':
+    main()
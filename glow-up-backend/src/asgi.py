@@ -0,0 +1,127 @@
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.json_provider import supports_raw_json
+from src.models.engine_profile import create_async_db_engine
+from src.routes.async_plans import async_plans_routes
+from src.services.async_http import DELEGATE, AsyncRequest, HTTPError, normalize_result
+from src.services.metrics import REQUESTS, REQUEST_DURATION
+import os
+import time
+
+# Hilos con los que se atienden las rutas delegadas a la app Flask (WSGI)
+ASGI_WSGI_WORKERS = int(os.environ.get('ASGI_WSGI_WORKERS', 10))
+
+# Rutas con versión asíncrona; el resto (y lo que estas devuelvan como DELEGATE) va a Flask
+ASYNC_ROUTES = (async_plans_routes,)
+
+
+def create_asgi_app(flask_app=None):
+    """App ASGI del modo SERVER_MODE=asgi.
+
+    Las rutas de ASYNC_ROUTES se atienden como corrutinas con una AsyncSession
+    y el cliente asíncrono de OpenAI, de modo que esperar al LLM no ocupa un
+    hilo. Todo lo demás se delega a la app Flask a través de a2wsgi, que
+    mantiene CORS, métricas, streaming SSE y manejo de errores tal cual.
+    """
+    if flask_app is None:
+        from src.main import create_app
+        flask_app = create_app()
+
+    engine = create_async_db_engine(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    wsgi = WSGIMiddleware(flask_app, workers=ASGI_WSGI_WORKERS)
+    raw_json = supports_raw_json(flask_app)
+    cors_origins = set(flask_app.config.get('CORS_ORIGINS', ()))
+
+    def route(method, path):
+        for routes in ASYNC_ROUTES:
+            match = routes.match(method, path)
+            if match is not None:
+                return match
+        return None
+
+    async def send_response(send, request, body, status, headers):
+        if isinstance(body, (dict, list)):
+            body = flask_app.json.dumps(body).encode('utf-8') + b'\n'
+            headers.setdefault('Content-Type', 'application/json')
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        headers['Content-Length'] = str(len(body))
+
+        # Mismas cabeceras CORS que flask-cors para las respuestas simples
+        origin = request.headers.get('origin')
+        if origin in cors_origins:
+            headers['Access-Control-Allow-Origin'] = origin
+            headers['Vary'] = 'Origin'
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), str(value).encode('latin-1')) for name, value in headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+
+        match = route(scope['method'], scope['path']) if scope['type'] == 'http' else None
+        if match is None:
+            return await wsgi(scope, receive, send)
+
+        handler, rule, params = match
+        body = await read_body(receive)
+        request = AsyncRequest(scope, body, sessions, raw_json)
+        try:
+            result = await handler(request, **params)
+        except HTTPError as e:
+            result = {'error': str(e)}, e.status_code
+        except Exception:
+            flask_app.logger.exception('Error en %s %s', request.method, request.path)
+            result = {'error': 'Error interno del servidor'}, 500
+
+        if result is DELEGATE:
+            return await wsgi(scope, replay_body(body, receive), send)
+
+        response_body, status, headers = normalize_result(result)
+        await send_response(send, request, response_body, status, headers)
+
+        # Mismas series que init_metrics, con la regla de la ruta como endpoint
+        labels = {'method': request.method, 'endpoint': rule}
+        REQUESTS.inc(status=str(status), **labels)
+        REQUEST_DURATION.observe(time.perf_counter() - request.started, **labels)
+
+    return app
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+def replay_body(body, receive):
+    """receive() que entrega de nuevo el cuerpo ya leído, para delegar la petición a WSGI"""
+    pending = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def replayed():
+        if pending:
+            return pending.pop()
+        return await receive()
+    return replayed
@@ -0,0 +1,67 @@
+from flask.json.provider import DefaultJSONProvider
+import json
+import re
+import uuid
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el módulo json estándar
+    orjson = None
+
+
+class RawJSON:
+    """Fragmento JSON ya serializado (bytes UTF-8) que se inserta tal cual en la respuesta"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask basado en orjson que admite fragmentos RawJSON.
+
+    Los fragmentos se serializan como un marcador único y después se sustituyen
+    por sus bytes, de modo que los planes guardados no se decodifican ni se
+    vuelven a codificar.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj, **kwargs):
+        fragments = []
+        nonce = uuid.uuid4().hex
+
+        def default(value):
+            if isinstance(value, RawJSON):
+                fragments.append(value.data)
+                return f'{nonce}:{len(fragments) - 1}'
+            return self.default(value)
+
+        if orjson is not None and not kwargs:
+            options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                options |= orjson.OPT_SORT_KEYS
+            body = orjson.dumps(obj, default=default, option=options)
+        else:
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            kwargs.setdefault('separators', (',', ':'))
+            body = json.dumps(obj, default=default, **kwargs).encode('utf-8')
+
+        if not fragments:
+            return body
+
+        # Sustituir todos los marcadores en una sola pasada
+        marker = re.compile(b'"' + nonce.encode('ascii') + rb':(\d+)"')
+        return marker.sub(lambda match: fragments[int(match.group(1))], body)
+
+
+def supports_raw_json(app):
+    """Indica si el proveedor JSON de la app sabe incrustar fragmentos RawJSON"""
+    return isinstance(app.json, FastJSONProvider)
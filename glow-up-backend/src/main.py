@@ -1,22 +1,40 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from src.models.user import db
+from src.json_provider import FastJSONProvider
 from src.routes.auth import auth_bp
 from src.routes.user import user_bp
 from src.routes.ai_plans import ai_plans_bp
 from src.routes.progress import progress_bp
+from src.routes.jobs import jobs_bp
+from src.routes.metrics import metrics_bp
+from src.routes.export import export_bp
+from src.models.engine_profile import configure_engines, engine_options
+from src.models.migrations import migrate, migrate_schema_command
+from src.models.plan_blob_migration import migrate_plan_blobs_command
+from src.services.export import export_data_command
+from src.services.metrics import init_metrics
+from src.services import llm_client
 import os
 
 def create_app():
+    """Factoría de la app; no toca la base de datos (el esquema se crea con flask migrate-schema)"""
     app = Flask(__name__)
     
     # Configuración
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///glow_up.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pool y opciones del motor según DB_ENGINE_PROFILE (tuned/legacy)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     
-    # Configurar CORS
-    CORS(app, origins=['http://localhost:5173', 'http://127.0.0.1:5173'])
+    # Proveedor JSON rápido (orjson + fragmentos RawJSON); JSON_PROVIDER=default para el de Flask
+    if os.environ.get('JSON_PROVIDER', 'fast') == 'fast':
+        app.json = FastJSONProvider(app)
+    
+    # Configurar CORS (CORS_ORIGINS también lo usa el modo ASGI)
+    app.config['CORS_ORIGINS'] = ['http://localhost:5173', 'http://127.0.0.1:5173']
+    CORS(app, origins=app.config['CORS_ORIGINS'])
     
     # Inicializar base de datos
     db.init_app(app)
@@ -26,10 +44,29 @@ def create_app():
     app.register_blueprint(user_bp, url_prefix='/api')
     app.register_blueprint(ai_plans_bp, url_prefix='/api')
     app.register_blueprint(progress_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    
+    # Comandos de mantenimiento (flask migrate-schema, flask migrate-plan-blobs, flask export-data)
+    app.cli.add_command(migrate_schema_command)
+    app.cli.add_command(migrate_plan_blobs_command)
+    app.cli.add_command(export_data_command)
     
-    # Crear tablas
+    # LLM local de pruebas (FAKE_LLM_LATENCY=<segundos>); solo entonces se importa openai al arrancar
+    if os.environ.get('FAKE_LLM_LATENCY') is not None:
+        from src.services.fake_llm import install_from_env as install_fake_llm_from_env
+        install_fake_llm_from_env()
+    elif os.environ.get('LLM_CLIENT_PRELOAD', '0').lower() in ('1', 'true', 'yes'):
+        # Workers de larga duración: cargar openai en segundo plano en vez de en la primera generación
+        llm_client.preload()
+    
+    # PRAGMAs de SQLite en los motores (crearlos no abre conexiones)
     with app.app_context():
-        db.create_all()
+        configure_engines(db)
+    
+    # Métricas por petición (tiempo, SQL, LLM) expuestas en /api/metrics
+    init_metrics(app, db)
     
     # Ruta de salud
     @app.route('/api/health', methods=['GET'])
@@ -50,7 +87,18 @@ def create_app():
     
     return app
 
-if __name__ == '__main__':
+def serve():
+    """Servidor de desarrollo de un solo proceso: aplica las migraciones pendientes y arranca"""
     app = create_app()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    migrate(app)
+    if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+        # Endpoints de generación y lectura como corrutinas (ver src/asgi.py)
+        import uvicorn
+        from src.asgi import create_asgi_app
+        uvicorn.run(create_asgi_app(app), host='0.0.0.0', port=5000)
+    else:
+        app.run(host='0.0.0.0', port=5000, debug=True)
+
+if __name__ == '__main__':
+    serve()
 
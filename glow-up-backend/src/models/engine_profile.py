@@ -0,0 +1,138 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_profile():
+    """Perfil de motor activo (DB_ENGINE_PROFILE): 'tuned' por defecto o 'legacy' sin ajustes"""
+    profile = os.environ.get('DB_ENGINE_PROFILE', 'tuned')
+    if profile not in ('tuned', 'legacy'):
+        raise ValueError(f'Perfil de base de datos desconocido: {profile}')
+    return profile
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(database_uri):
+    """Opciones de create_engine (SQLALCHEMY_ENGINE_OPTIONS) según el perfil y el dialecto.
+
+    Servidores (PostgreSQL/MySQL): pool acotado con overflow, pre-ping y
+    reciclado de conexiones. SQLite en fichero: pool del tamaño de los hilos
+    de trabajo y espera en bloqueos en lugar de fallar con "database is locked".
+    """
+    if engine_profile() == 'legacy':
+        return {}
+
+    url = make_url(database_uri)
+    if _is_memory_sqlite(url):
+        # SQLite en memoria usa un pool de una conexión por hilo; no admite tamaño de pool
+        return {}
+
+    options = {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30)
+    }
+
+    if url.get_backend_name() == 'sqlite':
+        # Timeout del driver (segundos) para esperar bloqueos de escritura
+        options['connect_args'] = {
+            'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+            'check_same_thread': False
+        }
+    else:
+        options['pool_pre_ping'] = _env_bool('DB_POOL_PRE_PING', 'true')
+        options['pool_recycle'] = _env_int('DB_POOL_RECYCLE', 1800)
+
+    return options
+
+
+def sqlite_pragmas():
+    """PRAGMAs aplicados a cada conexión SQLite nueva"""
+    return (
+        ('journal_mode', os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('busy_timeout', _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('synchronous', os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('mmap_size', _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    )
+
+
+def register_sqlite_pragmas(engine):
+    """Aplica sqlite_pragmas() a cada conexión nueva del motor (síncrono) si es SQLite en fichero"""
+    if engine_profile() == 'legacy' or engine.dialect.name != 'sqlite' or _is_memory_sqlite(engine.url):
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def enforce_sqlite_foreign_keys(engine):
+    """PRAGMA foreign_keys=ON en cada conexión SQLite (en cualquier perfil).
+
+    SQLite ignora las claves foráneas, y con ellas ON DELETE CASCADE, salvo
+    que se activen por conexión; el borrado de usuarios depende de ello.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('PRAGMA foreign_keys=ON')
+        finally:
+            cursor.close()
+
+
+def configure_engines(db):
+    """Registra los PRAGMAs de SQLite en los motores de la app (requiere contexto de app)"""
+    for engine in db.engines.values():
+        enforce_sqlite_foreign_keys(engine)
+        register_sqlite_pragmas(engine)
+
+
+# Driver asíncrono de cada dialecto para el modo ASGI
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql'
+}
+
+
+def async_database_uri(database_uri):
+    """URI equivalente con el driver asíncrono del dialecto (sqlite:///x.db -> sqlite+aiosqlite:///x.db)"""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'Sin driver asíncrono para {backend}')
+    if _is_memory_sqlite(url):
+        raise ValueError('El modo ASGI necesita una base de datos en fichero o servidor, no SQLite en memoria')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}').render_as_string(hide_password=False)
+
+
+def create_async_db_engine(database_uri):
+    """Motor asíncrono con las mismas opciones de pool y PRAGMAs que el motor de Flask-SQLAlchemy"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(async_database_uri(database_uri), **engine_options(database_uri))
+    enforce_sqlite_foreign_keys(engine.sync_engine)
+    register_sqlite_pragmas(engine.sync_engine)
+    return engine
@@ -0,0 +1,219 @@
+from flask.cli import with_appcontext
+from sqlalchemy import Column, DateTime, ForeignKeyConstraint, Integer, MetaData, String, Table, func, inspect, insert, select, text
+from sqlalchemy.schema import AddConstraint, DropConstraint
+from src.models.user import db
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+import click
+
+# Versión del esquema aplicada, una fila por migración
+_version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+# Migraciones en orden: (versión, descripción, función(connection))
+MIGRATIONS = []
+
+# Tablas que existían cuando el esquema se creaba con db.create_all() al arrancar
+BASELINE_TABLES = (
+    'user', 'workout_plan', 'nutrition_plan', 'progress_entry', 'progress_rollup',
+    'data_version', 'plan_feedback', 'cached_plan', 'idempotency_record'
+)
+
+
+def migration(version, description):
+    """Registra una migración; cada una se aplica en su propia transacción"""
+    def decorator(upgrade):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f'Migración {version} fuera de orden')
+        MIGRATIONS.append((version, description, upgrade))
+        return upgrade
+    return decorator
+
+
+@migration(1, 'Esquema inicial (antes db.create_all al arrancar)')
+def initial_schema(connection):
+    # checkfirst: en bases antiguas solo crea las tablas que falten
+    db.metadata.create_all(connection, tables=[db.metadata.tables[name] for name in BASELINE_TABLES])
+
+
+# Tablas con user_id que deben borrarse junto con el usuario
+USER_OWNED_TABLES = (
+    'workout_plan', 'nutrition_plan', 'progress_entry', 'progress_rollup',
+    'data_version', 'plan_feedback', 'idempotency_record'
+)
+
+
+@migration(2, 'ON DELETE CASCADE en las tablas de cada usuario')
+def cascade_user_deletes(connection):
+    inspector = inspect(connection)
+    for name in USER_OWNED_TABLES:
+        foreign_key = next(
+            fk for fk in inspector.get_foreign_keys(name)
+            if fk['referred_table'] == 'user' and fk['constrained_columns'] == ['user_id']
+        )
+        if (foreign_key.get('options') or {}).get('ondelete', '').upper() == 'CASCADE':
+            continue
+
+        # Filas huérfanas de usuarios ya borrados (p. ej. feedback, que no tenía relación)
+        table = db.metadata.tables[name]
+        users = db.metadata.tables['user']
+        connection.execute(table.delete().where(table.c.user_id.not_in(select(users.c.id))))
+
+        if name == 'progress_entry':
+            # La tabla reconstruida (o el índice que falte) ya es única por (user_id, date)
+            _dedupe_progress_entries(connection)
+
+        if connection.dialect.name == 'sqlite':
+            _rebuild_sqlite_table(connection, inspector, table)
+            continue
+
+        # Servidores: sustituir la restricción por otra igual con ON DELETE CASCADE
+        metadata = MetaData()
+        Table('user', metadata, Column('id', Integer, primary_key=True))
+        constraint = ForeignKeyConstraint(['user_id'], ['user.id'], name=foreign_key['name'], ondelete='CASCADE')
+        Table(name, metadata, Column('user_id', Integer), constraint)
+        connection.execute(DropConstraint(constraint))
+        connection.execute(AddConstraint(constraint))
+        existing = {index['name'] for index in inspector.get_indexes(name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+
+
+def _rebuild_sqlite_table(connection, inspector, table):
+    """SQLite no puede cambiar una clave foránea: se crea la tabla de nuevo (con sus índices) y se copian las filas"""
+    name = table.name
+    columns = ', '.join(f'"{column["name"]}"' for column in inspector.get_columns(name) if column['name'] in table.c)
+    old_indexes = [index['name'] for index in inspector.get_indexes(name)]
+    connection.execute(text(f'ALTER TABLE "{name}" RENAME TO "_{name}_old"'))
+    for index in old_indexes:
+        connection.execute(text(f'DROP INDEX "{index}"'))
+    table.create(connection)
+    connection.execute(text(f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM "_{name}_old"'))
+    connection.execute(text(f'DROP TABLE "_{name}_old"'))
+
+
+def _dedupe_progress_entries(connection):
+    """Deja una sola entrada por (user_id, date), la más reciente (id mayor), como el upsert"""
+    table = db.metadata.tables['progress_entry']
+    latest = select(func.max(table.c.id).label('id')).group_by(table.c.user_id, table.c.date).subquery()
+    connection.execute(table.delete().where(table.c.id.not_in(select(latest.c.id))))
+
+
+@migration(3, 'Índice único (user_id, date) en progress_entry para el upsert de la importación masiva')
+def unique_progress_entry_dates(connection):
+    # create_all no añade índices a tablas existentes: las bases anteriores tienen
+    # el índice sin UNIQUE (o ninguno) y el ON CONFLICT de la importación falla
+    table = db.metadata.tables['progress_entry']
+    index = next(index for index in table.indexes if index.name == 'ix_progress_entry_user_date')
+    existing = next((found for found in inspect(connection).get_indexes(table.name) if found['name'] == index.name), None)
+    if existing is not None and existing['unique']:
+        return
+    _dedupe_progress_entries(connection)
+    if existing is not None:
+        index.drop(connection)
+    index.create(connection)
+
+
+@migration(4, 'Agregados de progreso (rollups) de todas las entradas existentes')
+def backfill_progress_rollups(connection):
+    # Antes se reconstruían al consultar y solo si el usuario no tenía ningún
+    # agregado: con una entrada nueva, sus periodos anteriores quedaban sin agregar
+    from src.services.progress_rollups import ROLLUP_PERIODS, rollup_values
+
+    entries = db.metadata.tables['progress_entry']
+    rollups = db.metadata.tables['progress_rollup']
+    connection.execute(rollups.delete())
+    rows = connection.execution_options(yield_per=10000).execute(
+        select(entries.c.user_id, entries.c.date, entries.c.weight, entries.c.body_fat_percentage)
+        .order_by(entries.c.user_id, entries.c.date)
+    )
+    for user_id, user_rows in groupby(rows, key=itemgetter(0)):
+        user_rows = [row[1:] for row in user_rows]
+        for period in ROLLUP_PERIODS:
+            connection.execute(insert(rollups), rollup_values(user_id, period, user_rows))
+
+
+@migration(5, 'Columnas de planes en binario (bytea en PostgreSQL) con el códec configurado')
+def binary_plan_blobs(connection):
+    # Las columnas PlanBlob son LargeBinary: en PostgreSQL un TEXT antiguo hace fallar cada escritura
+    from src.models.plan_blob import get_codec
+    from src.models.plan_blob_migration import convert_columns_to_binary, reencode_plan_blobs
+
+    convert_columns_to_binary(connection)
+    reencode_plan_blobs(connection, get_codec())
+
+
+def head_version():
+    return MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    """Versión aplicada; 0 si la base está vacía y None si tiene tablas sin versionar (creadas con create_all)"""
+    inspector = inspect(connection)
+    if inspector.has_table(schema_version.name):
+        return connection.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())).scalar() or 0
+    return None if inspector.has_table('user') else 0
+
+
+def _record(connection, version, description):
+    connection.execute(insert(schema_version).values(
+        version=version, description=description, applied_at=datetime.utcnow()
+    ))
+
+
+def upgrade(engine):
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas.
+
+    Una base vacía se crea directamente con el esquema actual (db.metadata) y
+    se marca en la última versión; una base creada con create_all sin versionar
+    se toma como anterior a la migración 1, que solo añade lo que falte.
+    """
+    with engine.begin() as connection:
+        version = current_version(connection)
+        _version_metadata.create_all(connection)
+        if version == 0:
+            db.metadata.create_all(connection)
+            for number, description, _ in MIGRATIONS:
+                _record(connection, number, description)
+            return [number for number, _, _ in MIGRATIONS]
+
+    applied = []
+    for number, description, upgrade_step in MIGRATIONS:
+        if version is not None and number <= version:
+            continue
+        with engine.begin() as connection:
+            upgrade_step(connection)
+            _record(connection, number, description)
+        applied.append(number)
+    return applied
+
+
+def migrate(app):
+    """Aplica las migraciones a la base de datos de la app (scripts, benchmarks y servidor de desarrollo)"""
+    with app.app_context():
+        return upgrade(db.engine)
+
+
+@click.command('migrate-schema')
+@click.option('--status', is_flag=True, help='Solo muestra la versión actual y la última disponible')
+@with_appcontext
+def migrate_schema_command(status):
+    """Aplica las migraciones de esquema pendientes (sustituye a db.create_all al arrancar)"""
+    if status:
+        with db.engine.connect() as connection:
+            version = current_version(connection)
+        click.echo(f"Versión del esquema: {'sin versionar' if version is None else version} (última: {head_version()})")
+        return
+
+    applied = upgrade(db.engine)
+    if applied:
+        click.echo(f"Migraciones aplicadas: {', '.join(str(number) for number in applied)}")
+    else:
+        click.echo(f'El esquema ya está en la versión {head_version()}')
@@ -0,0 +1,170 @@
+from sqlalchemy.types import LargeBinary, TypeDecorator
+from src.json_provider import RawJSON
+import json
+import os
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional; sin él solo hay códecs JSON
+    msgpack = None
+
+
+class JsonCodec:
+    """JSON sin comprimir (formato histórico, sin byte de versión)"""
+    name = 'json'
+    version = None
+
+    def encode(self, value):
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def encode_json(self, json_bytes):
+        return json_bytes
+
+    def decode(self, payload):
+        return json.loads(payload)
+
+    def to_json(self, payload):
+        return payload
+
+
+class ZlibJsonCodec(JsonCodec):
+    """JSON compacto comprimido con zlib"""
+    name = 'json-zlib'
+    version = 1
+
+    def encode(self, value):
+        return self.encode_json(super().encode(value))
+
+    def encode_json(self, json_bytes):
+        return zlib.compress(json_bytes, 6)
+
+    def decode(self, payload):
+        return json.loads(zlib.decompress(payload))
+
+    def to_json(self, payload):
+        return zlib.decompress(payload)
+
+
+class ZlibMsgpackCodec:
+    """MessagePack comprimido con zlib"""
+    name = 'msgpack-zlib'
+    version = 2
+
+    def encode(self, value):
+        if msgpack is None:
+            raise RuntimeError('El códec msgpack-zlib requiere el paquete msgpack')
+        return zlib.compress(msgpack.packb(value, use_bin_type=True), 6)
+
+    def encode_json(self, json_bytes):
+        return self.encode(json.loads(json_bytes))
+
+    def decode(self, payload):
+        if msgpack is None:
+            raise RuntimeError('El códec msgpack-zlib requiere el paquete msgpack')
+        return msgpack.unpackb(zlib.decompress(payload), raw=False)
+
+    def to_json(self, payload):
+        return JsonCodec().encode(self.decode(payload))
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), ZlibJsonCodec(), ZlibMsgpackCodec())}
+CODECS_BY_VERSION = {codec.version: codec for codec in CODECS.values() if codec.version is not None}
+
+
+def get_codec(name=None):
+    """Códec para escrituras nuevas (PLAN_BLOB_CODEC, por defecto json-zlib)"""
+    name = name or os.environ.get('PLAN_BLOB_CODEC', 'json-zlib')
+    if name not in CODECS:
+        raise ValueError(f'Códec de planes desconocido: {name}')
+    return CODECS[name]
+
+
+def split_payload(raw):
+    """Devuelve (códec, payload) para un valor leído de la base de datos"""
+    if isinstance(raw, str):
+        return CODECS['json'], raw.encode('utf-8')
+    raw = bytes(raw)
+    codec = CODECS_BY_VERSION.get(raw[0]) if raw else None
+    if codec is None:
+        # Filas antiguas: texto JSON guardado tal cual
+        return CODECS['json'], raw
+    return codec, raw[1:]
+
+
+class StoredJSON:
+    """Valor JSON guardado en una columna PlanBlob; se decodifica solo al usarlo"""
+
+    __slots__ = ('codec', 'payload', '_value')
+    _MISSING = object()
+
+    def __init__(self, codec, payload):
+        self.codec = codec
+        self.payload = payload
+        self._value = self._MISSING
+
+    @property
+    def value(self):
+        if self._value is self._MISSING:
+            self._value = self.codec.decode(self.payload)
+        return self._value
+
+    def json_bytes(self):
+        """Texto JSON (UTF-8) del valor; sin decodificar para los códecs JSON"""
+        return self.codec.to_json(self.payload)
+
+
+def plan_value(field, default=None):
+    """Valor Python de una columna PlanBlob, admita lo que admita el atributo"""
+    if field is None or field == '':
+        return {} if default is None else default
+    if isinstance(field, StoredJSON):
+        return field.value
+    if isinstance(field, (str, bytes)):
+        return StoredJSON(*split_payload(field)).value
+    return field
+
+
+def plan_json(field):
+    """Fragmento RawJSON de una columna PlanBlob, para incrustarlo sin decodificar"""
+    if isinstance(field, StoredJSON):
+        return RawJSON(field.json_bytes())
+    return plan_value(field)
+
+
+def encode_value(value, codec):
+    """Bytes a guardar para value (dict, texto JSON o StoredJSON) con el códec dado"""
+    if isinstance(value, StoredJSON):
+        if value.codec is codec:
+            payload = value.payload
+        else:
+            payload = codec.encode_json(value.json_bytes())
+    elif isinstance(value, str):
+        payload = codec.encode_json(value.encode('utf-8'))
+    else:
+        payload = codec.encode(value)
+
+    if codec.version is None:
+        return payload
+    return bytes([codec.version]) + payload
+
+
+class PlanBlob(TypeDecorator):
+    """Columna binaria para blobs de planes con códec configurable y byte de versión.
+
+    Acepta dicts/listas, texto JSON o StoredJSON al escribir y devuelve
+    StoredJSON al leer. Las filas antiguas con texto JSON se siguen leyendo.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode_value(value, get_codec())
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return StoredJSON(*split_payload(value))
@@ -0,0 +1,88 @@
+from flask.cli import with_appcontext
+from sqlalchemy import LargeBinary, inspect, literal, select, text, type_coerce, update
+from src.models.plan_blob import encode_value, get_codec, split_payload, StoredJSON
+from src.models.user import WorkoutPlan, NutritionPlan, db
+import click
+
+# Columnas PlanBlob a migrar
+PLAN_BLOB_COLUMNS = (
+    (WorkoutPlan, ('plan_data',)),
+    (NutritionPlan, ('macros', 'meal_plan'))
+)
+
+
+def convert_columns_to_binary(connection):
+    """En PostgreSQL las columnas TEXT antiguas deben pasar a bytea (SQLite no lo necesita)"""
+    if connection.dialect.name != 'postgresql':
+        return
+
+    inspector = inspect(connection)
+    for model, columns in PLAN_BLOB_COLUMNS:
+        table = model.__tablename__
+        current = {column['name']: column['type'] for column in inspector.get_columns(table)}
+        for column in columns:
+            if column in current and current[column].__class__.__name__.upper() == 'TEXT':
+                connection.execute(text(
+                    f'ALTER TABLE "{table}" ALTER COLUMN {column} TYPE bytea '
+                    f"USING convert_to({column}, 'UTF8')"
+                ))
+
+
+def reencode_plan_blobs(connection, codec, batch_size=500, on_batch=None):
+    """Re-codifica con codec los blobs guardados con otro. Devuelve filas actualizadas.
+
+    Lee por lotes de id; on_batch() se llama tras cada lote (el comando lo usa
+    para confirmar la transacción de a poco).
+    """
+    migrated = 0
+    for model, columns in PLAN_BLOB_COLUMNS:
+        table = model.__table__
+        # Lectura cruda (sin el TypeDecorator)
+        raw_columns = [type_coerce(table.c[column], LargeBinary) for column in columns]
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(table.c.id, *raw_columns).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            for row in rows:
+                values = {}
+                for column, raw in zip(columns, row[1:]):
+                    if raw is None:
+                        continue
+                    current_codec, payload = split_payload(raw)
+                    if current_codec is not codec:
+                        encoded = encode_value(StoredJSON(current_codec, payload), codec)
+                        values[column] = literal(encoded, LargeBinary)
+                if values:
+                    connection.execute(update(table).where(table.c.id == row.id).values(**values))
+                    migrated += 1
+            last_id = rows[-1].id
+            if on_batch:
+                on_batch()
+
+    return migrated
+
+
+def migrate_plan_blobs(codec_name=None, batch_size=500):
+    """Cambia los blobs de planes al códec indicado (por defecto PLAN_BLOB_CODEC). Devuelve filas actualizadas.
+
+    El paso de las columnas a binario es la migración de esquema 5 (flask migrate-schema).
+    """
+    codec = get_codec(codec_name)
+    with db.engine.connect() as connection:
+        migrated = reencode_plan_blobs(connection, codec, batch_size, on_batch=connection.commit)
+        connection.commit()
+    return migrated
+
+
+@click.command('migrate-plan-blobs')
+@click.option('--codec', default=None, help='Códec destino (json, json-zlib, msgpack-zlib)')
+@click.option('--batch-size', default=500, show_default=True)
+@with_appcontext
+def migrate_plan_blobs_command(codec, batch_size):
+    """Re-codifica plan_data, macros y meal_plan con otro códec (tras flask migrate-schema)"""
+    migrated = migrate_plan_blobs(codec, batch_size)
+    click.echo(f'Planes migrados: {migrated}')
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from src.models.plan_blob import PlanBlob, plan_json, plan_value
 from datetime import datetime
 import json
 
@@ -20,10 +21,12 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relaciones
-    workout_plans = db.relationship('WorkoutPlan', backref='user', lazy=True, cascade='all, delete-orphan')
-    nutrition_plans = db.relationship('NutritionPlan', backref='user', lazy=True, cascade='all, delete-orphan')
-    progress_entries = db.relationship('ProgressEntry', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Relaciones; al borrar el usuario la base de datos elimina sus filas (ON DELETE CASCADE)
+    # sin cargarlas en la sesión (passive_deletes)
+    workout_plans = db.relationship('WorkoutPlan', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    nutrition_plans = db.relationship('NutritionPlan', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    progress_entries = db.relationship('ProgressEntry', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    plan_feedback = db.relationship('PlanFeedback', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def to_dict(self):
         return {
@@ -43,18 +46,24 @@ class User(db.Model):
         }
 
 class WorkoutPlan(db.Model):
+    __table_args__ = (
+        db.Index('ix_workout_plan_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     duration_weeks = db.Column(db.Integer, nullable=False)
     difficulty_level = db.Column(db.String(20), nullable=False)
-    plan_data = db.Column(db.Text, nullable=False)  # JSON string with workout details
+    plan_data = db.Column(PlanBlob, nullable=False)  # workout details (codec in plan_blob.py)
     ai_generated = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=False)
     
-    def to_dict(self):
+    def to_dict(self, raw_json=False):
+        # raw_json: incrustar el blob guardado como RawJSON en lugar de decodificarlo
+        blob = plan_json if raw_json else plan_value
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -62,26 +71,45 @@ class WorkoutPlan(db.Model):
             'description': self.description,
             'duration_weeks': self.duration_weeks,
             'difficulty_level': self.difficulty_level,
-            'plan_data': json.loads(self.plan_data) if self.plan_data else {},
+            'plan_data': blob(self.plan_data),
+            'ai_generated': self.ai_generated,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'is_active': self.is_active
+        }
+    
+    def to_summary_dict(self):
+        """Versión ligera para listados (sin plan_data)"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'duration_weeks': self.duration_weeks,
+            'difficulty_level': self.difficulty_level,
             'ai_generated': self.ai_generated,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'is_active': self.is_active
         }
 
 class NutritionPlan(db.Model):
+    __table_args__ = (
+        db.Index('ix_nutrition_plan_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     duration_weeks = db.Column(db.Integer, nullable=False)
     daily_calories = db.Column(db.Integer, nullable=False)
-    macros = db.Column(db.Text, nullable=False)  # JSON string with macronutrient breakdown
-    meal_plan = db.Column(db.Text, nullable=False)  # JSON string with meal details
+    macros = db.Column(PlanBlob, nullable=False)  # macronutrient breakdown (codec in plan_blob.py)
+    meal_plan = db.Column(PlanBlob, nullable=False)  # meal details (codec in plan_blob.py)
     ai_generated = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=False)
     
-    def to_dict(self):
+    def to_dict(self, raw_json=False):
+        # raw_json: incrustar los blobs guardados como RawJSON en lugar de decodificarlos
+        blob = plan_json if raw_json else plan_value
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -89,16 +117,33 @@ class NutritionPlan(db.Model):
             'description': self.description,
             'duration_weeks': self.duration_weeks,
             'daily_calories': self.daily_calories,
-            'macros': json.loads(self.macros) if self.macros else {},
-            'meal_plan': json.loads(self.meal_plan) if self.meal_plan else {},
+            'macros': blob(self.macros),
+            'meal_plan': blob(self.meal_plan),
+            'ai_generated': self.ai_generated,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'is_active': self.is_active
+        }
+    
+    def to_summary_dict(self):
+        """Versión ligera para listados (sin macros ni meal_plan)"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'duration_weeks': self.duration_weeks,
+            'daily_calories': self.daily_calories,
             'ai_generated': self.ai_generated,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'is_active': self.is_active
         }
 
 class ProgressEntry(db.Model):
+    __table_args__ = (
+        db.Index('ix_progress_entry_user_date', 'user_id', 'date', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     date = db.Column(db.Date, nullable=False)
     weight = db.Column(db.Float, nullable=True)
     body_fat_percentage = db.Column(db.Float, nullable=True)
@@ -118,9 +163,51 @@ class ProgressEntry(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class ProgressRollup(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'period', 'period_start', name='uq_progress_rollup_period'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    period = db.Column(db.String(10), nullable=False)  # 'week' or 'month'
+    period_start = db.Column(db.Date, nullable=False)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    weight_avg = db.Column(db.Float, nullable=True)
+    weight_min = db.Column(db.Float, nullable=True)
+    weight_max = db.Column(db.Float, nullable=True)
+    body_fat_avg = db.Column(db.Float, nullable=True)
+    body_fat_min = db.Column(db.Float, nullable=True)
+    body_fat_max = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'period': self.period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'entry_count': self.entry_count,
+            'weight_avg': self.weight_avg,
+            'weight_min': self.weight_min,
+            'weight_max': self.weight_max,
+            'body_fat_avg': self.body_fat_avg,
+            'body_fat_min': self.body_fat_min,
+            'body_fat_max': self.body_fat_max
+        }
+
+class DataVersion(db.Model):
+    # Contador por usuario y recurso; las escrituras lo incrementan y los GET lo usan como ETag
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    scope = db.Column(db.String(20), primary_key=True)  # 'plans' or 'progress'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class PlanFeedback(db.Model):
+    __table_args__ = (
+        db.Index('ix_plan_feedback_user_type_created', 'user_id', 'plan_type', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     plan_type = db.Column(db.String(20), nullable=False)  # 'workout' or 'nutrition'
     plan_id = db.Column(db.Integer, nullable=False)
     rating = db.Column(db.Integer, nullable=False)  # 1-5 scale
@@ -142,3 +229,42 @@ class PlanFeedback(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+class CachedPlan(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False, index=True)  # sha256 de las entradas del prompt
+    plan_type = db.Column(db.String(20), nullable=False)  # 'workout' or 'nutrition'
+    plan_data = db.Column(db.Text, nullable=False)  # JSON string con el plan generado
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cache_key': self.cache_key,
+            'plan_type': self.plan_type,
+            'hit_count': self.hit_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+
+class IdempotencyRecord(db.Model):
+    # Respuesta guardada de una petición con cabecera Idempotency-Key; status_code nulo = en curso
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    idempotency_key = db.Column(db.String(255), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 de método, ruta y cuerpo
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    response_headers = db.Column(db.Text, nullable=True)  # JSON con las cabeceras que se reenvían
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_idempotency_user_key'),
+    )
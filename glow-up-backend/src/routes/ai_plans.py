@@ -1,117 +1,402 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from src.models.user import User, WorkoutPlan, NutritionPlan, PlanFeedback, db
 from src.routes.auth import token_required
+from src.services.jobs import job_manager, JobQueueFull
+from src.services.plan_cache import plan_cache, fingerprint
+from src.services.json_stream import JsonSectionStream, extract_json
+from src.json_provider import supports_raw_json
+from src.services.etags import conditional_get, bump_version
+from src.services.metrics import timed_section, track_llm
+from src.services.idempotency import idempotent
+from src.services.rate_limit import rate_limited
+from src.services.admission import generation_admission, AdmissionRejected
+from src.services.single_flight import plan_flights
+from src.services import llm_guard, local_planner, prompt_builder
+from src.services.llm_client import get_openai, llm_configured
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import defer
+import base64
 import json
-import openai
-import os
+import time
 from datetime import datetime, timedelta
 
 ai_plans_bp = Blueprint('ai_plans', __name__)
 
-# Configurar OpenAI (se configurará cuando se proporcione la API key)
-openai.api_key = os.environ.get('OPENAI_API_KEY')
-
 @ai_plans_bp.route('/generate-workout-plan', methods=['POST'])
 @token_required
+@rate_limited('generate')
+@idempotent('generate-workout-plan')
 def generate_workout_plan(current_user):
     try:
         data = request.json
         duration_weeks = data.get('duration_weeks', 4)
         
-        # Obtener feedback previo para personalización
-        previous_feedback = PlanFeedback.query.filter_by(
-            user_id=current_user.id,
-            plan_type='workout'
-        ).order_by(PlanFeedback.created_at.desc()).limit(5).all()
+        # Modo asíncrono: devolver el id del trabajo de inmediato
+        if wants_async(data):
+            job = job_manager.submit(
+                current_app._get_current_object(),
+                current_user.id,
+                'workout',
+                run_workout_plan_job,
+                current_user.id,
+                duration_weeks,
+                coalesce_key=duration_weeks
+            )
+            return jsonify({
+                'message': 'Generación del plan de entrenamiento en curso',
+                'job': job.to_dict()
+            }), 202, {'Location': f'/api/jobs/{job.id}'}
         
-        # Construir prompt para OpenAI
-        prompt = build_workout_prompt(current_user, duration_weeks, previous_feedback)
+        # Peticiones simultáneas del mismo usuario comparten una única generación
+        # y ocupan un único hueco del límite global de generaciones en curso
+        def generate():
+            with generation_admission.slot():
+                plan, generation = create_workout_plan(current_user, duration_weeks)
+            return plan.to_dict(raw_json=supports_raw_json(current_app)), generation
         
-        # Generar plan con OpenAI (simulado por ahora)
-        if openai.api_key:
-            plan_data = generate_with_openai(prompt, 'workout')
-        else:
-            plan_data = generate_mock_workout_plan(current_user, duration_weeks)
-        
-        # Guardar plan en la base de datos
-        workout_plan = WorkoutPlan(
-            user_id=current_user.id,
-            title=f"Plan de Entrenamiento - {duration_weeks} semanas",
-            description=f"Plan personalizado para {current_user.goal}",
-            duration_weeks=duration_weeks,
-            difficulty_level=current_user.experience_level,
-            plan_data=json.dumps(plan_data),
-            ai_generated=True,
-            is_active=True
-        )
-        
-        # Desactivar planes anteriores
-        WorkoutPlan.query.filter_by(user_id=current_user.id, is_active=True).update({'is_active': False})
-        
-        db.session.add(workout_plan)
-        db.session.commit()
+        (plan, generation), coalesced = plan_flights.do(('workout', current_user.id, duration_weeks), generate)
         
         return jsonify({
             'message': 'Plan de entrenamiento generado exitosamente',
-            'plan': workout_plan.to_dict()
-        }), 201
+            'plan': plan,
+            'generation': generation
+        }), 201, {'X-Coalesced': 'true'} if coalesced else {}
         
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except AdmissionRejected as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @ai_plans_bp.route('/generate-nutrition-plan', methods=['POST'])
 @token_required
+@rate_limited('generate')
+@idempotent('generate-nutrition-plan')
 def generate_nutrition_plan(current_user):
     try:
         data = request.json
         duration_weeks = data.get('duration_weeks', 4)
         
-        # Obtener feedback previo para personalización
-        previous_feedback = PlanFeedback.query.filter_by(
-            user_id=current_user.id,
-            plan_type='nutrition'
-        ).order_by(PlanFeedback.created_at.desc()).limit(5).all()
+        # Modo asíncrono: devolver el id del trabajo de inmediato
+        if wants_async(data):
+            job = job_manager.submit(
+                current_app._get_current_object(),
+                current_user.id,
+                'nutrition',
+                run_nutrition_plan_job,
+                current_user.id,
+                duration_weeks,
+                coalesce_key=duration_weeks
+            )
+            return jsonify({
+                'message': 'Generación del plan nutricional en curso',
+                'job': job.to_dict()
+            }), 202, {'Location': f'/api/jobs/{job.id}'}
         
-        # Construir prompt para OpenAI
-        prompt = build_nutrition_prompt(current_user, duration_weeks, previous_feedback)
+        # Peticiones simultáneas del mismo usuario comparten una única generación
+        # y ocupan un único hueco del límite global de generaciones en curso
+        def generate():
+            with generation_admission.slot():
+                plan, generation = create_nutrition_plan(current_user, duration_weeks)
+            return plan.to_dict(raw_json=supports_raw_json(current_app)), generation
         
-        # Generar plan con OpenAI (simulado por ahora)
-        if openai.api_key:
-            plan_data = generate_with_openai(prompt, 'nutrition')
-        else:
-            plan_data = generate_mock_nutrition_plan(current_user, duration_weeks)
+        (plan, generation), coalesced = plan_flights.do(('nutrition', current_user.id, duration_weeks), generate)
         
-        # Calcular calorías diarias basadas en el objetivo del usuario
-        daily_calories = calculate_daily_calories(current_user)
+        return jsonify({
+            'message': 'Plan nutricional generado exitosamente',
+            'plan': plan,
+            'generation': generation
+        }), 201, {'X-Coalesced': 'true'} if coalesced else {}
         
-        # Guardar plan en la base de datos
-        nutrition_plan = NutritionPlan(
-            user_id=current_user.id,
-            title=f"Plan Nutricional - {duration_weeks} semanas",
-            description=f"Plan personalizado para {current_user.goal}",
-            duration_weeks=duration_weeks,
-            daily_calories=daily_calories,
-            macros=json.dumps(plan_data['macros']),
-            meal_plan=json.dumps(plan_data['meal_plan']),
-            ai_generated=True,
-            is_active=True
-        )
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except AdmissionRejected as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+    except local_planner.UnsupportedDiet as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@ai_plans_bp.route('/generate-workout-plan/stream', methods=['POST'])
+@token_required
+@rate_limited('generate')
+def stream_workout_plan(current_user):
+    data = request.json or {}
+    duration_weeks = data.get('duration_weeks', 4)
+    
+    previous_feedback = get_previous_feedback(current_user, 'workout')
+    prompt = None
+    cache_key = None
+    if llm_configured() and not local_planner.should_plan_locally(current_user, 'workout'):
+        inputs = workout_prompt_inputs(current_user, duration_weeks, previous_feedback)
+        prompt, _ = prompt_builder.workout_prompt(inputs)
+        cache_key = fingerprint('workout', inputs)
+    
+    def save(plan_data, ai_generated):
+        return save_workout_plan(current_user, duration_weeks, plan_data, ai_generated)
+    
+    return admitted_sse_response(stream_plan_events(
+        'workout', prompt, cache_key, WORKOUT_STREAM_SECTIONS,
+        lambda: generate_local_workout_plan(current_user, duration_weeks, previous_feedback),
+        save, wants_tokens()
+    ))
+
+@ai_plans_bp.route('/generate-nutrition-plan/stream', methods=['POST'])
+@token_required
+@rate_limited('generate')
+def stream_nutrition_plan(current_user):
+    data = request.json or {}
+    duration_weeks = data.get('duration_weeks', 4)
+    
+    previous_feedback = get_previous_feedback(current_user, 'nutrition')
+    prompt = None
+    cache_key = None
+    if llm_configured() and not local_planner.should_plan_locally(current_user, 'nutrition'):
+        inputs = nutrition_prompt_inputs(current_user, duration_weeks, previous_feedback)
+        prompt, _ = prompt_builder.nutrition_prompt(inputs)
+        cache_key = fingerprint('nutrition', inputs)
+    
+    def save(plan_data, ai_generated):
+        return save_nutrition_plan(current_user, duration_weeks, plan_data, ai_generated)
+    
+    return admitted_sse_response(stream_plan_events(
+        'nutrition', prompt, cache_key, NUTRITION_STREAM_SECTIONS,
+        lambda: generate_local_nutrition_plan(current_user, duration_weeks, previous_feedback),
+        save, wants_tokens()
+    ))
+
+# Sub-secciones que se envían en cuanto el modelo termina de escribirlas
+WORKOUT_STREAM_SECTIONS = [('weekly_schedule', '*'), ('progression',)]
+NUTRITION_STREAM_SECTIONS = [('macros',), ('meal_plan', '*', '*')]
+
+def wants_async(data):
+    """Indica si el cliente pidió generar el plan en segundo plano"""
+    if request.headers.get('Prefer', '').lower() == 'respond-async':
+        return True
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool(data.get('async', False))
+
+def wants_tokens():
+    """Indica si el cliente quiere también los tokens crudos del modelo"""
+    return request.args.get('tokens', '').lower() in ('1', 'true', 'yes')
+
+def sse_event(event, data):
+    """Formatea un evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def admitted_sse_response(events):
+    """sse_response que ocupa un hueco de generación hasta que se cierra la respuesta (503 si no lo hay)"""
+    try:
+        generation_admission.acquire()
+    except AdmissionRejected as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+    response = sse_response(events)
+    response.call_on_close(generation_admission.release)
+    return response
+
+def stream_plan_events(plan_type, prompt, cache_key, sections, local_plan, save_plan, send_tokens=False):
+    """Genera los eventos SSE: start, section*, (token*), (fallback), plan | error (sin prompt se usa el plan local)"""
+    yield sse_event('start', {'plan_type': plan_type})
+    
+    try:
+        parser = JsonSectionStream(sections)
+        plan_data = plan_cache.get(cache_key) if prompt else None
+        generation = llm_guard.generation_info(plan_type, 'cache') if plan_data is not None else None
         
-        # Desactivar planes anteriores
-        NutritionPlan.query.filter_by(user_id=current_user.id, is_active=True).update({'is_active': False})
+        if plan_data is None and prompt:
+            deadline = llm_guard.request_deadline()
+            started = time.perf_counter()
+            try:
+                for text in stream_with_openai(prompt, plan_type, deadline):
+                    if send_tokens:
+                        yield sse_event('token', {'text': text})
+                    for path, value in parser.feed(text):
+                        yield sse_event('section', {'path': list(path), 'data': value})
+                plan_data = extract_json(parser.text)
+                plan_cache.set(cache_key, plan_type, plan_data)
+                generation = llm_guard.generation_info(
+                    plan_type, 'llm', llm_seconds=time.perf_counter() - started, deadline=deadline,
+                    prompt_tokens=prompt_builder.count_tokens(prompt))
+            except Exception as e:
+                # Fallback al plan local si OpenAI falla, tarda demasiado o el circuito está abierto
+                reason = llm_guard.failure_reason(e)
+                current_app.logger.warning('Stream del LLM (%s) degradado a plan local: %s', plan_type, e)
+                yield sse_event('fallback', {'reason': reason})
+                parser = JsonSectionStream(sections)
+                plan_data = local_plan()
+                generation = llm_guard.generation_info(
+                    plan_type, 'fallback', reason, time.perf_counter() - started, deadline,
+                    prompt_builder.count_tokens(prompt))
+        elif plan_data is None:
+            plan_data = local_plan()
+            generation = llm_guard.generation_info(plan_type, 'local')
         
-        db.session.add(nutrition_plan)
-        db.session.commit()
+        # Plan completo de caché o local: enviar igualmente por secciones
+        if not parser.text:
+            for path, value in parser.feed(json.dumps(plan_data)):
+                yield sse_event('section', {'path': list(path), 'data': value})
         
-        return jsonify({
-            'message': 'Plan nutricional generado exitosamente',
-            'plan': nutrition_plan.to_dict()
-        }), 201
+        plan = save_plan(plan_data, generation['source'] in ('llm', 'cache'))
+        yield sse_event('plan', {'plan': plan.to_dict(), 'generation': generation})
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+        yield sse_event('error', {'error': str(e)})
+
+def lock_user(user_id, session=None):
+    """Serializa las escrituras de planes de un usuario (SELECT ... FOR UPDATE; SQLite ya serializa escrituras)"""
+    (session or db.session).query(User.id).filter_by(id=user_id).with_for_update().scalar()
+
+def activate_plan(session, plan):
+    """Añade el plan como activo y desactiva los anteriores del mismo tipo, sin hacer commit.
+    
+    La fila del usuario queda bloqueada para que dos guardados simultáneos no
+    dejen dos planes activos. session es db.session o la síncrona de una AsyncSession.
+    """
+    lock_user(plan.user_id, session)
+    session.query(type(plan)).filter_by(user_id=plan.user_id, is_active=True).update({'is_active': False})
+    bump_version(plan.user_id, 'plans', session)
+    session.add(plan)
+
+def get_previous_feedback(user, plan_type):
+    """Obtiene feedback previo para personalización"""
+    return PlanFeedback.query.filter_by(
+        user_id=user.id,
+        plan_type=plan_type
+    ).order_by(PlanFeedback.created_at.desc()).limit(5).all()
+
+def create_workout_plan(user, duration_weeks):
+    """Genera un plan de entrenamiento, lo guarda como plan activo y devuelve (plan, metadatos de generación)"""
+    with timed_section('workout', 'feedback'):
+        previous_feedback = get_previous_feedback(user, 'workout')
+    
+    def local_plan():
+        return generate_local_workout_plan(user, duration_weeks, previous_feedback)
+    
+    if llm_configured() and not local_planner.should_plan_locally(user, 'workout'):
+        # Construir prompt para OpenAI
+        with timed_section('workout', 'prompt'):
+            inputs = workout_prompt_inputs(user, duration_weeks, previous_feedback)
+            prompt, _ = prompt_builder.workout_prompt(inputs)
+            cache_key = fingerprint('workout', inputs)
+        
+        with timed_section('workout', 'generate'):
+            plan_data, generation = generate_with_openai(prompt, 'workout', cache_key, fallback=local_plan)
+    else:
+        # Generador local basado en reglas (sin LLM)
+        with timed_section('workout', 'local'):
+            plan_data = local_plan()
+        generation = llm_guard.generation_info('workout', 'local')
+    
+    with timed_section('workout', 'save'):
+        ai_generated = generation['source'] in ('llm', 'cache')
+        return save_workout_plan(user, duration_weeks, plan_data, ai_generated), generation
+
+def new_workout_plan(user, duration_weeks, plan_data, ai_generated=True):
+    """Plan de entrenamiento activo sin guardar"""
+    return WorkoutPlan(
+        user_id=user.id,
+        title=f"Plan de Entrenamiento - {duration_weeks} semanas",
+        description=f"Plan personalizado para {user.goal}",
+        duration_weeks=duration_weeks,
+        difficulty_level=user.experience_level,
+        plan_data=plan_data,
+        ai_generated=ai_generated,
+        is_active=True
+    )
+
+def save_workout_plan(user, duration_weeks, plan_data, ai_generated=True):
+    """Guarda el plan de entrenamiento y desactiva los anteriores"""
+    workout_plan = new_workout_plan(user, duration_weeks, plan_data, ai_generated)
+    activate_plan(db.session, workout_plan)
+    db.session.commit()
+    
+    return workout_plan
+
+def create_nutrition_plan(user, duration_weeks):
+    """Genera un plan nutricional, lo guarda como plan activo y devuelve (plan, metadatos de generación)"""
+    with timed_section('nutrition', 'feedback'):
+        previous_feedback = get_previous_feedback(user, 'nutrition')
+    
+    def local_plan():
+        return generate_local_nutrition_plan(user, duration_weeks, previous_feedback)
+    
+    if llm_configured() and not local_planner.should_plan_locally(user, 'nutrition'):
+        # Construir prompt para OpenAI
+        with timed_section('nutrition', 'prompt'):
+            inputs = nutrition_prompt_inputs(user, duration_weeks, previous_feedback)
+            prompt, _ = prompt_builder.nutrition_prompt(inputs)
+            cache_key = fingerprint('nutrition', inputs)
+        
+        with timed_section('nutrition', 'generate'):
+            plan_data, generation = generate_with_openai(prompt, 'nutrition', cache_key, fallback=local_plan)
+    else:
+        # Generador local basado en reglas (sin LLM)
+        with timed_section('nutrition', 'local'):
+            plan_data = local_plan()
+        generation = llm_guard.generation_info('nutrition', 'local')
+    
+    with timed_section('nutrition', 'save'):
+        ai_generated = generation['source'] in ('llm', 'cache')
+        return save_nutrition_plan(user, duration_weeks, plan_data, ai_generated), generation
+
+def new_nutrition_plan(user, duration_weeks, plan_data, ai_generated=True):
+    """Plan nutricional activo sin guardar"""
+    # Calcular calorías diarias basadas en el objetivo del usuario
+    daily_calories = calculate_daily_calories(user)
+    
+    return NutritionPlan(
+        user_id=user.id,
+        title=f"Plan Nutricional - {duration_weeks} semanas",
+        description=f"Plan personalizado para {user.goal}",
+        duration_weeks=duration_weeks,
+        daily_calories=daily_calories,
+        macros=plan_data['macros'],
+        meal_plan=plan_data['meal_plan'],
+        ai_generated=ai_generated,
+        is_active=True
+    )
+
+def save_nutrition_plan(user, duration_weeks, plan_data, ai_generated=True):
+    """Guarda el plan nutricional y desactiva los anteriores"""
+    nutrition_plan = new_nutrition_plan(user, duration_weeks, plan_data, ai_generated)
+    activate_plan(db.session, nutrition_plan)
+    db.session.commit()
+    
+    return nutrition_plan
+
+def run_workout_plan_job(user_id, duration_weeks):
+    """Trabajo en segundo plano: genera el plan de entrenamiento de un usuario"""
+    user = User.query.get(user_id)
+    if not user:
+        raise ValueError('Usuario no encontrado')
+    
+    # Los trabajos también cuentan para el límite global de generaciones en curso
+    with generation_admission.slot():
+        plan, generation = create_workout_plan(user, duration_weeks)
+    return {'plan_type': 'workout', 'plan': plan.to_dict(), 'generation': generation}
+
+def run_nutrition_plan_job(user_id, duration_weeks):
+    """Trabajo en segundo plano: genera el plan nutricional de un usuario"""
+    user = User.query.get(user_id)
+    if not user:
+        raise ValueError('Usuario no encontrado')
+    
+    # Los trabajos también cuentan para el límite global de generaciones en curso
+    with generation_admission.slot():
+        plan, generation = create_nutrition_plan(user, duration_weeks)
+    return {'plan_type': 'nutrition', 'plan': plan.to_dict(), 'generation': generation}
 
 @ai_plans_bp.route('/submit-feedback', methods=['POST'])
 @token_required
@@ -143,299 +428,245 @@ def submit_feedback(current_user):
 
 @ai_plans_bp.route('/my-plans', methods=['GET'])
 @token_required
+@conditional_get('plans')
 def get_my_plans(current_user):
     try:
+        # Modo listado: resúmenes paginados por cursor, sin columnas pesadas
+        if request.args.get('view') == 'summary':
+            return get_my_plan_summaries(current_user)
+        
         workout_plans = WorkoutPlan.query.filter_by(user_id=current_user.id).order_by(WorkoutPlan.created_at.desc()).all()
         nutrition_plans = NutritionPlan.query.filter_by(user_id=current_user.id).order_by(NutritionPlan.created_at.desc()).all()
         
+        # Los blobs guardados se incrustan tal cual, sin json.loads + re-encode
+        raw_json = supports_raw_json(current_app)
         return jsonify({
-            'workout_plans': [plan.to_dict() for plan in workout_plans],
-            'nutrition_plans': [plan.to_dict() for plan in nutrition_plans]
+            'workout_plans': [plan.to_dict(raw_json=raw_json) for plan in workout_plans],
+            'nutrition_plans': [plan.to_dict(raw_json=raw_json) for plan in nutrition_plans]
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@ai_plans_bp.route('/plans/workout/<int:plan_id>', methods=['GET'])
+@token_required
+@conditional_get('plans')
+def get_workout_plan(current_user, plan_id):
+    plan = WorkoutPlan.query.filter_by(id=plan_id, user_id=current_user.id).first()
+    if not plan:
+        return jsonify({'error': 'Plan no encontrado'}), 404
+    
+    return jsonify({'plan': plan.to_dict(raw_json=supports_raw_json(current_app))}), 200
+
+@ai_plans_bp.route('/plans/nutrition/<int:plan_id>', methods=['GET'])
+@token_required
+@conditional_get('plans')
+def get_nutrition_plan(current_user, plan_id):
+    plan = NutritionPlan.query.filter_by(id=plan_id, user_id=current_user.id).first()
+    if not plan:
+        return jsonify({'error': 'Plan no encontrado'}), 404
+    
+    return jsonify({'plan': plan.to_dict(raw_json=supports_raw_json(current_app))}), 200
+
+# Columnas JSON grandes que no se cargan en los listados
+PLAN_SUMMARY_DEFERRED = {
+    'workout': (WorkoutPlan, (WorkoutPlan.plan_data,)),
+    'nutrition': (NutritionPlan, (NutritionPlan.macros, NutritionPlan.meal_plan))
+}
+DEFAULT_PLAN_PAGE_SIZE = 20
+MAX_PLAN_PAGE_SIZE = 100
+
+class InvalidCursor(ValueError):
+    """Cursor de paginación mal formado"""
+
+def encode_cursor(plan):
+    payload = json.dumps([plan.created_at.isoformat(), plan.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        created_at, plan_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(plan_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Cursor de paginación inválido')
+
+def get_my_plan_summaries(current_user):
+    """Resúmenes de planes con paginación keyset (created_at, id) por tipo"""
+    limit = min(max(request.args.get('limit', DEFAULT_PLAN_PAGE_SIZE, type=int), 1), MAX_PLAN_PAGE_SIZE)
+    plan_types = [request.args['type']] if request.args.get('type') else list(PLAN_SUMMARY_DEFERRED)
+    
+    response = {'next_cursors': {}}
+    for plan_type in plan_types:
+        if plan_type not in PLAN_SUMMARY_DEFERRED:
+            return jsonify({'error': 'Tipo de plan no válido (workout, nutrition)'}), 400
+        model, heavy_columns = PLAN_SUMMARY_DEFERRED[plan_type]
+        
+        query = model.query.options(*[defer(column) for column in heavy_columns]).filter(
+            model.user_id == current_user.id
+        )
+        
+        cursor = request.args.get(f'{plan_type}_cursor')
+        if cursor:
+            created_at, plan_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < plan_id)
+            ))
+        
+        # Se pide una fila extra para saber si hay más páginas
+        plans = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        has_more = len(plans) > limit
+        plans = plans[:limit]
+        
+        response[f'{plan_type}_plans'] = [plan.to_summary_dict() for plan in plans]
+        response['next_cursors'][plan_type] = encode_cursor(plans[-1]) if has_more else None
+    
+    return jsonify(response), 200
+
+def parse_json_list(value):
+    """Normaliza una lista guardada como JSON (orden y mayúsculas no importan)"""
+    try:
+        items = json.loads(value) if value else []
+    except (TypeError, ValueError):
+        items = [value]
+    if not isinstance(items, list):
+        items = [items]
+    return sorted({str(item).strip().lower() for item in items if str(item).strip()})
+
+def round_or_none(value, digits=1):
+    return round(value, digits) if value is not None else None
+
+def workout_prompt_inputs(user, duration_weeks, previous_feedback):
+    """Entradas normalizadas de las que depende build_workout_prompt"""
+    return {
+        'age': user.age,
+        'weight': round_or_none(user.weight),
+        'height': round_or_none(user.height),
+        'goal': user.goal,
+        'experience_level': user.experience_level,
+        'activity_level': user.activity_level,
+        'equipment_available': parse_json_list(user.equipment_available),
+        'duration_weeks': duration_weeks,
+        'feedback': prompt_builder.summarize_feedback(previous_feedback)
+    }
+
+def nutrition_prompt_inputs(user, duration_weeks, previous_feedback):
+    """Entradas normalizadas de las que depende build_nutrition_prompt"""
+    return {
+        'age': user.age,
+        'weight': round_or_none(user.weight),
+        'height': round_or_none(user.height),
+        'goal': user.goal,
+        'activity_level': user.activity_level,
+        'dietary_restrictions': parse_json_list(user.dietary_restrictions),
+        'daily_calories': calculate_daily_calories(user),
+        'duration_weeks': duration_weeks,
+        'feedback': prompt_builder.summarize_feedback(previous_feedback, include_difficulty=False)
+    }
+
 def build_workout_prompt(user, duration_weeks, previous_feedback):
-    """Construye el prompt para generar un plan de entrenamiento"""
-    feedback_text = ""
-    if previous_feedback:
-        feedback_text = "Feedback de planes anteriores:\n"
-        for feedback in previous_feedback:
-            feedback_text += f"- Rating: {feedback.rating}/5, Dificultad: {feedback.difficulty_rating}/5, Comentario: {feedback.feedback_text}\n"
-    
-    equipment_available = user.equipment_available if user.equipment_available else "Equipo básico de gimnasio"
-    
-    prompt = f"""
-    Genera un plan de entrenamiento personalizado para un usuario con las siguientes características:
-    
-    Información del usuario:
-    - Edad: {user.age} años
-    - Peso: {user.weight} kg
-    - Altura: {user.height} cm
-    - Objetivo: {user.goal}
-    - Nivel de experiencia: {user.experience_level}
-    - Nivel de actividad: {user.activity_level}
-    - Equipo disponible: {equipment_available}
-    
-    Duración del plan: {duration_weeks} semanas
-    
-    {feedback_text}
-    
-    Genera un plan estructurado con:
-    1. Cronograma semanal (7 días)
-    2. Para cada día de entrenamiento: tipo de entrenamiento, grupos musculares, ejercicios específicos
-    3. Para cada ejercicio: series, repeticiones, peso sugerido (si aplica), tempo (para usuarios avanzados)
-    4. Días de descanso y cardio
-    5. Progresión semanal
-    
-    Responde en formato JSON con la estructura especificada.
-    """
+    """Construye el prompt compacto para generar un plan de entrenamiento"""
+    prompt, _ = prompt_builder.workout_prompt(workout_prompt_inputs(user, duration_weeks, previous_feedback))
     return prompt
 
 def build_nutrition_prompt(user, duration_weeks, previous_feedback):
-    """Construye el prompt para generar un plan nutricional"""
-    feedback_text = ""
-    if previous_feedback:
-        feedback_text = "Feedback de planes anteriores:\n"
-        for feedback in previous_feedback:
-            feedback_text += f"- Rating: {feedback.rating}/5, Comentario: {feedback.feedback_text}\n"
-    
-    daily_calories = calculate_daily_calories(user)
-    dietary_restrictions = user.dietary_restrictions if user.dietary_restrictions else "Ninguna"
-    
-    prompt = f"""
-    Genera un plan nutricional personalizado para un usuario con las siguientes características:
+    """Construye el prompt compacto para generar un plan nutricional"""
+    prompt, _ = prompt_builder.nutrition_prompt(nutrition_prompt_inputs(user, duration_weeks, previous_feedback))
+    return prompt
+
+LLM_SYSTEM_PROMPT = "Eres un experto en fitness y nutrición. Genera planes detallados y seguros."
+
+def llm_request(prompt):
+    """Parámetros de ChatCompletion.create/acreate para un prompt de plan"""
+    return {
+        'model': "gpt-4",
+        'messages': [
+            {"role": "system", "content": LLM_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        'max_tokens': 3000,
+        'temperature': 0.7
+    }
+
+def parse_llm_plan(response):
+    """Plan (dict) de la respuesta completa del LLM"""
+    return json.loads(response.choices[0].message.content)
+
+def generate_with_openai(prompt, plan_type, cache_key=None, fallback=None):
+    """Genera plan usando OpenAI API (con caché por huella de entradas); devuelve (plan, metadatos).
     
-    Información del usuario:
-    - Edad: {user.age} años
-    - Peso: {user.weight} kg
-    - Altura: {user.height} cm
-    - Objetivo: {user.goal}
-    - Nivel de actividad: {user.activity_level}
-    - Restricciones dietéticas: {dietary_restrictions}
-    - Calorías diarias objetivo: {daily_calories}
+    La llamada tiene el plazo de la petición y pasa por el circuit breaker; si
+    falla, se agota el plazo o el circuito está abierto se usa fallback() y el
+    motivo queda en los metadatos. Sin fallback el error se propaga.
+    """
+    if cache_key:
+        cached_plan = plan_cache.get(cache_key)
+        if cached_plan is not None:
+            return cached_plan, llm_guard.generation_info(plan_type, 'cache')
     
-    Duración del plan: {duration_weeks} semanas
+    deadline = llm_guard.request_deadline()
+    prompt_tokens = prompt_builder.count_tokens(prompt)
+    app = current_app._get_current_object()
     
-    {feedback_text}
+    def create(timeout):
+        return get_openai().ChatCompletion.create(**llm_request(prompt), request_timeout=timeout)
     
-    Genera un plan estructurado con:
-    1. Distribución de macronutrientes
-    2. Plan de comidas semanal con 2 opciones por comida
-    3. Recetas detalladas con ingredientes y preparación
-    4. Información nutricional por comida
+    def cache_late_response(response):
+        # La respuesta que llega después del plazo se guarda para la próxima petición
+        try:
+            plan_data = parse_llm_plan(response)
+        except (ValueError, AttributeError, IndexError):
+            return
+        if cache_key:
+            with app.app_context():
+                plan_cache.set(cache_key, plan_type, plan_data)
     
-    Responde en formato JSON con la estructura especificada.
-    """
-    return prompt
-
-def generate_with_openai(prompt, plan_type):
-    """Genera plan usando OpenAI API"""
+    started = time.perf_counter()
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Eres un experto en fitness y nutrición. Genera planes detallados y seguros."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=3000,
-            temperature=0.7
-        )
+        with track_llm(plan_type) as call:
+            response = llm_guard.call(create, deadline, on_late=cache_late_response)
+            call['usage'] = getattr(response, 'usage', None)
         
-        plan_text = response.choices[0].message.content
-        return json.loads(plan_text)
+        plan_data = parse_llm_plan(response)
         
     except Exception as e:
-        # Fallback a plan mock si OpenAI falla
-        if plan_type == 'workout':
-            return generate_mock_workout_plan(None, 4)
-        else:
-            return generate_mock_nutrition_plan(None, 4)
-
-def generate_mock_workout_plan(user, duration_weeks):
-    """Genera un plan de entrenamiento mock para pruebas"""
-    return {
-        "weekly_schedule": [
-            {
-                "day": "Lunes",
-                "type": "Fuerza A",
-                "muscle_groups": ["Pecho", "Tríceps", "Hombros"],
-                "duration_minutes": 55,
-                "exercises": [
-                    {
-                        "name": "Press de banca",
-                        "sets": 4,
-                        "reps": "8-10",
-                        "weight_suggestion": "70% 1RM",
-                        "tempo": "2-1-2-1",
-                        "rest_seconds": 90
-                    },
-                    {
-                        "name": "Press militar",
-                        "sets": 3,
-                        "reps": "10-12",
-                        "weight_suggestion": "60% 1RM",
-                        "tempo": "2-0-2-0",
-                        "rest_seconds": 75
-                    }
-                ]
-            },
-            {
-                "day": "Martes",
-                "type": "Cardio",
-                "muscle_groups": ["Cardiovascular"],
-                "duration_minutes": 30,
-                "exercises": [
-                    {
-                        "name": "Caminata rápida",
-                        "sets": 1,
-                        "reps": "30 minutos",
-                        "intensity": "Moderada",
-                        "heart_rate_zone": "60-70%"
-                    }
-                ]
-            },
-            {
-                "day": "Miércoles",
-                "type": "Fuerza B",
-                "muscle_groups": ["Espalda", "Bíceps"],
-                "duration_minutes": 55,
-                "exercises": [
-                    {
-                        "name": "Dominadas",
-                        "sets": 4,
-                        "reps": "6-8",
-                        "weight_suggestion": "Peso corporal",
-                        "tempo": "2-1-2-1",
-                        "rest_seconds": 120
-                    }
-                ]
-            },
-            {
-                "day": "Jueves",
-                "type": "Cardio",
-                "muscle_groups": ["Cardiovascular"],
-                "duration_minutes": 25,
-                "exercises": []
-            },
-            {
-                "day": "Viernes",
-                "type": "Fuerza C",
-                "muscle_groups": ["Piernas", "Glúteos"],
-                "duration_minutes": 60,
-                "exercises": [
-                    {
-                        "name": "Sentadillas",
-                        "sets": 4,
-                        "reps": "10-12",
-                        "weight_suggestion": "80% 1RM",
-                        "tempo": "3-1-1-1",
-                        "rest_seconds": 120
-                    }
-                ]
-            },
-            {
-                "day": "Sábado",
-                "type": "Cardio",
-                "muscle_groups": ["Cardiovascular"],
-                "duration_minutes": 40,
-                "exercises": []
-            },
-            {
-                "day": "Domingo",
-                "type": "Descanso",
-                "muscle_groups": [],
-                "duration_minutes": 0,
-                "exercises": []
-            }
-        ],
-        "progression": {
-            "week_1": "Adaptación - Enfoque en técnica",
-            "week_2": "Incremento de volumen - +10% repeticiones",
-            "week_3": "Intensidad máxima - +5% peso",
-            "week_4": "Deload - -20% volumen para recuperación"
-        }
-    }
+        # Fallback al generador local (no se cachea)
+        if fallback is None:
+            raise
+        reason = llm_guard.failure_reason(e)
+        current_app.logger.warning('LLM (%s) degradado a plan local por %s: %s', plan_type, reason, e)
+        return fallback(), llm_guard.generation_info(
+            plan_type, 'fallback', reason, time.perf_counter() - started, deadline, prompt_tokens)
+    
+    if cache_key:
+        plan_cache.set(cache_key, plan_type, plan_data)
+    
+    return plan_data, llm_guard.generation_info(
+        plan_type, 'llm', llm_seconds=time.perf_counter() - started, deadline=deadline, prompt_tokens=prompt_tokens)
 
-def generate_mock_nutrition_plan(user, duration_weeks):
-    """Genera un plan nutricional mock para pruebas"""
-    return {
-        "macros": {
-            "protein_grams": 150,
-            "carbs_grams": 200,
-            "fat_grams": 80,
-            "protein_percentage": 30,
-            "carbs_percentage": 40,
-            "fat_percentage": 30
-        },
-        "meal_plan": {
-            "week_1": {
-                "monday": {
-                    "breakfast": {
-                        "option_1": {
-                            "name": "Avena con frutas y proteína",
-                            "ingredients": ["100g avena", "1 plátano", "200ml leche descremada", "1 scoop proteína"],
-                            "preparation": "Cocinar la avena con leche, agregar plátano cortado y proteína en polvo",
-                            "calories": 450,
-                            "protein": 35,
-                            "carbs": 55,
-                            "fat": 8
-                        },
-                        "option_2": {
-                            "name": "Huevos revueltos con tostadas",
-                            "ingredients": ["3 huevos", "2 rebanadas pan integral", "1 aguacate", "tomate"],
-                            "preparation": "Revolver huevos, tostar pan, agregar aguacate y tomate",
-                            "calories": 480,
-                            "protein": 25,
-                            "carbs": 35,
-                            "fat": 25
-                        }
-                    },
-                    "lunch": {
-                        "option_1": {
-                            "name": "Pollo con arroz y verduras",
-                            "ingredients": ["150g pechuga de pollo", "100g arroz integral", "verduras mixtas"],
-                            "preparation": "Cocinar pollo a la plancha, hervir arroz, saltear verduras",
-                            "calories": 520,
-                            "protein": 45,
-                            "carbs": 50,
-                            "fat": 12
-                        },
-                        "option_2": {
-                            "name": "Salmón con quinoa",
-                            "ingredients": ["120g salmón", "80g quinoa", "espárragos", "limón"],
-                            "preparation": "Hornear salmón con limón, cocinar quinoa, vapor espárragos",
-                            "calories": 540,
-                            "protein": 40,
-                            "carbs": 45,
-                            "fat": 18
-                        }
-                    },
-                    "dinner": {
-                        "option_1": {
-                            "name": "Ensalada de atún",
-                            "ingredients": ["150g atún en agua", "lechuga", "tomate", "pepino", "aceite oliva"],
-                            "preparation": "Mezclar todos los ingredientes, aliñar con aceite de oliva",
-                            "calories": 320,
-                            "protein": 35,
-                            "carbs": 15,
-                            "fat": 15
-                        },
-                        "option_2": {
-                            "name": "Pavo con vegetales",
-                            "ingredients": ["120g pavo", "brócoli", "calabacín", "pimiento"],
-                            "preparation": "Cocinar pavo a la plancha, saltear vegetales",
-                            "calories": 300,
-                            "protein": 32,
-                            "carbs": 18,
-                            "fat": 10
-                        }
-                    }
-                }
-            }
-        }
-    }
+def stream_with_openai(prompt, plan_type='plan', deadline=None):
+    """Genera plan usando OpenAI API en modo streaming, devolviendo fragmentos de texto"""
+    def create(timeout):
+        return get_openai().ChatCompletion.create(**llm_request(prompt), stream=True, request_timeout=timeout)
+    
+    with track_llm(plan_type, mode='stream'):
+        for chunk in llm_guard.stream(create, deadline or llm_guard.request_deadline()):
+            text = getattr(chunk.choices[0].delta, 'content', None)
+            if text:
+                yield text
+
+def generate_local_workout_plan(user, duration_weeks, previous_feedback=()):
+    """Genera un plan de entrenamiento con el generador local basado en reglas"""
+    return local_planner.generate_workout_plan(user, duration_weeks, previous_feedback)
+
+def generate_local_nutrition_plan(user, duration_weeks, previous_feedback=()):
+    """Genera un plan nutricional con el generador local basado en reglas"""
+    daily_calories = None
+    if user is not None and user.age and user.weight and user.height:
+        daily_calories = calculate_daily_calories(user)
+    return local_planner.generate_nutrition_plan(user, duration_weeks, previous_feedback, daily_calories)
 
 def calculate_daily_calories(user):
     """Calcula las calorías diarias basadas en el perfil del usuario"""
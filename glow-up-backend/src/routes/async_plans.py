@@ -0,0 +1,337 @@
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import defer
+from src.models.user import User, WorkoutPlan, NutritionPlan, PlanFeedback
+from src.routes.auth import decode_token
+from src.routes.ai_plans import (
+    PLAN_SUMMARY_DEFERRED, DEFAULT_PLAN_PAGE_SIZE, MAX_PLAN_PAGE_SIZE, InvalidCursor,
+    activate_plan, decode_cursor, encode_cursor, generate_local_nutrition_plan, generate_local_workout_plan,
+    llm_request, new_nutrition_plan, new_workout_plan, nutrition_prompt_inputs, parse_llm_plan,
+    workout_prompt_inputs
+)
+from src.services.admission import generation_admission, AdmissionRejected
+from src.services.async_http import AsyncRoutes, DELEGATE, HTTPError
+from src.services.etags import get_version, resource_etag
+from src.services.idempotency import IDEMPOTENCY_HEADER
+from src.services.metrics import track_llm
+from src.services.plan_cache import plan_cache, fingerprint
+from src.services import rate_limit
+from src.services.single_flight import AsyncSingleFlight
+from src.services.user_cache import cache_user, get_cached_user, invalidation_mark
+from src.services import llm_guard, local_planner, prompt_builder
+from src.services.llm_client import get_openai, llm_configured
+import asyncio
+import jwt
+import logging
+import time
+
+# Versión asíncrona (modo ASGI) de los endpoints de generación y lectura de planes.
+# Lo que no está portado (modo asíncrono con trabajos, Idempotency-Key, streaming)
+# devuelve DELEGATE y lo atiende la app Flask.
+async_plans_routes = AsyncRoutes(url_prefix='/api')
+
+logger = logging.getLogger(__name__)
+
+PLAN_KINDS = {
+    'workout': {
+        'model': WorkoutPlan,
+        'inputs': workout_prompt_inputs,
+        'prompt': prompt_builder.workout_prompt,
+        'local': generate_local_workout_plan,
+        'new': new_workout_plan,
+        'message': 'Plan de entrenamiento generado exitosamente'
+    },
+    'nutrition': {
+        'model': NutritionPlan,
+        'inputs': nutrition_prompt_inputs,
+        'prompt': prompt_builder.nutrition_prompt,
+        'local': generate_local_nutrition_plan,
+        'new': new_nutrition_plan,
+        'message': 'Plan nutricional generado exitosamente'
+    }
+}
+
+# Generaciones en curso por (tipo, usuario, semanas) en el bucle de eventos
+async_plan_flights = AsyncSingleFlight('plan_generation')
+
+# Tareas de fondo (respuestas tardías del LLM) para que no las recoja el GC
+_background = set()
+
+
+async def authenticate(request, session):
+    """Usuario del token JWT (de la caché de usuarios si está); lanza HTTPError como token_required"""
+    token = request.headers.get('authorization')
+    if not token:
+        raise HTTPError('Token no proporcionado', 401)
+    try:
+        user_id = decode_token(token)
+    except jwt.ExpiredSignatureError:
+        raise HTTPError('Token expirado', 401)
+    except jwt.InvalidTokenError:
+        raise HTTPError('Token inválido', 401)
+
+    user = get_cached_user(user_id)
+    if user is None:
+        mark = invalidation_mark()
+        user = await session.get(User, user_id)
+        if user is None:
+            raise HTTPError('Usuario no encontrado', 404)
+        cache_user(user, mark)
+    return user
+
+
+def wants_async(request, data):
+    """Indica si el cliente pidió generar el plan en segundo plano (ver ai_plans.wants_async)"""
+    if request.headers.get('prefer', '').lower() == 'respond-async':
+        return True
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool(data.get('async', False))
+
+
+@async_plans_routes.route('/generate-workout-plan', methods=['POST'])
+async def generate_workout_plan(request):
+    return await generate_plan(request, 'workout')
+
+
+@async_plans_routes.route('/generate-nutrition-plan', methods=['POST'])
+async def generate_nutrition_plan(request):
+    return await generate_plan(request, 'nutrition')
+
+
+async def generate_plan(request, plan_type):
+    data = request.json()
+    if data is None or wants_async(request, data) or request.headers.get(IDEMPOTENCY_HEADER.lower()):
+        return DELEGATE
+
+    try:
+        duration_weeks = data.get('duration_weeks', 4)
+        async with request.sessions() as session:
+            user = await authenticate(request, session)
+
+        # Mismos buckets que @rate_limited('generate') en la ruta Flask
+        rate_limit.check('generate', {
+            'user': user.id,
+            'ip': rate_limit.client_ip(request.remote_addr, request.headers.get('x-forwarded-for'))
+        })
+
+        # Peticiones simultáneas del mismo usuario comparten una única generación
+        # y ocupan un único hueco del límite global de generaciones en curso
+        async def generate():
+            async with generation_admission.slot():
+                plan, generation = await create_plan(request, plan_type, user, duration_weeks)
+            return plan.to_dict(raw_json=request.raw_json), generation
+
+        (plan, generation), coalesced = await async_plan_flights.do((plan_type, user.id, duration_weeks), generate)
+
+        return {
+            'message': PLAN_KINDS[plan_type]['message'],
+            'plan': plan,
+            'generation': generation
+        }, 201, {'X-Coalesced': 'true'} if coalesced else {}
+
+    except rate_limit.RateLimited as e:
+        return {'error': str(e)}, 429, rate_limit.retry_after_headers(e)
+    except AdmissionRejected as e:
+        return {'error': str(e)}, 503, {'Retry-After': str(e.retry_after)}
+    except local_planner.UnsupportedDiet as e:
+        return {'error': str(e)}, 422
+    except HTTPError:
+        raise
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+async def create_plan(request, plan_type, user, duration_weeks):
+    """Como create_workout_plan/create_nutrition_plan, sin ocupar una conexión mientras se espera al LLM"""
+    kind = PLAN_KINDS[plan_type]
+    async with request.sessions() as session:
+        previous_feedback = (await session.scalars(
+            select(PlanFeedback)
+            .filter_by(user_id=user.id, plan_type=plan_type)
+            .order_by(PlanFeedback.created_at.desc())
+            .limit(5)
+        )).all()
+
+    def local_plan():
+        return kind['local'](user, duration_weeks, previous_feedback)
+
+    if llm_configured() and not local_planner.should_plan_locally(user, plan_type):
+        inputs = kind['inputs'](user, duration_weeks, previous_feedback)
+        prompt, _ = kind['prompt'](inputs)
+        plan_data, generation = await generate_with_openai(
+            request, prompt, plan_type, fingerprint(plan_type, inputs), local_plan)
+    else:
+        # Generador local basado en reglas (sin LLM)
+        plan_data = local_plan()
+        generation = llm_guard.generation_info(plan_type, 'local')
+
+    plan = kind['new'](user, duration_weeks, plan_data, generation['source'] in ('llm', 'cache'))
+    async with request.sessions() as session:
+        await session.run_sync(activate_plan, plan)
+        await session.commit()
+    return plan, generation
+
+
+async def generate_with_openai(request, prompt, plan_type, cache_key, fallback):
+    """Versión asíncrona de ai_plans.generate_with_openai (openai.ChatCompletion.acreate)"""
+    async with request.sessions() as session:
+        cached_plan = await plan_cache.get_async(session, cache_key)
+    if cached_plan is not None:
+        return cached_plan, llm_guard.generation_info(plan_type, 'cache')
+
+    deadline = llm_guard.Deadline(llm_guard.LLM_DEADLINE_SECONDS, request.started)
+    prompt_tokens = prompt_builder.count_tokens(prompt)
+
+    def create(timeout):
+        return get_openai().ChatCompletion.acreate(**llm_request(prompt), request_timeout=timeout)
+
+    async def cache_plan(plan_data):
+        async with request.sessions() as session:
+            await plan_cache.set_async(session, cache_key, plan_type, plan_data)
+
+    def cache_late_response(response):
+        # La respuesta que llega después del plazo se guarda para la próxima petición
+        try:
+            plan_data = parse_llm_plan(response)
+        except (ValueError, AttributeError, IndexError):
+            return
+        task = asyncio.ensure_future(cache_plan(plan_data))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+    started = time.perf_counter()
+    try:
+        with track_llm(plan_type) as call:
+            response = await llm_guard.call_async(create, deadline, on_late=cache_late_response)
+            call['usage'] = getattr(response, 'usage', None)
+
+        plan_data = parse_llm_plan(response)
+
+    except Exception as e:
+        # Fallback al generador local (no se cachea)
+        reason = llm_guard.failure_reason(e)
+        logger.warning('LLM (%s) degradado a plan local por %s: %s', plan_type, reason, e)
+        return fallback(), llm_guard.generation_info(
+            plan_type, 'fallback', reason, time.perf_counter() - started, deadline, prompt_tokens)
+
+    await cache_plan(plan_data)
+    return plan_data, llm_guard.generation_info(
+        plan_type, 'llm', llm_seconds=time.perf_counter() - started, deadline=deadline, prompt_tokens=prompt_tokens)
+
+
+class NotModified(Exception):
+    """El ETag del cliente sigue vigente: responder 304"""
+
+    def __init__(self, etag):
+        super().__init__(etag)
+        self.etag = etag
+
+
+async def conditional_etag(request, session, user):
+    """ETag de conditional_get('plans') para la petición; lanza NotModified si el del cliente sigue vigente"""
+    version = await session.run_sync(lambda sync_session: get_version(user.id, 'plans', sync_session))
+    etag = resource_etag('plans', user.id, version, request.path, request.query_string)
+    if request.if_none_match(etag):
+        raise NotModified(etag)
+    return etag
+
+
+def etag_headers(etag):
+    return {'ETag': f'W/"{etag}"', 'Cache-Control': 'private, no-cache'}
+
+
+@async_plans_routes.route('/plans/workout/<int:plan_id>')
+async def get_workout_plan(request, plan_id):
+    return await get_plan(request, 'workout', plan_id)
+
+
+@async_plans_routes.route('/plans/nutrition/<int:plan_id>')
+async def get_nutrition_plan(request, plan_id):
+    return await get_plan(request, 'nutrition', plan_id)
+
+
+async def get_plan(request, plan_type, plan_id):
+    model = PLAN_KINDS[plan_type]['model']
+
+    async with request.sessions() as session:
+        user = await authenticate(request, session)
+        try:
+            etag = await conditional_etag(request, session, user)
+        except NotModified as e:
+            return '', 304, etag_headers(e.etag)
+
+        plan = (await session.scalars(select(model).filter_by(id=plan_id, user_id=user.id))).first()
+        if not plan:
+            return {'error': 'Plan no encontrado'}, 404
+
+        return {'plan': plan.to_dict(raw_json=request.raw_json)}, 200, etag_headers(etag)
+
+
+@async_plans_routes.route('/my-plans')
+async def get_my_plans(request):
+    async with request.sessions() as session:
+        user = await authenticate(request, session)
+        try:
+            etag = await conditional_etag(request, session, user)
+        except NotModified as e:
+            return '', 304, etag_headers(e.etag)
+
+        try:
+            # Modo listado: resúmenes paginados por cursor, sin columnas pesadas
+            if request.args.get('view') == 'summary':
+                response, status = await get_my_plan_summaries(request, session, user)
+                return response, status, etag_headers(etag) if status == 200 else {}
+
+            response = {}
+            for plan_type, kind in PLAN_KINDS.items():
+                model = kind['model']
+                plans = (await session.scalars(
+                    select(model).filter_by(user_id=user.id).order_by(model.created_at.desc())
+                )).all()
+                response[f'{plan_type}_plans'] = [plan.to_dict(raw_json=request.raw_json) for plan in plans]
+            return response, 200, etag_headers(etag)
+
+        except InvalidCursor as e:
+            return {'error': str(e)}, 400
+        except Exception as e:
+            return {'error': str(e)}, 500
+
+
+async def get_my_plan_summaries(request, session, user):
+    """Versión asíncrona de ai_plans.get_my_plan_summaries; devuelve (respuesta, status)"""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PLAN_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PLAN_PAGE_SIZE
+    limit = min(max(limit, 1), MAX_PLAN_PAGE_SIZE)
+    plan_types = [request.args['type']] if request.args.get('type') else list(PLAN_SUMMARY_DEFERRED)
+
+    response = {'next_cursors': {}}
+    for plan_type in plan_types:
+        if plan_type not in PLAN_SUMMARY_DEFERRED:
+            return {'error': 'Tipo de plan no válido (workout, nutrition)'}, 400
+        model, heavy_columns = PLAN_SUMMARY_DEFERRED[plan_type]
+
+        query = select(model).options(*[defer(column) for column in heavy_columns]).filter(
+            model.user_id == user.id
+        )
+
+        cursor = request.args.get(f'{plan_type}_cursor')
+        if cursor:
+            created_at, plan_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < plan_id)
+            ))
+
+        # Se pide una fila extra para saber si hay más páginas
+        plans = (await session.scalars(
+            query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+        )).all()
+        has_more = len(plans) > limit
+        plans = plans[:limit]
+
+        response[f'{plan_type}_plans'] = [plan.to_summary_dict() for plan in plans]
+        response['next_cursors'][plan_type] = encode_cursor(plans[-1]) if has_more else None
+
+    return response, 200
@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
-from werkzeug.security import generate_password_hash, check_password_hash
 from src.models.user import User, db
+from src.services.user_cache import get_authenticated_user
+from src.services.etags import make_etag, not_modified, with_etag
+from src.services.passwords import hash_password, verify_password, password_needs_rehash, PasswordHashQueueFull
+from src.services.rate_limit import rate_limited
 import jwt
 import datetime
 import os
@@ -29,7 +32,7 @@ def register():
         user = User(
             name=data['name'],
             email=data['email'],
-            password_hash=generate_password_hash(data['password']),
+            password_hash=hash_password(data['password']),
             age=data['age'],
             weight=data['weight'],
             height=data['height'],
@@ -55,11 +58,15 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except PasswordHashQueueFull as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     try:
         data = request.json
@@ -69,9 +76,14 @@ def login():
         
         user = User.query.filter_by(email=data['email']).first()
         
-        if not user or not check_password_hash(user.password_hash, data['password']):
+        if not user or not verify_password(user.password_hash, data['password']):
             return jsonify({'error': 'Credenciales inválidas'}), 401
         
+        # Actualizar hashes creados con parámetros antiguos
+        if password_needs_rehash(user.password_hash):
+            user.password_hash = hash_password(data['password'])
+            db.session.commit()
+        
         # Generar token JWT
         token = jwt.encode({
             'user_id': user.id,
@@ -84,10 +96,14 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except PasswordHashQueueFull as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@auth_bp.route('/verify-token', methods=['POST'])
+@auth_bp.route('/verify-token', methods=['GET', 'POST'])
 def verify_token():
     try:
         token = request.headers.get('Authorization')
@@ -99,15 +115,20 @@ def verify_token():
             token = token[7:]
         
         decoded = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        user = User.query.get(decoded['user_id'])
+        user = get_authenticated_user(decoded['user_id'])
         
         if not user:
             return jsonify({'error': 'Usuario no encontrado'}), 404
         
-        return jsonify({
+        # El perfil solo cambia cuando cambia updated_at (sin consultas extra)
+        etag = make_etag('user', user.id, user.updated_at.isoformat() if user.updated_at else '')
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        
+        return with_etag(jsonify({
             'valid': True,
             'user': user.to_dict()
-        }), 200
+        }), etag)
         
     except jwt.ExpiredSignatureError:
         return jsonify({'error': 'Token expirado'}), 401
@@ -116,6 +137,12 @@ def verify_token():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def decode_token(token):
+    """user_id del token JWT de la cabecera Authorization (con o sin 'Bearer ')"""
+    if token.startswith('Bearer '):
+        token = token[7:]
+    return jwt.decode(token, SECRET_KEY, algorithms=['HS256'])['user_id']
+
 def token_required(f):
     """Decorador para rutas que requieren autenticación"""
     def decorated(*args, **kwargs):
@@ -124,11 +151,7 @@ def token_required(f):
             return jsonify({'error': 'Token no proporcionado'}), 401
         
         try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            
-            decoded = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = User.query.get(decoded['user_id'])
+            current_user = get_authenticated_user(decode_token(token))
             
             if not current_user:
                 return jsonify({'error': 'Usuario no encontrado'}), 404
@@ -0,0 +1,42 @@
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from src.routes.auth import token_required
+from src.services.export import InvalidExportRequest, decode_export_cursor, iter_ndjson, parse_kinds, parse_since
+import hmac
+import os
+
+export_bp = Blueprint('export', __name__)
+
+@export_bp.route('/export', methods=['GET'])
+def export_all():
+    # Exportación completa (back-office): exige EXPORT_TOKEN; sin él el endpoint está deshabilitado
+    token = os.environ.get('EXPORT_TOKEN')
+    if not token:
+        return jsonify({'error': 'Exportación deshabilitada (EXPORT_TOKEN)'}), 403
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(provided, token):
+        return jsonify({'error': 'No autorizado'}), 401
+
+    return ndjson_export(request.args.get('user_id', type=int))
+
+@export_bp.route('/export/me', methods=['GET'])
+@token_required
+def export_me(current_user):
+    # Exportación de los datos propios (derecho de acceso/portabilidad)
+    return ndjson_export(current_user.id)
+
+def ndjson_export(user_id):
+    """Respuesta NDJSON en streaming; parámetros since, types y cursor (para reanudar)"""
+    try:
+        kinds = parse_kinds(request.args.get('types'))
+        since = parse_since(request.args.get('since'))
+        cursor = request.args.get('cursor')
+        if cursor:
+            decode_export_cursor(cursor)
+    except InvalidExportRequest as e:
+        return jsonify({'error': str(e)}), 400
+
+    lines = iter_ndjson(current_app._get_current_object(), kinds, since, cursor, user_id)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no'
+    })
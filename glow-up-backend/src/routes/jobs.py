@@ -0,0 +1,16 @@
+from flask import Blueprint, jsonify
+from src.routes.auth import token_required
+from src.services.jobs import job_manager
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job(current_user, job_id):
+    job = job_manager.get(job_id)
+    
+    # No revelar trabajos de otros usuarios
+    if not job or job.user_id != current_user.id:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    
+    return jsonify({'job': job.to_dict()}), 200
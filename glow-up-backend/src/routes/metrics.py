@@ -0,0 +1,30 @@
+from flask import Blueprint, Response, jsonify, request
+from functools import wraps
+from src.services.metrics import registry
+from src.services.plan_cache import plan_cache
+import hmac
+import os
+
+metrics_bp = Blueprint('metrics', __name__)
+
+def metrics_token_required(f):
+    """METRICS_TOKEN opcional: si está definido exige "Authorization: Bearer <token>" (scraper u operador)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = os.environ.get('METRICS_TOKEN')
+        if token:
+            provided = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(provided, token):
+                return jsonify({'error': 'No autorizado'}), 401
+        return f(*args, **kwargs)
+    return decorated
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@metrics_token_required
+def get_metrics():
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@metrics_bp.route('/plan-cache/stats', methods=['GET'])
+@metrics_token_required
+def get_plan_cache_stats():
+    return jsonify({'cache': plan_cache.stats()}), 200
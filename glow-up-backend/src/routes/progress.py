@@ -1,11 +1,25 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, ProgressEntry, db
 from src.routes.auth import token_required
+from src.services.progress_rollups import refresh_rollups, get_rollups
+from src.services.etags import conditional_get, bump_version
+from src.services.progress_import import iter_csv, iter_ndjson, validate_row, upsert_progress_rows, RowError
+from sqlalchemy import func
 from datetime import datetime, timedelta
+import io
 import json
 
 progress_bp = Blueprint('progress', __name__)
 
+# Límite del historial consultable (10 años) y puntos por defecto en gráficos
+MAX_PROGRESS_DAYS = 3650
+DEFAULT_CHART_POINTS = 200
+MAX_CHART_POINTS = 2000
+
+# Importación masiva: filas por upsert y máximo de errores devueltos
+BULK_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
 @progress_bp.route('/progress', methods=['POST'])
 @token_required
 def add_progress_entry(current_user):
@@ -28,6 +42,9 @@ def add_progress_entry(current_user):
             existing_entry.measurements = json.dumps(data.get('measurements', {}))
             existing_entry.notes = data.get('notes', existing_entry.notes)
             
+            refresh_rollups(current_user.id, [entry_date])
+            
+            bump_version(current_user.id, 'progress')
             db.session.commit()
             
             return jsonify({
@@ -46,6 +63,8 @@ def add_progress_entry(current_user):
             )
             
             db.session.add(progress_entry)
+            refresh_rollups(current_user.id, [entry_date])
+            bump_version(current_user.id, 'progress')
             db.session.commit()
             
             return jsonify({
@@ -57,22 +76,109 @@ def add_progress_entry(current_user):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@progress_bp.route('/progress/bulk', methods=['POST'])
+@token_required
+def bulk_import_progress(current_user):
+    try:
+        # Formato por parámetro o por Content-Type (NDJSON por defecto)
+        content_type = request.mimetype or ''
+        data_format = request.args.get('format') or ('csv' if 'csv' in content_type else 'ndjson')
+        if data_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'Formato no soportado (csv, ndjson)'}), 400
+        
+        # Leer el cuerpo en streaming, línea a línea
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        records = iter_csv(lines) if data_format == 'csv' else iter_ndjson(lines)
+        
+        processed = 0
+        imported = 0
+        failed = 0
+        errors = []
+        chunk = []
+        chunk_rows = []
+        touched_dates = set()
+        
+        def record_error(row_number, message):
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'error': message})
+        
+        def flush_chunk():
+            nonlocal imported, failed
+            if not chunk:
+                return
+            try:
+                upsert_progress_rows(current_user.id, chunk)
+                bump_version(current_user.id, 'progress')
+                db.session.commit()
+                imported += len(chunk)
+                touched_dates.update(row['date'] for row in chunk)
+            except Exception as e:
+                db.session.rollback()
+                failed += len(chunk)
+                record_error(f'{chunk_rows[0]}-{chunk_rows[-1]}', str(e))
+            chunk.clear()
+            chunk_rows.clear()
+        
+        for row_number, record in records:
+            processed += 1
+            try:
+                chunk.append(validate_row(record))
+                chunk_rows.append(row_number)
+            except RowError as e:
+                failed += 1
+                record_error(row_number, str(e))
+                continue
+            
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                flush_chunk()
+        flush_chunk()
+        
+        # Actualizar agregados de los periodos afectados
+        if touched_dates:
+            refresh_rollups(current_user.id, touched_dates)
+            db.session.commit()
+        
+        return jsonify({
+            'message': 'Importación completada',
+            'processed': processed,
+            'imported': imported,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @progress_bp.route('/progress', methods=['GET'])
 @token_required
+@conditional_get('progress', depends_on_date=True)
 def get_progress_entries(current_user):
     try:
         # Parámetros de consulta
-        days = request.args.get('days', 30, type=int)
+        days = min(max(request.args.get('days', 30, type=int), 0), MAX_PROGRESS_DAYS)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 100, type=int), 1), 500)
         start_date = datetime.now().date() - timedelta(days=days)
         
+        # Solo se materializan las filas de la página solicitada
         entries = ProgressEntry.query.filter(
-            ProgressEntry.user_id == current_user.id,
-            ProgressEntry.date >= start_date
-        ).order_by(ProgressEntry.date.desc()).all()
+            *progress_window(current_user.id, start_date)
+        ).order_by(ProgressEntry.date.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        
+        summary = calculate_progress_summary(current_user.id, start_date)
+        total = summary.get('total_entries', 0)
         
         return jsonify({
             'entries': [entry.to_dict() for entry in entries],
-            'summary': calculate_progress_summary(entries)
+            'summary': summary,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'has_next': page * per_page < total
+            }
         }), 200
         
     except Exception as e:
@@ -80,16 +186,18 @@ def get_progress_entries(current_user):
 
 @progress_bp.route('/progress/stats', methods=['GET'])
 @token_required
+@conditional_get('progress', depends_on_date=True)
 def get_progress_stats(current_user):
     try:
-        # Obtener entradas de los últimos 90 días
+        # Estadísticas de los últimos 90 días, calculadas en SQL
         start_date = datetime.now().date() - timedelta(days=90)
-        entries = ProgressEntry.query.filter(
-            ProgressEntry.user_id == current_user.id,
-            ProgressEntry.date >= start_date
-        ).order_by(ProgressEntry.date.asc()).all()
+        overview = db.session.query(
+            func.count(ProgressEntry.id),
+            func.min(ProgressEntry.date),
+            func.max(ProgressEntry.date)
+        ).filter(*progress_window(current_user.id, start_date)).one()
         
-        if not entries:
+        if not overview[0]:
             return jsonify({
                 'message': 'No hay datos de progreso disponibles',
                 'stats': {}
@@ -97,20 +205,47 @@ def get_progress_stats(current_user):
         
         # Calcular estadísticas
         stats = {
-            'weight_change': calculate_weight_change(entries),
-            'body_fat_change': calculate_body_fat_change(entries),
-            'consistency': calculate_consistency(entries),
-            'trends': calculate_trends(entries)
+            'weight_change': calculate_weight_change(current_user.id, start_date),
+            'body_fat_change': calculate_body_fat_change(current_user.id, start_date),
+            'consistency': calculate_consistency(*overview),
+            'trends': calculate_trends(current_user.id, start_date, overview[0])
         }
         
         return jsonify({
             'stats': stats,
-            'chart_data': prepare_chart_data(entries)
+            'chart_data': prepare_chart_data(current_user.id, start_date, DEFAULT_CHART_POINTS)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@progress_bp.route('/progress/chart', methods=['GET'])
+@token_required
+@conditional_get('progress', depends_on_date=True)
+def get_progress_chart(current_user):
+    try:
+        days = min(max(request.args.get('days', 90, type=int), 0), MAX_PROGRESS_DAYS)
+        points = min(max(request.args.get('points', DEFAULT_CHART_POINTS, type=int), 3), MAX_CHART_POINTS)
+        mode = request.args.get('mode', 'lttb')
+        start_date = datetime.now().date() - timedelta(days=days)
+        
+        if mode in ('week', 'month'):
+            chart_data = prepare_rollup_chart_data(current_user.id, start_date, mode)
+        elif mode in ('lttb', 'minmax'):
+            chart_data = prepare_chart_data(current_user.id, start_date, points, mode)
+        else:
+            return jsonify({'error': 'Modo de gráfico no válido (lttb, minmax, week, month)'}), 400
+        
+        return jsonify({
+            'mode': mode,
+            'days': days,
+            'chart_data': chart_data
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @progress_bp.route('/progress/<int:entry_id>', methods=['DELETE'])
 @token_required
 def delete_progress_entry(current_user, entry_id):
@@ -124,6 +259,8 @@ def delete_progress_entry(current_user, entry_id):
             return jsonify({'error': 'Entrada de progreso no encontrada'}), 404
         
         db.session.delete(entry)
+        refresh_rollups(current_user.id, [entry.date])
+        bump_version(current_user.id, 'progress')
         db.session.commit()
         
         return jsonify({'message': 'Entrada eliminada exitosamente'}), 200
@@ -132,81 +269,110 @@ def delete_progress_entry(current_user, entry_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-def calculate_progress_summary(entries):
+def progress_window(user_id, start_date):
+    """Filtros de las entradas de un usuario desde start_date"""
+    return (ProgressEntry.user_id == user_id, ProgressEntry.date >= start_date)
+
+def first_last_values(user_id, start_date, *columns, skip_nulls=False):
+    """Devuelve (total, [(primero, último) por columna]) con una sola consulta de ventana"""
+    oldest_first = {'order_by': ProgressEntry.date.asc()}
+    newest_first = {'order_by': ProgressEntry.date.desc()}
+    
+    selected = [func.count().over().label('total')]
+    for column in columns:
+        selected.append(func.first_value(column, type_=column.type).over(**oldest_first))
+        selected.append(func.first_value(column, type_=column.type).over(**newest_first))
+    
+    query = db.session.query(*selected).filter(*progress_window(user_id, start_date))
+    if skip_nulls:
+        query = query.filter(*[column.isnot(None) for column in columns])
+    
+    row = query.limit(1).first()
+    if row is None:
+        return 0, [(None, None) for _ in columns]
+    
+    return row[0], [(row[1 + 2 * i], row[2 + 2 * i]) for i in range(len(columns))]
+
+def calculate_progress_summary(user_id, start_date):
     """Calcula un resumen del progreso"""
-    if not entries:
+    total, (dates, weights, body_fats) = first_last_values(
+        user_id, start_date,
+        ProgressEntry.date, ProgressEntry.weight, ProgressEntry.body_fat_percentage
+    )
+    if not total:
         return {}
     
-    latest_entry = entries[0]
-    oldest_entry = entries[-1]
-    
     summary = {
-        'total_entries': len(entries),
-        'latest_weight': latest_entry.weight,
-        'latest_body_fat': latest_entry.body_fat_percentage,
+        'total_entries': total,
+        'latest_weight': weights[1],
+        'latest_body_fat': body_fats[1],
         'date_range': {
-            'start': oldest_entry.date.isoformat(),
-            'end': latest_entry.date.isoformat()
+            'start': dates[0].isoformat(),
+            'end': dates[1].isoformat()
         }
     }
     
     # Calcular cambios si hay múltiples entradas
-    if len(entries) > 1:
-        if latest_entry.weight and oldest_entry.weight:
-            summary['weight_change'] = round(latest_entry.weight - oldest_entry.weight, 1)
+    if total > 1:
+        if weights[1] and weights[0]:
+            summary['weight_change'] = round(weights[1] - weights[0], 1)
         
-        if latest_entry.body_fat_percentage and oldest_entry.body_fat_percentage:
-            summary['body_fat_change'] = round(latest_entry.body_fat_percentage - oldest_entry.body_fat_percentage, 1)
+        if body_fats[1] and body_fats[0]:
+            summary['body_fat_change'] = round(body_fats[1] - body_fats[0], 1)
     
     return summary
 
-def calculate_weight_change(entries):
+def calculate_weight_change(user_id, start_date):
     """Calcula el cambio de peso"""
-    weight_entries = [e for e in entries if e.weight is not None]
-    if len(weight_entries) < 2:
+    count, [(first_weight, last_weight)] = first_last_values(
+        user_id, start_date, ProgressEntry.weight, skip_nulls=True
+    )
+    if count < 2:
         return None
     
-    first_weight = weight_entries[-1].weight
-    last_weight = weight_entries[0].weight
-    
     return {
         'total_change': round(last_weight - first_weight, 1),
         'percentage_change': round(((last_weight - first_weight) / first_weight) * 100, 1),
-        'average_weekly_change': round((last_weight - first_weight) / len(weight_entries) * 7, 2)
+        'average_weekly_change': round((last_weight - first_weight) / count * 7, 2)
     }
 
-def calculate_body_fat_change(entries):
+def calculate_body_fat_change(user_id, start_date):
     """Calcula el cambio de grasa corporal"""
-    bf_entries = [e for e in entries if e.body_fat_percentage is not None]
-    if len(bf_entries) < 2:
+    count, [(first_bf, last_bf)] = first_last_values(
+        user_id, start_date, ProgressEntry.body_fat_percentage, skip_nulls=True
+    )
+    if count < 2:
         return None
     
-    first_bf = bf_entries[-1].body_fat_percentage
-    last_bf = bf_entries[0].body_fat_percentage
-    
     return {
         'total_change': round(last_bf - first_bf, 1),
         'percentage_points_change': round(last_bf - first_bf, 1)
     }
 
-def calculate_consistency(entries):
+def calculate_consistency(total_entries, first_date, last_date):
     """Calcula la consistencia en el registro"""
-    if not entries:
+    if not total_entries:
         return 0
     
     # Calcular días entre primera y última entrada
-    date_range = (entries[0].date - entries[-1].date).days + 1
-    consistency_percentage = (len(entries) / date_range) * 100
+    date_range = (last_date - first_date).days + 1
+    consistency_percentage = (total_entries / date_range) * 100
     
     return min(round(consistency_percentage, 1), 100)
 
-def calculate_trends(entries):
+def calculate_trends(user_id, start_date, total_entries):
     """Calcula tendencias en los datos"""
-    if len(entries) < 3:
+    if total_entries < 3:
         return {}
     
-    # Tendencia de peso (últimas 3 entradas)
-    recent_weights = [e.weight for e in entries[:3] if e.weight is not None]
+    # Últimas 3 entradas, de la más reciente a la más antigua
+    recent = db.session.query(
+        ProgressEntry.weight,
+        ProgressEntry.body_fat_percentage
+    ).filter(*progress_window(user_id, start_date)).order_by(ProgressEntry.date.desc()).limit(3).all()
+    
+    # Tendencia de peso
+    recent_weights = [row.weight for row in recent if row.weight is not None]
     weight_trend = 'stable'
     if len(recent_weights) >= 2:
         if recent_weights[0] > recent_weights[-1]:
@@ -215,7 +381,7 @@ def calculate_trends(entries):
             weight_trend = 'decreasing'
     
     # Tendencia de grasa corporal
-    recent_bf = [e.body_fat_percentage for e in entries[:3] if e.body_fat_percentage is not None]
+    recent_bf = [row.body_fat_percentage for row in recent if row.body_fat_percentage is not None]
     bf_trend = 'stable'
     if len(recent_bf) >= 2:
         if recent_bf[0] > recent_bf[-1]:
@@ -228,18 +394,44 @@ def calculate_trends(entries):
         'body_fat_trend': bf_trend
     }
 
-def prepare_chart_data(entries):
-    """Prepara datos para gráficos"""
-    chart_data = {
-        'weight': [],
-        'body_fat': [],
-        'dates': []
-    }
+def prepare_chart_data(user_id, start_date, points=None, method='lttb'):
+    """Prepara datos para gráficos, reducidos a como máximo points puntos"""
+    # Solo las columnas necesarias, sin construir objetos ORM
+    rows = db.session.query(
+        ProgressEntry.date,
+        ProgressEntry.weight,
+        ProgressEntry.body_fat_percentage
+    ).filter(*progress_window(user_id, start_date)).order_by(ProgressEntry.date.asc()).all()
     
-    for entry in reversed(entries):  # Orden cronológico para gráficos
-        chart_data['dates'].append(entry.date.isoformat())
-        chart_data['weight'].append(entry.weight)
-        chart_data['body_fat'].append(entry.body_fat_percentage)
+    # Reducción que conserva la forma de la curva (orden cronológico); numpy solo se carga aquí
+    if points and len(rows) > points:
+        from src.services.downsample import downsample_series
+        
+        indices = downsample_series(
+            [row.date.toordinal() for row in rows],
+            [[row.weight for row in rows], [row.body_fat_percentage for row in rows]],
+            points,
+            method
+        )
+        rows = [rows[i] for i in indices]
     
-    return chart_data
+    return {
+        'weight': [row.weight for row in rows],
+        'body_fat': [row.body_fat_percentage for row in rows],
+        'dates': [row.date.isoformat() for row in rows]
+    }
 
+def prepare_rollup_chart_data(user_id, start_date, period):
+    """Prepara datos para gráficos a partir de los agregados semanales o mensuales"""
+    rollups = get_rollups(user_id, period, start_date)
+    
+    return {
+        'weight': [r.weight_avg for r in rollups],
+        'weight_min': [r.weight_min for r in rollups],
+        'weight_max': [r.weight_max for r in rollups],
+        'body_fat': [r.body_fat_avg for r in rollups],
+        'body_fat_min': [r.body_fat_min for r in rollups],
+        'body_fat_max': [r.body_fat_max for r in rollups],
+        'entry_count': [r.entry_count for r in rollups],
+        'dates': [r.period_start.isoformat() for r in rollups]
+    }
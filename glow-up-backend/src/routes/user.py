@@ -1,12 +1,20 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from src.models.user import User, db
+from src.services.export import iter_records
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    # Mismo array JSON, escrito por lotes (yield_per): la memoria no crece con el número de usuarios
+    dumps = current_app.json.dumps
+    def generate():
+        separator = '['
+        for batch in iter_records(('user',)):
+            yield separator + ','.join(dumps(user.to_dict()) for _, _, user in batch)
+            separator = ','
+        yield ']\n' if separator == ',' else '[]\n'
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -0,0 +1,174 @@
+from collections import deque
+from src.services.metrics import registry
+import asyncio
+import math
+import os
+import threading
+import time
+
+ADMISSIONS = registry.counter(
+    'generation_admission_total', 'Generaciones admitidas o rechazadas por el control de admisión', ('outcome',))
+ADMISSION_WAIT = registry.histogram(
+    'generation_admission_wait_seconds', 'Espera en cola hasta obtener hueco para generar')
+
+
+class AdmissionRejected(Exception):
+    """No hay hueco para otra generación: cola llena o se agotó la espera"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _ThreadWaiter:
+    __slots__ = ('event', 'granted')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+    def grant(self):
+        self.granted = True
+        self.event.set()
+
+
+class _AsyncWaiter:
+    __slots__ = ('loop', 'future', 'granted')
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+        self.granted = False
+
+    def grant(self):
+        self.granted = True
+        self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    """Límite global de generaciones en curso con una cola de espera acotada.
+
+    Hasta max_in_flight generaciones se ejecutan a la vez; las siguientes
+    esperan en orden de llegada (como mucho max_queue, y queue_timeout
+    segundos) y el resto se rechaza de inmediato. Al liberar un hueco se cede
+    directamente al primero de la cola. Hilos (Flask) y corrutinas (ASGI) del
+    mismo proceso comparten el límite.
+    """
+
+    def __init__(self, max_in_flight=32, max_queue=64, queue_timeout=5.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def retry_after(self):
+        return max(1, math.ceil(self.queue_timeout))
+
+    def _enter(self, waiter_factory):
+        """Toma un hueco libre (None), encola un waiter o lanza AdmissionRejected si la cola está llena"""
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                ADMISSIONS.inc(outcome='rejected')
+                raise AdmissionRejected('Servidor ocupado generando planes, inténtalo de nuevo más tarde',
+                                        self.retry_after)
+            waiter = waiter_factory()
+            self._waiters.append(waiter)
+            return waiter
+
+    def _give_up(self, waiter):
+        """Saca de la cola a un waiter que dejó de esperar; False si el hueco le llegó a la vez (y ya es suyo)"""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters.remove(waiter)
+            return True
+
+    def _timed_out(self, waiter):
+        if self._give_up(waiter):
+            ADMISSIONS.inc(outcome='timeout')
+            raise AdmissionRejected('Tiempo de espera agotado en la cola de generación', self.retry_after)
+
+    def _admitted(self, started):
+        ADMISSIONS.inc(outcome='admitted')
+        ADMISSION_WAIT.observe(time.perf_counter() - started)
+
+    def acquire(self):
+        started = time.perf_counter()
+        waiter = self._enter(_ThreadWaiter)
+        if waiter is not None and not waiter.event.wait(self.queue_timeout):
+            self._timed_out(waiter)
+        self._admitted(started)
+
+    async def acquire_async(self):
+        started = time.perf_counter()
+        waiter = self._enter(_AsyncWaiter)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._timed_out(waiter)
+            except asyncio.CancelledError:
+                # Cliente desconectado: no quedarse con un hueco que nadie liberará
+                if not self._give_up(waiter):
+                    self.release()
+                raise
+        self._admitted(started)
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # El hueco pasa al siguiente sin quedar libre entre medias
+                self._waiters.popleft().grant()
+            else:
+                self._in_flight -= 1
+
+    def slot(self):
+        """Context manager: with admission.slot(): ..."""
+        return _Slot(self)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'queued': len(self._waiters),
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue
+            }
+
+
+class _Slot:
+    __slots__ = ('controller',)
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def __enter__(self):
+        self.controller.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.controller.release()
+
+    async def __aenter__(self):
+        await self.controller.acquire_async()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.controller.release()
+
+
+generation_admission = AdmissionController(
+    max_in_flight=int(os.environ.get('GENERATION_MAX_IN_FLIGHT', 32)),
+    max_queue=int(os.environ.get('GENERATION_MAX_QUEUE', 64)),
+    queue_timeout=float(os.environ.get('GENERATION_QUEUE_TIMEOUT_SECONDS', 5))
+)
@@ -0,0 +1,99 @@
+from urllib.parse import parse_qs
+from werkzeug.http import parse_etags
+import json
+import re
+import time
+
+# Respuesta especial de un manejador asíncrono: atender la petición con la app Flask
+DELEGATE = object()
+
+# Conversores de los patrones de ruta, con la misma sintaxis que Flask
+_CONVERTERS = {
+    'int': (r'\d+', int),
+    'string': (r'[^/]+', str)
+}
+_PLACEHOLDER = re.compile(r'<(?:(\w+):)?(\w+)>')
+
+
+class HTTPError(Exception):
+    """Error que se responde como {'error': mensaje} con el código indicado"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AsyncRequest:
+    """Petición HTTP ya leída entera (los endpoints asíncronos solo reciben cuerpos JSON pequeños)"""
+
+    def __init__(self, scope, body, sessions, raw_json=False):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('utf-8')
+        self.args = {name: values[0] for name, values in parse_qs(self.query_string).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.remote_addr = (scope.get('client') or (None,))[0]
+        self.body = body
+        # async_sessionmaker de la app y si el proveedor JSON admite RawJSON
+        self.sessions = sessions
+        self.raw_json = raw_json
+        self.started = time.perf_counter()
+
+    def json(self):
+        """Cuerpo JSON como dict; None si no hay cuerpo o no es JSON"""
+        if not self.body:
+            return None
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def if_none_match(self, etag):
+        return parse_etags(self.headers.get('if-none-match')).contains_weak(etag)
+
+
+class AsyncRoutes:
+    """Tabla de rutas asíncronas (el equivalente de un Blueprint para el modo ASGI)"""
+
+    def __init__(self, url_prefix=''):
+        self.url_prefix = url_prefix
+        self.rules = []
+
+    def route(self, rule, methods=('GET',)):
+        def decorator(handler):
+            pattern, converters = self._compile(self.url_prefix + rule)
+            self.rules.append((frozenset(methods), pattern, converters, self.url_prefix + rule, handler))
+            return handler
+        return decorator
+
+    def match(self, method, path):
+        """(manejador, regla, parámetros) de la ruta, o None si no hay versión asíncrona"""
+        for methods, pattern, converters, rule, handler in self.rules:
+            if method not in methods:
+                continue
+            match = pattern.fullmatch(path)
+            if match:
+                params = {name: converters[name](value) for name, value in match.groupdict().items()}
+                return handler, rule, params
+        return None
+
+    @staticmethod
+    def _compile(rule):
+        converters = {}
+        regex = ''
+        position = 0
+        for placeholder in _PLACEHOLDER.finditer(rule):
+            pattern, convert = _CONVERTERS[placeholder.group(1) or 'string']
+            converters[placeholder.group(2)] = convert
+            regex += re.escape(rule[position:placeholder.start()]) + f'(?P<{placeholder.group(2)}>{pattern})'
+            position = placeholder.end()
+        return re.compile(regex + re.escape(rule[position:])), converters
+
+
+def normalize_result(result):
+    """(cuerpo, status, cabeceras) a partir de lo que devuelve un manejador, como en las vistas Flask"""
+    if not isinstance(result, tuple):
+        return result, 200, {}
+    body, status, headers = (result + ({},))[:3] if len(result) == 2 else result
+    return body, status, dict(headers or {})
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: índices de n_out puntos que conservan la forma de la serie.
+
+    x debe estar ordenado de forma ascendente. El área de cada candidato de un
+    bucket se calcula vectorizada; solo se itera sobre los buckets.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1], dtype=int)[:max(n_out, 0)]
+
+    # Límites de los n_out - 2 buckets interiores (el primer y último punto se conservan)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Promedio del bucket siguiente, precalculado para todos los buckets
+    cumsum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cumsum_y = np.concatenate(([0.0], np.cumsum(y)))
+    next_start = edges[1:]
+    next_end = np.append(edges[2:], n)
+    counts = next_end - next_start
+    avg_x = (cumsum_x[next_end] - cumsum_x[next_start]) / counts
+    avg_y = (cumsum_y[next_end] - cumsum_y[next_start]) / counts
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs(
+            (x[previous] - avg_x[i]) * (by - y[previous])
+            - (x[previous] - bx) * (avg_y[i] - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax_buckets(x, y, n_out):
+    """Índices del mínimo y máximo de cada bucket (n_out // 2 buckets), totalmente vectorizado"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    buckets = max(n_out // 2, 1)
+    bucket_of = (np.arange(n) * buckets) // n
+    starts = np.flatnonzero(np.r_[True, bucket_of[1:] != bucket_of[:-1]])
+
+    # Ordenar por (bucket, valor) permite tomar el primero y el último de cada bucket
+    order = np.lexsort((y, bucket_of))
+    ends = np.r_[starts[1:], n] - 1
+    picked = np.concatenate((order[starts], order[ends]))
+    return np.unique(picked)
+
+
+def downsample_series(x, series, n_out, method='lttb'):
+    """Reduce varias series que comparten eje x a como máximo n_out puntos.
+
+    Los valores None se ignoran por serie; se devuelve la unión de los índices
+    elegidos para cada serie, de modo que todas comparten las mismas fechas.
+    """
+    pick = lttb if method == 'lttb' else minmax_buckets
+    x = np.asarray(x, dtype=float)
+    budget = max(n_out // max(len(series), 1), 2)
+
+    chosen = []
+    for values in series:
+        values = np.array([np.nan if v is None else v for v in values], dtype=float)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid):
+            chosen.append(valid[pick(x[valid], values[valid], budget)])
+
+    if not chosen:
+        return np.arange(min(len(x), n_out))
+    return np.unique(np.concatenate(chosen))
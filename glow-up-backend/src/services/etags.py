@@ -0,0 +1,95 @@
+from flask import make_response, request
+from functools import wraps
+from sqlalchemy.exc import IntegrityError
+from src.models.user import DataVersion, db
+from datetime import date, datetime
+import hashlib
+
+# Cambiar si cambia el formato de las respuestas para invalidar ETags antiguos
+ETAG_FORMAT_VERSION = 1
+
+
+def get_version(user_id, scope, session=None):
+    """Versión actual de los datos de un usuario (0 si nunca se escribieron).
+
+    session: sesión a usar en lugar de db.session (p. ej. la síncrona de una AsyncSession.run_sync).
+    """
+    session = session or db.session
+    version = session.query(DataVersion.version).filter_by(user_id=user_id, scope=scope).scalar()
+    return version or 0
+
+
+def bump_version(user_id, scope, session=None):
+    """Incrementa la versión; llamar dentro de la transacción de escritura, antes del commit"""
+    session = session or db.session
+    versions = session.query(DataVersion).filter_by(user_id=user_id, scope=scope)
+    updated = versions.update(
+        {'version': DataVersion.version + 1, 'updated_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+    if updated:
+        return
+
+    try:
+        with session.begin_nested():
+            session.add(DataVersion(user_id=user_id, scope=scope, version=1))
+    except IntegrityError:
+        # Otra petición creó la fila a la vez
+        versions.update({'version': DataVersion.version + 1}, synchronize_session=False)
+
+
+def make_etag(*parts):
+    raw = ':'.join(str(part) for part in (ETAG_FORMAT_VERSION,) + parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def resource_etag(scope, user_id, version, path, query_string, depends_on_date=False):
+    """ETag de conditional_get para una ruta y sus parámetros"""
+    return make_etag(
+        scope,
+        user_id,
+        version,
+        path,
+        query_string,
+        date.today().isoformat() if depends_on_date else ''
+    )
+
+
+def not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def with_etag(response, etag):
+    response = make_response(response)
+    if response.status_code == 200:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_get(scope, depends_on_date=False):
+    """Decorador (debajo de token_required): responde 304 si el ETag del cliente sigue vigente.
+
+    El ETag depende de la versión del recurso, de los parámetros de la URL y,
+    para ventanas relativas a hoy, de la fecha actual. Se comprueba antes de
+    cargar ninguna fila.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            etag = resource_etag(
+                scope,
+                current_user.id,
+                get_version(current_user.id, scope),
+                request.path,
+                request.query_string.decode('utf-8'),
+                depends_on_date
+            )
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag)
+            return with_etag(f(current_user, *args, **kwargs), etag)
+        return decorated
+    return decorator
@@ -0,0 +1,218 @@
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from flask.cli import with_appcontext
+from src.json_provider import supports_raw_json
+from src.models.user import User, WorkoutPlan, NutritionPlan, ProgressEntry, PlanFeedback, db
+from src.services.metrics import registry
+import base64
+import click
+import json
+import os
+
+# Filas por lote leído de la base de datos (yield_per: cursor de servidor en PostgreSQL)
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+EXPORTED = registry.counter('export_records_total', 'Registros exportados en NDJSON', ('type',))
+
+# Tipo de registro, modelo, columna del filtro since y columna del dueño (exportación de un usuario)
+ExportKind = namedtuple('ExportKind', ('name', 'model', 'since_column', 'owner_column'))
+
+EXPORT_KINDS = (
+    ExportKind('user', User, 'updated_at', 'id'),
+    ExportKind('progress_entry', ProgressEntry, 'created_at', 'user_id'),
+    ExportKind('workout_plan', WorkoutPlan, 'created_at', 'user_id'),
+    ExportKind('nutrition_plan', NutritionPlan, 'created_at', 'user_id'),
+    ExportKind('plan_feedback', PlanFeedback, 'created_at', 'user_id')
+)
+EXPORT_KIND_NAMES = tuple(kind.name for kind in EXPORT_KINDS)
+
+
+class InvalidExportRequest(ValueError):
+    """Cursor, fecha since o tipo de registro no válidos"""
+
+
+def encode_export_cursor(kind, last_id, since=None):
+    """Posición tras el registro last_id de kind; incluye since para reanudar con el mismo filtro"""
+    return _cursor_encoder(kind, since)(last_id)
+
+
+def _cursor_encoder(kind, since):
+    # Se llama una vez por fila: solo el id cambia entre cursores del mismo tipo
+    prefix = f'[{json.dumps(kind)}, '
+    suffix = f', {json.dumps(since.isoformat() if since else None)}]'
+    return lambda last_id: base64.urlsafe_b64encode(f'{prefix}{last_id}{suffix}'.encode('utf-8')).decode('ascii')
+
+
+def decode_export_cursor(cursor):
+    """(tipo, último id, since)"""
+    try:
+        kind, last_id, since = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if kind not in EXPORT_KIND_NAMES:
+            raise ValueError(kind)
+        return kind, int(last_id), datetime.fromisoformat(since) if since else None
+    except (ValueError, TypeError):
+        raise InvalidExportRequest('Cursor de exportación inválido')
+
+
+def parse_since(value):
+    """Fecha u hora ISO 8601 (2024-01-31 o 2024-01-31T10:00:00); None si no se indica"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidExportRequest('Parámetro since inválido (fecha ISO 8601)')
+
+
+def parse_kinds(value):
+    """Lista de tipos separados por comas; todos si no se indica"""
+    if not value:
+        return EXPORT_KIND_NAMES
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_KIND_NAMES]
+    if unknown:
+        raise InvalidExportRequest(f"Tipo de registro desconocido: {', '.join(unknown)} ({', '.join(EXPORT_KIND_NAMES)})")
+    return names
+
+
+def iter_records(kinds=EXPORT_KIND_NAMES, since=None, cursor=None, user_id=None, batch_size=None):
+    """Genera lotes [(tipo, id, objeto)] en orden de tipo e id, con memoria constante.
+
+    Cada tipo se lee con una sola consulta ordenada por id y yield_per, de modo
+    que solo hay un lote en memoria. Con cursor se reanuda justo después del registro que lo
+    generó (y con su since); user_id limita la exportación a un usuario.
+    """
+    start_kind, last_id = None, 0
+    if cursor:
+        start_kind, last_id, since = decode_export_cursor(cursor)
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+
+    started = start_kind is None
+    for kind in EXPORT_KINDS:
+        if not started:
+            if kind.name != start_kind:
+                continue
+            started = True
+        else:
+            last_id = 0
+        if kind.name not in kinds:
+            continue
+
+        model = kind.model
+        query = db.select(model).where(model.id > last_id)
+        if since is not None:
+            query = query.where(getattr(model, kind.since_column) >= since)
+        if user_id is not None:
+            query = query.where(getattr(model, kind.owner_column) == user_id)
+        query = query.order_by(model.id).execution_options(yield_per=batch_size)
+
+        # El mapa de identidad de la sesión guarda referencias débiles: los objetos
+        # de un lote ya servido (sin cambios pendientes) se liberan solos
+        for partition in db.session.scalars(query).partitions():
+            yield [(kind.name, obj.id, obj) for obj in partition]
+
+
+def record_dict(obj, raw_json=False):
+    if isinstance(obj, (WorkoutPlan, NutritionPlan)):
+        return obj.to_dict(raw_json=raw_json)
+    return obj.to_dict()
+
+
+def iter_ndjson(app, kinds=EXPORT_KIND_NAMES, since=None, cursor=None, user_id=None, batch_size=None):
+    """Líneas NDJSON (un bloque de texto por lote).
+
+    Cada registro es {"type", "cursor", "data"}; su cursor reanuda la
+    exportación justo después de él. La última línea es {"type": "end",
+    "count"}: si falta, la exportación se cortó y se puede reanudar con el
+    cursor de la última línea recibida (count cuenta los registros de esta
+    llamada, no los de llamadas anteriores reanudadas).
+    """
+    if cursor:
+        # El since del cursor manda: el que se reanuda es el filtro original
+        since = decode_export_cursor(cursor)[2]
+    raw_json = supports_raw_json(app)
+    dumps = app.json.dumps
+    count = 0
+    for batch in iter_records(kinds, since, cursor, user_id, batch_size):
+        name = batch[0][0]
+        cursor_for = _cursor_encoder(name, since)
+        # Envoltorio por formato: solo data pasa por el serializador JSON
+        lines = [
+            f'{{"type":"{name}","cursor":"{cursor_for(record_id)}","data":{dumps(record_dict(obj, raw_json))}}}'
+            for _, record_id, obj in batch
+        ]
+        count += len(lines)
+        EXPORTED.inc(len(lines), type=name)
+        yield '\n'.join(lines) + '\n'
+    yield dumps({'type': 'end', 'count': count}) + '\n'
+
+
+def read_resume_point(path, block_size=65536):
+    """(cursor, bytes válidos, completa) de un fichero NDJSON exportado a medias.
+
+    Busca desde el final la última línea completa: si es la de fin la
+    exportación ya terminó; si no, su cursor indica dónde seguir. Los bytes de
+    una línea cortada a medias quedan fuera de 'bytes válidos' para truncarlos.
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        buffer = b''
+        while position > 0 and buffer.count(b'\n') < 2:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+
+    end = buffer.rfind(b'\n')
+    if end < 0:
+        return None, 0, False
+    line = buffer[buffer.rfind(b'\n', 0, end) + 1:end]
+    valid_bytes = position + end + 1
+    record = json.loads(line)
+    if record.get('type') == 'end':
+        return None, valid_bytes, True
+    return record['cursor'], valid_bytes, False
+
+
+@click.command('export-data')
+@click.option('--output', '-o', default='-', show_default=True, help='Fichero NDJSON de salida (- para stdout)')
+@click.option('--since', default=None, help='Solo registros creados (usuarios: modificados) desde esta fecha ISO')
+@click.option('--types', default=None, help=f"Tipos separados por comas ({', '.join(EXPORT_KIND_NAMES)})")
+@click.option('--user-id', type=int, default=None, help='Exportar solo los datos de este usuario')
+@click.option('--cursor', default=None, help='Reanudar tras el registro con este cursor')
+@click.option('--resume', is_flag=True, help='Continuar el fichero --output desde su última línea completa')
+@click.option('--batch-size', type=int, default=None, help=f'Filas por lote (por defecto {EXPORT_BATCH_SIZE})')
+@with_appcontext
+def export_data_command(output, since, types, user_id, cursor, resume, batch_size):
+    """Exporta usuarios, progreso, planes y feedback en NDJSON con memoria constante"""
+    try:
+        kinds = parse_kinds(types)
+        since = parse_since(since)
+        mode = 'w'
+        if resume:
+            if output == '-':
+                raise click.UsageError('--resume necesita --output con un fichero')
+            if os.path.exists(output):
+                cursor, valid_bytes, complete = read_resume_point(output)
+                if complete:
+                    click.echo('La exportación ya está completa', err=True)
+                    return
+                # Descartar una última línea escrita a medias
+                with open(output, 'r+b') as f:
+                    f.truncate(valid_bytes)
+                mode = 'a'
+        if cursor:
+            decode_export_cursor(cursor)
+    except InvalidExportRequest as e:
+        raise click.BadParameter(str(e))
+
+    chunks = iter_ndjson(current_app, kinds, since, cursor, user_id, batch_size)
+    if output == '-':
+        stdout = click.get_text_stream('stdout')
+        for chunk in chunks:
+            stdout.write(chunk)
+        return
+    with open(output, mode, encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+from src.services.llm_client import get_openai
+import asyncio
+import json
+import os
+import random
+import time
+
+# El sustituto parchea el propio módulo openai (que aquí sí se importa)
+openai = get_openai()
+
+# Implementaciones originales, para poder restaurarlas
+_original_create = openai.ChatCompletion.create
+_original_acreate = openai.ChatCompletion.acreate
+
+
+class FakeChatCompletion:
+    """Sustituto local de openai.ChatCompletion con latencia, tamaño de respuesta y tasa de errores configurables"""
+
+    latency = 0.0
+    chunk_size = 64
+    payload_bytes = 0
+    failure_rate = 0.0
+    calls = 0
+    _random = random.Random()
+
+    @classmethod
+    def create(cls, model=None, messages=None, stream=False, request_timeout=None, **kwargs):
+        prompt, content = cls._complete(messages)
+        if stream:
+            return cls._stream(content)
+
+        if cls.latency:
+            # Como el cliente real, request_timeout corta la espera
+            if request_timeout is not None and cls.latency > request_timeout:
+                time.sleep(request_timeout)
+                raise openai.error.Timeout('Tiempo de espera agotado (simulado)')
+            time.sleep(cls.latency)
+
+        return cls._response(model, prompt, content)
+
+    @classmethod
+    async def acreate(cls, model=None, messages=None, request_timeout=None, **kwargs):
+        """Versión asíncrona (openai.ChatCompletion.acreate); la latencia no bloquea el bucle de eventos"""
+        prompt, content = cls._complete(messages)
+        if cls.latency:
+            if request_timeout is not None and cls.latency > request_timeout:
+                await asyncio.sleep(request_timeout)
+                raise openai.error.Timeout('Tiempo de espera agotado (simulado)')
+            await asyncio.sleep(cls.latency)
+
+        return cls._response(model, prompt, content)
+
+    @classmethod
+    def _complete(cls, messages):
+        from src.routes.ai_plans import generate_local_workout_plan, generate_local_nutrition_plan
+
+        cls.calls += 1
+        if cls.failure_rate and cls._random.random() < cls.failure_rate:
+            raise openai.error.APIError('Error simulado del proveedor', http_status=502)
+        prompt = messages[-1]['content'] if messages else ''
+        if 'plan nutricional' in prompt.lower():
+            plan = generate_local_nutrition_plan(None, 4)
+        else:
+            plan = generate_local_workout_plan(None, 4)
+
+        content = json.dumps(plan)
+        if cls.payload_bytes > len(content):
+            # Relleno para simular respuestas más largas del modelo
+            plan['notes'] = 'x' * (cls.payload_bytes - len(content) - 12)
+            content = json.dumps(plan)
+        return prompt, content
+
+    @staticmethod
+    def _response(model, prompt, content):
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role='assistant', content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=len(prompt) // 4,
+                completion_tokens=len(content) // 4,
+                total_tokens=(len(prompt) + len(content)) // 4
+            )
+        )
+
+    @classmethod
+    def _stream(cls, content):
+        # Reparte la latencia total entre los fragmentos, como un modelo real
+        pieces = [content[i:i + cls.chunk_size] for i in range(0, len(content), cls.chunk_size)]
+        delay = cls.latency / len(pieces) if pieces else 0
+        for piece in pieces:
+            if delay:
+                time.sleep(delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(
+                delta=SimpleNamespace(content=piece),
+                finish_reason=None
+            )])
+
+
+def install_fake_llm(latency=0.0, payload_bytes=0, failure_rate=0.0, seed=None):
+    """Reemplaza la llamada a OpenAI por el sustituto local"""
+    FakeChatCompletion.latency = latency
+    FakeChatCompletion.payload_bytes = payload_bytes
+    FakeChatCompletion.failure_rate = failure_rate
+    FakeChatCompletion._random = random.Random(seed)
+    FakeChatCompletion.calls = 0
+    openai.ChatCompletion.create = FakeChatCompletion.create
+    openai.ChatCompletion.acreate = FakeChatCompletion.acreate
+    if not openai.api_key:
+        openai.api_key = 'fake-llm'
+
+
+def uninstall_fake_llm():
+    """Restaura la llamada real a OpenAI"""
+    openai.ChatCompletion.create = _original_create
+    openai.ChatCompletion.acreate = _original_acreate
+    if openai.api_key == 'fake-llm':
+        openai.api_key = None
+
+
+def install_from_env():
+    """Activa el sustituto si FAKE_LLM_LATENCY está definido (FAKE_LLM_PAYLOAD_BYTES y FAKE_LLM_FAILURE_RATE opcionales)"""
+    latency = os.environ.get('FAKE_LLM_LATENCY')
+    if latency is not None:
+        install_fake_llm(
+            float(latency),
+            int(os.environ.get('FAKE_LLM_PAYLOAD_BYTES', 0)),
+            float(os.environ.get('FAKE_LLM_FAILURE_RATE', 0))
+        )
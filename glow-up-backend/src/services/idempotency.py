@@ -0,0 +1,151 @@
+from flask import current_app, jsonify, request
+from functools import wraps
+from sqlalchemy.exc import IntegrityError
+from src.models.user import IdempotencyRecord, db
+from src.services.metrics import registry
+from src.services.single_flight import SingleFlight
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Tiempo durante el que se repite la respuesta guardada para la misma clave
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+# Una clave en curso más antigua que esto se considera abandonada (proceso caído)
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 300))
+
+# Cabeceras de la respuesta original que se reenvían al repetirla
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+REPLAYS = registry.counter(
+    'idempotency_replays_total', 'Respuestas repetidas a partir de una Idempotency-Key', ('endpoint',))
+
+idempotency_flights = SingleFlight('idempotency_key')
+
+
+class IdempotencyConflict(Exception):
+    """La clave está en uso por otra petición en curso o con otro cuerpo"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def request_hash():
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.get_data(cache=True)):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _snapshot(response):
+    """(status, cuerpo, cabeceras) de una respuesta, compartible entre hilos"""
+    headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+    return response.status_code, response.get_data(as_text=True), headers
+
+
+def _replay(snapshot, replayed=True):
+    status, body, headers = snapshot
+    response = current_app.response_class(body, status=status, headers=headers)
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(user_id, key, endpoint, body_hash):
+    """Reserva la clave; devuelve la instantánea guardada si ya se completó, o None si hay que ejecutar"""
+    now = datetime.utcnow()
+    IdempotencyRecord.query.filter(IdempotencyRecord.expires_at <= now).delete(synchronize_session=False)
+    try:
+        with db.session.begin_nested():
+            db.session.add(IdempotencyRecord(
+                user_id=user_id,
+                idempotency_key=key,
+                endpoint=endpoint,
+                request_hash=body_hash,
+                created_at=now,
+                expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+            ))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    record = IdempotencyRecord.query.filter_by(user_id=user_id, idempotency_key=key).first()
+    if record is None:
+        # Expiró y se borró entre medias
+        return _claim(user_id, key, endpoint, body_hash)
+    if record.request_hash != body_hash or record.endpoint != endpoint:
+        raise IdempotencyConflict('La Idempotency-Key ya se usó con otra petición', 422)
+    if record.status_code is not None:
+        return record.status_code, record.response_body, json.loads(record.response_headers or '{}')
+    if record.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS):
+        # Reserva abandonada: se toma de nuevo
+        record.created_at = now
+        db.session.commit()
+        return None
+    raise IdempotencyConflict('Hay una petición con esta Idempotency-Key en curso', 409)
+
+
+def _finish(user_id, key, snapshot):
+    status, body, headers = snapshot
+    query = IdempotencyRecord.query.filter_by(user_id=user_id, idempotency_key=key)
+    if status >= 500:
+        # Los errores del servidor no se guardan: el reintento vuelve a ejecutarse
+        query.delete(synchronize_session=False)
+    else:
+        query.update({
+            'status_code': status,
+            'response_body': body,
+            'response_headers': json.dumps(headers)
+        }, synchronize_session=False)
+    db.session.commit()
+
+
+def idempotent(endpoint):
+    """Decorador (debajo de token_required): con cabecera Idempotency-Key, ejecuta la vista una sola vez.
+
+    Los reintentos con la misma clave y el mismo cuerpo reciben la respuesta
+    guardada (cabecera Idempotent-Replayed). Si el original sigue en curso en
+    este proceso se espera a su resultado; en otro proceso se responde 409.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(current_user, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+            if not key:
+                return view(current_user, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} demasiado larga (máximo {MAX_KEY_LENGTH})'}), 400
+
+            user_id = current_user.id
+            body_hash = request_hash()
+
+            def run():
+                stored = _claim(user_id, key, endpoint, body_hash)
+                if stored is not None:
+                    return stored, True
+                try:
+                    snapshot = _snapshot(current_app.make_response(view(current_user, *args, **kwargs)))
+                except BaseException:
+                    db.session.rollback()
+                    _finish(user_id, key, (500, None, {}))
+                    raise
+                _finish(user_id, key, snapshot)
+                return snapshot, False
+
+            try:
+                (snapshot, stored), shared = idempotency_flights.do((user_id, key, body_hash), run)
+            except IdempotencyConflict as e:
+                return jsonify({'error': str(e)}), e.status_code, {'Retry-After': '1'} if e.status_code == 409 else {}
+
+            replayed = stored or shared
+            if replayed:
+                REPLAYS.inc(endpoint=endpoint)
+            return _replay(snapshot, replayed)
+        return wrapper
+    return decorator
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import threading
+import time
+import uuid
+
+# Estados posibles de un trabajo
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """Se lanza cuando no hay espacio para encolar más trabajos"""
+
+
+class Job:
+    """Trabajo de generación ejecutado en segundo plano"""
+
+    def __init__(self, user_id, job_type, coalesce_key=None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.job_type = job_type
+        self.coalesce_key = coalesce_key
+        self.status = JOB_PENDING
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'type': self.job_type,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobManager:
+    """Pool acotado de hilos que ejecuta trabajos dentro del contexto de la app"""
+
+    def __init__(self, max_workers=4, max_pending=32, ttl_seconds=3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = None
+        self._jobs = {}
+        self._finished_at = {}
+        self._lock = threading.Lock()
+        # Limita trabajos en cola + en ejecución para no acumular memoria
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='plan-job'
+                )
+            return self._executor
+
+    def submit(self, app, user_id, job_type, fn, *args, coalesce_key=None, **kwargs):
+        """Encola fn(*args, **kwargs) y devuelve el trabajo creado.
+
+        Con coalesce_key, si el usuario ya tiene un trabajo del mismo tipo y clave
+        sin terminar se devuelve ese en lugar de encolar otro.
+        """
+        with self._lock:
+            if coalesce_key is not None:
+                for job in self._jobs.values():
+                    if (not job.done and job.user_id == user_id and job.job_type == job_type
+                            and job.coalesce_key == coalesce_key):
+                        return job
+
+            if not self._slots.acquire(blocking=False):
+                raise JobQueueFull('Demasiadas generaciones en curso, inténtalo más tarde')
+
+            job = Job(user_id, job_type, coalesce_key)
+            self._purge_expired()
+            self._jobs[job.id] = job
+
+        try:
+            self._get_executor().submit(self._run, app, job, fn, args, kwargs)
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Espera a que termine un trabajo (útil en pruebas y benchmarks)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.done:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.01)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, app, job, fn, args, kwargs):
+        from src.models.user import db
+
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            with app.app_context():
+                try:
+                    job.result = fn(*args, **kwargs)
+                    job.status = JOB_COMPLETED
+                except Exception as e:
+                    db.session.rollback()
+                    job.error = str(e)
+                    job.status = JOB_FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._finished_at[job.id] = time.monotonic()
+            self._slots.release()
+
+    def _purge_expired(self):
+        # Se llama con el lock tomado
+        now = time.monotonic()
+        expired = [job_id for job_id, finished in self._finished_at.items()
+                   if now - finished > self.ttl_seconds]
+        for job_id in expired:
+            self._finished_at.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+
+
+job_manager = JobManager(
+    max_workers=int(os.environ.get('PLAN_JOB_WORKERS', 4)),
+    max_pending=int(os.environ.get('PLAN_JOB_QUEUE_SIZE', 32)),
+    ttl_seconds=int(os.environ.get('PLAN_JOB_TTL_SECONDS', 3600))
+)
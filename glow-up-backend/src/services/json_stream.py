@@ -0,0 +1,113 @@
+import json
+
+
+class JsonSectionStream:
+    """Parser incremental que detecta sub-secciones JSON completas mientras llega el texto.
+
+    Los patrones son tuplas de claves/índices, con '*' como comodín:
+    ('weekly_schedule', '*') emite cada día del cronograma en cuanto se cierra.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = [tuple(pattern) for pattern in patterns]
+        self._chunks = []
+        self._pos = 0  # caracteres ya analizados
+        # Solo se guarda el texto de la sección o clave que sigue abierta, desde _buffer_start
+        self._buffer = ''
+        self._buffer_start = 0
+        self._stack = []  # frames: {'type', 'start', 'path', 'key', 'expect_key', 'capture'}
+        self._in_string = False
+        self._in_key = False
+        self._escape = False
+        self._string_start = None
+
+    @property
+    def text(self):
+        """Texto completo recibido hasta ahora"""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def feed(self, chunk):
+        """Añade texto y devuelve la lista de (path, valor) completados.
+
+        Solo se analiza el fragmento nuevo: el coste total es lineal en la longitud de la respuesta.
+        """
+        self._chunks.append(chunk)
+        completed = []
+        buffer = self._buffer + chunk
+        offset = self._buffer_start
+
+        for i in range(self._pos, self._pos + len(chunk)):
+            char = buffer[i - offset]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._in_key:
+                        self._in_key = False
+                        self._stack[-1]['key'] = json.loads(buffer[self._string_start - offset:i + 1 - offset])
+                continue
+
+            if char == '"':
+                if self._stack:
+                    frame = self._stack[-1]
+                    self._in_string = True
+                    self._in_key = frame['type'] == 'object' and frame['expect_key']
+                    self._string_start = i
+            elif char in '{[':
+                path = tuple(frame['key'] for frame in self._stack)
+                self._stack.append({
+                    'type': 'object' if char == '{' else 'array',
+                    'start': i,
+                    'path': path,
+                    'key': None if char == '{' else 0,
+                    'expect_key': char == '{',
+                    'capture': self._matches(path)
+                })
+            elif char in '}]':
+                if not self._stack:
+                    continue
+                frame = self._stack.pop()
+                if frame['capture']:
+                    try:
+                        completed.append((frame['path'], json.loads(buffer[frame['start'] - offset:i + 1 - offset])))
+                    except ValueError:
+                        pass
+            elif char == ':':
+                if self._stack and self._stack[-1]['type'] == 'object':
+                    self._stack[-1]['expect_key'] = False
+            elif char == ',':
+                if self._stack:
+                    frame = self._stack[-1]
+                    if frame['type'] == 'object':
+                        frame['expect_key'] = True
+                    else:
+                        frame['key'] += 1
+
+        self._pos += len(chunk)
+        keep = [frame['start'] for frame in self._stack if frame['capture']]
+        if self._in_key:
+            keep.append(self._string_start)
+        self._buffer_start = min(keep) if keep else self._pos
+        self._buffer = buffer[self._buffer_start - offset:]
+        return completed
+
+    def _matches(self, path):
+        for pattern in self.patterns:
+            if len(pattern) == len(path) and all(p == '*' or p == k for p, k in zip(pattern, path)):
+                return True
+        return False
+
+
+def extract_json(text):
+    """Obtiene el objeto JSON de la respuesta, ignorando texto o ``` alrededor"""
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end == -1:
+        raise ValueError('La respuesta no contiene JSON')
+    return json.loads(text[start:end + 1])
@@ -0,0 +1,33 @@
+import os
+import threading
+
+# El paquete openai (con aiohttp) tarda ~0.3 s en importarse: se carga en la primera llamada al LLM
+_openai = None
+_lock = threading.Lock()
+
+
+def get_openai():
+    """Módulo openai con la API key de OPENAI_API_KEY, importado la primera vez que se pide"""
+    global _openai
+    if _openai is None:
+        with _lock:
+            if _openai is None:
+                import openai
+                if not openai.api_key:
+                    openai.api_key = os.environ.get('OPENAI_API_KEY')
+                _openai = openai
+    return _openai
+
+
+def llm_configured():
+    """Indica si hay API key del LLM, sin importar openai si todavía no se ha usado"""
+    if _openai is not None:
+        return bool(_openai.api_key)
+    return bool(os.environ.get('OPENAI_API_KEY'))
+
+
+def preload():
+    """Importa openai en segundo plano (LLM_CLIENT_PRELOAD=1) para no cargarlo en la primera generación"""
+    thread = threading.Thread(target=get_openai, name='llm-client-preload', daemon=True)
+    thread.start()
+    return thread
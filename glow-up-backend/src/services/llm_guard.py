@@ -0,0 +1,252 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from src.services.metrics import TOKEN_BUCKETS, current_metrics, registry
+import asyncio
+import os
+import threading
+import time
+
+# Presupuesto total de una petición que llama al LLM, contado desde su inicio
+LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_SECONDS', 20))
+# Margen reservado antes del plazo para generar y guardar el plan local
+LLM_HEDGE_MARGIN_SECONDS = float(os.environ.get('LLM_HEDGE_MARGIN_SECONDS', 1))
+# Llamadas al LLM en paralelo; las que esperan consumen su propio plazo
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+
+# Circuit breaker: se abre tras N fallos o llamadas lentas seguidas y prueba de nuevo tras el enfriamiento
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.environ.get('LLM_BREAKER_COOLDOWN_SECONDS', 30))
+LLM_SLOW_CALL_SECONDS = float(os.environ.get('LLM_SLOW_CALL_SECONDS', 15))
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+LLM_OUTCOMES = registry.counter(
+    'llm_generation_outcomes_total', 'Resultado de cada generación que podía usar el LLM',
+    ('plan_type', 'source', 'reason'))
+PROMPT_TOKENS = registry.histogram(
+    'llm_prompt_tokens', 'Tokens del prompt de usuario contados antes de llamar al LLM', ('plan_type',),
+    buckets=TOKEN_BUCKETS)
+BREAKER_TRANSITIONS = registry.counter(
+    'llm_circuit_transitions_total', 'Cambios de estado del circuit breaker del LLM', ('state',))
+
+
+class CircuitOpen(Exception):
+    """El circuito está abierto: no se llama al LLM"""
+
+
+class LLMTimeout(TimeoutError):
+    """El LLM no respondió antes del plazo de la petición"""
+
+
+class CircuitBreaker:
+    """Circuit breaker de fallos consecutivos; una llamada lenta cuenta como fallo"""
+
+    def __init__(self, failure_threshold=5, cooldown_seconds=30, slow_call_seconds=15):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Indica si se puede llamar; en semiabierto solo deja pasar una llamada de prueba"""
+        with self._lock:
+            if self._state == CIRCUIT_OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._transition(CIRCUIT_HALF_OPEN)
+            if self._state == CIRCUIT_HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record(self, ok, duration):
+        failed = not ok or duration >= self.slow_call_seconds
+        with self._lock:
+            self._trial_running = False
+            if not failed:
+                self._failures = 0
+                if self._state != CIRCUIT_CLOSED:
+                    self._transition(CIRCUIT_CLOSED)
+                return
+
+            self._failures += 1
+            if self._state == CIRCUIT_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self._state != CIRCUIT_OPEN:
+                    self._transition(CIRCUIT_OPEN)
+
+    def cancel(self):
+        """Llamada abandonada sin resultado (p. ej. el cliente cortó el stream)"""
+        with self._lock:
+            self._trial_running = False
+
+    def reset(self):
+        with self._lock:
+            self._state = CIRCUIT_CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                return CIRCUIT_HALF_OPEN
+            return self._state
+
+    def _transition(self, state):
+        # Se llama con el lock tomado
+        self._state = state
+        BREAKER_TRANSITIONS.inc(state=state)
+
+
+class Deadline:
+    """Plazo absoluto de una petición"""
+
+    def __init__(self, seconds, started=None):
+        self.seconds = seconds
+        self.expires = (started if started is not None else time.perf_counter()) + seconds
+
+    def remaining(self):
+        return self.expires - time.perf_counter()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def request_deadline():
+    """Plazo del LLM para la petición actual, descontando lo que ya lleva (trabajos: desde ahora)"""
+    metrics = current_metrics()
+    return Deadline(LLM_DEADLINE_SECONDS, metrics.started if metrics is not None else None)
+
+
+breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_SECONDS, LLM_SLOW_CALL_SECONDS)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix='llm-call')
+        return _executor
+
+
+def call(create, deadline, on_late=None):
+    """Ejecuta create(timeout) respetando el circuito y el plazo.
+
+    Deja de esperar LLM_HEDGE_MARGIN_SECONDS antes del plazo y lanza LLMTimeout
+    para que el llamante sirva el plan local. La llamada sigue en segundo plano
+    y, si termina bien, se entrega a on_late(resultado).
+    """
+    if not breaker.allow():
+        raise CircuitOpen('Circuito del LLM abierto')
+
+    wait = deadline.remaining() - LLM_HEDGE_MARGIN_SECONDS
+    if wait <= 0:
+        breaker.cancel()
+        raise LLMTimeout('Sin tiempo para llamar al LLM')
+
+    started = time.perf_counter()
+    future = _get_executor().submit(create, deadline.remaining())
+
+    def finished(done):
+        if done.cancelled():
+            # Nunca llegó a salir de la cola local: no dice nada del proveedor
+            breaker.cancel()
+        else:
+            breaker.record(done.exception() is None, time.perf_counter() - started)
+
+    future.add_done_callback(finished)
+    try:
+        return future.result(timeout=wait)
+    except FutureTimeout:
+        if not future.cancel() and on_late is not None:
+            future.add_done_callback(
+                lambda done: on_late(done.result()) if not done.cancelled() and done.exception() is None else None
+            )
+        raise LLMTimeout(f'El LLM no respondió en {wait:.1f}s')
+
+
+async def call_async(create, deadline, on_late=None):
+    """Versión asíncrona de call para el modo ASGI: await create(timeout) sin ocupar un hilo"""
+    if not breaker.allow():
+        raise CircuitOpen('Circuito del LLM abierto')
+
+    wait = deadline.remaining() - LLM_HEDGE_MARGIN_SECONDS
+    if wait <= 0:
+        breaker.cancel()
+        raise LLMTimeout('Sin tiempo para llamar al LLM')
+
+    started = time.perf_counter()
+    task = asyncio.ensure_future(create(deadline.remaining()))
+
+    def finished(done):
+        if done.cancelled():
+            breaker.cancel()
+        else:
+            breaker.record(done.exception() is None, time.perf_counter() - started)
+
+    task.add_done_callback(finished)
+    done, _ = await asyncio.wait({task}, timeout=wait)
+    if task in done:
+        return task.result()
+
+    if on_late is not None:
+        task.add_done_callback(
+            lambda done: on_late(done.result()) if not done.cancelled() and done.exception() is None else None
+        )
+    raise LLMTimeout(f'El LLM no respondió en {wait:.1f}s')
+
+
+def stream(create, deadline):
+    """Itera create(timeout) respetando el circuito; lanza LLMTimeout si el stream supera el plazo"""
+    if not breaker.allow():
+        raise CircuitOpen('Circuito del LLM abierto')
+
+    started = time.perf_counter()
+    try:
+        for chunk in create(max(deadline.remaining(), 0.1)):
+            if deadline.expired():
+                raise LLMTimeout('El stream del LLM superó el plazo')
+            yield chunk
+    except GeneratorExit:
+        breaker.cancel()
+        raise
+    except BaseException:
+        breaker.record(False, time.perf_counter() - started)
+        raise
+    breaker.record(True, time.perf_counter() - started)
+
+
+def failure_reason(error):
+    """Motivo de la degradación a plan local que se informa en los metadatos"""
+    if isinstance(error, CircuitOpen):
+        return 'circuit_open'
+    if isinstance(error, TimeoutError):
+        return 'timeout'
+    if isinstance(error, ValueError):
+        return 'invalid_response'
+    return 'llm_error'
+
+
+def generation_info(plan_type, source, reason=None, llm_seconds=None, deadline=None, prompt_tokens=None):
+    """Metadatos de generación que acompañan al plan en la respuesta"""
+    LLM_OUTCOMES.inc(plan_type=plan_type, source=source, reason=reason or '')
+    if prompt_tokens is not None:
+        PROMPT_TOKENS.observe(prompt_tokens, plan_type=plan_type)
+    return {
+        'source': source,
+        'reason': reason,
+        'llm_ms': round(llm_seconds * 1000, 1) if llm_seconds is not None else None,
+        'deadline_ms': round(deadline.seconds * 1000) if deadline is not None else None,
+        'prompt_tokens': prompt_tokens,
+        'circuit': breaker.state
+    }
@@ -0,0 +1,361 @@
+from src.services.plan_catalog import (
+    CARDIO, DIET_KEYWORDS, EQUIPMENT_KEYWORDS, EQUIPMENT_TAGS, EXERCISES, FILLER_WORDS, LEVEL_RANK, MEALS,
+    MUSCLE_GROUP_NAMES, PROGRESSION_PHASES, WEEK_TEMPLATES
+)
+from functools import lru_cache
+import json
+import os
+import re
+import unicodedata
+
+# Parámetros de entrenamiento por objetivo
+GOAL_PARAMS = {
+    'lose_weight': {'reps': '12-15', 'rest': 45, 'compound_rest': 75, 'load': '60% 1RM',
+                    'cardio_minutes': 35, 'heart_rate_zone': '65-75%'},
+    'gain_muscle': {'reps': '8-12', 'rest': 75, 'compound_rest': 120, 'load': '70-75% 1RM',
+                    'cardio_minutes': 20, 'heart_rate_zone': '60-70%'},
+    'maintain_weight': {'reps': '10-12', 'rest': 60, 'compound_rest': 90, 'load': '65% 1RM',
+                        'cardio_minutes': 30, 'heart_rate_zone': '60-70%'}
+}
+
+# Reparto de macros (% proteína, % carbohidratos, % grasa) por objetivo
+MACRO_SPLIT = {
+    'lose_weight': (35, 35, 30),
+    'gain_muscle': (30, 45, 25),
+    'maintain_weight': (30, 40, 30)
+}
+
+BASE_SETS = {'beginner': 3, 'intermediate': 3, 'advanced': 4}
+LOADED_EQUIPMENT = ('barbell', 'dumbbells', 'machines', 'kettlebell')
+BORED_WORDS = ('aburrid', 'repetitiv', 'monoton', 'variedad')
+DEFAULT_DAILY_CALORIES = 2200
+MAX_MEAL_PLAN_WEEKS = 52
+
+
+class UnsupportedDiet(ValueError):
+    """Restricciones dietéticas que el catálogo de recetas no puede garantizar"""
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', str(text).strip().lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def _as_list(value):
+    """Lista de valores a partir de JSON, texto separado por comas o lista"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = value.split(',')
+    if not isinstance(value, list):
+        value = [value]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+@lru_cache(maxsize=None)
+def _keyword_patterns(table):
+    """(patrón, resultado) por palabra clave, de la más larga a la más corta"""
+    pairs = sorted(((keyword, result) for keywords, result in table for keyword in keywords),
+                   key=lambda pair: -len(pair[0]))
+    # Palabra completa, admitiendo el plural ('mancuernas', 'lacteos')
+    return tuple((re.compile(rf'(?<!\w){re.escape(keyword)}(?:e?s)?(?!\w)'), result) for keyword, result in pairs)
+
+
+def _match_keywords(item, table):
+    """Devuelve (resultados de todas las palabras clave presentes, palabras no reconocidas).
+
+    Cada coincidencia se retira del texto antes de probar claves más cortas,
+    de modo que 'barra fija' no cuenta además como 'barra'.
+    """
+    text = _normalize(item)
+    results = []
+    for pattern, result in _keyword_patterns(table):
+        text, count = pattern.subn(' ', text)
+        if count:
+            results.append(result)
+    unrecognized = [word for word in re.findall(r'\w+', text) if word not in FILLER_WORDS and not word.isdigit()]
+    return results, unrecognized
+
+
+def resolve_equipment(value):
+    """Devuelve (etiquetas de equipo disponibles, elementos no reconocidos)"""
+    items = _as_list(value)
+    if not items:
+        # Sin datos se asume equipo básico de gimnasio, como en el prompt del LLM
+        return set(EQUIPMENT_TAGS), []
+
+    tags = {'bodyweight'}
+    unknown = []
+    for item in items:
+        results, unrecognized = _match_keywords(item, EQUIPMENT_KEYWORDS)
+        for item_tags in results:
+            tags.update(item_tags)
+        if not results or unrecognized:
+            unknown.append(item)
+    return tags, unknown
+
+
+def resolve_diet(value):
+    """Devuelve (etiquetas que deben cumplir las recetas, restricciones no reconocidas).
+
+    Un elemento puede aportar varias etiquetas ('vegetariano sin gluten'); si
+    además tiene palabras no reconocidas se considera desconocido, aunque sus
+    etiquetas se siguen aplicando.
+    """
+    tags = set()
+    unknown = []
+    for item in _as_list(value):
+        results, unrecognized = _match_keywords(item, DIET_KEYWORDS)
+        tags.update(tag for tag in results if tag)
+        if not results or unrecognized:
+            unknown.append(item)
+    return tags, unknown
+
+
+def _profile(user):
+    goal = getattr(user, 'goal', None)
+    goal = 'maintain_weight' if goal not in GOAL_PARAMS else goal
+    level = getattr(user, 'experience_level', None) or 'beginner'
+    return goal, level
+
+
+def feedback_adjustments(feedback):
+    """(delta de series, rotación de ejercicios/recetas) a partir del feedback reciente"""
+    difficulties = [f.difficulty_rating for f in feedback if f.difficulty_rating]
+    volume_delta = 0
+    if difficulties:
+        average = sum(difficulties) / len(difficulties)
+        if average >= 4:
+            volume_delta = -1
+        elif average <= 2:
+            volume_delta = 1
+
+    # Cada plan mal valorado o calificado de repetitivo desplaza la selección
+    rotation = sum(1 for f in feedback if (f.rating or 3) <= 2 or mentions_boredom(f.feedback_text))
+    return volume_delta, rotation
+
+
+def mentions_boredom(text):
+    """Indica si un comentario de feedback pide más variedad"""
+    normalized = _normalize(text or '')
+    return any(word in normalized for word in BORED_WORDS)
+
+
+def covers_profile(user, plan_type):
+    """Indica si las reglas locales cubren el perfil (equipo y restricciones reconocidos)"""
+    if user is None:
+        return True
+    if plan_type == 'workout':
+        _, unknown = resolve_equipment(user.equipment_available)
+        return not unknown and (user.experience_level or 'beginner') in LEVEL_RANK
+    # El optimizador (numpy) se importa al primer plan nutricional, no al arrancar
+    from src.services.meal_optimizer import recipe_candidates
+
+    diet_tags, unknown = resolve_diet(user.dietary_restrictions)
+    return not unknown and all(recipe_candidates(meal, diet_tags) for meal in MEALS)
+
+
+def planner_mode():
+    """PLAN_GENERATOR: 'auto' (local si las reglas cubren el perfil), 'local' o 'llm'"""
+    mode = os.environ.get('PLAN_GENERATOR', 'auto')
+    return mode if mode in ('auto', 'local', 'llm') else 'auto'
+
+
+def should_plan_locally(user, plan_type):
+    mode = planner_mode()
+    return mode == 'local' or (mode == 'auto' and covers_profile(user, plan_type))
+
+
+def _exercise_candidates(group, equipment, level_rank):
+    candidates = [
+        exercise for exercise in EXERCISES
+        if exercise[1] == group
+        and LEVEL_RANK[exercise[3]] <= level_rank
+        and equipment.intersection(exercise[2])
+    ]
+    # Primero los ejercicios compuestos
+    return sorted(candidates, key=lambda exercise: not exercise[4])
+
+
+def _weight_suggestion(exercise, equipment, params):
+    used = [tag for tag in exercise[2] if tag in equipment]
+    if any(tag in LOADED_EQUIPMENT for tag in used):
+        return params['load']
+    if 'bands' in used:
+        return 'Banda de resistencia media'
+    return 'Peso corporal'
+
+
+def _strength_day(day, day_type, groups, equipment, goal, level, volume_delta, offset):
+    params = GOAL_PARAMS[goal]
+    level_rank = LEVEL_RANK[level]
+    sets_base = BASE_SETS[level] + volume_delta
+
+    exercises = []
+    used = set()
+    for position, group in enumerate(groups):
+        candidates = [exercise for exercise in _exercise_candidates(group, equipment, level_rank)
+                      if exercise[0] not in used]
+        if not candidates:
+            continue
+        exercise = candidates[(offset + position) % len(candidates)]
+        used.add(exercise[0])
+
+        compound = exercise[4]
+        sets = max(2, min(5, sets_base + (1 if compound and level != 'beginner' else 0)))
+        item = {
+            'name': exercise[0],
+            'sets': sets,
+            'reps': params['reps'],
+            'weight_suggestion': _weight_suggestion(exercise, equipment, params),
+            'rest_seconds': params['compound_rest'] if compound else params['rest']
+        }
+        if level != 'beginner':
+            item['tempo'] = '3-1-1-0' if compound else '2-0-2-0'
+        exercises.append(item)
+
+    # Calentamiento de 10 minutos más ~40 s de trabajo por serie, redondeado a 5 minutos
+    seconds = sum(item['sets'] * (40 + item['rest_seconds']) for item in exercises)
+    duration = 10 + 5 * round(seconds / 300)
+
+    muscle_groups = []
+    for group in groups:
+        name = MUSCLE_GROUP_NAMES[group]
+        if name not in muscle_groups:
+            muscle_groups.append(name)
+
+    return {
+        'day': day,
+        'type': day_type,
+        'muscle_groups': muscle_groups,
+        'duration_minutes': duration,
+        'exercises': exercises
+    }
+
+
+def _cardio_day(day, equipment, goal, level, offset, light=False):
+    params = GOAL_PARAMS[goal]
+    level_rank = LEVEL_RANK[level]
+    candidates = [
+        cardio for cardio in CARDIO
+        if LEVEL_RANK[cardio[2]] <= level_rank and equipment.intersection(cardio[1])
+        and (not light or cardio[3] == 'steady')
+    ]
+    cardio = candidates[offset % len(candidates)]
+    minutes = 25 if light else params['cardio_minutes'] + 5 * level_rank
+    if cardio[3] == 'intervals':
+        minutes = min(minutes, 25)
+
+    return {
+        'day': day,
+        'type': 'Cardio suave' if light else 'Cardio',
+        'muscle_groups': ['Cardiovascular'],
+        'duration_minutes': minutes,
+        'exercises': [{
+            'name': cardio[0],
+            'sets': 1,
+            'reps': f'{minutes} minutos',
+            'intensity': 'Baja' if light else ('Alta' if cardio[3] == 'intervals' else 'Moderada'),
+            'heart_rate_zone': '55-65%' if light else ('80-90%' if cardio[3] == 'intervals' else params['heart_rate_zone'])
+        }]
+    }
+
+
+def _rest_day(day):
+    return {'day': day, 'type': 'Descanso', 'muscle_groups': [], 'duration_minutes': 0, 'exercises': []}
+
+
+def progression_for(duration_weeks):
+    """Mesociclos de 4 semanas (adaptación, volumen, intensidad, descarga) repetidos"""
+    progression = {}
+    for week in range(1, max(int(duration_weeks or 4), 1) + 1):
+        phase = PROGRESSION_PHASES[(week - 1) % len(PROGRESSION_PHASES)]
+        cycle = (week - 1) // len(PROGRESSION_PHASES) + 1
+        progression[f'week_{week}'] = phase if cycle == 1 else f'{phase} (ciclo {cycle})'
+    return progression
+
+
+def generate_workout_plan(user, duration_weeks, feedback=()):
+    """Plan de entrenamiento determinista a partir del catálogo y la plantilla del nivel"""
+    goal, level = _profile(user)
+    if level not in LEVEL_RANK:
+        level = 'beginner'
+    equipment, _ = resolve_equipment(getattr(user, 'equipment_available', None))
+    volume_delta, rotation = feedback_adjustments(feedback)
+
+    schedule = []
+    for index, (day, day_type, groups) in enumerate(WEEK_TEMPLATES[level]):
+        offset = index + rotation
+        if day_type == 'cardio':
+            schedule.append(_cardio_day(day, equipment, goal, level, offset))
+        elif day_type == 'rest':
+            # Para perder peso, los descansos entre semana pasan a cardio suave
+            if goal == 'lose_weight' and day != 'Domingo':
+                schedule.append(_cardio_day(day, equipment, goal, level, offset, light=True))
+            else:
+                schedule.append(_rest_day(day))
+        else:
+            schedule.append(_strength_day(day, day_type, groups, equipment, goal, level, volume_delta, offset))
+
+    return {
+        'weekly_schedule': schedule,
+        'progression': progression_for(duration_weeks)
+    }
+
+
+def macros_for(goal, daily_calories):
+    protein, carbs, fat = MACRO_SPLIT[goal]
+    return {
+        'protein_grams': int(round(daily_calories * protein / 100 / 4)),
+        'carbs_grams': int(round(daily_calories * carbs / 100 / 4)),
+        'fat_grams': int(round(daily_calories * fat / 100 / 9)),
+        'protein_percentage': protein,
+        'carbs_percentage': carbs,
+        'fat_percentage': fat
+    }
+
+
+def generate_nutrition_plan(user, duration_weeks, feedback=(), daily_calories=None):
+    """Plan nutricional con raciones optimizadas para las calorías y macros objetivo"""
+    return generate_nutrition_plans([(user, duration_weeks, feedback, daily_calories)])[0]
+
+
+def generate_nutrition_plans(requests):
+    """Versión por lotes de generate_nutrition_plan para tuplas (user, duration_weeks, feedback, daily_calories).
+
+    Los objetivos que comparten restricciones dietéticas se resuelven juntos con
+    una única operación vectorizada del optimizador. Lanza UnsupportedDiet si
+    alguna restricción no se reconoce o no hay recetas que la cumplan.
+    """
+    from src.services.meal_optimizer import get_optimizer, recipe_candidates
+
+    prepared = []
+    groups = {}
+    for index, (user, duration_weeks, feedback, daily_calories) in enumerate(requests):
+        goal, _ = _profile(user)
+        macros = macros_for(goal, daily_calories or DEFAULT_DAILY_CALORIES)
+        diet_tags, unknown = resolve_diet(getattr(user, 'dietary_restrictions', None))
+        diet_key = frozenset(diet_tags)
+        # Nunca se relaja una restricción: sin recetas que la cumplan no hay plan local
+        if unknown:
+            raise UnsupportedDiet(f"Restricciones dietéticas no reconocidas por el generador local: {', '.join(unknown)}")
+        if not all(recipe_candidates(meal, diet_key) for meal in MEALS):
+            raise UnsupportedDiet(f"Sin recetas compatibles con: {', '.join(sorted(diet_key))}")
+        weeks = max(1, min(int(duration_weeks or 4), MAX_MEAL_PLAN_WEEKS))
+        prepared.append(macros)
+        groups.setdefault(diet_key, []).append((index, macros, weeks, feedback_adjustments(feedback)[1]))
+
+    plans = [None] * len(prepared)
+    for diet_key, members in groups.items():
+        targets = [[m['protein_grams'], m['carbs_grams'], m['fat_grams']] for _, m, _, _ in members]
+        meal_plans = get_optimizer(diet_key).meal_plans(
+            targets,
+            [weeks for _, _, weeks, _ in members],
+            [rotation for _, _, _, rotation in members]
+        )
+        for (index, macros, _, _), meal_plan in zip(members, meal_plans):
+            plans[index] = {'macros': macros, 'meal_plan': meal_plan}
+    return plans
@@ -0,0 +1,200 @@
+from functools import lru_cache
+from src.services.plan_catalog import DIET_EXCLUDES, DAYS, FOODS, MEAL_SHARE, MEALS, RECIPES
+import math
+import numpy as np
+
+# kcal por gramo de proteína, carbohidratos y grasa
+ATWATER = np.array([4.0, 4.0, 9.0])
+
+# Límites de la ración respecto a la receta base y tolerancias respecto al objetivo diario
+SCALE_MIN = 0.5
+SCALE_MAX = 2.5
+CALORIE_TOLERANCE = 0.05
+MACRO_TOLERANCE = 0.10
+
+# Mínimo de combinaciones distintas entre las que rotar los días
+MIN_POOL = 2
+
+# Peso de la regularización que mantiene cada comida cerca de su reparto de calorías
+SHARE_WEIGHT = 0.25
+
+# Celdas objetivo x combinación resueltas a la vez en solve (acota la memoria de las matrices N x K x comidas)
+SOLVE_CELLS = 600000
+
+
+def recipe_macros(recipe):
+    """Gramos de proteína, carbohidratos y grasa de la ración base"""
+    total = np.zeros(3)
+    for amount, food in recipe['ingredients']:
+        if amount is not None:
+            total += amount / 100 * np.array(FOODS[food][3:6])
+    return total
+
+
+def recipe_diet_tags(recipe):
+    """Restricciones que cumple la receta según el contenido de sus alimentos"""
+    contains = set()
+    for amount, food in recipe['ingredients']:
+        if amount is not None:
+            contains.update(FOODS[food][6])
+    return {tag for tag, excluded in DIET_EXCLUDES.items() if not contains.intersection(excluded)}
+
+
+def recipe_candidates(meal, diet_tags):
+    return [recipe for recipe in RECIPES[meal] if set(diet_tags) <= recipe_diet_tags(recipe)]
+
+
+@lru_cache(maxsize=4096)
+def _portion(meal, recipe_index, scale, diet_key):
+    recipe = get_optimizer(diet_key).candidates[meal][recipe_index]
+    ingredients = []
+    for amount, food in recipe['ingredients']:
+        if amount is None:
+            ingredients.append(food)
+            continue
+        name, unit = FOODS[food][0], FOODS[food][1]
+        ingredients.append(f'{max(5, int(5 * round(amount * scale / 5)))}{unit} {name}')
+
+    protein, carbs, fat = recipe_macros(recipe) * scale
+    return {
+        'name': recipe['name'],
+        'ingredients': ingredients,
+        'preparation': recipe['preparation'],
+        'calories': int(round(4 * protein + 4 * carbs + 9 * fat)),
+        'protein': int(round(protein)),
+        'carbs': int(round(carbs)),
+        'fat': int(round(fat))
+    }
+
+
+class MealOptimizer:
+    """Elige combinaciones de recetas para cada comida y sus raciones para unos objetivos de macros.
+
+    Para cada combinación k de recetas se resuelve por mínimos cuadrados la ración
+    de cada comida que acerca proteína, carbohidratos y grasa (ponderados en kcal)
+    al objetivo, con una regularización hacia el reparto de calorías por comida.
+    La solución es lineal en el objetivo, escalas = M[k] @ objetivo, de modo que M
+    se precalcula una vez por conjunto de restricciones y cualquier número de
+    objetivos se resuelve con una sola operación vectorizada.
+    """
+
+    def __init__(self, diet_tags=frozenset()):
+        self.diet_key = frozenset(diet_tags)
+        self.candidates = {meal: recipe_candidates(meal, self.diet_key) for meal in MEALS}
+        missing = [meal for meal, recipes in self.candidates.items() if not recipes]
+        if missing:
+            raise ValueError(f'Sin recetas compatibles para: {", ".join(missing)}')
+
+        macros = [np.array([recipe_macros(recipe) for recipe in self.candidates[meal]]) for meal in MEALS]
+
+        # Todas las combinaciones (K, comidas)
+        grids = np.meshgrid(*[np.arange(len(m)) for m in macros], indexing='ij')
+        self.combos = np.stack([grid.ravel() for grid in grids], axis=1)
+
+        # V[k, j, i] = gramos del macro j en la ración base de la comida i
+        self.V = np.stack([macros[i][self.combos[:, i]] for i in range(len(MEALS))], axis=2)
+        kcal = np.einsum('j,kji->ki', ATWATER, self.V)
+        share = np.array([MEAL_SHARE[meal] for meal in MEALS])
+        weights = ATWATER ** 2
+
+        # (Vᵀ D² V + λ diag(kcal²)) s = Vᵀ D² t + λ kcal · share · (ATWATER · t)
+        A = np.einsum('kji,j,kjm->kim', self.V, weights, self.V) + SHARE_WEIGHT * kcal[:, :, None] ** 2 * np.eye(len(MEALS))
+        B = np.einsum('kji,j->kij', self.V, weights) + SHARE_WEIGHT * (kcal * share)[:, :, None] * ATWATER
+        self.M = np.linalg.solve(A, B)
+
+    def solve(self, targets):
+        """Para objetivos (N, 3) en gramos devuelve (escalas (N, K, comidas), puntuación (N, K), dentro de tolerancia (N, K))"""
+        targets = np.atleast_2d(np.asarray(targets, dtype=float))
+        chunk = max(1, SOLVE_CELLS // self.combos.shape[0])
+        results = [self._solve_chunk(targets[i:i + chunk]) for i in range(0, len(targets), chunk)]
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def _solve_chunk(self, targets):
+        scales = np.einsum('kij,nj->nki', self.M, targets)
+        np.clip(scales, SCALE_MIN, SCALE_MAX, out=scales)
+        # Se evalúan las raciones ya redondeadas, que son las que se sirven
+        np.round(scales, 2, out=scales)
+
+        achieved = np.einsum('kji,nki->nkj', self.V, scales)
+        target_kcal = (targets @ ATWATER)[:, None]
+        calorie_error = np.abs(achieved @ ATWATER - target_kcal) / target_kcal
+        # Holgura por el redondeo a gramos enteros de cada comida
+        slack = 0.5 * len(MEALS)
+        macro_error = ((np.abs(achieved - targets[:, None, :]) + slack) / targets[:, None, :]).max(axis=2)
+
+        within = (calorie_error <= CALORIE_TOLERANCE) & (macro_error <= MACRO_TOLERANCE)
+        score = calorie_error + 0.5 * macro_error + (~within)
+        return scales, score, within
+
+    def meal_plans(self, targets, weeks, rotations=None):
+        """Planes {'week_N': {día: {comida: {option_1, option_2}}}} para cada objetivo.
+
+        Cada día usa dos combinaciones distintas dentro de tolerancia, de modo
+        que cualquiera de las dos columnas de opciones cumple el objetivo
+        diario. Si hay menos de MIN_POOL se completan con las mejores restantes
+        y los días que las usan llevan 'within_tolerance': False.
+        """
+        targets = np.atleast_2d(np.asarray(targets, dtype=float))
+        weeks = np.broadcast_to(np.asarray(weeks), (len(targets),))
+        rotations = np.zeros(len(targets), dtype=int) if rotations is None else np.asarray(rotations)
+        scales, score, within = self.solve(targets)
+        order = np.argsort(score, axis=1, kind='stable')
+
+        plans = []
+        for n in range(len(targets)):
+            pool_size = min(max(int(within[n].sum()), MIN_POOL), self.combos.shape[0])
+            pool = order[n, :pool_size]
+            stride = _stride(pool_size)
+            plan = {}
+            slot = int(rotations[n])
+            for week in range(1, int(weeks[n]) + 1):
+                days = {}
+                for day in DAYS:
+                    options = {}
+                    combos = []
+                    for option in ('option_1', 'option_2'):
+                        k = pool[(slot * stride) % pool_size]
+                        combos.append(k)
+                        slot += 1
+                        options[option] = [(meal, int(self.combos[k, i]), float(scales[n, k, i]))
+                                           for i, meal in enumerate(MEALS)]
+                    days[day] = {
+                        meal: {
+                            option: dict(_portion(meal, options[option][i][1], options[option][i][2], self.diet_key))
+                            for option in ('option_1', 'option_2')
+                        }
+                        for i, meal in enumerate(MEALS)
+                    }
+                    if not all(within[n, k] for k in combos):
+                        days[day]['within_tolerance'] = False
+                plan[f'week_{week}'] = days
+            plans.append(plan)
+        return plans
+
+
+def _stride(size):
+    """Paso coprimo con size cercano a size/φ: días consecutivos usan combinaciones alejadas en el ranking"""
+    stride = max(int(size * 0.618), 1)
+    while math.gcd(stride, size) != 1:
+        stride += 1
+    return stride
+
+
+@lru_cache(maxsize=64)
+def get_optimizer(diet_key=frozenset()):
+    """Optimizador precalculado por conjunto de restricciones"""
+    return MealOptimizer(diet_key)
+
+
+def day_totals(day):
+    """Totales de cada columna de opciones de un día: {option: {calories, protein, carbs, fat}}"""
+    totals = {}
+    for meal in day.values():
+        if not isinstance(meal, dict):
+            # Marca within_tolerance de los días fuera de tolerancia
+            continue
+        for option, portion in meal.items():
+            bucket = totals.setdefault(option, {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0})
+            for key in bucket:
+                bucket[key] += portion.get(key) or 0
+    return totals
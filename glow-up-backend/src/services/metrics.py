@@ -0,0 +1,280 @@
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+from sqlalchemy import event
+import bisect
+import json
+import os
+import threading
+import time
+
+# Límites de los buckets (segundos, sentencias y tokens)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador acumulado con etiquetas"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}' for key, value in items]
+
+
+class Histogram:
+    """Histograma con buckets acumulados en formato Prometheus"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Conteos por bucket (el último es +Inf), suma y total
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_number(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Texto de exposición de Prometheus (versión 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    'http_requests_total', 'Peticiones HTTP atendidas', ('method', 'endpoint', 'status'))
+REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Tiempo total de la petición', ('method', 'endpoint'))
+REQUEST_SQL_STATEMENTS = registry.histogram(
+    'http_request_sql_statements', 'Sentencias SQL ejecutadas por petición', ('method', 'endpoint'),
+    buckets=COUNT_BUCKETS)
+REQUEST_SQL_DURATION = registry.histogram(
+    'http_request_sql_duration_seconds', 'Tiempo en SQL por petición', ('method', 'endpoint'))
+REQUEST_LLM_DURATION = registry.histogram(
+    'http_request_llm_duration_seconds', 'Tiempo esperando al LLM por petición', ('method', 'endpoint'))
+LLM_DURATION = registry.histogram(
+    'llm_call_duration_seconds', 'Duración de cada llamada al LLM', ('plan_type', 'mode', 'outcome'))
+LLM_TOKENS = registry.histogram(
+    'llm_call_tokens', 'Tokens por llamada al LLM', ('plan_type', 'kind'), buckets=TOKEN_BUCKETS)
+PLAN_SECTION_DURATION = registry.histogram(
+    'plan_generation_section_seconds', 'Duración de cada fase de la generación de planes',
+    ('plan_type', 'section'))
+
+
+class RequestMetrics:
+    """Desglose de tiempos de una petición en curso"""
+
+    __slots__ = ('started', 'sql_count', 'sql_time', 'llm_calls', 'llm_time', 'llm_tokens', 'sections')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.llm_calls = 0
+        self.llm_time = 0.0
+        self.llm_tokens = 0
+        self.sections = {}
+
+    def to_dict(self, elapsed):
+        return {
+            'total_ms': round(elapsed * 1000, 1),
+            'sql_statements': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 1),
+            'llm_calls': self.llm_calls,
+            'llm_ms': round(self.llm_time * 1000, 1),
+            'llm_tokens': self.llm_tokens,
+            'sections_ms': {name: round(value * 1000, 1) for name, value in self.sections.items()}
+        }
+
+
+def current_metrics():
+    """Métricas de la petición actual, o None fuera de una petición (p. ej. trabajos en segundo plano)"""
+    if not has_app_context():
+        return None
+    return g.get('request_metrics')
+
+
+@contextmanager
+def timed_section(plan_type, section):
+    """Mide una fase de la generación de planes (feedback, prompt, generate, save)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        PLAN_SECTION_DURATION.observe(elapsed, plan_type=plan_type, section=section)
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.sections[section] = metrics.sections.get(section, 0.0) + elapsed
+
+
+@contextmanager
+def track_llm(plan_type, mode='complete'):
+    """Mide una llamada al LLM; el llamante puede asignar call['usage'] con la respuesta"""
+    call = {'usage': None}
+    outcome = 'ok'
+    started = time.perf_counter()
+    try:
+        yield call
+    except GeneratorExit:
+        # Stream abandonado por el cliente
+        outcome = 'cancelled'
+        raise
+    except TimeoutError:
+        outcome = 'timeout'
+        raise
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_DURATION.observe(elapsed, plan_type=plan_type, mode=mode, outcome=outcome)
+
+        tokens = 0
+        usage = call['usage']
+        if usage is not None:
+            for kind in ('prompt_tokens', 'completion_tokens'):
+                value = getattr(usage, kind, None) or 0
+                tokens += value
+                LLM_TOKENS.observe(value, plan_type=plan_type, kind=kind.split('_')[0])
+
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.llm_calls += 1
+            metrics.llm_time += elapsed
+            metrics.llm_tokens += tokens
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.sql_count += 1
+        metrics.sql_time += time.perf_counter() - conn.info.pop('query_started', time.perf_counter())
+
+
+def init_metrics(app, db):
+    """Registra el middleware de métricas y los eventos SQL de los motores de la app.
+
+    SLOW_REQUEST_MS activa el registro de peticiones lentas con su desglose.
+    """
+    slow_ms = os.environ.get('SLOW_REQUEST_MS')
+    slow_threshold = float(slow_ms) / 1000 if slow_ms else None
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_metrics = RequestMetrics()
+
+    @app.after_request
+    def record_request_metrics(response):
+        metrics = g.pop('request_metrics', None)
+        if metrics is None:
+            return response
+
+        # Las respuestas en streaming solo cuentan hasta el envío de cabeceras
+        elapsed = time.perf_counter() - metrics.started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = {'method': request.method, 'endpoint': endpoint}
+        REQUESTS.inc(status=str(response.status_code), **labels)
+        REQUEST_DURATION.observe(elapsed, **labels)
+        REQUEST_SQL_STATEMENTS.observe(metrics.sql_count, **labels)
+        REQUEST_SQL_DURATION.observe(metrics.sql_time, **labels)
+        if metrics.llm_calls:
+            REQUEST_LLM_DURATION.observe(metrics.llm_time, **labels)
+
+        if slow_threshold is not None and elapsed >= slow_threshold:
+            app.logger.warning('Petición lenta %s %s: %s', request.method, request.path, json.dumps(
+                dict(metrics.to_dict(elapsed), endpoint=endpoint, status=response.status_code)
+            ))
+        return response
@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+import multiprocessing
+import os
+import threading
+
+
+class PasswordHashQueueFull(Exception):
+    """Se lanza cuando hay demasiadas operaciones de hash pendientes"""
+
+
+class PasswordHashTimeout(PasswordHashQueueFull):
+    """El hash no terminó a tiempo; las rutas lo tratan igual que una cola llena (503)"""
+
+
+class PasswordHasher:
+    """Hash y verificación de contraseñas en un pool de procesos acotado.
+
+    El hash (scrypt/pbkdf2) es CPU-bound y retiene el GIL; ejecutarlo en otros
+    procesos evita que una ráfaga de logins bloquee el resto de peticiones.
+    Con workers=0 se ejecuta en el hilo de la petición.
+
+    Los procesos se crean con 'spawn' (fork desde un servidor con hilos puede
+    heredar locks tomados), que vuelve a importar el módulo principal en cada
+    worker: un script que use el hasher necesita el guard
+    if __name__ == '__main__', o bien PASSWORD_HASH_WORKERS=0.
+    """
+
+    def __init__(self, method='scrypt', workers=None, max_pending=64, timeout=30):
+        self.method = method
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + max_pending)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Indica si el hash se generó con parámetros distintos a los configurados"""
+        return pwhash.split('$', 1)[0] != self._configured_prefix()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _configured_prefix(self):
+        # Los mismos valores por defecto que completa Werkzeug ('scrypt' -> 'scrypt:32768:8:1')
+        method, *params = self.method.split(':')
+        if method == 'scrypt':
+            n, r, p = params or (2 ** 15, 8, 1)
+            return f'scrypt:{n}:{r}:{p}'
+        if method == 'pbkdf2':
+            hash_name = params[0] if params else 'sha256'
+            iterations = params[1] if len(params) > 1 else DEFAULT_PBKDF2_ITERATIONS
+            return f'pbkdf2:{hash_name}:{iterations}'
+        return self.method
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Descarta un pool roto (un worker murió) para que la siguiente operación cree otro"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        # Un reintento con un pool nuevo si el actual está roto
+        for attempt in (1, 2):
+            if not self._slots.acquire(blocking=False):
+                raise PasswordHashQueueFull('Servidor ocupado, inténtalo de nuevo en unos segundos')
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._slots.release()
+                self._discard_executor(executor)
+                if attempt == 2:
+                    raise
+                continue
+            except BaseException:
+                self._slots.release()
+                raise
+            # El hueco se libera cuando termina el hash, no cuando se deja de esperar:
+            # tras un timeout el hash sigue ocupando un proceso del pool
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeout:
+                raise PasswordHashTimeout('El servidor tarda demasiado, inténtalo de nuevo en unos segundos') from None
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                if attempt == 2:
+                    raise
+
+
+_hasher = None
+
+
+def configure_password_hasher(**kwargs):
+    """Reemplaza el hasher global (p. ej. para benchmarks)"""
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown(wait=False)
+    _hasher = PasswordHasher(**kwargs)
+    return _hasher
+
+
+def get_password_hasher():
+    global _hasher
+    if _hasher is None:
+        workers = os.environ.get('PASSWORD_HASH_WORKERS')
+        _hasher = PasswordHasher(
+            method=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+            workers=int(workers) if workers is not None else None,
+            max_pending=int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 64)),
+            timeout=float(os.environ.get('PASSWORD_HASH_TIMEOUT', 30))
+        )
+    return _hasher
+
+
+def hash_password(password):
+    return get_password_hasher().hash(password)
+
+
+def verify_password(pwhash, password):
+    return get_password_hasher().verify(pwhash, password)
+
+
+def password_needs_rehash(pwhash):
+    return get_password_hasher().needs_rehash(pwhash)
@@ -0,0 +1,231 @@
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import os
+import threading
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from src.services.ttl_cache import TTLCache
+
+# Cambiar al modificar los prompts para invalidar planes cacheados
+PLAN_CACHE_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(plan_type, inputs):
+    """Huella estable (sha256) de las entradas que determinan el prompt"""
+    payload = json.dumps(
+        {'v': PLAN_CACHE_VERSION, 'type': plan_type, 'inputs': inputs},
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    """Caché de planes generados: LRU en memoria + tabla persistente"""
+
+    def __init__(self, memory_size=256, db_max_rows=10000, ttl_seconds=7 * 24 * 3600, enabled=True):
+        self.memory_size = memory_size
+        self.db_max_rows = db_max_rows
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._memory = TTLCache(memory_size, ttl_seconds)  # key -> plan_text
+        self._lock = threading.Lock()
+        # Aciertos en la tabla aún sin anotar: key -> (aciertos, último uso)
+        self._pending_hits = {}
+        self._stats = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+    def get(self, key):
+        """Devuelve el plan cacheado (dict) o None"""
+        if not self.enabled:
+            return None
+
+        plan_text = self._memory.get(key)
+        if plan_text is not None:
+            self._count('memory_hits')
+            return json.loads(plan_text)
+
+        plan_text = self._db_get(key)
+        if plan_text is not None:
+            self._count('db_hits')
+            self._count('evictions', self._memory.set(key, plan_text))
+            return json.loads(plan_text)
+
+        self._count('misses')
+        return None
+
+    def set(self, key, plan_type, plan_data):
+        if not self.enabled:
+            return
+
+        plan_text = json.dumps(plan_data)
+        self._count('evictions', self._memory.set(key, plan_text))
+        self._db_set(key, plan_type, plan_text)
+        self._count('stores')
+
+    async def get_async(self, session, key):
+        """get() para el modo ASGI, con una AsyncSession"""
+        if not self.enabled:
+            return None
+
+        plan_text = self._memory.get(key)
+        if plan_text is not None:
+            self._count('memory_hits')
+            return json.loads(plan_text)
+
+        plan_text = await session.run_sync(lambda sync_session: self._db_get(key, sync_session))
+        if plan_text is not None:
+            self._count('db_hits')
+            self._count('evictions', self._memory.set(key, plan_text))
+            return json.loads(plan_text)
+
+        self._count('misses')
+        return None
+
+    async def set_async(self, session, key, plan_type, plan_data):
+        """set() para el modo ASGI, con una AsyncSession"""
+        if not self.enabled:
+            return
+
+        plan_text = json.dumps(plan_data)
+        self._count('evictions', self._memory.set(key, plan_text))
+        await session.run_sync(lambda sync_session: self._db_set(key, plan_type, plan_text, sync_session))
+        self._count('stores')
+
+    def clear(self):
+        from src.models.user import CachedPlan, db
+
+        self._memory.clear()
+        with self._lock:
+            self._pending_hits.clear()
+        CachedPlan.query.delete()
+        db.session.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        hits = stats['memory_hits'] + stats['db_hits']
+        lookups = hits + stats['misses']
+        stats['hit_rate'] = round(hits / lookups, 3) if lookups else 0
+        return stats
+
+    def _count(self, name, amount=1):
+        if not amount:
+            return
+        with self._lock:
+            self._stats[name] += amount
+
+    def _db_get(self, key, session=None):
+        """Solo lectura: no escribe ni confirma la sesión de quien llama.
+
+        El acierto se anota en memoria y se guarda con la siguiente escritura
+        de la caché (_db_set), que es la que usa last_used_at para expulsar.
+        """
+        from src.models.user import CachedPlan, db
+
+        session = session or db.session
+        try:
+            now = datetime.utcnow()
+            plan_text = session.execute(select(CachedPlan.plan_data).where(
+                CachedPlan.cache_key == key,
+                CachedPlan.expires_at > now
+            )).scalar()
+        except Exception:
+            # La caché nunca debe romper la generación
+            logger.warning('No se pudo leer el plan %s de la caché', key, exc_info=True)
+            return None
+
+        if plan_text is not None:
+            with self._lock:
+                hits, _ = self._pending_hits.get(key, (0, None))
+                self._pending_hits[key] = (hits + 1, now)
+        return plan_text
+
+    def _flush_hits(self, session):
+        """Anota en la tabla los aciertos pendientes, dentro de la transacción de _db_set"""
+        from src.models.user import CachedPlan
+
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        for key, (hits, last_used_at) in pending.items():
+            session.execute(update(CachedPlan).where(CachedPlan.cache_key == key).values(
+                hit_count=func.coalesce(CachedPlan.hit_count, 0) + hits,
+                last_used_at=last_used_at
+            ))
+
+    def _db_set(self, key, plan_type, plan_text, session=None):
+        """Guarda el plan en una transacción propia.
+
+        Sin sesión (Flask) abre una sobre db.engine: nunca confirma ni descarta
+        lo pendiente en db.session de la petición. En modo ASGI recibe la
+        sesión que la ruta abre solo para la caché.
+        """
+        from src.models.user import db
+
+        try:
+            if session is None:
+                with Session(db.engine) as session, session.begin():
+                    evicted = self._write(session, key, plan_type, plan_text)
+            else:
+                try:
+                    evicted = self._write(session, key, plan_type, plan_text)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    raise
+        except Exception:
+            # La caché nunca debe romper la generación, pero el fallo queda registrado
+            logger.exception('No se pudo guardar el plan %s en la caché', key)
+            return
+        self._count('evictions', evicted)
+
+    def _write(self, session, key, plan_type, plan_text):
+        """Inserta o renueva la fila, anota aciertos y expulsa; devuelve cuántas filas se expulsaron"""
+        from src.models.user import CachedPlan
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        cached_plans = session.query(CachedPlan)
+        cached = cached_plans.filter_by(cache_key=key).first()
+        if cached:
+            cached.plan_data = plan_text
+            cached.expires_at = expires_at
+            cached.last_used_at = now
+        else:
+            session.add(CachedPlan(
+                cache_key=key,
+                plan_type=plan_type,
+                plan_data=plan_text,
+                last_used_at=now,
+                expires_at=expires_at
+            ))
+
+        self._flush_hits(session)
+
+        # Eviction por TTL y por tamaño (los menos usados recientemente)
+        evicted = cached_plans.filter(CachedPlan.expires_at <= now).delete(synchronize_session=False)
+        overflow = cached_plans.count() - self.db_max_rows
+        if overflow > 0:
+            oldest = session.query(CachedPlan.id).order_by(CachedPlan.last_used_at.asc()).limit(overflow).all()
+            evicted += cached_plans.filter(
+                CachedPlan.id.in_([row.id for row in oldest])
+            ).delete(synchronize_session=False)
+        return evicted
+
+plan_cache = PlanCache(
+    memory_size=int(os.environ.get('PLAN_CACHE_MEMORY_SIZE', 256)),
+    db_max_rows=int(os.environ.get('PLAN_CACHE_DB_MAX_ROWS', 10000)),
+    ttl_seconds=int(os.environ.get('PLAN_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+    enabled=os.environ.get('PLAN_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+)
@@ -0,0 +1,350 @@
+# Catálogos del generador local de planes: ejercicios, cardio, plantillas semanales y recetas
+
+# Equipo reconocido. 'bodyweight' siempre está disponible
+EQUIPMENT_TAGS = ('bodyweight', 'dumbbells', 'barbell', 'machines', 'bands', 'kettlebell',
+                  'pullup_bar', 'bench', 'cardio_machine')
+
+# Palabras clave (sin acentos, en minúsculas) -> etiquetas de equipo
+EQUIPMENT_KEYWORDS = (
+    (('gimnasio', 'gym', 'completo', 'full'), EQUIPMENT_TAGS),
+    (('dominada', 'pull-up', 'pullup', 'pull up', 'barra fija'), ('pullup_bar',)),
+    (('mancuerna', 'dumbbell'), ('dumbbells',)),
+    (('barra', 'barbell', 'disco'), ('barbell',)),
+    (('maquina', 'machine', 'polea', 'cable'), ('machines',)),
+    (('banda', 'band', 'elastica', 'elastico', 'elastic', 'goma'), ('bands',)),
+    (('kettlebell', 'pesa rusa'), ('kettlebell',)),
+    (('banco', 'bench'), ('bench',)),
+    (('cinta', 'treadmill', 'bicicleta', 'bike', 'eliptica', 'elliptical', 'remo', 'rower', 'cardio'),
+     ('cardio_machine',)),
+    (('ninguno', 'none', 'peso corporal', 'bodyweight', 'casa', 'home', 'sin equipo', 'esterilla', 'mat'),
+     ('bodyweight',))
+)
+
+# Restricciones dietéticas reconocidas (palabras clave -> etiqueta que deben cumplir las recetas)
+DIET_KEYWORDS = (
+    (('vegano', 'vegana', 'vegan'), 'vegan'),
+    (('vegetariano', 'vegetariana', 'vegetarian'), 'vegetarian'),
+    (('gluten', 'celiac', 'celiaco', 'celiaca'), 'gluten_free'),
+    (('lactosa', 'lactose', 'lacteo', 'dairy'), 'lactose_free'),
+    (('frutos secos', 'nuez', 'nueces', 'nut', 'mani', 'cacahuete', 'peanut'), 'nut_free'),
+    (('ninguna', 'none', 'sin restricciones'), None)
+)
+
+# Palabras de enlace que no cambian el significado de un elemento ('sin gluten', 'alergia a las nueces').
+# Cualquier otra palabra no reconocida hace que el elemento cuente como desconocido
+FILLER_WORDS = frozenset((
+    'y', 'e', 'o', 'de', 'del', 'al', 'a', 'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'mi', 'mis',
+    'sin', 'libre', 'no', 'soy', 'apto', 'apta', 'para', 'dieta', 'alergia', 'alergico', 'alergica',
+    'intolerancia', 'intolerante', 'and', 'or', 'of', 'the', 'free', 'diet', 'allergy', 'intolerance', 'intolerant'
+))
+
+LEVEL_RANK = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
+
+# (nombre, grupo, equipo necesario (cualquiera), nivel mínimo, compuesto)
+EXERCISES = (
+    ('Sentadilla con barra', 'cuadriceps', ('barbell',), 'intermediate', True),
+    ('Sentadilla goblet', 'cuadriceps', ('dumbbells', 'kettlebell'), 'beginner', True),
+    ('Prensa de piernas', 'cuadriceps', ('machines',), 'beginner', True),
+    ('Sentadilla búlgara', 'cuadriceps', ('dumbbells', 'bench', 'bodyweight'), 'intermediate', True),
+    ('Sentadilla con peso corporal', 'cuadriceps', ('bodyweight',), 'beginner', True),
+    ('Zancadas', 'cuadriceps', ('bodyweight', 'dumbbells'), 'beginner', True),
+    ('Peso muerto rumano', 'isquios', ('barbell', 'dumbbells'), 'beginner', True),
+    ('Curl femoral en máquina', 'isquios', ('machines',), 'beginner', False),
+    ('Peso muerto a una pierna', 'isquios', ('bodyweight', 'dumbbells', 'kettlebell'), 'intermediate', True),
+    ('Puente de glúteos a una pierna', 'isquios', ('bodyweight',), 'beginner', False),
+    ('Puente de isquios con banda', 'isquios', ('bands',), 'beginner', False),
+    ('Buenos días con banda', 'isquios', ('bands',), 'beginner', True),
+    ('Hip thrust', 'gluteos', ('barbell', 'bench'), 'intermediate', True),
+    ('Puente de glúteos', 'gluteos', ('bodyweight',), 'beginner', False),
+    ('Swing con kettlebell', 'gluteos', ('kettlebell',), 'intermediate', True),
+    ('Patada de glúteo con banda', 'gluteos', ('bands',), 'beginner', False),
+    ('Press de banca', 'pecho', ('barbell',), 'beginner', True),
+    ('Press con mancuernas', 'pecho', ('dumbbells',), 'beginner', True),
+    ('Press en máquina', 'pecho', ('machines',), 'beginner', True),
+    ('Flexiones', 'pecho', ('bodyweight',), 'beginner', True),
+    ('Aperturas con mancuernas', 'pecho', ('dumbbells',), 'intermediate', False),
+    ('Fondos en paralelas', 'pecho', ('pullup_bar', 'bodyweight'), 'advanced', True),
+    ('Dominadas', 'espalda', ('pullup_bar',), 'intermediate', True),
+    ('Jalón al pecho', 'espalda', ('machines',), 'beginner', True),
+    ('Remo con barra', 'espalda', ('barbell',), 'intermediate', True),
+    ('Remo con mancuerna', 'espalda', ('dumbbells',), 'beginner', True),
+    ('Remo con banda', 'espalda', ('bands',), 'beginner', True),
+    ('Remo invertido', 'espalda', ('bodyweight', 'pullup_bar'), 'beginner', True),
+    ('Press militar', 'hombros', ('barbell',), 'intermediate', True),
+    ('Press de hombros con mancuernas', 'hombros', ('dumbbells',), 'beginner', True),
+    ('Elevaciones laterales', 'hombros', ('dumbbells', 'bands', 'machines'), 'beginner', False),
+    ('Flexiones pica', 'hombros', ('bodyweight',), 'beginner', True),
+    ('Face pull', 'hombros', ('machines', 'bands'), 'beginner', False),
+    ('Curl de bíceps con mancuernas', 'biceps', ('dumbbells',), 'beginner', False),
+    ('Curl con barra', 'biceps', ('barbell',), 'beginner', False),
+    ('Curl con banda', 'biceps', ('bands',), 'beginner', False),
+    ('Dominadas supinas', 'biceps', ('pullup_bar',), 'intermediate', True),
+    ('Remo invertido supino', 'biceps', ('bodyweight',), 'beginner', True),
+    ('Extensión de tríceps en polea', 'triceps', ('machines',), 'beginner', False),
+    ('Press francés', 'triceps', ('barbell', 'dumbbells'), 'intermediate', False),
+    ('Fondos en banco', 'triceps', ('bench', 'bodyweight'), 'beginner', False),
+    ('Extensión de tríceps con banda', 'triceps', ('bands',), 'beginner', False),
+    ('Plancha con toques de hombro', 'core', ('bodyweight',), 'beginner', False),
+    ('Dead bug', 'core', ('bodyweight',), 'beginner', False),
+    ('Rueda abdominal', 'core', ('bodyweight',), 'advanced', False),
+    ('Pallof press', 'core', ('bands', 'machines'), 'intermediate', False),
+    ('Elevaciones de piernas colgado', 'core', ('pullup_bar',), 'intermediate', False)
+)
+
+MUSCLE_GROUP_NAMES = {
+    'cuadriceps': 'Cuádriceps',
+    'isquios': 'Isquiotibiales',
+    'gluteos': 'Glúteos',
+    'pecho': 'Pecho',
+    'espalda': 'Espalda',
+    'hombros': 'Hombros',
+    'biceps': 'Bíceps',
+    'triceps': 'Tríceps',
+    'core': 'Core'
+}
+
+# (nombre, equipo necesario, nivel mínimo, estilo)
+CARDIO = (
+    ('Caminata rápida', ('bodyweight',), 'beginner', 'steady'),
+    ('Bicicleta estática', ('cardio_machine',), 'beginner', 'steady'),
+    ('Elíptica', ('cardio_machine',), 'beginner', 'steady'),
+    ('Trote suave', ('bodyweight',), 'intermediate', 'steady'),
+    ('Intervalos en cinta', ('cardio_machine',), 'intermediate', 'intervals'),
+    ('HIIT con peso corporal', ('bodyweight',), 'advanced', 'intervals'),
+    ('Circuito con kettlebell', ('kettlebell',), 'advanced', 'intervals')
+)
+
+# Plantillas semanales por nivel: (día, tipo, grupos musculares) con 'cardio' y 'rest' como tipos especiales
+WEEK_TEMPLATES = {
+    'beginner': (
+        ('Lunes', 'Cuerpo completo A', ('cuadriceps', 'pecho', 'espalda', 'core')),
+        ('Martes', 'cardio', ()),
+        ('Miércoles', 'Cuerpo completo B', ('isquios', 'hombros', 'espalda', 'core')),
+        ('Jueves', 'rest', ()),
+        ('Viernes', 'Cuerpo completo C', ('cuadriceps', 'gluteos', 'pecho', 'biceps', 'triceps')),
+        ('Sábado', 'cardio', ()),
+        ('Domingo', 'rest', ())
+    ),
+    'intermediate': (
+        ('Lunes', 'Tren superior A', ('pecho', 'espalda', 'hombros', 'triceps', 'biceps')),
+        ('Martes', 'Tren inferior A', ('cuadriceps', 'isquios', 'gluteos', 'core')),
+        ('Miércoles', 'cardio', ()),
+        ('Jueves', 'Tren superior B', ('espalda', 'pecho', 'hombros', 'biceps', 'triceps')),
+        ('Viernes', 'Tren inferior B', ('isquios', 'cuadriceps', 'gluteos', 'core')),
+        ('Sábado', 'cardio', ()),
+        ('Domingo', 'rest', ())
+    ),
+    'advanced': (
+        ('Lunes', 'Empuje', ('pecho', 'hombros', 'triceps', 'pecho')),
+        ('Martes', 'Tirón', ('espalda', 'biceps', 'espalda', 'core')),
+        ('Miércoles', 'Piernas', ('cuadriceps', 'isquios', 'gluteos', 'cuadriceps')),
+        ('Jueves', 'cardio', ()),
+        ('Viernes', 'Tren superior', ('pecho', 'espalda', 'hombros', 'biceps', 'triceps')),
+        ('Sábado', 'Tren inferior', ('cuadriceps', 'isquios', 'gluteos', 'core')),
+        ('Domingo', 'rest', ())
+    )
+}
+
+# Fases del mesociclo de 4 semanas
+PROGRESSION_PHASES = (
+    'Adaptación - Enfoque en técnica',
+    'Incremento de volumen - +10% repeticiones',
+    'Intensidad - +5% peso',
+    'Deload - -20% volumen para recuperación'
+)
+
+MEALS = ('breakfast', 'lunch', 'snack', 'dinner')
+MEAL_SHARE = {'breakfast': 0.25, 'lunch': 0.35, 'snack': 0.10, 'dinner': 0.30}
+DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# Base de datos de alimentos: clave -> (nombre, unidad, kcal, proteína, carbohidratos, grasa por 100 g/ml,
+# contenido relevante para restricciones: meat, fish, egg, dairy, gluten, nuts)
+FOODS = {
+    'avena': ('copos de avena', 'g', 379, 13.2, 67.7, 6.5, ('gluten',)),
+    'platano': ('plátano', 'g', 89, 1.1, 22.8, 0.3, ()),
+    'leche_desnatada': ('leche desnatada', 'ml', 35, 3.4, 5.0, 0.1, ('dairy',)),
+    'whey': ('proteína de suero', 'g', 400, 80.0, 8.0, 6.0, ('dairy',)),
+    'huevo': ('huevo', 'g', 143, 12.6, 0.7, 9.5, ('egg',)),
+    'pan_integral': ('pan integral', 'g', 247, 13.0, 41.0, 3.4, ('gluten',)),
+    'aguacate': ('aguacate', 'g', 160, 2.0, 8.5, 14.7, ()),
+    'tomate': ('tomate', 'g', 18, 0.9, 3.9, 0.2, ()),
+    'yogur_griego': ('yogur griego natural', 'g', 97, 9.0, 3.9, 5.0, ('dairy',)),
+    'granola': ('granola', 'g', 471, 10.0, 64.0, 20.0, ('gluten', 'nuts')),
+    'frutos_rojos': ('frutos rojos', 'g', 50, 0.7, 12.0, 0.3, ()),
+    'tofu': ('tofu firme', 'g', 144, 17.3, 2.8, 8.7, ()),
+    'pan_sin_gluten': ('pan sin gluten', 'g', 250, 4.0, 48.0, 4.5, ()),
+    'espinacas': ('espinacas', 'g', 23, 2.9, 3.6, 0.4, ()),
+    'proteina_guisante': ('proteína de guisante', 'g', 380, 80.0, 5.0, 5.0, ()),
+    'bebida_avena': ('bebida de avena', 'ml', 45, 1.0, 7.0, 1.5, ()),
+    'claras': ('claras de huevo', 'g', 52, 10.9, 0.7, 0.2, ('egg',)),
+    'patata': ('patata', 'g', 77, 2.0, 17.0, 0.1, ()),
+    'aceite_oliva': ('aceite de oliva', 'g', 884, 0.0, 0.0, 100.0, ()),
+    'pollo': ('pechuga de pollo', 'g', 165, 31.0, 0.0, 3.6, ('meat',)),
+    'arroz_integral': ('arroz integral', 'g', 370, 7.9, 77.0, 2.9, ()),
+    'verduras': ('verduras mixtas', 'g', 35, 2.0, 7.0, 0.3, ()),
+    'salmon': ('salmón', 'g', 208, 20.0, 0.0, 13.0, ('fish',)),
+    'quinoa': ('quinoa', 'g', 368, 14.0, 64.0, 6.0, ()),
+    'esparragos': ('espárragos', 'g', 20, 2.2, 3.9, 0.1, ()),
+    'lentejas': ('lentejas', 'g', 352, 24.6, 63.0, 1.1, ()),
+    'pasta_integral': ('pasta integral', 'g', 348, 13.0, 72.0, 2.5, ('gluten',)),
+    'pavo': ('pechuga de pavo', 'g', 135, 29.0, 0.0, 1.5, ('meat',)),
+    'tomate_triturado': ('tomate triturado', 'g', 32, 1.6, 7.0, 0.3, ()),
+    'garbanzos': ('garbanzos cocidos', 'g', 164, 8.9, 27.4, 2.6, ()),
+    'boniato': ('boniato', 'g', 86, 1.6, 20.0, 0.1, ()),
+    'tahini': ('tahini', 'g', 595, 17.0, 21.0, 54.0, ()),
+    'ternera': ('ternera magra', 'g', 158, 26.0, 0.0, 6.0, ('meat',)),
+    'arroz_basmati': ('arroz basmati', 'g', 355, 8.0, 78.0, 0.9, ()),
+    'brocoli': ('brócoli', 'g', 34, 2.8, 7.0, 0.4, ()),
+    'atun': ('atún al natural', 'g', 116, 26.0, 0.0, 1.0, ('fish',)),
+    'ensalada': ('ensalada verde', 'g', 15, 1.4, 2.9, 0.2, ()),
+    'merluza': ('merluza', 'g', 86, 17.0, 0.0, 1.8, ('fish',)),
+    'nueces': ('nueces', 'g', 654, 15.0, 14.0, 65.0, ('nuts',)),
+    'queso_fresco': ('queso fresco batido', 'g', 70, 8.0, 3.5, 2.5, ('dairy',)),
+    'calabaza': ('crema de calabaza', 'g', 40, 1.0, 7.0, 1.0, ()),
+    'hummus': ('hummus', 'g', 166, 8.0, 14.0, 9.6, ()),
+    'pan_pita': ('pan de pita', 'g', 275, 9.0, 55.0, 1.2, ('gluten',)),
+    'tempeh': ('tempeh', 'g', 192, 20.3, 7.6, 10.8, ()),
+    'seitan': ('seitán', 'g', 370, 75.0, 14.0, 1.9, ('gluten',)),
+    'edamame': ('edamame', 'g', 122, 11.9, 8.9, 5.2, ()),
+    'tortitas_arroz': ('tortitas de arroz', 'g', 387, 8.0, 81.0, 3.0, ()),
+    'manzana': ('manzana', 'g', 52, 0.3, 14.0, 0.2, ())
+}
+
+# Contenido que excluye cada restricción dietética
+DIET_EXCLUDES = {
+    'vegan': ('meat', 'fish', 'egg', 'dairy'),
+    'vegetarian': ('meat', 'fish'),
+    'gluten_free': ('gluten',),
+    'lactose_free': ('dairy',),
+    'nut_free': ('nuts',)
+}
+
+# Recetas: ingredientes (gramos, alimento) o (None, texto) para los que no escalan, y preparación.
+# Macros y etiquetas dietéticas se calculan a partir de FOODS
+RECIPES = {
+    'breakfast': (
+        {'name': 'Avena con frutas y proteína',
+         'ingredients': ((80, 'avena'), (120, 'platano'), (200, 'leche_desnatada'), (25, 'whey')),
+         'preparation': 'Cocinar la avena con leche, agregar plátano cortado y proteína en polvo'},
+        {'name': 'Huevos revueltos con tostadas',
+         'ingredients': ((150, 'huevo'), (60, 'pan_integral'), (60, 'aguacate'), (100, 'tomate')),
+         'preparation': 'Revolver huevos, tostar pan, agregar aguacate y tomate'},
+        {'name': 'Yogur griego con granola y frutos rojos',
+         'ingredients': ((200, 'yogur_griego'), (40, 'granola'), (80, 'frutos_rojos')),
+         'preparation': 'Servir el yogur con la granola y los frutos rojos por encima'},
+        {'name': 'Tostadas de tofu revuelto',
+         'ingredients': ((150, 'tofu'), (60, 'pan_sin_gluten'), (60, 'espinacas'), (None, 'cúrcuma')),
+         'preparation': 'Desmenuzar el tofu y saltearlo con espinacas y cúrcuma; servir sobre el pan tostado'},
+        {'name': 'Batido de proteína vegetal con plátano',
+         'ingredients': ((30, 'proteina_guisante'), (120, 'platano'), (250, 'bebida_avena'), (40, 'avena')),
+         'preparation': 'Triturar todos los ingredientes hasta obtener un batido homogéneo'},
+        {'name': 'Tortilla de claras con patata',
+         'ingredients': ((200, 'claras'), (150, 'patata'), (None, 'cebolla'), (10, 'aceite_oliva')),
+         'preparation': 'Asar la patata en dados y cuajar con las claras y la cebolla'},
+        {'name': 'Queso fresco batido con frutos rojos y pan',
+         'ingredients': ((250, 'queso_fresco'), (100, 'frutos_rojos'), (50, 'pan_sin_gluten')),
+         'preparation': 'Mezclar el queso batido con los frutos rojos y acompañar con el pan tostado'},
+        {'name': 'Porridge de quinoa con proteína de guisante',
+         'ingredients': ((60, 'quinoa'), (30, 'proteina_guisante'), (200, 'bebida_avena'), (100, 'frutos_rojos')),
+         'preparation': 'Cocer la quinoa en la bebida de avena, añadir la proteína fuera del fuego y los frutos rojos'},
+        {'name': 'Tostadas sin gluten con aguacate y tofu',
+         'ingredients': ((120, 'tofu'), (70, 'pan_sin_gluten'), (50, 'aguacate'), (100, 'tomate')),
+         'preparation': 'Tostar el pan, cubrir con el aguacate machacado, el tofu a la plancha y el tomate'},
+        {'name': 'Batido de proteína vegetal con frutos rojos',
+         'ingredients': ((40, 'proteina_guisante'), (150, 'frutos_rojos'), (250, 'bebida_avena')),
+         'preparation': 'Triturar la proteína con los frutos rojos y la bebida de avena'}
+    ),
+    'lunch': (
+        {'name': 'Pollo con arroz y verduras',
+         'ingredients': ((150, 'pollo'), (80, 'arroz_integral'), (150, 'verduras'), (5, 'aceite_oliva')),
+         'preparation': 'Cocinar pollo a la plancha, hervir arroz, saltear verduras'},
+        {'name': 'Salmón con quinoa',
+         'ingredients': ((130, 'salmon'), (70, 'quinoa'), (120, 'esparragos'), (None, 'limón')),
+         'preparation': 'Hornear salmón con limón, cocinar quinoa, vapor espárragos'},
+        {'name': 'Lentejas estofadas con verduras',
+         'ingredients': ((90, 'lentejas'), (150, 'verduras'), (10, 'aceite_oliva')),
+         'preparation': 'Cocer las lentejas con las verduras troceadas y un sofrito ligero'},
+        {'name': 'Pasta integral con pavo y tomate',
+         'ingredients': ((80, 'pasta_integral'), (130, 'pavo'), (150, 'tomate_triturado'), (5, 'aceite_oliva')),
+         'preparation': 'Cocer la pasta y mezclar con el pavo salteado en salsa de tomate'},
+        {'name': 'Bowl de garbanzos, boniato y tahini',
+         'ingredients': ((150, 'garbanzos'), (150, 'boniato'), (15, 'tahini'), (None, 'rúcula')),
+         'preparation': 'Asar el boniato, mezclar con los garbanzos y aliñar con tahini'},
+        {'name': 'Ternera salteada con arroz y brócoli',
+         'ingredients': ((130, 'ternera'), (70, 'arroz_basmati'), (150, 'brocoli'), (None, 'salsa de soja sin gluten')),
+         'preparation': 'Saltear la ternera con el brócoli y servir con el arroz'},
+        {'name': 'Tempeh salteado con quinoa y brócoli',
+         'ingredients': ((150, 'tempeh'), (60, 'quinoa'), (150, 'brocoli'), (None, 'jengibre')),
+         'preparation': 'Dorar el tempeh en dados, saltear con el brócoli y servir sobre la quinoa'},
+        {'name': 'Curry de garbanzos y espinacas con arroz',
+         'ingredients': ((200, 'garbanzos'), (100, 'espinacas'), (50, 'arroz_basmati'), (5, 'aceite_oliva'), (None, 'curry')),
+         'preparation': 'Rehogar las especias, añadir los garbanzos y las espinacas y servir con el arroz'},
+        {'name': 'Ensalada templada de lentejas y tofu',
+         'ingredients': ((60, 'lentejas'), (150, 'tofu'), (100, 'ensalada'), (100, 'tomate'), (5, 'aceite_oliva')),
+         'preparation': 'Mezclar las lentejas cocidas con el tofu dorado, la ensalada y el tomate'}
+    ),
+    'snack': (
+        {'name': 'Batido de proteína con plátano',
+         'ingredients': ((30, 'whey'), (120, 'platano'), (250, 'leche_desnatada')),
+         'preparation': 'Triturar la proteína con la leche y el plátano'},
+        {'name': 'Batido vegetal de proteína',
+         'ingredients': ((30, 'proteina_guisante'), (250, 'bebida_avena')),
+         'preparation': 'Agitar la proteína con la bebida de avena bien fría'},
+        {'name': 'Tostada integral con hummus',
+         'ingredients': ((60, 'pan_integral'), (50, 'hummus'), (None, 'pimentón')),
+         'preparation': 'Tostar el pan y untar el hummus con una pizca de pimentón'},
+        {'name': 'Nueces con manzana',
+         'ingredients': ((25, 'nueces'), (150, 'manzana')),
+         'preparation': 'Acompañar la manzana troceada con las nueces'},
+        {'name': 'Yogur griego con frutos rojos',
+         'ingredients': ((170, 'yogur_griego'), (80, 'frutos_rojos')),
+         'preparation': 'Servir el yogur con los frutos rojos por encima'},
+        {'name': 'Edamame al vapor',
+         'ingredients': ((150, 'edamame'), (None, 'sal en escamas')),
+         'preparation': 'Cocer al vapor 5 minutos y servir con sal en escamas'},
+        {'name': 'Tortitas de arroz con pavo',
+         'ingredients': ((20, 'tortitas_arroz'), (80, 'pavo'), (None, 'mostaza')),
+         'preparation': 'Cubrir las tortitas con el pavo y un poco de mostaza'},
+        {'name': 'Tortitas de arroz con hummus',
+         'ingredients': ((30, 'tortitas_arroz'), (50, 'hummus'), (None, 'pimentón')),
+         'preparation': 'Untar las tortitas con el hummus y espolvorear pimentón'},
+        {'name': 'Plátano con tahini',
+         'ingredients': ((120, 'platano'), (15, 'tahini')),
+         'preparation': 'Cortar el plátano en rodajas y regar con el tahini'}
+    ),
+    'dinner': (
+        {'name': 'Ensalada de atún',
+         'ingredients': ((150, 'atun'), (100, 'ensalada'), (100, 'tomate'), (10, 'aceite_oliva')),
+         'preparation': 'Mezclar todos los ingredientes, aliñar con aceite de oliva'},
+        {'name': 'Pavo con vegetales',
+         'ingredients': ((150, 'pavo'), (250, 'verduras'), (5, 'aceite_oliva')),
+         'preparation': 'Cocinar pavo a la plancha, saltear vegetales'},
+        {'name': 'Merluza al horno con patata',
+         'ingredients': ((180, 'merluza'), (150, 'patata'), (10, 'aceite_oliva'), (None, 'perejil')),
+         'preparation': 'Hornear la merluza sobre la patata laminada con aceite y perejil'},
+        {'name': 'Tofu salteado con verduras y nueces',
+         'ingredients': ((180, 'tofu'), (200, 'verduras'), (15, 'nueces')),
+         'preparation': 'Saltear el tofu en dados con las verduras y terminar con las nueces'},
+        {'name': 'Tortilla francesa con ensalada y queso fresco',
+         'ingredients': ((150, 'huevo'), (100, 'queso_fresco'), (100, 'ensalada')),
+         'preparation': 'Cuajar la tortilla y servir con la ensalada y el queso fresco'},
+        {'name': 'Crema de calabaza con hummus y pan de pita',
+         'ingredients': ((300, 'calabaza'), (60, 'hummus'), (50, 'pan_pita')),
+         'preparation': 'Calentar la crema y acompañar con el hummus y el pan de pita tostado'},
+        {'name': 'Seitán a la plancha con boniato',
+         'ingredients': ((100, 'seitan'), (200, 'boniato'), (100, 'ensalada'), (5, 'aceite_oliva')),
+         'preparation': 'Marcar el seitán a la plancha y servir con el boniato asado y la ensalada'},
+        {'name': 'Tofu al horno con boniato y brócoli',
+         'ingredients': ((200, 'tofu'), (150, 'boniato'), (150, 'brocoli'), (5, 'aceite_oliva')),
+         'preparation': 'Hornear el tofu en dados con el boniato y el brócoli regados con el aceite'},
+        {'name': 'Tempeh a la plancha con patata',
+         'ingredients': ((150, 'tempeh'), (200, 'patata'), (100, 'ensalada'), (5, 'aceite_oliva')),
+         'preparation': 'Marcar el tempeh a la plancha y servir con la patata cocida y la ensalada'},
+        {'name': 'Lentejas salteadas con arroz y verduras',
+         'ingredients': ((70, 'lentejas'), (50, 'arroz_integral'), (150, 'verduras'), (5, 'aceite_oliva')),
+         'preparation': 'Saltear las lentejas cocidas y el arroz con las verduras'},
+        {'name': 'Tofu a la plancha con espárragos',
+         'ingredients': ((250, 'tofu'), (200, 'esparragos'), (5, 'aceite_oliva')),
+         'preparation': 'Marcar el tofu a la plancha y saltear los espárragos con el aceite'}
+    )
+}
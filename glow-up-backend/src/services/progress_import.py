@@ -0,0 +1,136 @@
+from sqlalchemy import func
+from src.models.user import ProgressEntry, db
+from datetime import date, datetime
+import csv
+import json
+
+class RowError(ValueError):
+    """Error de validación de una fila concreta"""
+
+
+def iter_ndjson(lines):
+    """Lee objetos JSON línea a línea, sin cargar el cuerpo completo"""
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, RowError('JSON inválido')
+            continue
+        if not isinstance(record, dict):
+            yield number, RowError('Se esperaba un objeto JSON')
+            continue
+        yield number, record
+
+
+def iter_csv(lines):
+    """Lee filas CSV con cabecera (date, weight, body_fat_percentage, measurements, notes)"""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        # Fila 1 = cabecera
+        yield reader.line_num, {key: value for key, value in record.items() if key}
+
+
+def _optional_float(value, field, minimum, maximum):
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field} debe ser numérico')
+    if not minimum <= number <= maximum:
+        raise RowError(f'{field} fuera de rango ({minimum}-{maximum})')
+    return number
+
+
+def validate_row(record):
+    """Convierte un registro en valores de columna o lanza RowError"""
+    if isinstance(record, RowError):
+        raise record
+
+    raw_date = record.get('date')
+    if not raw_date:
+        raise RowError('Campo requerido: date')
+    raw_date = str(raw_date)
+    try:
+        # fromisoformat es mucho más rápido que strptime; se exige YYYY-MM-DD
+        if len(raw_date) != 10:
+            raise ValueError
+        entry_date = date.fromisoformat(raw_date)
+    except ValueError:
+        raise RowError('Fecha inválida, formato esperado YYYY-MM-DD')
+
+    measurements = record.get('measurements')
+    if isinstance(measurements, str):
+        if measurements.strip():
+            try:
+                measurements = json.loads(measurements)
+            except ValueError:
+                raise RowError('measurements debe ser un objeto JSON')
+        else:
+            measurements = None
+    if measurements is not None and not isinstance(measurements, dict):
+        raise RowError('measurements debe ser un objeto JSON')
+
+    notes = record.get('notes')
+    return {
+        'date': entry_date,
+        'weight': _optional_float(record.get('weight'), 'weight', 1, 1000),
+        'body_fat_percentage': _optional_float(record.get('body_fat_percentage'), 'body_fat_percentage', 0, 100),
+        'measurements': json.dumps(measurements) if measurements is not None else None,
+        'notes': notes if notes not in ('', None) else None
+    }
+
+
+def upsert_progress_rows(user_id, rows):
+    """Inserta o actualiza filas por (user_id, date) con un único upsert nativo del dialecto.
+
+    Los campos ausentes en la fila conservan el valor ya guardado.
+    """
+    if not rows:
+        return 0
+
+    # Una fecha repetida en el mismo lote: gana la última
+    now = datetime.utcnow()
+    by_date = {}
+    for row in rows:
+        by_date[row['date']] = dict(row, user_id=user_id, created_at=now)
+    values = list(by_date.values())
+
+    table = ProgressEntry.__table__
+    dialect = db.session.get_bind().dialect.name
+    update_columns = ('weight', 'body_fat_percentage', 'measurements', 'notes')
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.date],
+            set_={name: func.coalesce(stmt.excluded[name], table.c[name]) for name in update_columns}
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {name: func.coalesce(stmt.inserted[name], table.c[name]) for name in update_columns}
+        )
+    else:
+        # Dialecto sin upsert: combinar fila a fila
+        for value in values:
+            existing = ProgressEntry.query.filter_by(user_id=user_id, date=value['date']).first()
+            if existing:
+                for name in update_columns:
+                    if value[name] is not None:
+                        setattr(existing, name, value[name])
+            else:
+                db.session.add(ProgressEntry(**value))
+        db.session.flush()
+        return len(values)
+
+    db.session.execute(stmt, values)
+    return len(values)
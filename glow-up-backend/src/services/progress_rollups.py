@@ -0,0 +1,111 @@
+from sqlalchemy import insert, select
+from src.models.user import ProgressEntry, ProgressRollup, db
+from datetime import date, timedelta
+
+ROLLUP_PERIODS = ('week', 'month')
+
+
+def period_bounds(period, day):
+    """Devuelve (inicio, fin exclusivo) de la semana (lunes) o mes que contiene day"""
+    if period == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+
+    start = day.replace(day=1)
+    if start.month == 12:
+        return start, date(start.year + 1, 1, 1)
+    return start, date(start.year, start.month + 1, 1)
+
+
+def refresh_rollups(user_id, days):
+    """Recalcula los agregados semanales y mensuales de los periodos que contienen days.
+
+    Se llama dentro de la transacción que modifica las entradas (antes del commit);
+    el autoflush hace que la consulta vea los cambios pendientes. Lee una sola vez
+    el rango afectado y reemplaza sus agregados en bloque.
+    """
+    days = set(days)
+    if not days:
+        return
+
+    first, last = min(days), max(days)
+    ranges = {period: (period_bounds(period, first)[0], period_bounds(period, last)[1]) for period in ROLLUP_PERIODS}
+    rows = db.session.execute(select(
+        ProgressEntry.date,
+        ProgressEntry.weight,
+        ProgressEntry.body_fat_percentage
+    ).where(
+        ProgressEntry.user_id == user_id,
+        ProgressEntry.date >= min(start for start, _ in ranges.values()),
+        ProgressEntry.date < max(end for _, end in ranges.values())
+    )).all()
+
+    for period, (range_start, range_end) in ranges.items():
+        ProgressRollup.query.filter(
+            ProgressRollup.user_id == user_id,
+            ProgressRollup.period == period,
+            ProgressRollup.period_start >= range_start,
+            ProgressRollup.period_start < range_end
+        ).delete(synchronize_session=False)
+
+        values = rollup_values(user_id, period, (row for row in rows if range_start <= row[0] < range_end))
+        if values:
+            db.session.execute(insert(ProgressRollup), values)
+
+
+def rollup_values(user_id, period, rows):
+    """Filas de ProgressRollup a partir de tuplas (fecha, peso, grasa corporal)"""
+    # Inicio del periodo sin pasar por period_bounds: se evalúa una vez por entrada
+    if period == 'week':
+        period_start = lambda day: day - timedelta(days=day.weekday())
+    else:
+        period_start = lambda day: day.replace(day=1)
+
+    # period_start -> [entradas, pesos, grasas]
+    buckets = {}
+    for day, weight, body_fat in rows:
+        start = period_start(day)
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = [0, [], []]
+        bucket[0] += 1
+        if weight is not None:
+            bucket[1].append(weight)
+        if body_fat is not None:
+            bucket[2].append(body_fat)
+
+    return [
+        {
+            'user_id': user_id,
+            'period': period,
+            'period_start': start,
+            'entry_count': count,
+            'weight_avg': _average(weights),
+            'weight_min': min(weights) if weights else None,
+            'weight_max': max(weights) if weights else None,
+            'body_fat_avg': _average(body_fats),
+            'body_fat_min': min(body_fats) if body_fats else None,
+            'body_fat_max': max(body_fats) if body_fats else None
+        }
+        for start, (count, weights, body_fats) in buckets.items()
+    ]
+
+
+def _average(values):
+    return round(sum(values) / len(values), 2) if values else None
+
+
+def rebuild_rollups(user_id):
+    """Reconstruye todos los agregados de un usuario (datos cargados sin refresh_rollups)"""
+    ProgressRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    days = [row.date for row in db.session.query(ProgressEntry.date).filter_by(user_id=user_id)]
+    refresh_rollups(user_id, days)
+
+
+def get_rollups(user_id, period, start_date):
+    """Agregados del periodo desde start_date (los datos anteriores a los rollups los añade la migración 4)"""
+    return ProgressRollup.query.filter(
+        ProgressRollup.user_id == user_id,
+        ProgressRollup.period == period,
+        ProgressRollup.period_start >= period_bounds(period, start_date)[0]
+    ).order_by(ProgressRollup.period_start.asc()).all()
@@ -0,0 +1,146 @@
+from src.services.local_planner import mentions_boredom
+import math
+import os
+import re
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken es opcional; sin él se estima el número de tokens
+    tiktoken = None
+
+# Presupuesto de tokens del prompt de usuario; las líneas opcionales se descartan para cumplirlo
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', 220))
+
+# Límites de las listas libres del perfil (equipo, restricciones)
+MAX_LIST_ITEMS = 12
+MAX_ITEM_CHARS = 40
+
+# Prioridad de cada línea: 0 obligatoria; las de mayor número se descartan antes
+REQUIRED = 0
+SCHEMA = 1
+FEEDBACK = 2
+
+# Estructura esperada en notación compacta de claves
+WORKOUT_SCHEMA = (
+    'Claves: weekly_schedule[7]{day,type,muscle_groups[],duration_minutes,'
+    'exercises[]{name,sets,reps,weight_suggestion,rest_seconds,tempo}}, progression{week_N}. '
+    'Incluye descanso y cardio; tempo solo para avanzados.'
+)
+NUTRITION_SCHEMA = (
+    'Claves: macros{protein_grams,carbs_grams,fat_grams,protein_percentage,carbs_percentage,fat_percentage}, '
+    'meal_plan{week_N{monday..sunday{breakfast,lunch,snack,dinner{option_1,option_2'
+    '{name,ingredients[],preparation,calories,protein,carbs,fat}}}}}.'
+)
+
+_TOKEN_PIECES = re.compile(r'\w+|[^\w\s]+')
+_encoding = None
+
+
+def count_tokens(text):
+    """Tokens del texto con tiktoken (cl100k_base) o, sin él, una estimación por palabras y signos"""
+    global _encoding
+    if tiktoken is not None:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            return len(_encoding.encode(text))
+        except Exception:
+            pass
+    # Las palabras se parten en trozos de ~4 caracteres y las rachas de signos en pares
+    return sum(math.ceil(len(piece) / (4 if piece[0].isalnum() or piece[0] == '_' else 2))
+               for piece in _TOKEN_PIECES.findall(text))
+
+
+def compact_list(items):
+    """Lista normalizada y acotada para el prompt"""
+    return [item[:MAX_ITEM_CHARS] for item in items[:MAX_LIST_ITEMS]]
+
+
+def summarize_feedback(feedback, include_difficulty=True):
+    """Señales agregadas del feedback reciente (más reciente primero) en lugar del texto literal"""
+    if not feedback:
+        return None
+
+    ratings = [f.rating for f in feedback if f.rating]
+    summary = {
+        'count': len(feedback),
+        'rating': round(sum(ratings) / len(ratings), 1) if ratings else None,
+        'wants_variety': sum(1 for f in feedback if mentions_boredom(f.feedback_text))
+    }
+    if include_difficulty:
+        difficulties = [f.difficulty_rating for f in feedback if f.difficulty_rating]
+        summary['difficulty'] = round(sum(difficulties) / len(difficulties), 1) if difficulties else None
+        # Positivo: los últimos planes se percibieron más duros que los anteriores
+        summary['difficulty_drift'] = round(difficulties[0] - difficulties[-1], 1) if len(difficulties) > 1 else 0
+    return summary
+
+
+def _profile_line(inputs, fields):
+    parts = []
+    for key, label, unit in fields:
+        value = inputs.get(key)
+        if value is not None and value != '':
+            parts.append(f'{label} {value}{unit}'.strip())
+    return 'Perfil: ' + ', '.join(parts) + '.' if parts else 'Perfil: sin datos.'
+
+
+def _feedback_line(summary):
+    if not summary:
+        return None
+    parts = []
+    if summary.get('rating') is not None:
+        parts.append(f"valoración {summary['rating']}/5")
+    if summary.get('difficulty') is not None:
+        drift = summary.get('difficulty_drift')
+        parts.append(f"dificultad {summary['difficulty']}/5" + (f" (tendencia {drift:+g})" if drift else ''))
+    if summary.get('wants_variety'):
+        parts.append(f"{summary['wants_variety']} piden más variedad")
+    return f"Feedback reciente (n={summary['count']}): " + ', '.join(parts) + '.' if parts else None
+
+
+def fit_budget(lines, budget=None):
+    """Une las líneas (prioridad, texto) descartando las opcionales hasta caber en el presupuesto.
+
+    Devuelve (prompt, tokens); si ni las obligatorias caben se devuelven igualmente.
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    kept = [(priority, text) for priority, text in lines if text]
+    while True:
+        prompt = '\n'.join(text for _, text in kept)
+        tokens = count_tokens(prompt)
+        optional = [priority for priority, _ in kept if priority != REQUIRED]
+        if tokens <= budget or not optional:
+            return prompt, tokens
+        lowest = max(optional)
+        kept = [(priority, text) for priority, text in kept if priority != lowest]
+
+
+def workout_prompt(inputs, budget=None):
+    """Prompt compacto de entrenamiento a partir de workout_prompt_inputs; devuelve (prompt, tokens)"""
+    equipment = compact_list(inputs.get('equipment_available') or [])
+    return fit_budget([
+        (REQUIRED, f"Plan de entrenamiento de {inputs['duration_weeks']} semanas. Responde solo con JSON."),
+        (REQUIRED, _profile_line(inputs, (
+            ('age', 'edad', ''), ('weight', '', ' kg'), ('height', '', ' cm'), ('goal', 'objetivo', ''),
+            ('experience_level', 'nivel', ''), ('activity_level', 'actividad', '')
+        ))),
+        (REQUIRED, 'Equipo: ' + (', '.join(equipment) if equipment else 'básico de gimnasio') + '.'),
+        (FEEDBACK, _feedback_line(inputs.get('feedback'))),
+        (SCHEMA, WORKOUT_SCHEMA)
+    ], budget)
+
+
+def nutrition_prompt(inputs, budget=None):
+    """Prompt compacto de nutrición a partir de nutrition_prompt_inputs; devuelve (prompt, tokens)"""
+    restrictions = compact_list(inputs.get('dietary_restrictions') or [])
+    return fit_budget([
+        (REQUIRED, f"Plan nutricional de {inputs['duration_weeks']} semanas, {inputs['daily_calories']} kcal/día, "
+                   f"2 opciones por comida con receta y macros. Responde solo con JSON."),
+        (REQUIRED, _profile_line(inputs, (
+            ('age', 'edad', ''), ('weight', '', ' kg'), ('height', '', ' cm'), ('goal', 'objetivo', ''),
+            ('activity_level', 'actividad', '')
+        ))),
+        (REQUIRED, 'Restricciones: ' + (', '.join(restrictions) if restrictions else 'ninguna') + '.'),
+        (FEEDBACK, _feedback_line(inputs.get('feedback'))),
+        (SCHEMA, NUTRITION_SCHEMA)
+    ], budget)
@@ -0,0 +1,237 @@
+from collections import namedtuple
+from flask import jsonify, request
+from functools import wraps
+from src.services.metrics import registry
+from src.services.ttl_cache import TTLCache
+import math
+import os
+import sqlite3
+import threading
+import time
+
+# Capacidad (ráfaga) y segundos en los que se rellena entera
+Limit = namedtuple('Limit', ('capacity', 'period'))
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1').lower() not in ('0', 'false', 'no')
+# 'memory' (por proceso) o sqlite:///ruta.db para que varios workers compartan los buckets
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+# Detrás de un proxy de confianza: tomar la IP del cliente de X-Forwarded-For
+RATE_LIMIT_TRUST_FORWARDED = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', '0').lower() in ('1', 'true', 'yes')
+
+RATE_LIMITED = registry.counter(
+    'rate_limited_total', 'Peticiones rechazadas con 429 por límite de uso', ('scope', 'dimension'))
+
+
+def parse_limit(value):
+    """'10/600' -> Limit(10, 600): ráfaga de 10 que se repone en 600 s"""
+    capacity, _, period = value.partition('/')
+    return Limit(int(capacity), float(period or 1))
+
+
+def _env_limit(name, default):
+    return parse_limit(os.environ.get(name, default))
+
+
+# Buckets por ámbito y dimensión (usuario, IP, email)
+RATE_LIMITS = {
+    'generate': {
+        'user': _env_limit('RATE_LIMIT_GENERATE_USER', '10/600'),
+        'ip': _env_limit('RATE_LIMIT_GENERATE_IP', '30/600')
+    },
+    'login': {
+        'ip': _env_limit('RATE_LIMIT_LOGIN_IP', '20/60'),
+        'email': _env_limit('RATE_LIMIT_LOGIN_EMAIL', '5/60')
+    }
+}
+
+
+class RateLimited(Exception):
+    """Algún bucket de la petición está vacío"""
+
+    def __init__(self, dimension, retry_after):
+        super().__init__(f'Demasiadas peticiones; vuelve a intentarlo en {math.ceil(retry_after)} s')
+        self.dimension = dimension
+        self.retry_after = retry_after
+
+
+def _refill(state, limit, now):
+    """Tokens disponibles ahora a partir del estado guardado (tokens, instante)"""
+    if state is None:
+        return float(limit.capacity)
+    tokens, updated = state
+    return min(float(limit.capacity), tokens + max(now - updated, 0) * limit.capacity / limit.period)
+
+
+def _take(states, buckets, cost, now):
+    """Consume cost de todos los buckets o de ninguno.
+
+    buckets: [(clave, dimensión, Limit)]; states: clave -> (tokens, instante) o None.
+    Devuelve (nuevos estados, None) o (None, (dimensión, segundos hasta poder repetir)).
+    """
+    updated = {}
+    denied = None
+    for key, dimension, limit in buckets:
+        tokens = _refill(states.get(key), limit, now)
+        if tokens < cost:
+            wait = (cost - tokens) * limit.period / limit.capacity
+            if denied is None or wait > denied[1]:
+                denied = (dimension, wait)
+        updated[key] = (tokens - cost, now)
+    return (None, denied) if denied else (updated, None)
+
+
+class MemoryBucketStore:
+    """Buckets en memoria del proceso; un bucket inactivo más de un periodo ya estaría lleno y se olvida"""
+
+    def __init__(self, max_keys=100000):
+        longest = max(limit.period for limits in RATE_LIMITS.values() for limit in limits.values())
+        self._buckets = TTLCache(max_keys, longest)
+        self._lock = threading.Lock()
+
+    def take(self, buckets, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            states = {key: self._buckets.get(key) for key, _, _ in buckets}
+            updated, denied = _take(states, buckets, cost, now)
+            if updated:
+                for key, state in updated.items():
+                    self._buckets.set(key, state)
+        return denied
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Buckets en un fichero SQLite compartido por los workers de la máquina (BEGIN IMMEDIATE serializa)"""
+
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        self._longest = max(limit.period for limits in RATE_LIMITS.values() for limit in limits.values())
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_bucket '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def take(self, buckets, cost=1):
+        # Reloj de pared: los workers no comparten el monotónico
+        now = time.time()
+        connection = self._connection()
+        keys = [key for key, _, _ in buckets]
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                f"SELECT key, tokens, updated FROM rate_limit_bucket WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+            states = {key: (tokens, updated) for key, tokens, updated in rows}
+            updated, denied = _take(states, buckets, cost, now)
+            if updated:
+                connection.executemany(
+                    'INSERT INTO rate_limit_bucket (key, tokens, updated) VALUES (?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                    [(key, tokens, at) for key, (tokens, at) in updated.items()]
+                )
+            self._takes += 1
+            if self._takes % self.CLEANUP_EVERY == 0:
+                # Los buckets sin uso durante más de un periodo están llenos: borrarlos no cambia nada
+                connection.execute('DELETE FROM rate_limit_bucket WHERE updated < ?', (now - self._longest,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return denied
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_limit_bucket')
+
+
+def create_store(spec=None):
+    spec = spec or RATE_LIMIT_STORE
+    if spec == 'memory':
+        return MemoryBucketStore()
+    if spec.startswith('sqlite:///'):
+        return SQLiteBucketStore(spec[len('sqlite:///'):])
+    raise ValueError(f'RATE_LIMIT_STORE desconocido: {spec}')
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_store()
+        return _store
+
+
+def client_ip(remote_addr, forwarded_for=None):
+    """IP del cliente; X-Forwarded-For solo si RATE_LIMIT_TRUST_FORWARDED"""
+    if RATE_LIMIT_TRUST_FORWARDED and forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr or 'unknown'
+
+
+def check(scope, identities):
+    """Consume un token de cada bucket del ámbito; lanza RateLimited si alguno está vacío.
+
+    identities: dimensión -> valor (p. ej. {'user': 3, 'ip': '10.0.0.1'}); las
+    dimensiones sin valor se ignoran.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    buckets = [
+        (f'{scope}:{dimension}:{identities[dimension]}', dimension, limit)
+        for dimension, limit in RATE_LIMITS[scope].items()
+        if identities.get(dimension) is not None
+    ]
+    if not buckets:
+        return
+    denied = get_store().take(buckets)
+    if denied:
+        dimension, retry_after = denied
+        RATE_LIMITED.inc(scope=scope, dimension=dimension)
+        raise RateLimited(dimension, retry_after)
+
+
+def retry_after_headers(error):
+    return {'Retry-After': str(max(1, math.ceil(error.retry_after)))}
+
+
+def rate_limited(scope):
+    """Decorador: aplica los buckets de RATE_LIMITS[scope] y responde 429 con Retry-After.
+
+    Debajo de token_required el primer argumento es el usuario (dimensión
+    'user'); la dimensión 'email' se toma del cuerpo JSON (login).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            identities = {
+                'ip': client_ip(request.remote_addr, request.headers.get('X-Forwarded-For')),
+                'user': getattr(args[0], 'id', None) if args else None
+            }
+            if 'email' in RATE_LIMITS[scope]:
+                email = (request.get_json(silent=True) or {}).get('email')
+                identities['email'] = str(email).strip().lower() if email else None
+            try:
+                check(scope, identities)
+            except RateLimited as e:
+                return jsonify({'error': str(e)}), 429, retry_after_headers(e)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
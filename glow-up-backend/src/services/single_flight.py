@@ -0,0 +1,95 @@
+from src.services.metrics import registry
+import asyncio
+import threading
+
+COALESCED = registry.counter(
+    'single_flight_coalesced_total', 'Peticiones que reutilizaron una operación en curso', ('scope',))
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una única ejecución.
+
+    La primera llamada ejecuta fn; las que llegan mientras sigue en curso esperan
+    y reciben el mismo resultado (o la misma excepción). Solo coordina hilos del
+    mismo proceso.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Devuelve (resultado, compartido); compartido indica que lo calculó otra llamada"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED.inc(scope=self.scope)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """SingleFlight para corrutinas del mismo bucle de eventos (modo ASGI)"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self._calls = {}
+
+    async def do(self, key, fn):
+        """Devuelve (resultado, compartido) de await fn()"""
+        future = self._calls.get(key)
+        if future is not None:
+            COALESCED.inc(scope=self.scope)
+            return await asyncio.shield(future), True
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita el aviso de excepción no recuperada si nadie más esperaba
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+# Generaciones síncronas en curso por (tipo, usuario, semanas)
+plan_flights = SingleFlight('plan_generation')
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """LRU en memoria, con tamaño máximo y expiración por entrada (thread-safe)"""
+
+    def __init__(self, max_size=256, ttl_seconds=60):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()  # key -> (expires_monotonic, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve el valor o None si no existe o expiró"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Guarda un valor y devuelve cuántas entradas se desalojaron por tamaño"""
+        evicted = 0
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def pop(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
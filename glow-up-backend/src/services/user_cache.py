@@ -0,0 +1,112 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from src.models.user import User, db
+from src.services.ttl_cache import TTLCache
+import os
+import threading
+
+# Caché por proceso de usuarios autenticados (user_id -> instancia desacoplada)
+_identities = TTLCache(
+    max_size=int(os.environ.get('AUTH_USER_CACHE_SIZE', 1024)),
+    ttl_seconds=int(os.environ.get('AUTH_USER_CACHE_TTL_SECONDS', 60))
+)
+
+# Contador de invalidaciones: una lectura que se cruza con un commit no se guarda en caché
+_invalidations = 0
+_invalidations_lock = threading.Lock()
+
+# Clave en session.info con los ids de usuario modificados en la transacción en curso
+_PENDING_KEY = 'user_cache_pending'
+# Marca de update()/delete() masivo sobre User: no se sabe qué ids cambian
+_ALL = object()
+
+
+def get_authenticated_user(user_id):
+    """Devuelve el usuario del token sin consultar la base de datos si está en caché"""
+    snapshot = _identities.get(user_id)
+    if snapshot is not None:
+        # Adjuntar una copia a la sesión actual sin hacer SELECT
+        return db.session.merge(snapshot, load=False)
+
+    mark = invalidation_mark()
+    user = User.query.get(user_id)
+    if user:
+        cache_user(user, mark)
+    return user
+
+
+def get_cached_user(user_id):
+    """Copia desacoplada del usuario en caché, o None (modo ASGI: solo lectura de columnas)"""
+    return _identities.get(user_id)
+
+
+def invalidation_mark():
+    """Tomar antes de leer el usuario y pasarlo a cache_user"""
+    return _invalidations
+
+
+def cache_user(user, mark=None):
+    """Guarda una copia del usuario; con mark, solo si nada se ha invalidado desde que se tomó"""
+    if mark is not None and mark != _invalidations:
+        # Un commit concurrente pudo cambiar la fila después de leerla
+        return
+    _identities.set(user.id, _snapshot(user))
+
+
+def invalidate_user(user_id):
+    """Elimina un usuario de la caché (llamar al modificarlo o borrarlo)"""
+    global _invalidations
+    with _invalidations_lock:
+        _invalidations += 1
+    _identities.pop(user_id)
+
+
+def clear_user_cache():
+    global _invalidations
+    with _invalidations_lock:
+        _invalidations += 1
+    _identities.clear()
+
+
+def _snapshot(user):
+    # Copia de las columnas, independiente de la sesión de la petición
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+# Invalidación al confirmar, no al hacer flush: antes del commit otra petición
+# podría volver a leer la fila antigua y guardarla en caché durante todo el TTL,
+# y un cambio deshecho con rollback no debe expulsar a nadie.
+# Cubre cambios por el ORM y update()/delete() masivos de ORM sobre User (vacían
+# la caché entera); las sentencias Core sobre la tabla user (connection.execute)
+# no pasan por la sesión y deben llamar a invalidate_user o clear_user_cache.
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = [obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is User.__mapper__:
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL in pending:
+        clear_user_cache()
+        return
+    for user_id in pending:
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,117 @@
+import os
+import sys
+
+# Antes de importar la app: contraseñas con hash barato y en el propio proceso
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app import create_app
+from src.models.migrations import migrate
+from src.models.user import db
+from src.services import llm_guard, rate_limit
+from src.services.plan_cache import plan_cache
+from src.services.user_cache import clear_user_cache
+
+USER_PROFILE = {
+    'name': 'Ana',
+    'password': 'secreto123',
+    'age': 30,
+    'weight': 70,
+    'height': 170,
+    'goal': 'maintain'
+}
+
+# Perfiles variados para las pruebas que comparan prompts o planes entre usuarios
+SEEDED_PROFILES = [
+    {'age': 22, 'weight': 58.5, 'height': 165, 'goal': 'gain_muscle', 'experience_level': 'beginner',
+     'activity_level': 'light', 'equipment_available': [], 'dietary_restrictions': []},
+    {'age': 35, 'weight': 92.3, 'height': 181, 'goal': 'lose_weight', 'experience_level': 'intermediate',
+     'activity_level': 'moderate', 'equipment_available': ['mancuernas', 'banco', 'bandas elásticas'],
+     'dietary_restrictions': ['sin gluten']},
+    {'age': 48, 'weight': 77, 'height': 170, 'goal': 'maintain', 'experience_level': 'advanced',
+     'activity_level': 'active', 'equipment_available': ['barra', 'máquina de poleas', 'kettlebell', 'TRX'],
+     'dietary_restrictions': ['vegano', 'bajo en sodio']},
+    {'age': 61, 'weight': 68.2, 'height': 158, 'goal': 'lose_weight', 'experience_level': 'beginner',
+     'activity_level': 'sedentary', 'equipment_available': ['esterilla'], 'dietary_restrictions': ['lactosa']},
+]
+SEEDED_FEEDBACK = [
+    {'rating': 4, 'difficulty_rating': 3, 'feedback_text': 'Me gustó, aunque los lunes se hacían muy largos.'},
+    {'rating': 2, 'difficulty_rating': 5, 'feedback_text': 'Demasiado repetitivo, siempre los mismos ejercicios.'},
+    {'rating': 5, 'difficulty_rating': 2, 'feedback_text': ''},
+]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App con una base SQLite temporal ya migrada"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app()
+    app.config['TESTING'] = True
+    migrate(app)
+    with app.app_context():
+        plan_cache.clear()
+    yield app
+    with app.app_context():
+        plan_cache.clear()
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_global_state():
+    # Estado de proceso compartido entre apps: buckets, usuarios cacheados y circuito del LLM
+    rate_limit.get_store().clear()
+    clear_user_cache()
+    llm_guard.breaker.reset()
+    yield
+    rate_limit.get_store().clear()
+    clear_user_cache()
+    llm_guard.breaker.reset()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Sustituto local de OpenAI (necesita el paquete openai) y generación siempre con el LLM"""
+    pytest.importorskip('openai')
+    from src.services import fake_llm
+
+    monkeypatch.setenv('PLAN_GENERATOR', 'llm')
+    fake_llm.install_fake_llm()
+    yield fake_llm
+    fake_llm.uninstall_fake_llm()
+
+
+def register(client, email='ana@example.com', **fields):
+    """Registra un usuario y devuelve (usuario, cabeceras de autenticación)"""
+    response = client.post('/api/auth/register', json=dict(USER_PROFILE, email=email, **fields))
+    assert response.status_code == 201, response.get_json()
+    data = response.get_json()
+    return data['user'], {'Authorization': f"Bearer {data['token']}"}
+
+
+@pytest.fixture
+def user(client):
+    return register(client)
+
+
+@pytest.fixture
+def seeded_users(client):
+    """Usuarios de SEEDED_PROFILES; el i-ésimo con los i primeros comentarios de cada tipo de plan"""
+    users = []
+    for index, profile in enumerate(SEEDED_PROFILES):
+        user_data, headers = register(client, email=f'usuario{index}@example.com', **profile)
+        for feedback in SEEDED_FEEDBACK[:index]:
+            for plan_type in ('workout', 'nutrition'):
+                response = client.post('/api/submit-feedback', headers=headers,
+                                       json=dict(feedback, plan_type=plan_type, plan_id=1))
+                assert response.status_code == 201
+        users.append((user_data, headers))
+    return users
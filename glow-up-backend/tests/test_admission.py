@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.routes import ai_plans
+from src.services.admission import AdmissionController, AdmissionRejected
+from src.services.jobs import JOB_COMPLETED, JOB_FAILED, job_manager
+import asyncio
+import pytest
+import threading
+import time
+
+
+def wait_for_queue(controller, queued, timeout=5):
+    deadline = time.monotonic() + timeout
+    while controller.stats()['queued'] != queued:
+        assert time.monotonic() < deadline, 'Tiempo de espera agotado'
+        time.sleep(0.005)
+
+
+def test_full_queue_is_rejected_immediately():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=2)
+    controller.acquire()
+
+    started = time.perf_counter()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire()
+    assert time.perf_counter() - started < 0.5
+    assert rejected.value.retry_after == 2
+
+    controller.release()
+    with controller.slot():
+        assert controller.stats()['in_flight'] == 1
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_queued_request_gets_the_released_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    controller.acquire()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        waiting = pool.submit(controller.acquire)
+        wait_for_queue(controller, 1)
+        # Cola llena: el siguiente no espera
+        with pytest.raises(AdmissionRejected):
+            controller.acquire()
+
+        controller.release()
+        waiting.result(timeout=5)
+    # El hueco pasó directamente al que esperaba
+    assert controller.stats() == {'in_flight': 1, 'queued': 0, 'max_in_flight': 1, 'max_queue': 1}
+
+
+def test_queued_request_times_out():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=0.1)
+    controller.acquire()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire()
+    assert rejected.value.retry_after == 1
+    assert controller.stats()['queued'] == 0
+
+    controller.release()
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_async_waiters_share_the_limit_with_threads():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    controller.acquire()
+
+    async def main():
+        waiter = asyncio.ensure_future(controller.acquire_async())
+        while controller.stats()['queued'] != 1:
+            await asyncio.sleep(0.005)
+        # Lo libera un hilo, como una petición síncrona que termina
+        threading.Thread(target=controller.release).start()
+        await asyncio.wait_for(waiter, 5)
+
+    asyncio.run(main())
+    assert controller.stats()['in_flight'] == 1
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    controller.acquire()
+
+    async def main():
+        waiter = asyncio.ensure_future(controller.acquire_async())
+        while controller.stats()['queued'] != 1:
+            await asyncio.sleep(0.005)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(main())
+    assert controller.stats()['queued'] == 0
+    controller.release()
+    assert controller.stats()['in_flight'] == 0
+
+
+@pytest.fixture
+def busy(monkeypatch):
+    """Límite global con su único hueco ocupado y sin cola"""
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=3)
+    monkeypatch.setattr(ai_plans, 'generation_admission', controller)
+    controller.acquire()
+    yield controller
+    controller.release()
+
+
+@pytest.mark.parametrize('path', [
+    '/api/generate-workout-plan',
+    '/api/generate-nutrition-plan',
+    '/api/generate-workout-plan/stream',
+])
+def test_generation_is_rejected_with_503_when_busy(client, user, busy, path):
+    _, headers = user
+    response = client.post(path, json={'duration_weeks': 4}, headers=headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert busy.stats() == {'in_flight': 1, 'queued': 0, 'max_in_flight': 1, 'max_queue': 0}
+
+
+def test_generation_releases_its_slot(client, user, monkeypatch):
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1)
+    monkeypatch.setattr(ai_plans, 'generation_admission', controller)
+    _, headers = user
+
+    for path in ('/api/generate-workout-plan', '/api/generate-workout-plan/stream'):
+        response = client.post(path, json={'duration_weeks': 4}, headers=headers)
+        response.get_data()
+        response.close()
+        assert response.status_code in (200, 201)
+        assert controller.stats()['in_flight'] == 0
+
+
+def test_async_jobs_are_rejected_when_busy(client, user, busy):
+    _, headers = user
+    response = client.post('/api/generate-workout-plan', query_string={'async': '1'},
+                           json={'duration_weeks': 4}, headers=headers)
+    assert response.status_code == 202
+
+    job = job_manager.wait(response.get_json()['job']['id'], timeout=10)
+    assert job.status == JOB_FAILED
+    assert 'ocupado' in job.error
+    assert busy.stats()['in_flight'] == 1
+
+
+def test_async_jobs_hold_a_slot_while_generating(client, user, monkeypatch):
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1)
+    monkeypatch.setattr(ai_plans, 'generation_admission', controller)
+    create_plan = ai_plans.create_nutrition_plan
+    seen = []
+
+    def observed(*args):
+        seen.append(controller.stats()['in_flight'])
+        return create_plan(*args)
+
+    monkeypatch.setattr(ai_plans, 'create_nutrition_plan', observed)
+    _, headers = user
+    response = client.post('/api/generate-nutrition-plan', query_string={'async': '1'},
+                           json={'duration_weeks': 4}, headers=headers)
+
+    job = job_manager.wait(response.get_json()['job']['id'], timeout=10)
+    assert job.status == JOB_COMPLETED
+    assert seen == [1]
+    assert controller.stats()['in_flight'] == 0
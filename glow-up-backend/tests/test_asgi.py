@@ -0,0 +1,172 @@
+from conftest import USER_PROFILE
+from src.asgi import create_asgi_app
+from src.routes import async_plans
+from types import SimpleNamespace
+import asyncio
+import json
+import pytest
+
+
+async def call(asgi, method, path, body=None, headers=None, query=''):
+    """Petición HTTP directa a la app ASGI, como la haría uvicorn"""
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    raw_headers = [(b'host', b'testserver'), (b'content-length', str(len(payload)).encode())]
+    if body is not None:
+        raw_headers.append((b'content-type', b'application/json'))
+    raw_headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()]
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+        'method': method, 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'headers': raw_headers,
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80)
+    }
+    pending = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    disconnected = asyncio.Event()
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    try:
+        await asyncio.wait_for(asgi(scope, receive, send), 10)
+    finally:
+        disconnected.set()
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in start['headers']}
+    return SimpleNamespace(status=start['status'], headers=headers, body=body,
+                           json=lambda: json.loads(body) if body else None)
+
+
+def run(app, scenario):
+    """Ejecuta scenario(asgi) en un bucle nuevo, con arranque y parada (lifespan) como uvicorn"""
+    asgi = create_asgi_app(app)
+
+    async def main():
+        startup = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        shutdown = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if len(startup) == 1:
+                await shutdown.wait()
+            return startup.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        lifespan = asyncio.ensure_future(asgi({'type': 'lifespan'}, receive, send))
+        try:
+            await scenario(asgi)
+        finally:
+            shutdown.set()
+            await lifespan
+        assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+    asyncio.run(main())
+
+
+async def register(asgi, email='ana@example.com'):
+    # Ruta sin versión asíncrona: la atiende Flask a través de a2wsgi
+    response = await call(asgi, 'POST', '/api/auth/register', dict(USER_PROFILE, email=email))
+    assert response.status == 201, response.json()
+    return {'Authorization': f"Bearer {response.json()['token']}"}
+
+
+def test_async_routes_require_a_valid_token(app):
+    async def scenario(asgi):
+        response = await call(asgi, 'GET', '/api/my-plans')
+        assert (response.status, response.json()) == (401, {'error': 'Token no proporcionado'})
+        response = await call(asgi, 'GET', '/api/my-plans', headers={'Authorization': 'Bearer x.y.z'})
+        assert (response.status, response.json()) == (401, {'error': 'Token inválido'})
+        response = await call(asgi, 'POST', '/api/generate-workout-plan', {'duration_weeks': 4},
+                              headers={'Authorization': 'Bearer x.y.z'})
+        assert response.status == 401
+
+    run(app, scenario)
+
+
+def test_generate_and_read_plans_through_asgi(app):
+    async def scenario(asgi):
+        headers = await register(asgi)
+
+        response = await call(asgi, 'POST', '/api/generate-workout-plan', {'duration_weeks': 4}, headers)
+        assert response.status == 201
+        assert response.headers['content-type'] == 'application/json'
+        created = response.json()
+        assert created['generation']['source'] == 'local'
+        plan_id = created['plan']['id']
+
+        response = await call(asgi, 'GET', f'/api/plans/workout/{plan_id}', headers=headers)
+        assert response.status == 200
+        assert response.json()['plan']['plan_data'] == created['plan']['plan_data']
+        etag = response.headers['etag']
+
+        # Revalidación con ETag sin volver a serializar el plan
+        response = await call(asgi, 'GET', f'/api/plans/workout/{plan_id}',
+                              headers=dict(headers, **{'If-None-Match': etag}))
+        assert (response.status, response.body) == (304, b'')
+
+        response = await call(asgi, 'GET', '/api/my-plans', headers=headers, query='view=summary&type=workout')
+        assert [plan['id'] for plan in response.json()['workout_plans']] == [plan_id]
+        assert 'plan_data' not in response.json()['workout_plans'][0]
+
+        # Los planes de otro usuario no se ven
+        other = await register(asgi, 'otro@example.com')
+        response = await call(asgi, 'GET', f'/api/plans/workout/{plan_id}', headers=other)
+        assert response.status == 404
+
+    run(app, scenario)
+
+
+def test_async_generation_uses_the_async_llm_client(app, fake_llm):
+    async def scenario(asgi):
+        headers = await register(asgi)
+        response = await call(asgi, 'POST', '/api/generate-nutrition-plan', {'duration_weeks': 4}, headers)
+        assert response.status == 201
+        assert response.json()['generation']['source'] == 'llm'
+        assert response.json()['plan']['ai_generated'] is True
+
+        response = await call(asgi, 'POST', '/api/generate-nutrition-plan', {'duration_weeks': 4}, headers)
+        assert response.json()['generation']['source'] == 'cache'
+
+    run(app, scenario)
+    assert fake_llm.FakeChatCompletion.calls == 1
+
+
+def test_concurrent_generations_are_coalesced(app, fake_llm):
+    fake_llm.FakeChatCompletion.latency = 0.3
+
+    async def scenario(asgi):
+        headers = await register(asgi)
+        responses = await asyncio.gather(*[
+            call(asgi, 'POST', '/api/generate-workout-plan', {'duration_weeks': 4}, headers) for _ in range(3)])
+        assert [response.status for response in responses] == [201] * 3
+        assert len({response.json()['plan']['id'] for response in responses}) == 1
+        assert sum(response.headers.get('x-coalesced') == 'true' for response in responses) == 2
+
+    run(app, scenario)
+    assert fake_llm.FakeChatCompletion.calls == 1
+
+
+@pytest.mark.parametrize('extra', [{'query': 'async=1'}, {'headers': {'Idempotency-Key': 'clave-1'}}])
+def test_unported_modes_are_delegated_to_flask(app, extra, monkeypatch):
+    handled = []
+    monkeypatch.setattr(async_plans, 'create_plan', lambda *args: handled.append(args))
+
+    async def scenario(asgi):
+        headers = dict(await register(asgi), **extra.get('headers', {}))
+        response = await call(asgi, 'POST', '/api/generate-workout-plan', {'duration_weeks': 4}, headers,
+                              extra.get('query', ''))
+        assert response.status in (201, 202)
+        assert response.json()['plan' if response.status == 201 else 'job']
+
+    run(app, scenario)
+    assert handled == []
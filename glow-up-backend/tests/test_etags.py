@@ -0,0 +1,71 @@
+from conftest import register
+import pytest
+
+
+def get(client, path, headers, etag=None, **params):
+    if etag is not None:
+        headers = dict(headers, **{'If-None-Match': etag})
+    return client.get(path, headers=headers, query_string=params)
+
+
+@pytest.mark.parametrize('path', ['/api/progress', '/api/progress/stats', '/api/progress/chart'])
+def test_progress_reads_revalidate_until_progress_changes(client, user, path):
+    _, headers = user
+    first = get(client, path, headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = get(client, path, headers, etag)
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert cached.data == b''
+
+    client.post('/api/progress', json={'date': '2024-06-01', 'weight': 70}, headers=headers)
+    changed = get(client, path, headers, etag)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_bulk_import_invalidates_progress_etag(client, user):
+    _, headers = user
+    etag = get(client, '/api/progress', headers).headers['ETag']
+    client.post('/api/progress/bulk', data='{"date": "2024-06-02", "weight": 71}\n',
+                content_type='application/x-ndjson', headers=headers)
+    assert get(client, '/api/progress', headers, etag).status_code == 200
+
+
+def test_etag_depends_on_query_string_and_user(client, user):
+    _, headers = user
+    _, other_headers = register(client, email='otro@example.com')
+
+    etag = get(client, '/api/progress', headers, days=30).headers['ETag']
+    assert get(client, '/api/progress', headers, etag, days=60).status_code == 200
+    assert get(client, '/api/progress', other_headers, etag, days=30).status_code == 200
+
+
+def test_plans_revalidate_until_a_plan_is_generated(client, user):
+    _, headers = user
+    plan_id = client.post('/api/generate-workout-plan', json={}, headers=headers).get_json()['plan']['id']
+
+    for path in ('/api/my-plans', f'/api/plans/workout/{plan_id}'):
+        etag = get(client, path, headers).headers['ETag']
+        assert get(client, path, headers, etag).status_code == 304
+
+    etag = get(client, '/api/my-plans', headers).headers['ETag']
+    client.post('/api/generate-nutrition-plan', json={}, headers=headers)
+    assert get(client, '/api/my-plans', headers, etag).status_code == 200
+
+
+def test_errors_carry_no_etag(client, user):
+    _, headers = user
+    response = get(client, '/api/plans/workout/999', headers)
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_verify_token_revalidates_profile(client, user):
+    _, headers = user
+    etag = get(client, '/api/auth/verify-token', headers).headers['ETag']
+    assert get(client, '/api/auth/verify-token', headers, etag).status_code == 304
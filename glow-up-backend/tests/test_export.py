@@ -0,0 +1,144 @@
+from conftest import register
+from datetime import date, datetime, timedelta
+from src.models.user import NutritionPlan, ProgressEntry, WorkoutPlan, db
+from src.services import export
+from src.services.export import EXPORT_KIND_NAMES, decode_export_cursor, encode_export_cursor
+import json
+import pytest
+
+OLD = datetime(2023, 6, 1, 9, 0)
+NEW = datetime(2024, 6, 1, 9, 0)
+TOKEN = {'Authorization': 'Bearer secreto'}
+
+
+@pytest.fixture
+def seeded(app, client, monkeypatch):
+    """Dos usuarios con progreso y planes antiguos y recientes; lotes pequeños para cruzar varios"""
+    monkeypatch.setenv('EXPORT_TOKEN', 'secreto')
+    monkeypatch.setattr(export, 'EXPORT_BATCH_SIZE', 2)
+    ids = []
+    for email in ('ana@example.com', 'otro@example.com'):
+        user_data, headers = register(client, email=email)
+        ids.append((user_data['id'], headers))
+    with app.app_context():
+        for user_id, _ in ids:
+            for index, created_at in enumerate((OLD, NEW, NEW)):
+                db.session.add(WorkoutPlan(
+                    user_id=user_id, title=f'Entrenamiento {index}', duration_weeks=4, difficulty_level='beginner',
+                    plan_data={'weekly_schedule': [{'day': 'Miércoles'}]}, created_at=created_at))
+                db.session.add(NutritionPlan(
+                    user_id=user_id, title=f'Nutrición {index}', duration_weeks=4, daily_calories=2000,
+                    macros={'protein_grams': 150}, meal_plan={'day_1': {}}, created_at=created_at))
+            db.session.add(ProgressEntry(user_id=user_id, date=date(2024, 6, 1), weight=70.5, created_at=NEW))
+        db.session.commit()
+    return ids
+
+
+def parse(body):
+    """(registros, línea final) de un cuerpo NDJSON"""
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert lines[-1]['type'] == 'end'
+    return lines[:-1], lines[-1]
+
+
+def fetch(client, path='/api/export', headers=TOKEN, **params):
+    response = client.get(path, query_string=params, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Cache-Control'] == 'no-store'
+    return parse(response.get_data(as_text=True))
+
+
+def test_export_requires_the_export_token(client, monkeypatch):
+    assert client.get('/api/export', headers=TOKEN).status_code == 403
+    monkeypatch.setenv('EXPORT_TOKEN', 'secreto')
+    assert client.get('/api/export').status_code == 401
+    assert client.get('/api/export', headers={'Authorization': 'Bearer otro'}).status_code == 401
+    assert client.get('/api/export', headers=TOKEN).status_code == 200
+
+
+def test_records_are_exported_by_type_then_id(client, seeded):
+    records, end = fetch(client)
+    assert end['count'] == len(records) == 2 + 6 + 6 + 2
+    order = [(EXPORT_KIND_NAMES.index(record['type']), record['data']['id']) for record in records]
+    assert order == sorted(order)
+    assert {record['type'] for record in records} == {'user', 'workout_plan', 'nutrition_plan', 'progress_entry'}
+    # Los planes salen con su JSON completo
+    plan = next(record for record in records if record['type'] == 'workout_plan')
+    assert plan['data']['plan_data'] == {'weekly_schedule': [{'day': 'Miércoles'}]}
+    assert decode_export_cursor(plan['cursor']) == ('workout_plan', plan['data']['id'], None)
+
+
+def test_any_cursor_resumes_right_after_its_record(client, seeded):
+    records, _ = fetch(client)
+    for index in (0, 3, 7, len(records) - 1):
+        resumed, end = fetch(client, cursor=records[index]['cursor'])
+        assert resumed == records[index + 1:]
+        assert end['count'] == len(records) - index - 1
+
+
+def test_since_filters_and_is_kept_in_the_cursor(client, seeded):
+    records, _ = fetch(client, since='2024-01-01')
+    plans = [record for record in records if record['type'].endswith('_plan')]
+    assert len(plans) == 8
+    assert {plan['data']['created_at'] for plan in plans} == {NEW.isoformat()}
+    # Los usuarios se filtran por updated_at: se acaban de registrar
+    assert sum(record['type'] == 'user' for record in records) == 2
+
+    # Al reanudar manda el since del cursor, aunque no se repita el parámetro
+    resumed, _ = fetch(client, cursor=records[2]['cursor'])
+    assert resumed == records[3:]
+
+
+def test_types_and_user_filters(client, seeded):
+    (user_id, headers), _ = seeded
+    records, _ = fetch(client, types='workout_plan,progress_entry', user_id=user_id)
+    assert [record['type'] for record in records] == ['progress_entry'] + ['workout_plan'] * 3
+    assert {record['data']['user_id'] for record in records} == {user_id}
+
+    # /export/me solo devuelve lo del usuario autenticado
+    mine, _ = fetch(client, '/api/export/me', headers)
+    assert {record['data'].get('user_id', record['data']['id']) for record in mine} == {user_id}
+    assert len(mine) == 1 + 1 + 3 + 3
+
+
+@pytest.mark.parametrize('params', [
+    {'since': 'ayer'},
+    {'types': 'cardio'},
+    {'cursor': 'no-es-base64!'},
+    {'cursor': encode_export_cursor('workout', 1)},
+])
+def test_invalid_parameters_return_400(client, seeded, params):
+    response = client.get('/api/export', query_string=params, headers=TOKEN)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_cli_resumes_an_interrupted_export(app, seeded, tmp_path):
+    runner = app.test_cli_runner()
+    full = tmp_path / 'completa.ndjson'
+    result = runner.invoke(args=['export-data', '--output', str(full), '--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    records, end = parse(full.read_text(encoding='utf-8'))
+    assert end['count'] == len(records)
+
+    # Corte a mitad de una línea: la línea rota se descarta y se sigue tras la anterior
+    content = full.read_bytes()
+    cut = content.index(b'\n', len(content) // 2) + 10
+    partial = tmp_path / 'parcial.ndjson'
+    partial.write_bytes(content[:cut])
+    result = runner.invoke(args=['export-data', '--output', str(partial), '--resume'])
+    assert result.exit_code == 0, result.output
+    resumed, end = parse(partial.read_text(encoding='utf-8'))
+    assert resumed == records
+    assert end['count'] < len(records)
+
+    result = runner.invoke(args=['export-data', '--output', str(partial), '--resume'])
+    assert 'ya está completa' in result.output
+    assert parse(partial.read_text(encoding='utf-8'))[0] == records
+
+
+def test_cli_resume_needs_an_output_file(app):
+    result = app.test_cli_runner().invoke(args=['export-data', '--resume'])
+    assert result.exit_code != 0
+    assert '--resume necesita --output' in result.output
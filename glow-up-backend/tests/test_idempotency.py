@@ -0,0 +1,106 @@
+from conftest import register
+from src.models.user import IdempotencyRecord, WorkoutPlan, db
+from src.routes import ai_plans
+from src.services.idempotency import IDEMPOTENCY_LOCK_SECONDS, request_hash
+from datetime import datetime, timedelta
+import json
+
+ENDPOINT = '/api/generate-workout-plan'
+
+
+def generate(client, headers, key, body=None):
+    return client.post(ENDPOINT, data=json.dumps(body or {'duration_weeks': 4}), content_type='application/json',
+                       headers=dict(headers, **{'Idempotency-Key': key}))
+
+
+def plan_count(app, user_id):
+    with app.app_context():
+        return WorkoutPlan.query.filter_by(user_id=user_id).count()
+
+
+def reserve(app, user_id, key, body, created_at):
+    """Reserva en curso de otro proceso para la misma clave y el mismo cuerpo"""
+    data = json.dumps(body)
+    with app.test_request_context(ENDPOINT, method='POST', data=data, content_type='application/json'):
+        body_hash = request_hash()
+    with app.app_context():
+        db.session.add(IdempotencyRecord(
+            user_id=user_id, idempotency_key=key, endpoint='generate-workout-plan', request_hash=body_hash,
+            created_at=created_at, expires_at=created_at + timedelta(days=1)
+        ))
+        db.session.commit()
+
+
+def test_retry_replays_the_stored_response(app, client, user):
+    user_data, headers = user
+    first = generate(client, headers, 'clave-1')
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    retry = generate(client, headers, 'clave-1')
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert plan_count(app, user_data['id']) == 1
+
+    # Otra clave es otra operación
+    assert generate(client, headers, 'clave-2').get_json()['plan']['id'] != first.get_json()['plan']['id']
+    assert plan_count(app, user_data['id']) == 2
+
+
+def test_same_key_with_another_body_is_rejected(app, client, user):
+    user_data, headers = user
+    generate(client, headers, 'clave', {'duration_weeks': 4})
+
+    response = generate(client, headers, 'clave', {'duration_weeks': 8})
+    assert response.status_code == 422
+    assert plan_count(app, user_data['id']) == 1
+
+
+def test_keys_are_scoped_per_user(app, client, user):
+    user_data, headers = user
+    other, other_headers = register(client, email='otro@example.com')
+    generate(client, headers, 'compartida')
+
+    response = generate(client, other_headers, 'compartida')
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert plan_count(app, other['id']) == 1
+
+
+def test_key_in_flight_elsewhere_returns_409(app, client, user):
+    user_data, headers = user
+    reserve(app, user_data['id'], 'en-curso', {'duration_weeks': 4}, datetime.utcnow())
+
+    response = generate(client, headers, 'en-curso')
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert plan_count(app, user_data['id']) == 0
+
+
+def test_abandoned_reservation_is_taken_over(app, client, user):
+    user_data, headers = user
+    stale = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS + 60)
+    reserve(app, user_data['id'], 'abandonada', {'duration_weeks': 4}, stale)
+
+    response = generate(client, headers, 'abandonada')
+    assert response.status_code == 201
+    assert plan_count(app, user_data['id']) == 1
+    assert generate(client, headers, 'abandonada').headers['Idempotent-Replayed'] == 'true'
+
+
+def test_server_errors_are_not_stored(app, client, user, monkeypatch):
+    user_data, headers = user
+    original = ai_plans.create_workout_plan
+    monkeypatch.setattr(ai_plans, 'create_workout_plan', lambda *args: 1 / 0)
+    assert generate(client, headers, 'reintento').status_code == 500
+
+    monkeypatch.setattr(ai_plans, 'create_workout_plan', original)
+    response = generate(client, headers, 'reintento')
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+
+
+def test_overlong_key_is_rejected(client, user):
+    _, headers = user
+    assert generate(client, headers, 'x' * 256).status_code == 400
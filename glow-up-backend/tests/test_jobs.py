@@ -0,0 +1,46 @@
+from conftest import register
+from src.services.jobs import JOB_COMPLETED, job_manager
+
+
+def submit_workout_job(client, headers):
+    response = client.post('/api/generate-workout-plan', json={'duration_weeks': 4, 'async': True}, headers=headers)
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert response.headers['Location'] == f"/api/jobs/{job['id']}"
+    return job['id']
+
+
+def test_async_job_completes_and_is_polled(client, user):
+    _, headers = user
+    job_id = submit_workout_job(client, headers)
+
+    job_manager.wait(job_id, timeout=10)
+    response = client.get(f'/api/jobs/{job_id}', headers=headers)
+    assert response.status_code == 200
+    job = response.get_json()['job']
+    assert job['status'] == JOB_COMPLETED
+    assert job['result']['plan_type'] == 'workout'
+    assert job['result']['generation']['source'] == 'local'
+
+
+def test_async_job_falls_back_when_llm_fails(client, user, fake_llm):
+    _, headers = user
+    fake_llm.FakeChatCompletion.failure_rate = 1.0
+
+    job_id = submit_workout_job(client, headers)
+    job = job_manager.wait(job_id, timeout=10)
+
+    assert job.status == JOB_COMPLETED
+    generation = job.result['generation']
+    assert generation['source'] == 'fallback'
+    assert generation['reason'] == 'llm_error'
+    assert job.result['plan']['ai_generated'] is False
+
+
+def test_jobs_of_other_users_are_hidden(client, user):
+    _, headers = user
+    job_id = submit_workout_job(client, headers)
+    job_manager.wait(job_id, timeout=10)
+
+    _, other_headers = register(client, email='otro@example.com')
+    assert client.get(f'/api/jobs/{job_id}', headers=other_headers).status_code == 404
@@ -0,0 +1,90 @@
+from app import create_app
+from conftest import register
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from src import json_provider
+from src.json_provider import FastJSONProvider, RawJSON, supports_raw_json
+from src.models.user import db
+import json
+import pytest
+import uuid
+
+VALUES = {
+    'texto': 'Señor Muñoz: “plan” de 5 días 💪',
+    'fecha': datetime(2024, 3, 5, 10, 30, 15),
+    'fecha_utc': datetime(2024, 3, 5, 10, 30, 15, tzinfo=timezone.utc),
+    'día': date(2024, 3, 5),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'decimal': Decimal('72.50'),
+    'lista': [1, 2.5, None, True]
+}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def provider(request, app, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return FastJSONProvider(app)
+
+
+def test_matches_the_stdlib_provider(app, provider):
+    expected = json.loads(DefaultJSONProvider(app).dumps(VALUES))
+    assert json.loads(provider.dumps(VALUES)) == expected
+    # Fechas en el mismo formato HTTP que Flask
+    assert expected['fecha'] == 'Tue, 05 Mar 2024 10:30:15 GMT'
+
+
+def test_raw_fragments_are_spliced_verbatim(provider):
+    stored = json.dumps({'día': 'Miércoles', 'notas': 'sin "comillas" rotas'}, ensure_ascii=False)
+    body = provider.dumps({
+        'plan': RawJSON(stored),
+        'más': [RawJSON(b'[1,2,3]'), RawJSON('"ñ"')],
+        # Un texto con pinta de marcador no se sustituye
+        'texto': '"0123456789abcdef:0"'
+    })
+    assert stored in body
+    assert json.loads(body) == {
+        'plan': json.loads(stored),
+        'más': [[1, 2, 3], 'ñ'],
+        'texto': '"0123456789abcdef:0"'
+    }
+
+
+def test_keyword_arguments_fall_back_to_the_json_module(provider):
+    body = provider.dumps({'b': RawJSON('{"x":1}'), 'a': 'ñ'}, indent=2)
+    assert '\n' in body
+    assert json.loads(body) == {'a': 'ñ', 'b': {'x': 1}}
+
+
+def responses(client, headers):
+    plan_id = client.post('/api/generate-workout-plan', json={'duration_weeks': 4},
+                          headers=headers).get_json()['plan']['id']
+    client.post('/api/generate-nutrition-plan', json={'duration_weeks': 4}, headers=headers)
+    return {path: client.get(path, headers=headers) for path in (
+        '/api/my-plans', f'/api/plans/workout/{plan_id}', '/api/my-plans?view=summary')}
+
+
+def test_spliced_responses_match_the_default_provider(app, client, monkeypatch):
+    assert supports_raw_json(app)
+    _, headers = register(client, name='José Ñúñez', equipment_available=['mancuernas', 'banco plano'])
+    fast = responses(client, headers)
+
+    monkeypatch.setenv('JSON_PROVIDER', 'default')
+    default_app = create_app()
+    assert not supports_raw_json(default_app)
+    default = {path: default_app.test_client().get(path, headers=headers) for path in fast}
+    with default_app.app_context():
+        db.engine.dispose()
+
+    for path, response in fast.items():
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        # Bytes válidos: UTF-8 y un único documento JSON
+        body = json.loads(response.get_data().decode('utf-8'))
+        assert body == default[path].get_json(), path
+    plans = json.loads(fast['/api/my-plans'].get_data())
+    assert plans['workout_plans'][0]['plan_data']['weekly_schedule']
+    assert plans['nutrition_plans'][0]['meal_plan']
@@ -0,0 +1,77 @@
+from src.services.json_stream import JsonSectionStream, extract_json
+import json
+import pytest
+
+SECTIONS = [('weekly_schedule', '*'), ('progression',)]
+
+PLAN = {
+    'title': 'Plan {con} [llaves] y "comillas"',
+    'weekly_schedule': [
+        {'day': 'Lunes', 'exercises': [{'name': 'Sentadilla', 'notes': 'Espalda recta, \\ sin rebotar }'}]},
+        {'day': 'Martes', 'exercises': []},
+        {'day': 'Miércoles', 'exercises': [{'name': 'Plancha', 'sets': 3}]}
+    ],
+    'clave "rara"': {'progression': 'no es la sección'},
+    'progression': {'week_1': 'Base', 'week_2': 'Carga'}
+}
+
+
+def feed_in_chunks(text, size, sections=SECTIONS):
+    parser = JsonSectionStream(sections)
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return parser, completed
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 10000])
+def test_sections_are_emitted_in_order_for_any_chunking(size):
+    text = json.dumps(PLAN, ensure_ascii=False)
+    parser, completed = feed_in_chunks(text, size)
+    assert completed == [
+        (('weekly_schedule', 0), PLAN['weekly_schedule'][0]),
+        (('weekly_schedule', 1), PLAN['weekly_schedule'][1]),
+        (('weekly_schedule', 2), PLAN['weekly_schedule'][2]),
+        (('progression',), PLAN['progression'])
+    ]
+    assert parser.text == text
+
+
+def test_section_is_emitted_as_soon_as_it_closes():
+    text = json.dumps(PLAN)
+    first_day_end = text.index('}]}', text.index('Sentadilla')) + 3
+    parser = JsonSectionStream(SECTIONS)
+    assert parser.feed(text[:first_day_end - 1]) == []
+    assert parser.feed(text[first_day_end - 1:first_day_end]) == [
+        (('weekly_schedule', 0), PLAN['weekly_schedule'][0])]
+
+
+def test_nested_wildcards():
+    plan = {'macros': {'protein_grams': 150}, 'meal_plan': {'day_1': {'breakfast': {'name': 'Avena'},
+                                                                      'lunch': {'name': 'Arroz'}}}}
+    _, completed = feed_in_chunks(json.dumps(plan), 5, [('macros',), ('meal_plan', '*', '*')])
+    assert [path for path, _ in completed] == [
+        ('macros',), ('meal_plan', 'day_1', 'breakfast'), ('meal_plan', 'day_1', 'lunch')]
+
+
+def test_only_the_open_section_is_kept():
+    plan = {'weekly_schedule': [{'day': day, 'notes': 'x' * 500} for day in range(200)]}
+    text = json.dumps(plan)
+    parser = JsonSectionStream(SECTIONS)
+    largest = 0
+    for start in range(0, len(text), 16):
+        parser.feed(text[start:start + 16])
+        largest = max(largest, len(parser._buffer))
+    # Como mucho un día más el fragmento, no la respuesta entera
+    assert largest < 600
+    assert parser.text == text
+
+
+def test_text_outside_json_is_ignored():
+    text = 'Aquí tienes tu plan:\n```json\n' + json.dumps(PLAN) + '\n```'
+    parser, completed = feed_in_chunks(text, 11)
+    assert len(completed) == 4
+    assert extract_json(parser.text) == PLAN
+
+    with pytest.raises(ValueError):
+        extract_json('sin json')
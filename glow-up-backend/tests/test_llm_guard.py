@@ -0,0 +1,206 @@
+from src.services import llm_guard
+from src.services.llm_guard import (
+    CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker, CircuitOpen, Deadline, LLMTimeout
+)
+from src.services.plan_cache import plan_cache
+import pytest
+import threading
+import time
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """Circuito propio de la prueba: 2 fallos lo abren y se prueba de nuevo a los 0.1 s"""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.1, slow_call_seconds=0.5)
+    monkeypatch.setattr(llm_guard, 'breaker', breaker)
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers(breaker):
+    breaker.record(False, 0.01)
+    assert breaker.state == CIRCUIT_CLOSED
+    # Un éxito reinicia la cuenta
+    breaker.record(True, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.record(False, 0.01)
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.12)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    # Una sola llamada de prueba
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit(breaker):
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    time.sleep(0.12)
+    assert breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow()
+
+
+def test_slow_calls_count_as_failures(breaker):
+    breaker.record(True, 0.6)
+    breaker.record(True, 0.6)
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_call_returns_result_within_deadline(breaker):
+    timeouts = []
+
+    def create(timeout):
+        timeouts.append(timeout)
+        return 'respuesta'
+
+    assert llm_guard.call(create, Deadline(5)) == 'respuesta'
+    # El proveedor recibe el tiempo que le queda a la petición
+    assert 4 < timeouts[0] <= 5
+
+
+def test_call_times_out_before_the_deadline_and_delivers_late_result(breaker, monkeypatch):
+    monkeypatch.setattr(llm_guard, 'LLM_HEDGE_MARGIN_SECONDS', 0.2)
+    late = []
+    delivered = threading.Event()
+
+    def create(timeout):
+        time.sleep(0.5)
+        return 'tarde'
+
+    def on_late(result):
+        late.append(result)
+        delivered.set()
+
+    started = time.perf_counter()
+    with pytest.raises(LLMTimeout):
+        llm_guard.call(create, Deadline(0.4), on_late=on_late)
+    # Se deja de esperar el margen antes del plazo
+    assert time.perf_counter() - started < 0.35
+
+    assert delivered.wait(2)
+    assert late == ['tarde']
+
+
+def test_call_skips_the_llm_without_time_or_with_open_circuit(breaker, monkeypatch):
+    monkeypatch.setattr(llm_guard, 'LLM_HEDGE_MARGIN_SECONDS', 1)
+    calls = []
+
+    def create(timeout):
+        calls.append(timeout)
+        return 'respuesta'
+
+    # Menos tiempo que el margen reservado para el plan local
+    with pytest.raises(LLMTimeout):
+        llm_guard.call(create, Deadline(0.5))
+
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    with pytest.raises(CircuitOpen):
+        llm_guard.call(create, Deadline(30))
+    assert calls == []
+
+
+def test_failed_call_is_recorded(breaker):
+    def create(timeout):
+        raise RuntimeError('502')
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            llm_guard.call(create, Deadline(30))
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_stream_stops_at_the_deadline(breaker):
+    def create(timeout):
+        for piece in ('{"a"', ': 1', '}'):
+            time.sleep(0.15)
+            yield piece
+
+    received = []
+    with pytest.raises(LLMTimeout):
+        for piece in llm_guard.stream(create, Deadline(0.25)):
+            received.append(piece)
+    assert received == ['{"a"']
+    # El stream cortado ya contó como fallo: uno más abre el circuito
+    breaker.record(False, 0.01)
+    assert breaker.state == CIRCUIT_OPEN
+
+
+@pytest.mark.parametrize('error, reason', [
+    (CircuitOpen(), 'circuit_open'),
+    (LLMTimeout(), 'timeout'),
+    (ValueError('JSON inválido'), 'invalid_response'),
+    (RuntimeError('502'), 'llm_error'),
+])
+def test_failure_reason(error, reason):
+    assert llm_guard.failure_reason(error) == reason
+
+
+def generate(client, headers):
+    response = client.post('/api/generate-workout-plan', json={'duration_weeks': 4}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_generation_uses_the_llm(client, user, fake_llm):
+    _, headers = user
+    result = generate(client, headers)
+    generation = result['generation']
+    assert (generation['source'], generation['reason'], generation['circuit']) == ('llm', None, CIRCUIT_CLOSED)
+    assert generation['prompt_tokens'] > 0
+    assert result['plan']['ai_generated'] is True
+
+    # Mismas entradas: la segunda sale de la caché de planes
+    assert generate(client, headers)['generation']['source'] == 'cache'
+    assert fake_llm.FakeChatCompletion.calls == 1
+
+
+def test_llm_errors_fall_back_to_the_local_plan_and_open_the_circuit(client, user, fake_llm, breaker):
+    _, headers = user
+    fake_llm.FakeChatCompletion.failure_rate = 1.0
+
+    for _ in range(2):
+        result = generate(client, headers)
+        assert (result['generation']['source'], result['generation']['reason']) == ('fallback', 'llm_error')
+        assert result['plan']['ai_generated'] is False
+        assert result['plan']['plan_data']['weekly_schedule']
+
+    # Con el circuito abierto ni siquiera se llama al proveedor
+    result = generate(client, headers)
+    assert result['generation']['reason'] == 'circuit_open'
+    assert result['generation']['circuit'] == CIRCUIT_OPEN
+    assert fake_llm.FakeChatCompletion.calls == 2
+
+    # Pasado el enfriamiento, una llamada de prueba con éxito cierra el circuito
+    time.sleep(0.12)
+    fake_llm.FakeChatCompletion.failure_rate = 0.0
+    result = generate(client, headers)
+    assert (result['generation']['source'], result['generation']['circuit']) == ('llm', CIRCUIT_CLOSED)
+
+
+def test_slow_llm_is_hedged_and_its_late_answer_cached(app, client, user, fake_llm, breaker, monkeypatch):
+    _, headers = user
+    monkeypatch.setattr(llm_guard, 'LLM_DEADLINE_SECONDS', 1.0)
+    monkeypatch.setattr(llm_guard, 'LLM_HEDGE_MARGIN_SECONDS', 0.7)
+    fake_llm.FakeChatCompletion.latency = 0.6
+    stores = plan_cache.stats()['stores']
+
+    started = time.perf_counter()
+    result = generate(client, headers)
+    assert time.perf_counter() - started < 0.6
+    generation = result['generation']
+    assert (generation['source'], generation['reason'], generation['deadline_ms']) == ('fallback', 'timeout', 1000)
+
+    # La respuesta que llega tarde se guarda para la siguiente petición
+    deadline = time.monotonic() + 3
+    while plan_cache.stats()['stores'] == stores:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert generate(client, headers)['generation']['source'] == 'cache'
@@ -0,0 +1,61 @@
+from src.services import local_planner
+from src.services.plan_catalog import EXERCISES
+from types import SimpleNamespace
+import pytest
+
+
+@pytest.mark.parametrize('value, tags, unknown', [
+    ('["vegano"]', {'vegan'}, []),
+    ('vegana, sin lactosa', {'vegan', 'lactose_free'}, []),
+    # Varias etiquetas en un mismo elemento
+    (['vegetariano sin gluten'], {'vegetarian', 'gluten_free'}, []),
+    (['alergia a las nueces', 'Celíaca'], {'nut_free', 'gluten_free'}, []),
+    (['ninguna'], set(), []),
+    # Palabras no reconocidas: el elemento entero es desconocido aunque aporte etiquetas
+    (['sin gluten ni soja'], {'gluten_free'}, ['sin gluten ni soja']),
+    (['keto'], set(), ['keto']),
+    # Palabras completas, no subcadenas
+    (['nutella'], set(), ['nutella']),
+])
+def test_resolve_diet(value, tags, unknown):
+    assert local_planner.resolve_diet(value) == (tags, unknown)
+
+
+@pytest.mark.parametrize('value, tags, unknown', [
+    ('mancuernas, banda elástica', {'dumbbells', 'bands'}, []),
+    (['barra y discos', 'banco'], {'barbell', 'bench'}, []),
+    # 'barra fija' (dominadas) se reconoce antes que 'barra'
+    (['barra fija'], {'pullup_bar'}, []),
+    (['mancuernas', 'trampolín'], {'dumbbells'}, ['trampolín']),
+])
+def test_resolve_equipment(value, tags, unknown):
+    found, missing = local_planner.resolve_equipment(value)
+    # Siempre se puede entrenar con el peso corporal
+    assert found - {'bodyweight'} == tags
+    assert missing == unknown
+
+
+def test_covers_profile_rejects_unknown_items():
+    user = SimpleNamespace(equipment_available='["mancuernas", "trampolín"]', experience_level='beginner',
+                           dietary_restrictions='["keto"]')
+    assert not local_planner.covers_profile(user, 'workout')
+    assert not local_planner.covers_profile(user, 'nutrition')
+
+    user.equipment_available, user.dietary_restrictions = '["mancuernas"]', '["sin gluten"]'
+    assert local_planner.covers_profile(user, 'workout')
+    assert local_planner.covers_profile(user, 'nutrition')
+
+
+@pytest.mark.parametrize('equipment', ['["mancuernas"]', '["ninguno"]', '["gimnasio completo"]'])
+def test_workout_plan_only_uses_available_equipment(equipment):
+    user = SimpleNamespace(goal='gain_muscle', experience_level='intermediate', equipment_available=equipment)
+    available, _ = local_planner.resolve_equipment(equipment)
+    required = {name: set(tags) for name, _, tags, _, _ in EXERCISES}
+
+    plan = local_planner.generate_workout_plan(user, 4)
+    assert len(plan['weekly_schedule']) == 7
+    exercises = [exercise['name'] for day in plan['weekly_schedule'] for exercise in day['exercises']]
+    assert exercises
+    for name in exercises:
+        if name in required:
+            assert required[name] & available, name
@@ -0,0 +1,68 @@
+from conftest import register
+from src.services import local_planner
+from src.services.meal_optimizer import CALORIE_TOLERANCE, day_totals, recipe_diet_tags
+from src.services.plan_catalog import RECIPES
+from types import SimpleNamespace
+import pytest
+
+RECIPE_TAGS = {recipe['name']: recipe_diet_tags(recipe) for recipes in RECIPES.values() for recipe in recipes}
+
+
+def nutrition_plan(restrictions='[]', goal='maintain', daily_calories=2200, weeks=1):
+    user = SimpleNamespace(goal=goal, dietary_restrictions=restrictions)
+    return local_planner.generate_nutrition_plan(user, weeks, daily_calories=daily_calories)
+
+
+def target_calories(macros):
+    return macros['protein_grams'] * 4 + macros['carbs_grams'] * 4 + macros['fat_grams'] * 9
+
+
+def days(plan):
+    return [day for week in plan['meal_plan'].values() for day in week.values()]
+
+
+@pytest.mark.parametrize('restrictions, tags', [
+    ('["vegano"]', {'vegan'}),
+    ('["sin gluten"]', {'gluten_free'}),
+    ('["vegana", "sin gluten", "sin frutos secos"]', {'vegan', 'gluten_free', 'nut_free'}),
+    ('["vegetariano", "sin lactosa"]', {'vegetarian', 'lactose_free'}),
+])
+def test_every_recipe_respects_the_restrictions(restrictions, tags):
+    plan = nutrition_plan(restrictions, weeks=2)
+    for day in days(plan):
+        for meal, options in day.items():
+            if not isinstance(options, dict):
+                continue
+            for option in options.values():
+                assert tags <= RECIPE_TAGS[option['name']], (meal, option['name'])
+
+
+@pytest.mark.parametrize('goal', ['lose_weight', 'maintain', 'gain_muscle'])
+@pytest.mark.parametrize('daily_calories', [1500, 2200, 3200])
+@pytest.mark.parametrize('restrictions', ['[]', '["vegano", "sin gluten"]'])
+def test_typical_targets_are_met_within_tolerance(goal, daily_calories, restrictions):
+    plan = nutrition_plan(restrictions, goal, daily_calories)
+    target = target_calories(plan['macros'])
+    for day in days(plan):
+        assert day.get('within_tolerance', True)
+        for totals in day_totals(day).values():
+            assert abs(totals['calories'] - target) <= target * CALORIE_TOLERANCE
+
+
+@pytest.mark.parametrize('daily_calories', [600, 8000])
+def test_unreachable_targets_are_flagged(daily_calories):
+    plan = nutrition_plan(daily_calories=daily_calories)
+    assert all(day['within_tolerance'] is False for day in days(plan))
+
+
+def test_unknown_restriction_raises():
+    with pytest.raises(local_planner.UnsupportedDiet):
+        nutrition_plan('["keto"]')
+
+
+def test_nutrition_route_rejects_unsupported_diet(client, monkeypatch):
+    monkeypatch.setenv('PLAN_GENERATOR', 'local')
+    _, headers = register(client, dietary_restrictions=['sin gluten', 'paleo'])
+    response = client.post('/api/generate-nutrition-plan', json={}, headers=headers)
+    assert response.status_code == 422
+    assert 'paleo' in response.get_json()['error']
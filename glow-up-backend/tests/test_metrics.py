@@ -0,0 +1,129 @@
+from app import create_app
+from src.models.user import db
+from src.services.metrics import Counter, Histogram, MetricsRegistry
+import logging
+import pytest
+import re
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """{(nombre, etiquetas ordenadas): valor} de un texto de exposición de Prometheus"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f'Línea no válida: {line!r}'
+        name, labels, value = match.groups()
+        samples[(name, tuple(sorted(LABEL.findall(labels or ''))))] = float(value)
+    return samples
+
+
+def value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def scrape(client, headers=None):
+    response = client.get('/api/metrics', headers=headers)
+    assert response.status_code == 200
+    assert response.content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    return parse(response.get_data(as_text=True))
+
+
+def test_metrics_token_is_required_when_configured(client, monkeypatch):
+    monkeypatch.setenv('METRICS_TOKEN', 'secreto')
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer otro'}).status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'secreto-no'}).status_code == 401
+    scrape(client, {'Authorization': 'Bearer secreto'})
+
+
+def test_every_line_is_valid_exposition_text(client):
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert text.endswith('\n')
+    for name in ('http_requests_total', 'http_request_duration_seconds', 'llm_call_duration_seconds',
+                 'plan_generation_section_seconds', 'rate_limited_total'):
+        assert f'# TYPE {name} ' in text
+    parse(text)
+
+
+def test_requests_and_sql_are_counted(client, user):
+    _, headers = user
+    labels = {'method': 'GET', 'endpoint': '/api/progress'}
+    before = scrape(client)
+    for _ in range(3):
+        assert client.get('/api/progress', headers=headers).status_code == 200
+    after = scrape(client)
+
+    def delta(name, **extra):
+        return value(after, name, **labels, **extra) - value(before, name, **labels, **extra)
+
+    assert delta('http_requests_total', status='200') == 3
+    assert delta('http_request_duration_seconds_count') == 3
+    assert delta('http_request_sql_statements_count') == 3
+    assert delta('http_request_sql_statements_sum') >= 3
+    # Buckets acumulados: +Inf los contiene a todos
+    assert delta('http_request_duration_seconds_bucket', le='+Inf') == 3
+
+
+def test_llm_calls_and_generation_sections_are_measured(client, user, fake_llm):
+    _, headers = user
+    before = scrape(client)
+    assert client.post('/api/generate-workout-plan', json={'duration_weeks': 4}, headers=headers).status_code == 201
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return value(after, name, **labels) - value(before, name, **labels)
+
+    assert delta('llm_call_duration_seconds_count', plan_type='workout', mode='complete', outcome='ok') == 1
+    assert delta('llm_call_tokens_count', plan_type='workout', kind='prompt') == 1
+    assert delta('llm_call_tokens_sum', plan_type='workout', kind='completion') > 0
+    assert delta('http_request_llm_duration_seconds_count', method='POST', endpoint='/api/generate-workout-plan') == 1
+    for section in ('feedback', 'generate', 'save'):
+        assert delta('plan_generation_section_seconds_count', plan_type='workout', section=section) == 1, section
+
+
+def test_slow_requests_are_logged(app, monkeypatch, caplog):
+    monkeypatch.setenv('SLOW_REQUEST_MS', '0')
+    slow_app = create_app()
+    with caplog.at_level(logging.WARNING):
+        slow_app.test_client().get('/api/health')
+    with slow_app.app_context():
+        db.engine.dispose()
+    assert 'Petición lenta GET /api/health' in caplog.text
+    assert '"sql_statements"' in caplog.text
+
+
+def test_counter_and_histogram_rendering():
+    registry = MetricsRegistry()
+    counter = registry.counter('pruebas_total', 'Pruebas', ('name',))
+    histogram = registry.histogram('espera_seconds', 'Espera', buckets=(0.1, 1))
+    counter.inc(name='con "comillas"\n')
+    counter.inc(2, name='con "comillas"\n')
+    for seconds in (0.05, 0.5, 5):
+        histogram.observe(seconds)
+
+    assert registry.render().splitlines() == [
+        '# HELP pruebas_total Pruebas',
+        '# TYPE pruebas_total counter',
+        'pruebas_total{name="con \\"comillas\\"\\n"} 3',
+        '# HELP espera_seconds Espera',
+        '# TYPE espera_seconds histogram',
+        'espera_seconds_bucket{le="0.1"} 1',
+        'espera_seconds_bucket{le="1"} 2',
+        'espera_seconds_bucket{le="+Inf"} 3',
+        'espera_seconds_sum 5.55',
+        'espera_seconds_count 3',
+    ]
+
+
+@pytest.mark.parametrize('metric', [Counter('a_total', 'A', ('x',)), Histogram('b_seconds', 'B', ('x',))])
+def test_missing_labels_are_an_error(metric):
+    with pytest.raises(KeyError):
+        if isinstance(metric, Counter):
+            metric.inc()
+        else:
+            metric.observe(1)
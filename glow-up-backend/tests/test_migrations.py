@@ -0,0 +1,141 @@
+from app import create_app
+from src.models.migrations import BASELINE_TABLES, USER_OWNED_TABLES, head_version, migrate
+from src.models.user import db
+from datetime import date, datetime
+import pytest
+import sqlalchemy
+
+
+def create_legacy_schema(url):
+    """Base como la dejaba db.create_all() antes de las migraciones: claves foráneas sin ON DELETE
+    CASCADE y sin índice único (user_id, date) en progress_entry"""
+    metadata = sqlalchemy.MetaData()
+    for name in BASELINE_TABLES:
+        table = db.metadata.tables[name].to_metadata(metadata)
+        for constraint in table.foreign_key_constraints:
+            constraint.ondelete = None
+        for index in table.indexes:
+            index.unique = False
+    engine = sqlalchemy.create_engine(url)
+    metadata.create_all(engine)
+    return engine, metadata
+
+
+def seed(engine, metadata):
+    """Dos usuarios con filas en todas sus tablas, fechas repetidas y feedback huérfano"""
+    tables = metadata.tables
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for user_id in (1, 2):
+            connection.execute(tables['user'].insert().values(
+                id=user_id, name=f'Usuario {user_id}', email=f'u{user_id}@example.com', password_hash='-',
+                created_at=now, updated_at=now))
+            connection.execute(tables['workout_plan'].insert().values(
+                user_id=user_id, title='Plan', duration_weeks=4, difficulty_level='beginner',
+                plan_data={'weekly_schedule': []}))
+            connection.execute(tables['nutrition_plan'].insert().values(
+                user_id=user_id, title='Plan', duration_weeks=4, daily_calories=2000,
+                macros={'protein_grams': 150}, meal_plan={}))
+            for weight in (70, 71):
+                connection.execute(tables['progress_entry'].insert().values(
+                    user_id=user_id, date=date(2024, 1, 1), weight=weight + user_id))
+            connection.execute(tables['progress_entry'].insert().values(
+                user_id=user_id, date=date(2024, 1, 2), weight=72))
+            connection.execute(tables['plan_feedback'].insert().values(
+                user_id=user_id, plan_type='workout', plan_id=1, rating=4))
+            connection.execute(tables['data_version'].insert().values(user_id=user_id, scope='plans', version=1))
+            connection.execute(tables['idempotency_record'].insert().values(
+                user_id=user_id, idempotency_key='k', endpoint='e', request_hash='h', created_at=now,
+                expires_at=now))
+        # Feedback de un usuario borrado (antes no tenía relación con User)
+        connection.execute(tables['plan_feedback'].insert().values(user_id=99, plan_type='workout', plan_id=1,
+                                                                   rating=1))
+
+
+def count(connection, table, user_id=None):
+    query = f'SELECT COUNT(*) FROM "{table}"'
+    if user_id is not None:
+        query += f' WHERE user_id = {int(user_id)}'
+    return connection.execute(sqlalchemy.text(query)).scalar()
+
+
+@pytest.fixture
+def legacy_app(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine, metadata = create_legacy_schema(url)
+    seed(engine, metadata)
+    engine.dispose()
+
+    monkeypatch.setenv('DATABASE_URL', url)
+    app = create_app()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def cascades(inspector, name):
+    foreign_key = next(fk for fk in inspector.get_foreign_keys(name) if fk['referred_table'] == 'user')
+    return (foreign_key['options'].get('ondelete') or '').upper() == 'CASCADE'
+
+
+def test_migrations_add_cascades_to_a_legacy_database(legacy_app):
+    with legacy_app.app_context():
+        inspector = sqlalchemy.inspect(db.engine)
+        assert not any(cascades(inspector, name) for name in USER_OWNED_TABLES)
+
+    assert migrate(legacy_app) == list(range(1, head_version() + 1))
+
+    with legacy_app.app_context():
+        inspector = sqlalchemy.inspect(db.engine)
+        for name in USER_OWNED_TABLES:
+            assert cascades(inspector, name), name
+        # Los índices de las tablas reconstruidas siguen ahí
+        indexes = {index['name']: index for index in inspector.get_indexes('progress_entry')}
+        assert indexes['ix_progress_entry_user_date']['unique']
+
+        connection = db.session.connection()
+        assert count(connection, 'plan_feedback', 99) == 0
+        # Una entrada por fecha: la última (id mayor)
+        rows = connection.execute(sqlalchemy.text(
+            'SELECT date, weight FROM progress_entry WHERE user_id = 1 ORDER BY date')).all()
+        assert [row.weight for row in rows] == [72, 72]
+        # Migración 4: agregados de las entradas existentes
+        assert count(connection, 'progress_rollup', 1) > 0
+
+    # Segunda pasada: nada pendiente
+    assert migrate(legacy_app) == []
+
+
+def test_deleting_a_user_removes_all_of_their_rows(legacy_app):
+    migrate(legacy_app)
+    client = legacy_app.test_client()
+
+    assert client.delete('/api/users/1').status_code == 204
+
+    with legacy_app.app_context():
+        connection = db.session.connection()
+        assert count(connection, 'user', None) == 1
+        for name in USER_OWNED_TABLES:
+            assert count(connection, name, 1) == 0, name
+            # Los datos del otro usuario no se tocan
+            assert count(connection, name, 2) > 0, name
+
+
+def test_deleting_a_user_on_a_new_database(app, client, user):
+    user_data, headers = user
+    client.post('/api/generate-workout-plan', json={}, headers=headers)
+    client.post('/api/progress', json={'date': '2024-01-01', 'weight': 70}, headers=headers)
+    client.post('/api/submit-feedback', json={'plan_type': 'workout', 'plan_id': 1, 'rating': 5}, headers=headers)
+    with app.app_context():
+        connection = db.session.connection()
+        for name in ('workout_plan', 'progress_entry', 'progress_rollup', 'plan_feedback', 'data_version'):
+            assert count(connection, name, user_data['id']) > 0, name
+        db.session.remove()
+
+    assert client.delete(f"/api/users/{user_data['id']}").status_code == 204
+
+    with app.app_context():
+        connection = db.session.connection()
+        for name in USER_OWNED_TABLES:
+            assert count(connection, name, user_data['id']) == 0, name
@@ -0,0 +1,136 @@
+from conftest import register
+from src.models.user import User, db
+from src.services import passwords
+from src.services.passwords import PasswordHasher, PasswordHashQueueFull, PasswordHashTimeout
+from werkzeug.security import generate_password_hash
+import os
+import pytest
+import signal
+import time
+
+METHOD = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture
+def pooled():
+    """Hasher con un proceso de verdad (spawn)"""
+    hasher = PasswordHasher(method=METHOD, workers=1, max_pending=1, timeout=30)
+    yield hasher
+    hasher.shutdown()
+
+
+def wait_for_free_slots(hasher, count, timeout=10):
+    deadline = time.monotonic() + timeout
+    while hasher._slots._value != count:
+        assert time.monotonic() < deadline, 'Tiempo de espera agotado'
+        time.sleep(0.01)
+
+
+def test_inline_hash_and_verify():
+    hasher = PasswordHasher(method=METHOD, workers=0)
+    pwhash = hasher.hash('secreto123')
+    assert pwhash.startswith('pbkdf2:sha256:1000$')
+    assert hasher.verify(pwhash, 'secreto123')
+    assert not hasher.verify(pwhash, 'otra')
+
+
+@pytest.mark.parametrize('method, pwhash, stale', [
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:1000$sal$hash', False),
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:600$sal$hash', True),
+    ('pbkdf2', f'pbkdf2:sha256:{passwords.DEFAULT_PBKDF2_ITERATIONS}$sal$hash', False),
+    ('scrypt', 'scrypt:32768:8:1$sal$hash', False),
+    ('scrypt', 'pbkdf2:sha256:1000$sal$hash', True),
+])
+def test_needs_rehash(method, pwhash, stale):
+    assert PasswordHasher(method=method, workers=0).needs_rehash(pwhash) is stale
+
+
+def test_process_pool_hash_and_verify(pooled):
+    pwhash = pooled.hash('secreto123')
+    assert pooled.verify(pwhash, 'secreto123')
+    assert not pooled.verify(pwhash, 'otra')
+    # Todos los huecos vuelven al terminar
+    wait_for_free_slots(pooled, 2)
+
+
+def test_full_queue_is_rejected_without_waiting(pooled):
+    for _ in range(2):
+        pooled._slots.acquire()
+    with pytest.raises(PasswordHashQueueFull):
+        pooled.hash('secreto123')
+    for _ in range(2):
+        pooled._slots.release()
+    assert pooled.verify(pooled.hash('secreto123'), 'secreto123')
+
+
+def test_timeout_keeps_the_slot_until_the_hash_finishes():
+    hasher = PasswordHasher(method=METHOD, workers=1, max_pending=0, timeout=0.001)
+    try:
+        # Arrancar el proceso ya tarda más que el plazo
+        with pytest.raises(PasswordHashTimeout):
+            hasher.hash('secreto123')
+        wait_for_free_slots(hasher, 1)
+        hasher.timeout = 30
+        assert hasher.verify(hasher.hash('secreto123'), 'secreto123')
+    finally:
+        hasher.shutdown()
+
+
+def test_broken_pool_is_replaced(pooled):
+    pwhash = pooled.hash('secreto123')
+    for process in list(pooled._executor._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+
+    assert pooled.verify(pwhash, 'secreto123')
+
+
+@pytest.fixture
+def global_hasher(monkeypatch):
+    def install(hasher):
+        monkeypatch.setattr(passwords, '_hasher', hasher)
+        return hasher
+    yield install
+    if passwords._hasher is not None:
+        passwords._hasher.shutdown(wait=False)
+
+
+def test_login_rehashes_old_hashes(app, client, global_hasher):
+    global_hasher(PasswordHasher(method=METHOD, workers=0))
+    user_data, _ = register(client)
+    with app.app_context():
+        account = db.session.get(User, user_data['id'])
+        account.password_hash = generate_password_hash('secreto123', 'pbkdf2:sha256:600')
+        db.session.commit()
+
+    response = client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secreto123'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(User, user_data['id']).password_hash.startswith('pbkdf2:sha256:1000$')
+    # El hash nuevo sigue siendo válido
+    assert client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secreto123'}).status_code == 200
+
+
+def test_busy_hasher_returns_503(client, global_hasher):
+    register(client)
+    hasher = global_hasher(PasswordHasher(method=METHOD, workers=1, max_pending=0, timeout=30))
+    hasher._slots.acquire()
+    try:
+        response = client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secreto123'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        response = client.post('/api/auth/register', json={
+            'name': 'Otro', 'email': 'otro@example.com', 'password': 'secreto123',
+            'age': 30, 'weight': 70, 'height': 170, 'goal': 'maintain'})
+        assert response.status_code == 503
+    finally:
+        hasher._slots.release()
+
+
+def test_slow_hash_returns_503(client, global_hasher):
+    register(client)
+    global_hasher(PasswordHasher(method=METHOD, workers=1, max_pending=0, timeout=0.001))
+    response = client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secreto123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert 'tarda demasiado' in response.get_json()['error']
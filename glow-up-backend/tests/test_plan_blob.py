@@ -0,0 +1,149 @@
+from sqlalchemy import LargeBinary, select, text, type_coerce
+from src.models import plan_blob
+from src.models.plan_blob import CODECS, StoredJSON, encode_value, get_codec, plan_json, plan_value, split_payload
+from src.models.user import NutritionPlan, WorkoutPlan, db
+import json
+import pytest
+
+PLAN = {
+    'weekly_schedule': [{'day': 'Miércoles', 'exercises': [{'name': 'Press banca', 'sets': 4, 'weight': 52.5}]}],
+    'notes': 'Hidratación 💧 y descanso',
+    'flags': [True, False, None],
+    'empty': {}
+}
+
+
+@pytest.mark.parametrize('name', sorted(CODECS))
+def test_codecs_round_trip(name):
+    codec = get_codec(name)
+    encoded = encode_value(PLAN, codec)
+    assert codec.version is None or encoded[0] == codec.version
+
+    read_codec, payload = split_payload(encoded)
+    assert read_codec is codec
+    stored = StoredJSON(read_codec, payload)
+    assert stored.value == PLAN
+    assert json.loads(stored.json_bytes()) == PLAN
+
+
+@pytest.mark.parametrize('source, target', [
+    (source, target) for source in sorted(CODECS) for target in sorted(CODECS)
+])
+def test_reencoding_between_codecs(source, target):
+    stored = StoredJSON(*split_payload(encode_value(PLAN, get_codec(source))))
+    encoded = encode_value(stored, get_codec(target))
+    assert StoredJSON(*split_payload(encoded)).value == PLAN
+
+
+def test_json_text_is_encoded_without_parsing():
+    text_value = json.dumps(PLAN, ensure_ascii=False)
+    encoded = encode_value(text_value, get_codec('json-zlib'))
+    assert StoredJSON(*split_payload(encoded)).value == PLAN
+
+
+@pytest.mark.parametrize('raw', [
+    json.dumps(PLAN),
+    json.dumps(PLAN, ensure_ascii=False).encode('utf-8'),
+    memoryview(json.dumps(PLAN).encode('utf-8')),
+    json.dumps([PLAN]),
+])
+def test_legacy_rows_without_version_byte(raw):
+    codec, payload = split_payload(raw)
+    assert codec is CODECS['json']
+    assert plan_value(StoredJSON(codec, payload)) in (PLAN, [PLAN])
+
+
+def test_plan_value_and_plan_json():
+    assert plan_value(None) == {}
+    assert plan_value('', default=[]) == []
+    assert plan_value(PLAN) is PLAN
+    assert plan_value(json.dumps(PLAN)) == PLAN
+
+    stored = StoredJSON(*split_payload(encode_value(PLAN, get_codec('json-zlib'))))
+    fragment = plan_json(stored)
+    assert json.loads(fragment.data) == PLAN
+    # Sin leer el valor: el JSON sale del payload
+    assert stored._value is StoredJSON._MISSING
+
+
+def test_unknown_codec_and_missing_msgpack(monkeypatch):
+    with pytest.raises(ValueError):
+        get_codec('bson')
+    monkeypatch.setattr(plan_blob, 'msgpack', None)
+    with pytest.raises(RuntimeError):
+        encode_value(PLAN, get_codec('msgpack-zlib'))
+
+
+def raw_blobs(connection):
+    table = WorkoutPlan.__table__
+    return [bytes(row[0]) for row in connection.execute(
+        select(type_coerce(table.c.plan_data, LargeBinary)).order_by(table.c.id))]
+
+
+def insert_legacy_rows(user_id):
+    """Filas como las dejaba la columna Text antigua: JSON plano sin byte de versión"""
+    for index in range(3):
+        db.session.execute(text(
+            'INSERT INTO workout_plan (user_id, title, duration_weeks, difficulty_level, plan_data, is_active) '
+            "VALUES (:user_id, :title, 4, 'beginner', :plan_data, 0)"
+        ), {'user_id': user_id, 'title': f'Antiguo {index}', 'plan_data': json.dumps(dict(PLAN, index=index))})
+        db.session.execute(text(
+            'INSERT INTO nutrition_plan (user_id, title, duration_weeks, daily_calories, macros, meal_plan, is_active) '
+            "VALUES (:user_id, 'Antiguo', 4, 2000, :macros, :meal_plan, 0)"
+        ), {'user_id': user_id, 'macros': '{"protein_grams":150}', 'meal_plan': '{"day_1":{}}'})
+    db.session.commit()
+
+
+def test_legacy_rows_are_read_through_the_column(app, user):
+    user_data, _ = user
+    with app.app_context():
+        insert_legacy_rows(user_data['id'])
+        plans = WorkoutPlan.query.order_by(WorkoutPlan.id).all()
+        assert [plan.to_dict()['plan_data']['index'] for plan in plans] == [0, 1, 2]
+        assert json.loads(plans[0].to_dict(raw_json=True)['plan_data'].data)['notes'] == PLAN['notes']
+        assert NutritionPlan.query.first().to_dict()['macros'] == {'protein_grams': 150}
+
+
+def test_new_writes_use_the_configured_codec(app, user, monkeypatch):
+    user_data, _ = user
+    monkeypatch.setenv('PLAN_BLOB_CODEC', 'msgpack-zlib')
+    with app.app_context():
+        db.session.add(WorkoutPlan(user_id=user_data['id'], title='Nuevo', duration_weeks=4,
+                                   difficulty_level='beginner', plan_data=PLAN))
+        db.session.commit()
+        assert raw_blobs(db.session.connection())[0][0] == CODECS['msgpack-zlib'].version
+        db.session.expire_all()
+        assert WorkoutPlan.query.one().to_dict()['plan_data'] == PLAN
+
+
+def test_migration_command_is_idempotent(app, user):
+    user_data, _ = user
+    with app.app_context():
+        insert_legacy_rows(user_data['id'])
+    runner = app.test_cli_runner()
+
+    # 3 planes de entrenamiento y 3 nutricionales con JSON plano
+    result = runner.invoke(args=['migrate-plan-blobs', '--codec', 'msgpack-zlib', '--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == 'Planes migrados: 6'
+    with app.app_context():
+        blobs = raw_blobs(db.session.connection())
+        assert {blob[0] for blob in blobs} == {CODECS['msgpack-zlib'].version}
+
+    # Segunda pasada: nada que cambiar y los bytes no se tocan
+    result = runner.invoke(args=['migrate-plan-blobs', '--codec', 'msgpack-zlib'])
+    assert result.output.strip() == 'Planes migrados: 0'
+    with app.app_context():
+        assert raw_blobs(db.session.connection()) == blobs
+
+    # Y de vuelta a json-zlib sin perder nada
+    assert runner.invoke(args=['migrate-plan-blobs', '--codec', 'json-zlib']).output.strip() == 'Planes migrados: 6'
+    with app.app_context():
+        plans = WorkoutPlan.query.order_by(WorkoutPlan.id).all()
+        assert [plan.to_dict()['plan_data'] for plan in plans] == [dict(PLAN, index=index) for index in range(3)]
+        assert {plan.to_dict()['macros']['protein_grams'] for plan in NutritionPlan.query.all()} == {150}
+
+
+def test_migration_command_rejects_unknown_codecs(app):
+    result = app.test_cli_runner().invoke(args=['migrate-plan-blobs', '--codec', 'bson'])
+    assert result.exit_code != 0
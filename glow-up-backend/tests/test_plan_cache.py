@@ -0,0 +1,135 @@
+from src.models.user import CachedPlan, User, db
+from src.services.plan_cache import PlanCache, fingerprint
+import logging
+import pytest
+import time
+
+PLAN = {'weekly_schedule': [{'day': 'Lunes', 'exercises': []}]}
+
+
+@pytest.fixture
+def context(app):
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+def rows():
+    return {row.cache_key: row for row in db.session.query(CachedPlan).all()}
+
+
+def test_fingerprint_depends_on_type_and_inputs():
+    inputs = {'goal': 'maintain', 'equipment': ['banco']}
+    assert fingerprint('workout', inputs) == fingerprint('workout', dict(reversed(list(inputs.items()))))
+    assert fingerprint('workout', inputs) != fingerprint('nutrition', inputs)
+    assert fingerprint('workout', inputs) != fingerprint('workout', dict(inputs, goal='lose_weight'))
+
+
+def test_memory_then_database_tier(context):
+    cache = PlanCache()
+    assert cache.get('a') is None
+    cache.set('a', 'workout', PLAN)
+    assert cache.get('a') == PLAN
+    assert cache.stats()['memory_hits'] == 1
+
+    # Otro proceso (memoria vacía) lo encuentra en la tabla y lo sube a memoria
+    other = PlanCache()
+    assert other.get('a') == PLAN
+    assert other.get('a') == PLAN
+    stats = other.stats()
+    assert (stats['db_hits'], stats['memory_hits'], stats['memory_entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 1
+
+
+def test_database_hits_are_recorded_with_the_next_write(context):
+    PlanCache().set('a', 'workout', PLAN)
+    reader = PlanCache()
+    reader.get('a')
+    # La lectura no escribe en la tabla
+    assert rows()['a'].hit_count == 0
+
+    reader.set('b', 'workout', PLAN)
+    db.session.expire_all()
+    assert rows()['a'].hit_count == 1
+
+
+def test_memory_tier_evicts_least_recently_used(context):
+    cache = PlanCache(memory_size=2)
+    cache.set('a', 'workout', PLAN)
+    cache.set('b', 'workout', PLAN)
+    cache.get('a')
+    cache.set('c', 'workout', PLAN)
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['memory_entries'] == 2
+
+    # 'b' salió de memoria pero sigue en la tabla
+    assert cache.get('b') == PLAN
+    assert cache.stats()['db_hits'] == 1
+
+
+def test_database_tier_evicts_least_recently_used_rows(context):
+    cache = PlanCache(db_max_rows=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, 'workout', PLAN)
+        time.sleep(0.01)
+    assert set(rows()) == {'b', 'c'}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_ignored_and_evicted(context):
+    cache = PlanCache(ttl_seconds=0.05)
+    cache.set('a', 'workout', PLAN)
+    time.sleep(0.1)
+    assert cache.get('a') is None
+    assert PlanCache().get('a') is None
+
+    cache.set('b', 'workout', PLAN)
+    assert set(rows()) == {'b'}
+
+
+def test_disabled_cache_stores_nothing(context):
+    cache = PlanCache(enabled=False)
+    cache.set('a', 'workout', PLAN)
+    assert cache.get('a') is None
+    assert rows() == {}
+
+
+def test_writes_do_not_touch_the_request_session(context):
+    db.session.add(User(name='Pendiente', email='pendiente@example.com', password_hash='-'))
+    PlanCache().set('a', 'workout', PLAN)
+    # La caché no confirmó el usuario pendiente de la petición
+    db.session.rollback()
+    assert User.query.filter_by(email='pendiente@example.com').first() is None
+    assert 'a' in rows()
+
+
+def test_failed_write_is_logged_and_keeps_pending_work(context, monkeypatch, caplog):
+    cache = PlanCache()
+
+    def fail(*args):
+        raise RuntimeError('disco lleno')
+    monkeypatch.setattr(cache, '_write', fail)
+
+    pending = User(name='Pendiente', email='pendiente@example.com', password_hash='-')
+    db.session.add(pending)
+    with caplog.at_level(logging.ERROR, logger='src.services.plan_cache'):
+        cache.set('a', 'workout', PLAN)
+    assert 'No se pudo guardar el plan a' in caplog.text
+
+    assert pending in db.session.new
+    db.session.commit()
+    assert User.query.filter_by(email='pendiente@example.com').first() is not None
+    # La memoria sí lo tiene
+    assert cache.get('a') == PLAN
+
+
+def test_stats_endpoint(client, monkeypatch):
+    response = client.get('/api/plan-cache/stats')
+    assert response.status_code == 200
+    assert {'memory_hits', 'db_hits', 'misses', 'stores', 'evictions', 'hit_rate'} <= set(
+        response.get_json()['cache'])
+
+    monkeypatch.setenv('METRICS_TOKEN', 'secreto')
+    assert client.get('/api/plan-cache/stats').status_code == 401
+    response = client.get('/api/plan-cache/stats', headers={'Authorization': 'Bearer secreto'})
+    assert response.status_code == 200
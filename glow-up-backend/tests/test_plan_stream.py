@@ -0,0 +1,125 @@
+from src.routes import ai_plans
+from src.services.admission import AdmissionController
+import json
+import pytest
+
+
+def parse_events(text):
+    """[(evento, datos)] de un cuerpo text/event-stream"""
+    events = []
+    for block in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def stream(client, headers, path='/api/generate-workout-plan/stream', query=''):
+    response = client.post(path + query, json={'duration_weeks': 4}, headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    # El servidor cierra la respuesta al terminar de enviarla
+    response.close()
+    return events
+
+
+def names(events):
+    return [name for name, _ in events]
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1)
+    monkeypatch.setattr(ai_plans, 'generation_admission', controller)
+    return controller
+
+
+def test_llm_stream_sends_sections_while_generating(client, user, fake_llm, admission, monkeypatch):
+    _, headers = user
+    monkeypatch.setattr(fake_llm.FakeChatCompletion, 'chunk_size', 16)
+    events = stream(client, headers, query='?tokens=1')
+
+    order = names(events)
+    assert order[0] == 'start' and order[-1] == 'plan'
+    # Las secciones llegan entre los tokens, no al final
+    assert order.index('section') < len(order) - 1 - order[::-1].index('token')
+
+    sections = [data for name, data in events if name == 'section']
+    plan = events[-1][1]
+    schedule = plan['plan']['plan_data']['weekly_schedule']
+    assert [section['path'] for section in sections[:len(schedule)]] == [
+        ['weekly_schedule', day] for day in range(len(schedule))]
+    assert [section['data'] for section in sections[:len(schedule)]] == schedule
+    assert sections[-1]['path'] == ['progression']
+
+    assert plan['generation']['source'] == 'llm'
+    assert ''.join(data['text'] for name, data in events if name == 'token').startswith('{')
+    assert admission.stats()['in_flight'] == 0
+
+
+def test_cached_plan_is_streamed_by_sections(client, user, fake_llm):
+    _, headers = user
+    stream(client, headers)
+    events = stream(client, headers, query='?tokens=1')
+    assert 'token' not in names(events)
+    assert names(events)[1] == 'section'
+    assert events[-1][1]['generation']['source'] == 'cache'
+    assert fake_llm.FakeChatCompletion.calls == 1
+
+
+def test_nutrition_stream_sections(client, user, fake_llm):
+    _, headers = user
+    events = stream(client, headers, '/api/generate-nutrition-plan/stream')
+    paths = [data['path'] for name, data in events if name == 'section']
+    assert paths[0] == ['macros']
+    assert paths[1:] and all(len(path) == 3 and path[0] == 'meal_plan' for path in paths[1:])
+    assert names(events)[-1] == 'plan'
+
+
+def test_llm_failure_streams_the_local_plan(client, user, fake_llm):
+    _, headers = user
+    fake_llm.FakeChatCompletion.failure_rate = 1.0
+    events = stream(client, headers)
+    assert names(events)[:2] == ['start', 'fallback']
+    assert events[1][1] == {'reason': 'llm_error'}
+    assert 'section' in names(events)
+    assert events[-1][0] == 'plan'
+    assert events[-1][1]['generation']['source'] == 'fallback'
+    assert events[-1][1]['plan']['ai_generated'] is False
+
+
+def test_local_stream_without_llm(client, user):
+    _, headers = user
+    events = stream(client, headers)
+    assert names(events)[0] == 'start' and names(events)[-1] == 'plan'
+    assert events[-1][1]['generation']['source'] == 'local'
+
+
+def test_failed_save_ends_with_an_error_event(client, user, admission, monkeypatch):
+    _, headers = user
+
+    def fail(*args):
+        raise RuntimeError('base de datos caída')
+    monkeypatch.setattr(ai_plans, 'save_workout_plan', fail)
+
+    events = stream(client, headers)
+    assert events[-1] == ('error', {'error': 'base de datos caída'})
+    assert 'plan' not in names(events)
+    assert admission.stats()['in_flight'] == 0
+
+
+def test_disconnected_client_releases_its_slot(client, user, fake_llm, admission, monkeypatch):
+    _, headers = user
+    fake_llm.FakeChatCompletion.latency = 2.0
+    monkeypatch.setattr(fake_llm.FakeChatCompletion, 'chunk_size', 16)
+
+    response = client.post('/api/generate-workout-plan/stream', json={'duration_weeks': 4}, headers=headers)
+    body = iter(response.response)
+    assert next(body).startswith(b'event: start')
+    assert admission.stats()['in_flight'] == 1
+
+    # El cliente se va a mitad de la generación
+    response.close()
+    assert admission.stats()['in_flight'] == 0
+    fake_llm.FakeChatCompletion.latency = 0.0
+    assert names(stream(client, headers))[-1] == 'plan'
@@ -0,0 +1,140 @@
+from conftest import register
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.models.user import NutritionPlan, WorkoutPlan, db
+from src.routes.ai_plans import InvalidCursor, decode_cursor, encode_cursor
+from types import SimpleNamespace
+import base64
+import pytest
+import string
+
+START = datetime(2024, 1, 1, 8, 0)
+
+
+def seed_plans(app, user_id, created):
+    """Un plan de cada tipo por fecha de created (se pueden repetir fechas)"""
+    with app.app_context():
+        for index, created_at in enumerate(created):
+            db.session.add(WorkoutPlan(
+                user_id=user_id, title=f'Entrenamiento {index}', duration_weeks=4, difficulty_level='beginner',
+                plan_data={'weekly_schedule': [{'day': 'Lunes', 'notes': 'x' * 1000}]}, created_at=created_at))
+            db.session.add(NutritionPlan(
+                user_id=user_id, title=f'Nutrición {index}', duration_weeks=4, daily_calories=2000,
+                macros={'protein_grams': 150}, meal_plan={'day_1': {}}, created_at=created_at))
+        db.session.commit()
+
+
+def summaries(client, headers, **params):
+    response = client.get('/api/my-plans', query_string=dict(view='summary', **params), headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def walk(client, headers, plan_type, limit):
+    """Recorre todas las páginas de un tipo y devuelve los títulos en orden"""
+    titles, cursor = [], None
+    while True:
+        params = {'type': plan_type, 'limit': limit}
+        if cursor:
+            params[f'{plan_type}_cursor'] = cursor
+        page = summaries(client, headers, **params)
+        titles.extend(plan['title'] for plan in page[f'{plan_type}_plans'])
+        cursor = page['next_cursors'][plan_type]
+        if cursor is None:
+            return titles
+
+
+def test_cursor_round_trip():
+    plan = SimpleNamespace(created_at=datetime(2024, 3, 5, 10, 30, 15, 123456), id=42)
+    cursor = encode_cursor(plan)
+    # Seguro en una query string sin escapar
+    assert set(cursor) <= set(string.ascii_letters + string.digits + '-_=')
+    assert decode_cursor(cursor) == (plan.created_at, 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    'no-es-base64!',
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b'["2024-01-01", "x"]').decode(),
+    base64.urlsafe_b64encode(b'["ayer", 1]').decode(),
+    base64.urlsafe_b64encode(b'[1, 2, 3]').decode(),
+    'ñ',
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_pages_follow_created_at_then_id(app, client, user):
+    user_data, headers = user
+    seed_plans(app, user_data['id'], [START + timedelta(days=day) for day in range(7)])
+
+    page = summaries(client, headers, limit=3)
+    assert [plan['title'] for plan in page['workout_plans']] == ['Entrenamiento 6', 'Entrenamiento 5', 'Entrenamiento 4']
+    assert [plan['title'] for plan in page['nutrition_plans']] == ['Nutrición 6', 'Nutrición 5', 'Nutrición 4']
+    assert set(page['next_cursors']) == {'workout', 'nutrition'}
+
+    assert walk(client, headers, 'workout', 3) == [f'Entrenamiento {index}' for index in range(6, -1, -1)]
+
+
+def test_equal_created_at_is_broken_by_id(app, client, user):
+    user_data, headers = user
+    # Cinco planes en el mismo instante: el cursor no puede saltarse ni repetir ninguno
+    seed_plans(app, user_data['id'], [START] * 5 + [START - timedelta(days=1)])
+
+    titles = walk(client, headers, 'nutrition', 2)
+    assert titles == [f'Nutrición {index}' for index in (4, 3, 2, 1, 0, 5)]
+
+
+def test_last_page_has_no_cursor(app, client, user):
+    user_data, headers = user
+    seed_plans(app, user_data['id'], [START, START])
+    page = summaries(client, headers, type='workout', limit=2)
+    assert len(page['workout_plans']) == 2
+    assert page['next_cursors'] == {'workout': None}
+    assert 'nutrition_plans' not in page
+
+
+def test_plans_of_other_users_are_not_listed(app, client, user):
+    user_data, headers = user
+    other, _ = register(client, email='otro@example.com')
+    seed_plans(app, other['id'], [START])
+    assert summaries(client, headers)['workout_plans'] == []
+
+
+@pytest.mark.parametrize('params', [
+    {'workout_cursor': 'no-es-base64!'},
+    {'nutrition_cursor': base64.urlsafe_b64encode(b'[]').decode()},
+    {'type': 'cardio'},
+])
+def test_bad_requests_return_400(client, user, params):
+    _, headers = user
+    response = client.get('/api/my-plans', query_string=dict(view='summary', **params), headers=headers)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_heavy_columns_are_not_loaded(app, client, user):
+    user_data, headers = user
+    seed_plans(app, user_data['id'], [START])
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        page = summaries(client, headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    plan_queries = [sql for sql in statements if 'FROM workout_plan' in sql or 'FROM nutrition_plan' in sql]
+    assert len(plan_queries) == 2
+    for sql in plan_queries:
+        for column in ('plan_data', 'macros', 'meal_plan'):
+            assert column not in sql
+    assert 'plan_data' not in page['workout_plans'][0]
+    assert 'meal_plan' not in page['nutrition_plans'][0]
+    assert page['nutrition_plans'][0]['daily_calories'] == 2000
@@ -0,0 +1,135 @@
+from conftest import register
+from src.models.user import ProgressEntry, db
+from src.models.migrations import unique_progress_entry_dates
+from src.routes import progress
+from datetime import date
+import json
+import sqlalchemy
+
+
+def ndjson(*records):
+    return '\n'.join(record if isinstance(record, str) else json.dumps(record) for record in records) + '\n'
+
+
+def bulk(client, headers, body, content_type='application/x-ndjson', **params):
+    return client.post('/api/progress/bulk', data=body, content_type=content_type, headers=headers,
+                       query_string=params)
+
+
+def entries(app, user_id):
+    with app.app_context():
+        return {
+            entry.date.isoformat(): entry
+            for entry in ProgressEntry.query.filter_by(user_id=user_id).order_by(ProgressEntry.date)
+        }
+
+
+def test_ndjson_import_reports_row_errors(app, client, user, monkeypatch):
+    user_data, headers = user
+    # Varios lotes para que cada upsert y su commit se ejerciten por separado
+    monkeypatch.setattr(progress, 'BULK_CHUNK_SIZE', 2)
+
+    body = ndjson(
+        {'date': '2024-01-01', 'weight': 80, 'body_fat_percentage': 20, 'measurements': {'waist': 90}},
+        {'date': '2024-01-02', 'weight': 79.5},
+        '{no es json',
+        '',
+        {'date': '01/03/2024', 'weight': 79},
+        {'date': '2024-01-04', 'weight': 5000},
+        {'date': '2024-01-05', 'weight': 78, 'notes': 'bien'},
+        [1, 2],
+        {'weight': 77}
+    )
+    response = bulk(client, headers, body)
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['processed'] == 8
+    assert result['imported'] == 3
+    assert result['failed'] == 5
+    assert [error['row'] for error in result['errors']] == [3, 5, 6, 8, 9]
+    assert result['errors_truncated'] is False
+
+    stored = entries(app, user_data['id'])
+    assert list(stored) == ['2024-01-01', '2024-01-02', '2024-01-05']
+    assert json.loads(stored['2024-01-01'].measurements) == {'waist': 90}
+    assert stored['2024-01-05'].notes == 'bien'
+
+
+def test_upsert_updates_existing_dates_and_keeps_missing_fields(app, client, user):
+    user_data, headers = user
+    bulk(client, headers, ndjson(
+        {'date': '2024-02-01', 'weight': 80, 'body_fat_percentage': 21},
+        {'date': '2024-02-02', 'weight': 79}
+    ))
+
+    # Solo las notas en una fecha existente; la fecha repetida en el mismo lote gana la última
+    response = bulk(client, headers, ndjson(
+        {'date': '2024-02-01', 'notes': 'revisión'},
+        {'date': '2024-02-02', 'weight': 78.5},
+        {'date': '2024-02-02', 'weight': 78}
+    ))
+    assert response.get_json()['failed'] == 0
+
+    stored = entries(app, user_data['id'])
+    assert len(stored) == 2
+    assert (stored['2024-02-01'].weight, stored['2024-02-01'].body_fat_percentage) == (80, 21)
+    assert stored['2024-02-01'].notes == 'revisión'
+    assert stored['2024-02-02'].weight == 78
+
+
+def test_csv_import_by_content_type(app, client, user):
+    user_data, headers = user
+    body = (
+        'date,weight,body_fat_percentage,measurements,notes\n'
+        '2024-03-01,81,22,"{""waist"": 91}",\n'
+        '2024-03-02,,abc,,\n'
+        '2024-03-03,80.5,,,fin\n'
+    )
+    response = bulk(client, headers, body, content_type='text/csv')
+
+    result = response.get_json()
+    assert (result['processed'], result['imported'], result['failed']) == (3, 2, 1)
+    # Fila 1 = cabecera
+    assert result['errors'] == [{'row': 3, 'error': 'body_fat_percentage debe ser numérico'}]
+    stored = entries(app, user_data['id'])
+    assert list(stored) == ['2024-03-01', '2024-03-03']
+    assert stored['2024-03-01'].notes is None
+
+
+def test_import_only_touches_own_entries(app, client, user):
+    user_data, headers = user
+    other, other_headers = register(client, email='otro@example.com')
+
+    bulk(client, other_headers, ndjson({'date': '2024-04-01', 'weight': 60}))
+    bulk(client, headers, ndjson({'date': '2024-04-01', 'weight': 90}))
+
+    assert entries(app, other['id'])['2024-04-01'].weight == 60
+    assert entries(app, user_data['id'])['2024-04-01'].weight == 90
+
+
+def test_unsupported_format(client, user):
+    _, headers = user
+    response = bulk(client, headers, 'x', format='xml')
+    assert response.status_code == 400
+
+
+def test_unique_index_migration_dedupes_existing_rows(app, client, user):
+    user_data, _ = user
+    with app.app_context():
+        connection = db.session.connection()
+        # Estado de una base anterior: índice sin UNIQUE y fechas repetidas
+        connection.execute(sqlalchemy.text('DROP INDEX ix_progress_entry_user_date'))
+        connection.execute(sqlalchemy.text('CREATE INDEX ix_progress_entry_user_date ON progress_entry (user_id, date)'))
+        for weight in (70, 71, 72):
+            connection.execute(ProgressEntry.__table__.insert().values(
+                user_id=user_data['id'], date=date(2024, 5, 1), weight=weight))
+
+        unique_progress_entry_dates(connection)
+        db.session.commit()
+
+        weights = [entry.weight for entry in ProgressEntry.query.filter_by(user_id=user_data['id'])]
+        assert weights == [72]
+        index = next(index for index in sqlalchemy.inspect(db.engine).get_indexes('progress_entry')
+                     if index['name'] == 'ix_progress_entry_user_date')
+        assert index['unique']
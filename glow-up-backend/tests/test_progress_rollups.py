@@ -0,0 +1,128 @@
+from src.models.user import ProgressEntry, ProgressRollup, db
+from src.models.migrations import backfill_progress_rollups
+from collections import defaultdict
+from datetime import date, timedelta
+import json
+import pytest
+
+
+def sample_entries(days=120):
+    """(fecha, peso, grasa) hasta hoy, con huecos y grasa corporal solo algunos días"""
+    today = date.today()
+    return [
+        (today - timedelta(days=offset), round(80 - offset * 0.05 + offset % 3 * 0.4, 1),
+         18 + offset % 4 if offset % 5 else None)
+        for offset in range(days) if offset % 7 != 3
+    ]
+
+
+def raw_aggregates(entries, period):
+    """Lo que debería devolver el gráfico por periodos, calculado directamente de las entradas"""
+    buckets = defaultdict(list)
+    for day, weight, body_fat in entries:
+        start = day - timedelta(days=day.weekday()) if period == 'week' else day.replace(day=1)
+        buckets[start].append((weight, body_fat))
+
+    def stats(values):
+        values = [value for value in values if value is not None]
+        if not values:
+            return None, None, None
+        return round(sum(values) / len(values), 2), min(values), max(values)
+
+    chart = defaultdict(list)
+    for start in sorted(buckets):
+        weights = stats(weight for weight, _ in buckets[start])
+        body_fats = stats(body_fat for _, body_fat in buckets[start])
+        chart['dates'].append(start.isoformat())
+        chart['entry_count'].append(len(buckets[start]))
+        for key, value in zip(('weight', 'weight_min', 'weight_max'), weights):
+            chart[key].append(value)
+        for key, value in zip(('body_fat', 'body_fat_min', 'body_fat_max'), body_fats):
+            chart[key].append(value)
+    return dict(chart)
+
+
+def import_entries(client, headers, entries):
+    body = '\n'.join(json.dumps({'date': day.isoformat(), 'weight': weight, 'body_fat_percentage': body_fat})
+                     for day, weight, body_fat in entries)
+    response = client.post('/api/progress/bulk', data=body, content_type='application/x-ndjson', headers=headers)
+    assert response.get_json()['imported'] == len(entries)
+
+
+def rollup_chart(client, headers, period):
+    response = client.get('/api/progress/chart', query_string={'mode': period, 'days': 365}, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['chart_data']
+
+
+def assert_matches_raw(client, headers, entries):
+    for period in ('week', 'month'):
+        chart = rollup_chart(client, headers, period)
+        expected = raw_aggregates(entries, period)
+        assert chart['dates'] == expected['dates']
+        assert chart['entry_count'] == expected['entry_count']
+        for key in ('weight', 'weight_min', 'weight_max', 'body_fat', 'body_fat_min', 'body_fat_max'):
+            assert chart[key] == pytest.approx(expected[key]), (period, key)
+
+
+def test_rollups_match_raw_aggregates_after_import(client, user):
+    _, headers = user
+    entries = sample_entries()
+    import_entries(client, headers, entries)
+
+    assert_matches_raw(client, headers, entries)
+
+
+def test_rollups_follow_single_writes_and_deletes(app, client, user):
+    user_data, headers = user
+    entries = sample_entries(60)
+    import_entries(client, headers, entries)
+
+    # Nueva entrada en un hueco, corrección de una existente y borrado de otra
+    gap = date.today() - timedelta(days=3)
+    client.post('/api/progress', json={'date': gap.isoformat(), 'weight': 75}, headers=headers)
+    corrected = entries[10][0]
+    client.post('/api/progress', json={'date': corrected.isoformat(), 'weight': 90, 'body_fat_percentage': 30},
+                headers=headers)
+    removed = entries[20][0]
+    with app.app_context():
+        entry_id = ProgressEntry.query.filter_by(user_id=user_data['id'], date=removed).one().id
+    assert client.delete(f'/api/progress/{entry_id}', headers=headers).status_code == 200
+
+    expected = [
+        (day, 90, 30) if day == corrected else (day, weight, body_fat)
+        for day, weight, body_fat in entries if day != removed
+    ] + [(gap, 75, None)]
+    assert_matches_raw(client, headers, expected)
+
+
+def test_backfill_migration_aggregates_every_existing_entry(app, client, user):
+    user_data, headers = user
+    entries = sample_entries(90)
+    with app.app_context():
+        # Entradas cargadas sin pasar por refresh_rollups (bases anteriores a los agregados)
+        db.session.execute(db.insert(ProgressEntry), [
+            {'user_id': user_data['id'], 'date': day, 'weight': weight, 'body_fat_percentage': body_fat}
+            for day, weight, body_fat in entries
+        ])
+        db.session.commit()
+        assert ProgressRollup.query.count() == 0
+
+        backfill_progress_rollups(db.session.connection())
+        db.session.commit()
+
+    assert_matches_raw(client, headers, entries)
+
+
+def test_downsampled_chart_keeps_endpoints(client, user):
+    _, headers = user
+    entries = sample_entries(365)
+    import_entries(client, headers, entries)
+
+    response = client.get('/api/progress/chart', query_string={'days': 400, 'points': 50}, headers=headers)
+    chart = response.get_json()['chart_data']
+    # Unión de los puntos elegidos para peso y grasa: como mucho points
+    assert 25 <= len(chart['dates']) <= 50
+    dates = sorted(day.isoformat() for day, _, _ in entries)
+    assert (chart['dates'][0], chart['dates'][-1]) == (dates[0], dates[-1])
+    assert chart['dates'] == sorted(chart['dates'])
@@ -0,0 +1,120 @@
+from src.services import prompt_builder
+from src.services.prompt_builder import MAX_ITEM_CHARS, MAX_LIST_ITEMS, count_tokens
+from types import SimpleNamespace
+import pytest
+
+INPUTS = {
+    'duration_weeks': 4,
+    'age': 30,
+    'weight': 70,
+    'height': 170,
+    'goal': 'gain_muscle',
+    'experience_level': 'intermediate',
+    'activity_level': 'moderate',
+    'equipment_available': ['mancuernas', 'banco'],
+    'feedback': {'count': 3, 'rating': 4.3, 'difficulty': 4, 'difficulty_drift': 1, 'wants_variety': 2}
+}
+
+
+@pytest.fixture
+def estimated(monkeypatch):
+    """Sin tiktoken: estimación por palabras y signos"""
+    monkeypatch.setattr(prompt_builder, 'tiktoken', None)
+
+
+@pytest.mark.parametrize('text, tokens', [
+    ('', 0),
+    # Palabras en trozos de ~4 caracteres
+    ('hola mundo', 3),
+    ('entrenamiento', 4),
+    ('70 kg, 170 cm.', 6),
+    ('{"a": [1]}', 6),
+    ('...', 2),
+])
+def test_estimated_token_count(estimated, text, tokens):
+    assert count_tokens(text) == tokens
+
+
+def test_tiktoken_count_when_available():
+    tiktoken = pytest.importorskip('tiktoken')
+    text = prompt_builder.workout_prompt(INPUTS)[0]
+    assert count_tokens(text) == len(tiktoken.get_encoding('cl100k_base').encode(text))
+
+
+def test_prompt_reports_its_own_token_count(estimated):
+    for build in (prompt_builder.workout_prompt, prompt_builder.nutrition_prompt):
+        prompt, tokens = build(dict(INPUTS, daily_calories=2500, dietary_restrictions=['vegano']))
+        assert tokens == count_tokens(prompt)
+        assert tokens <= prompt_builder.PROMPT_TOKEN_BUDGET
+
+
+def test_optional_lines_are_dropped_to_fit_the_budget(estimated):
+    full, full_tokens = prompt_builder.workout_prompt(INPUTS, budget=1000)
+    assert 'Feedback reciente' in full and 'Claves:' in full
+
+    # Primero se descarta el feedback y después el esquema; las obligatorias siempre quedan
+    without_feedback = count_tokens('\n'.join(line for line in full.split('\n') if 'Feedback' not in line))
+    prompt, tokens = prompt_builder.workout_prompt(INPUTS, budget=without_feedback)
+    assert 'Feedback reciente' not in prompt and 'Claves:' in prompt
+    assert tokens <= without_feedback < full_tokens
+
+    prompt, tokens = prompt_builder.workout_prompt(INPUTS, budget=1)
+    assert 'Claves:' not in prompt
+    assert prompt.startswith('Plan de entrenamiento de 4 semanas')
+    assert 'mancuernas, banco' in prompt
+    assert tokens > 1
+
+
+def test_free_text_lists_are_capped(estimated):
+    equipment = [f'equipo {index} ' + 'x' * 100 for index in range(50)]
+    prompt, _ = prompt_builder.workout_prompt(dict(INPUTS, equipment_available=equipment))
+    line = next(line for line in prompt.split('\n') if line.startswith('Equipo: '))
+    items = line[len('Equipo: '):-1].split(', ')
+    assert len(items) == MAX_LIST_ITEMS
+    assert all(len(item) <= MAX_ITEM_CHARS for item in items)
+
+
+def test_feedback_is_summarized(estimated):
+    summary = prompt_builder.summarize_feedback([
+        SimpleNamespace(rating=5, difficulty_rating=4, feedback_text='Muy aburrido, siempre lo mismo'),
+        SimpleNamespace(rating=3, difficulty_rating=2, feedback_text='Bien')
+    ])
+    assert summary == {'count': 2, 'rating': 4, 'wants_variety': 1, 'difficulty': 3, 'difficulty_drift': 2}
+    assert 'aburrido' not in prompt_builder.workout_prompt(dict(INPUTS, feedback=summary))[0]
+
+
+def test_prompts_are_smaller_than_the_legacy_ones(app, seeded_users, estimated, record_property):
+    from benchmarks.bench_prompt_tokens import legacy_nutrition_prompt, legacy_workout_prompt
+    from src.models.user import User, db
+    from src.routes.ai_plans import (
+        calculate_daily_calories, get_previous_feedback, nutrition_prompt_inputs, workout_prompt_inputs
+    )
+
+    report = []
+    with app.app_context():
+        for user_data, _ in seeded_users:
+            user = db.session.get(User, user_data['id'])
+            workout_feedback = get_previous_feedback(user, 'workout')
+            nutrition_feedback = get_previous_feedback(user, 'nutrition')
+            report.append({
+                'workout': (
+                    count_tokens(legacy_workout_prompt(user, 4, workout_feedback)),
+                    prompt_builder.workout_prompt(workout_prompt_inputs(user, 4, workout_feedback))[1]
+                ),
+                'nutrition': (
+                    count_tokens(legacy_nutrition_prompt(
+                        user, 4, nutrition_feedback, calculate_daily_calories(user))),
+                    prompt_builder.nutrition_prompt(nutrition_prompt_inputs(user, 4, nutrition_feedback))[1]
+                )
+            })
+    # Tokens (antes, después) por usuario en el informe de la prueba (--junitxml)
+    record_property('prompt_tokens', report)
+
+    for counts in report:
+        for plan_type, (before, after) in counts.items():
+            assert after < before, (plan_type, counts)
+            assert after <= prompt_builder.PROMPT_TOKEN_BUDGET
+    # En conjunto, los prompts de entrenamiento bajan más de un 30 %
+    workout_before = [counts['workout'][0] for counts in report]
+    workout_after = [counts['workout'][1] for counts in report]
+    assert sum(workout_after) < 0.7 * sum(workout_before)
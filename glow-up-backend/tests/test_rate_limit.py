@@ -0,0 +1,121 @@
+from conftest import register
+from src.services import rate_limit
+from src.services.rate_limit import Limit, MemoryBucketStore, SQLiteBucketStore
+import pytest
+import time
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Activa el límite y permite cambiar la capacidad de cada bucket en la prueba"""
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_ENABLED', True)
+
+    def set_limit(scope, dimension, value):
+        monkeypatch.setitem(rate_limit.RATE_LIMITS[scope], dimension, rate_limit.parse_limit(value))
+    return set_limit
+
+
+def generate(client, headers, path='/api/generate-workout-plan'):
+    return client.post(path, json={'duration_weeks': 4}, headers=headers)
+
+
+def test_generation_beyond_the_user_bucket_gets_429(client, user, limits):
+    limits('generate', 'user', '2/600')
+    _, headers = user
+    assert [generate(client, headers).status_code for _ in range(2)] == [201, 201]
+
+    response = generate(client, headers)
+    assert response.status_code == 429
+    # Un token cada 300 s
+    assert response.headers['Retry-After'] == '300'
+    assert 'error' in response.get_json()
+
+    # El stream comparte el bucket
+    assert generate(client, headers, '/api/generate-workout-plan/stream').status_code == 429
+
+    # Otro usuario tiene su propio bucket
+    _, other_headers = register(client, email='otro@example.com')
+    assert generate(client, other_headers).status_code == 201
+
+
+def test_ip_bucket_is_shared_by_users(client, limits, monkeypatch):
+    limits('generate', 'ip', '1/60')
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_TRUST_FORWARDED', False)
+    _, headers = register(client)
+    _, other_headers = register(client, email='otro@example.com')
+
+    assert generate(client, headers).status_code == 201
+    response = generate(client, other_headers)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '60'
+
+    # X-Forwarded-For solo cuenta detrás de un proxy de confianza
+    forwarded = dict(other_headers, **{'X-Forwarded-For': '203.0.113.7, 10.0.0.1'})
+    assert generate(client, forwarded).status_code == 429
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_TRUST_FORWARDED', True)
+    assert generate(client, forwarded).status_code == 201
+
+
+def test_login_is_limited_per_email(client, limits):
+    limits('login', 'email', '2/60')
+    register(client)
+
+    def login(email, password='incorrecta'):
+        return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+    assert [login('ana@example.com').status_code for _ in range(2)] == [401, 401]
+    response = login(' ANA@example.com ')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    # Ni siquiera con la contraseña buena mientras el bucket esté vacío
+    assert login('ana@example.com', 'secreto123').status_code == 429
+    assert login('otro@example.com').status_code == 401
+
+
+def test_disabled_rate_limit_never_rejects(client, user, limits, monkeypatch):
+    limits('generate', 'user', '1/600')
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_ENABLED', False)
+    _, headers = user
+    assert [generate(client, headers).status_code for _ in range(3)] == [201, 201, 201]
+
+
+def test_tokens_are_taken_from_every_bucket_or_none():
+    store = MemoryBucketStore()
+    user_bucket = ('user:1', 'user', Limit(1, 60))
+    ip_bucket = ('ip:x', 'ip', Limit(3, 60))
+
+    assert store.take([user_bucket, ip_bucket]) is None
+    dimension, retry_after = store.take([user_bucket, ip_bucket])
+    assert dimension == 'user'
+    assert 59 < retry_after <= 60
+    # El rechazo no gastó el token de la IP
+    assert store.take([ip_bucket]) is None
+    assert store.take([ip_bucket]) is None
+    assert store.take([ip_bucket])[0] == 'ip'
+
+
+def test_buckets_refill_over_time():
+    store = MemoryBucketStore()
+    bucket = ('user:1', 'user', Limit(2, 0.2))
+    assert store.take([bucket]) is None
+    assert store.take([bucket]) is None
+    assert store.take([bucket]) is not None
+    time.sleep(0.12)
+    assert store.take([bucket]) is None
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'buckets.db')
+    bucket = ('user:1', 'user', Limit(2, 600))
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+
+    assert first.take([bucket]) is None
+    assert second.take([bucket]) is None
+    assert first.take([bucket])[0] == 'user'
+    second.clear()
+    assert first.take([bucket]) is None
+
+
+def test_parse_limit():
+    assert rate_limit.parse_limit('10/600') == Limit(10, 600.0)
+    assert rate_limit.parse_limit('5') == Limit(5, 1.0)
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.models.user import WorkoutPlan
+from src.services.single_flight import COALESCED, AsyncSingleFlight, SingleFlight, plan_flights
+import asyncio
+import pytest
+import threading
+import time
+
+
+def coalesced(scope):
+    """Valor actual de single_flight_coalesced_total para el ámbito"""
+    for line in COALESCED.render():
+        if f'scope="{scope}"' in line:
+            return int(float(line.rsplit(' ', 1)[1]))
+    return 0
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Tiempo de espera agotado'
+        time.sleep(0.005)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight('test-shared')
+    release = threading.Event()
+    executions = []
+
+    def work():
+        executions.append(1)
+        release.wait(5)
+        return {'plan': 42}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        leader = pool.submit(flight.do, 'clave', work)
+        wait_until(lambda: flight.in_flight() == 1)
+        followers = [pool.submit(flight.do, 'clave', work) for _ in range(4)]
+        wait_until(lambda: coalesced('test-shared') == 4)
+        release.set()
+
+        assert leader.result() == ({'plan': 42}, False)
+        assert [future.result() for future in followers] == [({'plan': 42}, True)] * 4
+
+    assert len(executions) == 1
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight('test-errors')
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError('fallo')
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, 'clave', fail)
+        wait_until(lambda: flight.in_flight() == 1)
+        follower = pool.submit(flight.do, 'clave', fail)
+        wait_until(lambda: coalesced('test-errors') == 1)
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    # Terminada la llamada, la misma clave vuelve a ejecutarse
+    assert flight.do('clave', lambda: 'nuevo') == ('nuevo', False)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight('test-keys')
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert coalesced('test-keys') == 0
+
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight('test-async')
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return 'plan'
+
+    async def main():
+        return await asyncio.gather(*(flight.do('clave', work) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert sorted(results, key=lambda result: result[1]) == [('plan', False), ('plan', True), ('plan', True)]
+    assert len(executions) == 1
+
+
+def test_simultaneous_generations_of_a_user_are_coalesced(app, user, fake_llm):
+    user_data, headers = user
+    # El LLM tarda lo suficiente para que la segunda petición llegue con la primera en curso
+    fake_llm.FakeChatCompletion.latency = 0.5
+
+    def post():
+        return app.test_client().post('/api/generate-workout-plan', json={'duration_weeks': 4}, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(post)
+        wait_until(lambda: plan_flights.in_flight() == 1)
+        second = pool.submit(post)
+        responses = [first.result(), second.result()]
+
+    assert [response.status_code for response in responses] == [201, 201]
+    assert [response.headers.get('X-Coalesced') for response in responses] == [None, 'true']
+    assert responses[0].get_json()['plan']['id'] == responses[1].get_json()['plan']['id']
+    assert fake_llm.FakeChatCompletion.calls == 1
+    with app.app_context():
+        assert WorkoutPlan.query.filter_by(user_id=user_data['id']).count() == 1
@@ -0,0 +1,115 @@
+from src.models.user import User, db
+from src.services import user_cache
+from src.services.user_cache import cache_user, get_authenticated_user, get_cached_user, invalidation_mark
+
+
+def verify(client, headers, etag=None):
+    if etag:
+        headers = dict(headers, **{'If-None-Match': etag})
+    return client.get('/api/auth/verify-token', headers=headers)
+
+
+def test_authenticated_user_is_cached(app, client, user):
+    user_data, headers = user
+    assert get_cached_user(user_data['id']) is None
+    assert verify(client, headers).status_code == 200
+
+    snapshot = get_cached_user(user_data['id'])
+    assert snapshot.email == 'ana@example.com'
+    with app.app_context():
+        # Se adjunta a la sesión sin consultar la base de datos
+        assert get_authenticated_user(user_data['id']).name == 'Ana'
+
+
+def test_verify_token_revalidates_with_etag(client, user):
+    _, headers = user
+    response = verify(client, headers)
+    etag = response.headers['ETag']
+    assert response.get_json()['user']['email'] == 'ana@example.com'
+
+    cached = verify(client, headers, etag)
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert cached.get_data() == b''
+
+
+def test_profile_update_evicts_the_user_after_commit(app, client, user):
+    user_data, headers = user
+    etag = verify(client, headers).headers['ETag']
+
+    with app.app_context():
+        account = db.session.get(User, user_data['id'])
+        account.email = 'ana.nueva@example.com'
+        account.weight = 68
+        db.session.commit()
+    assert get_cached_user(user_data['id']) is None
+
+    response = verify(client, headers, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['user']['email'] == 'ana.nueva@example.com'
+
+
+def test_password_change_evicts_only_on_commit(app, client, user):
+    user_data, headers = user
+    verify(client, headers)
+
+    with app.app_context():
+        account = db.session.get(User, user_data['id'])
+        account.password_hash = 'pbkdf2:sha256:1000$nueva'
+        db.session.flush()
+        # Antes del commit otra petición aún ve la fila antigua: la caché se mantiene
+        assert get_cached_user(user_data['id']) is not None
+        db.session.commit()
+        assert get_cached_user(user_data['id']) is None
+
+    verify(client, headers)
+    assert get_cached_user(user_data['id']).password_hash == 'pbkdf2:sha256:1000$nueva'
+
+
+def test_rolled_back_change_does_not_evict(app, client, user):
+    user_data, headers = user
+    verify(client, headers)
+    snapshot = get_cached_user(user_data['id'])
+
+    with app.app_context():
+        account = db.session.get(User, user_data['id'])
+        account.password_hash = 'descartado'
+        db.session.flush()
+        db.session.rollback()
+        # Una transacción posterior sin cambios en User no arrastra el cambio deshecho
+        db.session.commit()
+
+    assert get_cached_user(user_data['id']) is snapshot
+    assert verify(client, headers).status_code == 200
+
+
+def test_bulk_update_clears_the_cache(app, client, user):
+    user_data, headers = user
+    verify(client, headers)
+
+    with app.app_context():
+        User.query.filter_by(id=user_data['id']).update({'name': 'Ana María'})
+        assert get_cached_user(user_data['id']) is not None
+        db.session.commit()
+
+    assert get_cached_user(user_data['id']) is None
+    assert verify(client, headers).get_json()['user']['name'] == 'Ana María'
+
+
+def test_read_that_races_a_commit_is_not_cached(app, user):
+    user_data, _ = user
+    with app.app_context():
+        mark = invalidation_mark()
+        account = db.session.get(User, user_data['id'])
+        user_cache.invalidate_user(user_data['id'])
+        cache_user(account, mark)
+    assert get_cached_user(user_data['id']) is None
+
+
+def test_deleted_user_is_evicted(client, user):
+    user_data, headers = user
+    verify(client, headers)
+    assert client.delete(f"/api/users/{user_data['id']}").status_code == 204
+    assert get_cached_user(user_data['id']) is None
+    assert verify(client, headers).status_code == 404